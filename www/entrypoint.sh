@@ -1,13 +1,25 @@
 #!/bin/sh
 
-# Make migrations
-python manage.py makemigrations
+if [ "$BOOT_MODE" = "none" ]; then
+    # Worker containers: the web container prepares the database
+    :
+elif [ "$BOOT_MODE" = "fast" ]; then
+    # Check/apply migrations, create partitions and collect static files
+    # (only when missing) in a single process; no makemigrations at runtime
+    python manage.py boot
+else
+    # Make migrations
+    python manage.py makemigrations
 
-# Apply database migrations
-python manage.py migrate
+    # Apply database migrations
+    python manage.py migrate
 
-# Collect static files
-python manage.py collectstatic --noinput
+    # Create upcoming reservation / invitation partitions
+    python manage.py manage_partitions
+
+    # Collect static files
+    python manage.py collectstatic --noinput
+fi
 
 # Start server
 exec "$@"
@@ -0,0 +1,9 @@
+"""
+gunicorn 設定
+
+preload_app 讓 master 先載入 project.wsgi（含 WARMUP_ON_BOOT 的暖機），
+worker fork 後直接共用已解析的 URL、編譯好的模板，第一個請求不用再付這些成本。
+"""
+import os
+
+preload_app = bool(int(os.environ.get('GUNICORN_PRELOAD', 1)))
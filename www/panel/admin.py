@@ -1,11 +1,248 @@
+from django.conf import settings
 from django.contrib import admin
-from .models import Therapist, Specialization, Store, MassagePlan, ServiceSurvey, Reservation, MassageInvitation
-
-# Register your models here.
-admin.site.register(Therapist)
-admin.site.register(Specialization)
-admin.site.register(Store)
-admin.site.register(MassagePlan)
-admin.site.register(ServiceSurvey)
-admin.site.register(Reservation)
-admin.site.register(MassageInvitation)
\ No newline at end of file
+from django.core.paginator import Paginator
+from django.db import connection, transaction, OperationalError
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import (Therapist, Specialization, Store, MassagePlan, ServiceSurvey, Reservation, MassageInvitation,
+                     TherapistShift, TherapistScheduleException, StoreBusinessHours, Task, Customer,
+                     RevenueDaily, DataMigrationCheckpoint)
+from .customers import normalize_phone
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    大資料表的分頁計數
+
+    沒有篩選條件時直接讀 PostgreSQL 統計資訊（pg_class.reltuples，分割表加總各分割）；
+    有篩選條件時照常 COUNT，但超過 ADMIN_COUNT_TIMEOUT_MS 就放棄，
+    改為最多數到 ADMIN_FILTERED_COUNT_CAP 筆，後台列表不會因為 COUNT(*) 逾時。
+    """
+
+    def _estimated_count(self):
+        # 分割表本身沒有資料，reltuples 為 0（PostgreSQL 14 起為 -1），要加總各分割
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                WITH RECURSIVE tree AS (
+                    SELECT oid, relkind, reltuples FROM pg_class WHERE oid = to_regclass(%s)
+                    UNION ALL
+                    SELECT c.oid, c.relkind, c.reltuples
+                    FROM pg_inherits i
+                    JOIN tree ON i.inhparent = tree.oid
+                    JOIN pg_class c ON c.oid = i.inhrelid
+                )
+                SELECT SUM(GREATEST(reltuples, 0)) FROM tree WHERE relkind <> 'p'
+                """,
+                [self.object_list.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        # 尚未 ANALYZE 的資料表 reltuples 為 0 或 -1
+        return int(row[0]) if row and row[0] else None
+
+    def _count_with_timeout(self, object_list):
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SET LOCAL statement_timeout = %s",
+                    [settings.ADMIN_COUNT_TIMEOUT_MS]
+                )
+            return object_list.count()
+
+    @cached_property
+    def count(self):
+        if connection.vendor != 'postgresql':
+            return super().count
+
+        filtered = bool(self.object_list.query.where)
+        if not filtered:
+            estimate = self._estimated_count()
+            if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+
+        try:
+            return self._count_with_timeout(self.object_list)
+        except OperationalError:
+            pass
+
+        if not filtered:
+            estimate = self._estimated_count()
+            if estimate:
+                return estimate
+        # 全表估計值不適用於篩選後的結果：最多數到上限，仍逾時就當作至少有上限筆數
+        cap = settings.ADMIN_FILTERED_COUNT_CAP
+        try:
+            return self._count_with_timeout(self.object_list.order_by()[:cap])
+        except OperationalError:
+            return cap
+
+
+class IncludeDeletedTherapistsMixin:
+    """後台表單的師傅欄位也可選已軟刪除的師傅，既有資料才能照常儲存"""
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.related_model is Therapist:
+            kwargs.setdefault('queryset', Therapist.all_objects.all())
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+class LargeTableAdmin(IncludeDeletedTherapistsMixin, admin.ModelAdmin):
+    """資料量大的 model 共用設定：不算全表筆數、使用估計分頁"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+@admin.register(Specialization)
+class SpecializationAdmin(admin.ModelAdmin):
+    search_fields = ('name',)
+
+
+@admin.register(Store)
+class StoreAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'phone', 'time_zone', 'slot_minutes', 'created_at')
+    list_select_related = ('user',)
+    search_fields = ('name', 'phone', 'user__username', 'user__email')
+    raw_id_fields = ('user',)
+
+
+@admin.register(StoreBusinessHours)
+class StoreBusinessHoursAdmin(admin.ModelAdmin):
+    list_display = ('store', 'weekday', 'open_time', 'close_time')
+    list_select_related = ('store',)
+    list_filter = ('weekday',)
+    autocomplete_fields = ('store',)
+
+
+@admin.register(Therapist)
+class TherapistAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'nick_name', 'phone', 'store', 'enabled', 'is_deleted', 'created_at')
+    list_select_related = ('store',)
+    list_filter = ('enabled', 'is_deleted')
+    search_fields = ('name', 'nick_name', 'phone')
+    autocomplete_fields = ('store',)
+
+    def get_queryset(self, request):
+        # 後台要能看到並還原已軟刪除的師傅
+        return Therapist.all_objects.select_related('store')
+
+
+@admin.register(MassagePlan)
+class MassagePlanAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'store', 'price', 'duration', 'created_at')
+    list_select_related = ('store',)
+    search_fields = ('name',)
+    autocomplete_fields = ('store',)
+
+    def get_queryset(self, request):
+        # __str__ 會用到店家名稱，自動完成的結果也需要一起查
+        return super().get_queryset(request).select_related('store')
+
+
+@admin.register(TherapistShift)
+class TherapistShiftAdmin(IncludeDeletedTherapistsMixin, admin.ModelAdmin):
+    list_display = ('therapist', 'weekday', 'start_time', 'end_time')
+    list_select_related = ('therapist',)
+    list_filter = ('weekday',)
+    autocomplete_fields = ('therapist',)
+
+
+@admin.register(TherapistScheduleException)
+class TherapistScheduleExceptionAdmin(LargeTableAdmin):
+    list_display = ('therapist', 'date', 'is_day_off', 'start_time', 'end_time')
+    list_select_related = ('therapist',)
+    list_filter = ('is_day_off',)
+    date_hierarchy = 'date'
+    autocomplete_fields = ('therapist',)
+
+
+@admin.register(ServiceSurvey)
+class ServiceSurveyAdmin(LargeTableAdmin):
+    list_display = ('id', 'therapist', 'store', 'rating', 'created_at')
+    list_select_related = ('therapist', 'store')
+    list_filter = ('rating',)
+    date_hierarchy = 'created_at'
+    raw_id_fields = ('therapist',)
+
+
+@admin.register(Customer)
+class CustomerAdmin(LargeTableAdmin):
+    list_display = ('id', 'name', 'phone', 'store', 'visit_count', 'last_visit_at', 'lifetime_spend')
+    list_select_related = ('store',)
+    search_fields = ('=phone',)
+    readonly_fields = ('visit_count', 'last_visit_at', 'lifetime_spend', 'next_visit_at')
+    autocomplete_fields = ('store',)
+
+    def get_search_results(self, request, queryset, search_term):
+        """電話可輸入任意格式，正規化後完全比對"""
+        if not search_term:
+            return queryset, False
+        return queryset.filter(phone=normalize_phone(search_term)), False
+
+
+@admin.register(Reservation)
+class ReservationAdmin(LargeTableAdmin):
+    list_display = ('id', 'customer_name', 'customer_phone', 'appointment_time',
+                    'store', 'massage_plan', 'therapist', 'price_charged', 'created_at')
+    # MassagePlan.__str__ 會用到店家名稱
+    list_select_related = ('store', 'massage_plan__store', 'therapist')
+    date_hierarchy = 'appointment_time'
+    search_fields = ('=customer__phone',)
+    autocomplete_fields = ('store', 'massage_plan')
+    raw_id_fields = ('therapist', 'customer')
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        以正規化後的電話找到客戶，再走預約的 (customer, appointment_time) 索引；
+        customer_phone 沒有索引，不直接比對（電話無法辨識、沒有關聯客戶的預約搜尋不到）
+        """
+        if not search_term:
+            return queryset, False
+        customers = Customer.objects.filter(phone=normalize_phone(search_term))
+        return queryset.filter(customer__in=customers), False
+
+
+@admin.register(RevenueDaily)
+class RevenueDailyAdmin(LargeTableAdmin):
+    list_display = ('date', 'store', 'therapist', 'massage_plan', 'reservation_count', 'revenue', 'list_revenue')
+    list_select_related = ('store', 'therapist', 'massage_plan__store')
+    date_hierarchy = 'date'
+    # 彙總由預約維護，不在後台修改
+    readonly_fields = ('store', 'date', 'therapist', 'massage_plan', 'reservation_count', 'revenue', 'list_revenue')
+
+
+@admin.register(MassageInvitation)
+class MassageInvitationAdmin(LargeTableAdmin):
+    list_display = ('id', 'massage_plan', 'therapist', 'available_start', 'available_end',
+                    'status', 'discount_price', 'click_count', 'created_at')
+    list_select_related = ('massage_plan__store', 'therapist')
+    list_filter = ('status',)
+    date_hierarchy = 'created_at'
+    search_fields = ('=slug',)
+    readonly_fields = ('slug', 'click_count', 'status')
+    autocomplete_fields = ('massage_plan',)
+    raw_id_fields = ('therapist',)
+
+
+@admin.register(Task)
+class TaskAdmin(LargeTableAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'run_at', 'duration_ms', 'finished_at', 'locked_by')
+    list_filter = ('status', 'name')
+    readonly_fields = ('attempts', 'locked_at', 'locked_by', 'duration_ms', 'last_error',
+                       'created_at', 'finished_at')
+    actions = ('requeue',)
+
+    @admin.action(description="重新排入佇列")
+    def requeue(self, request, queryset):
+        count = queryset.exclude(status=Task.RUNNING).update(
+            status=Task.PENDING, attempts=0, run_at=timezone.now(), finished_at=None
+        )
+        self.message_user(request, f"已重新排入 {count} 筆工作")
+
+
+@admin.register(DataMigrationCheckpoint)
+class DataMigrationCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('name', 'last_id', 'processed', 'changed', 'started_at', 'updated_at', 'finished_at')
+    # 進度由 run_data_migration 寫入；刪除一筆等於下次從頭開始
+    readonly_fields = ('name', 'last_id', 'processed', 'changed', 'started_at', 'updated_at', 'finished_at')
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import pre_migrate, post_migrate
 
 
 class PanelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'panel'
+
+    def ready(self):
+        # 註冊 signal handlers
+        from . import signals  # noqa: F401
+        from .partitioning import drop_history_views, refresh_history_views
+
+        # 封存資料的 view 會擋住修改欄位的 migration
+        pre_migrate.connect(drop_history_views, sender=self)
+        post_migrate.connect(refresh_history_views, sender=self)
@@ -0,0 +1,244 @@
+"""
+即時事件的 ASGI 端點（Server-Sent Events）：店家事件與公開邀請頁的預約事件
+
+Django 3.2 的 StreamingHttpResponse 不支援 async iterator，
+長連線若交給 Django view 會佔住一個 thread，所以這裡直接用 ASGI 實作，
+每條連線只是一個 asyncio.Queue。由 project/asgi.py 依路徑分派。
+"""
+import asyncio
+import json
+import re
+from http.cookies import SimpleCookie
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .events import get_broker, invitation_channel
+
+STORE_EVENTS_PATH = '/api/store-events/'
+INVITATION_EVENTS_PATH = re.compile(r'^/api/public-invitations/(?P<slug>[^/]+)/events/$')
+
+# _next_message 在客戶端斷線時的回傳值
+DISCONNECTED = object()
+
+
+class _SessionRequest:
+    """只帶 session 的最小 request，給 django.contrib.auth.get_user 使用"""
+
+    def __init__(self, session):
+        self.session = session
+
+
+@sync_to_async
+def _get_store_id(scope):
+    from django.contrib.auth import get_user
+    from django.db import close_old_connections
+
+    from .models import Store
+
+    close_old_connections()
+    try:
+        cookie = SimpleCookie()
+        for name, value in scope.get('headers', []):
+            if name == b'cookie':
+                cookie.load(value.decode('latin-1'))
+        morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+        if morsel is None:
+            return None
+
+        engine = import_module(settings.SESSION_ENGINE)
+        user = get_user(_SessionRequest(engine.SessionStore(morsel.value)))
+        if not user.is_authenticated:
+            return None
+        return Store.objects.filter(user=user).values_list('id', flat=True).first()
+    finally:
+        close_old_connections()
+
+
+@sync_to_async
+def _get_invitation_snapshot(slug):
+    """邀請狀態的快照（走 cache），找不到邀請時回傳 None"""
+    from django.db import close_old_connections
+
+    from .invitation_cache import slug_may_exist
+    from .invitation_status import get_status_snapshot
+
+    close_old_connections()
+    try:
+        if not slug_may_exist(slug):
+            return None
+        return get_status_snapshot(slug)
+    finally:
+        close_old_connections()
+
+
+async def _send_plain(send, status, body):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+    })
+    await send({'type': 'http.response.body', 'body': body.encode('utf-8')})
+
+
+async def _send_body(send, body):
+    await send({
+        'type': 'http.response.body',
+        'body': body.encode('utf-8'),
+        'more_body': True,
+    })
+
+
+async def _start_stream(send):
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    await _send_body(send, 'retry: 3000\n\n')
+
+
+def _event(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+async def _next_message(queue, disconnect, timeout):
+    """等待下一個事件；逾時回傳 None，客戶端斷線時回傳 DISCONNECTED"""
+    next_message = asyncio.ensure_future(queue.get())
+    done, _ = await asyncio.wait(
+        {next_message, disconnect},
+        timeout=timeout,
+        return_when=asyncio.FIRST_COMPLETED,
+    )
+    if next_message in done:
+        return next_message.result()
+    next_message.cancel()
+    return DISCONNECTED if disconnect in done else None
+
+
+async def store_events(scope, receive, send):
+    """推送目前登入店家的事件，直到客戶端斷線"""
+    if scope['method'] != 'GET':
+        await _send_plain(send, 405, 'Method not allowed')
+        return
+
+    store_id = await _get_store_id(scope)
+    if store_id is None:
+        await _send_plain(send, 403, 'Authentication required')
+        return
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=settings.STORE_EVENTS_QUEUE_SIZE)
+    broker = get_broker()
+    broker.subscribe(store_id, loop, queue)
+
+    disconnect = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        await _start_stream(send)
+        while not disconnect.done():
+            message = await _next_message(queue, disconnect, settings.STORE_EVENTS_HEARTBEAT_SECONDS)
+            if message is DISCONNECTED:
+                break
+            if message is None:
+                # 心跳，避免中間的 proxy 關閉閒置連線
+                await _send_body(send, ': ping\n\n')
+            else:
+                await _send_body(send, _event(message['type'], message['data']))
+    finally:
+        broker.unsubscribe(store_id, loop, queue)
+        disconnect.cancel()
+
+
+def _status_event(invitation_status):
+    if invitation_status['is_booked']:
+        return 'booked'
+    if invitation_status['is_expired']:
+        return 'expired'
+    return 'status'
+
+
+async def invitation_events(scope, receive, send, slug):
+    """
+    公開邀請頁的事件：連線時送出目前狀態，之後只在被預約（booked）或過了最後可預約時間（expired）時推送
+    等待期間每條連線只佔一個 asyncio.Queue，不讀取 cache 或資料庫；
+    連線超過 INVITATION_SSE_MAX_SECONDS 秒時結束，瀏覽器會自動重新連線
+    """
+    from .invitation_cache import parse_slug
+    from .invitation_status import last_bookable_time, status_from_snapshot
+
+    if scope['method'] != 'GET':
+        await _send_plain(send, 405, 'Method not allowed')
+        return
+    slug = parse_slug(slug)
+    if not settings.INVITATION_SSE_ENABLED or slug is None:
+        await _send_plain(send, 404, 'Not found')
+        return
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=1)
+    channel = invitation_channel(slug)
+    broker = get_broker()
+    # 先訂閱再讀取狀態，讀取之後才被預約也不會漏掉事件
+    broker.subscribe(channel, loop, queue)
+
+    disconnect = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        snapshot = await _get_invitation_snapshot(slug)
+        if snapshot is None:
+            await _send_plain(send, 404, 'Not found')
+            return
+
+        now = timezone.now()
+        invitation_status = status_from_snapshot(snapshot, now)
+        event_type = _status_event(invitation_status)
+        await _start_stream(send)
+        await _send_body(send, _event(event_type, invitation_status))
+        if event_type != 'status':
+            return
+
+        seconds = min(
+            (last_bookable_time(snapshot) - now).total_seconds(), settings.INVITATION_SSE_MAX_SECONDS
+        )
+        deadline = loop.time() + seconds
+        booked = False
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            message = await _next_message(
+                queue, disconnect, min(remaining, settings.STORE_EVENTS_HEARTBEAT_SECONDS)
+            )
+            if message is DISCONNECTED:
+                return
+            if message is not None:
+                booked = True
+                break
+            if deadline - loop.time() > 0:
+                await _send_body(send, ': ping\n\n')
+
+        snapshot = await _get_invitation_snapshot(slug)
+        if snapshot is None:
+            return
+        if booked:
+            # 事件在 commit 後才發佈，快照可能是 commit 前讀到的
+            snapshot = dict(snapshot, is_booked=True)
+        invitation_status = status_from_snapshot(snapshot, timezone.now())
+        event_type = _status_event(invitation_status)
+        if event_type != 'status':
+            await _send_body(send, _event(event_type, invitation_status))
+    finally:
+        broker.unsubscribe(channel, loop, queue)
+        disconnect.cancel()
@@ -0,0 +1,131 @@
+"""
+未指定師傅的預約自動派工
+
+候選人來自空檔點陣圖（panel.availability），再交給派工策略挑選：
+- least_loaded：當天預約數最少
+- round_robin：依序輪流
+- highest_rated：問卷平均星級最高
+
+策略可在 settings.RESERVATION_ASSIGNMENT_POLICY 以名稱或 dotted path 指定。
+派工期間會鎖住候選師傅當天的點陣圖列，同時建立的預約會依序處理，
+不會派給同一位師傅同一個時段。
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Avg, Count
+from django.utils.module_loading import import_string
+
+from . import availability
+from .store_calendar import get_store_calendar
+from .models import Reservation, ServiceSurvey, Therapist, TherapistDayAvailability
+
+
+class AssignmentPolicy:
+    """派工策略：從有空的師傅中挑一位，每次最多一次查詢"""
+
+    def choose(self, store, candidate_ids, start):
+        raise NotImplementedError
+
+
+class LeastLoadedPolicy(AssignmentPolicy):
+    """當天預約數最少的師傅，同數時取 id 較小者"""
+
+    def choose(self, store, candidate_ids, start):
+        calendar = get_store_calendar(store)
+        day_start, day_end = calendar.day_range(calendar.local_date(start))
+        loads = dict(
+            Reservation.objects.filter(
+                therapist_id__in=candidate_ids,
+                appointment_time__gte=day_start,
+                appointment_time__lt=day_end,
+            ).values('therapist_id').annotate(count=Count('id')).values_list('therapist_id', 'count')
+        )
+        return min(candidate_ids, key=lambda therapist_id: (loads.get(therapist_id, 0), therapist_id))
+
+
+class RoundRobinPolicy(AssignmentPolicy):
+    """接在店家最近一筆預約的師傅之後，依 id 順序輪流"""
+
+    def choose(self, store, candidate_ids, start):
+        last_therapist_id = Reservation.objects.filter(
+            store=store, therapist__isnull=False
+        ).order_by('-created_at').values_list('therapist_id', flat=True).first()
+
+        ordered = sorted(candidate_ids)
+        if last_therapist_id is None:
+            return ordered[0]
+        for therapist_id in ordered:
+            if therapist_id > last_therapist_id:
+                return therapist_id
+        return ordered[0]
+
+
+class HighestRatedPolicy(AssignmentPolicy):
+    """問卷平均星級最高的師傅，沒有問卷的排在最後"""
+
+    def choose(self, store, candidate_ids, start):
+        ratings = dict(
+            ServiceSurvey.objects.filter(
+                therapist_id__in=candidate_ids
+            ).values('therapist_id').annotate(avg=Avg('rating')).values_list('therapist_id', 'avg')
+        )
+        return max(candidate_ids, key=lambda therapist_id: (ratings.get(therapist_id, 0), -therapist_id))
+
+
+ASSIGNMENT_POLICIES = {
+    'least_loaded': LeastLoadedPolicy,
+    'round_robin': RoundRobinPolicy,
+    'highest_rated': HighestRatedPolicy,
+}
+
+
+def get_policy(name=None):
+    name = name or settings.RESERVATION_ASSIGNMENT_POLICY
+    policy_class = ASSIGNMENT_POLICIES.get(name)
+    if policy_class is None:
+        policy_class = import_string(name)
+    return policy_class()
+
+
+def assign_therapist(store, start, duration, policy=None):
+    """
+    找出 start 起 duration 分鐘都有空的師傅並依策略挑選
+    必須在 transaction.atomic() 內呼叫，並在同一個交易中建立預約，
+    鎖才會維持到預約寫入為止。找不到時回傳 None。
+    """
+    therapist_ids = list(
+        Therapist.objects.filter(
+            store=store, enabled=True
+        ).values_list('id', flat=True)
+    )
+    if not therapist_ids:
+        return None
+
+    calendar = get_store_calendar(store)
+    end = start + timedelta(minutes=duration)
+    days = availability.days_between(start, end, calendar)
+
+    # 確保點陣圖列存在，再以固定順序上鎖，避免死結
+    for day in days:
+        availability.get_day_bitmaps(therapist_ids, day, calendar)
+    rows = TherapistDayAvailability.objects.select_for_update().filter(
+        therapist_id__in=therapist_ids, date__in=days
+    ).order_by('therapist_id', 'date')
+
+    free_by_therapist = {}
+    for row in rows:
+        mask = availability.datetime_range_mask(row.date, start, end, calendar)
+        is_free = availability.from_bytes(row.free_bits) & mask == mask
+        free_by_therapist[row.therapist_id] = (
+            free_by_therapist.get(row.therapist_id, True) and is_free
+        )
+
+    candidate_ids = [
+        therapist_id for therapist_id, is_free in free_by_therapist.items() if is_free
+    ]
+    if not candidate_ids:
+        return None
+
+    therapist_id = (policy or get_policy()).choose(store, candidate_ids, start)
+    return Therapist.objects.get(id=therapist_id)
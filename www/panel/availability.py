@@ -0,0 +1,530 @@
+"""
+師傅空檔點陣圖
+
+每位師傅每天以一個整數表示，每個 bit 是一格 AVAILABILITY_SLOT_MINUTES 分鐘
+（預設 5 分鐘，一天 288 bits）。bit 0 是店家當地時鐘 00:00，bits 一律對應時鐘時間，
+所以需要日期換算的函式都接受店家行事曆（panel.store_calendar.StoreCalendar）。
+
+- working：班表（每週固定班表 + 特定日期例外，沒有班表時使用店家營業時間）
+- free：working 扣掉預約與邀請佔用的時段
+
+結果存在 TherapistDayAvailability，缺少的日期在讀取時才建立。
+預約建立時直接把對應 bits 清掉；其餘異動重建受影響的日期。
+「15:00 誰有 90 分鐘空檔」因此只需要一次查詢加上位元運算。
+
+每一列記錄計算時的店家行事曆版本（Store.calendar_version），營業時間或時區異動後
+版本不同的列視為過期，讀取時在鎖住後重建。
+
+寫入端（mark_busy、rebuild_days）先鎖住當天的列再讀取預約：缺少的列先以空白的佔位列
+INSERT ... ON CONFLICT DO NOTHING 建立並鎖住，同時讀取的請求要等這個交易結束，
+不會把交易開始前的舊結果寫進去蓋掉。讀取端寫入缺少的列時同樣遇到衝突就放棄。
+
+bulk_create / queryset.update 不會觸發 signals，
+大量寫入預約或邀請後以 rebuild_store_availability（或 `manage.py rebuild_availability`）重建。
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    MassageInvitation, Reservation, TherapistDayAvailability,
+    TherapistScheduleException, TherapistShift
+)
+
+SLOT_MINUTES = settings.AVAILABILITY_SLOT_MINUTES
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+BITMAP_BYTES = (SLOTS_PER_DAY + 7) // 8
+
+# 預約最長可能跨越的時間，用來往前找前一天開始的預約
+RESERVATION_LOOKBACK = timedelta(days=1)
+
+
+def to_bytes(bits):
+    return bits.to_bytes(BITMAP_BYTES, 'little')
+
+
+def from_bytes(value):
+    return int.from_bytes(bytes(value), 'little')
+
+
+def slot_mask(start_slot, end_slot):
+    """[start_slot, end_slot) 的 bits"""
+    start_slot = max(start_slot, 0)
+    end_slot = min(end_slot, SLOTS_PER_DAY)
+    if end_slot <= start_slot:
+        return 0
+    return ((1 << (end_slot - start_slot)) - 1) << start_slot
+
+
+def _minutes_to_slot(minutes, round_up=False):
+    if round_up:
+        return -(-minutes // SLOT_MINUTES)
+    return minutes // SLOT_MINUTES
+
+
+def time_range_mask(start_time, end_time):
+    """班表時間（time 物件）轉成 bits；結束 00:00 視為當天結束"""
+    start_minutes = start_time.hour * 60 + start_time.minute
+    end_minutes = end_time.hour * 60 + end_time.minute
+    if end_minutes == 0:
+        end_minutes = 24 * 60
+    return slot_mask(
+        _minutes_to_slot(start_minutes),
+        _minutes_to_slot(end_minutes, round_up=True)
+    )
+
+
+def datetime_range_mask(day, start, end, calendar):
+    """
+    datetime 區間與當天重疊部分的 bits，佔用時段一律往外取整格
+    bits 依當地時鐘時間（與班表相同）：日光節約時間轉換處切開，各段分別換算
+    """
+    minute = timedelta(minutes=1)
+    mask = 0
+    for segment_start, segment_end in calendar.clock_segments(start, end):
+        clock_start = calendar.clock_offset(day, segment_start)
+        clock_end = clock_start + (segment_end - segment_start)
+        mask |= slot_mask(
+            _minutes_to_slot(clock_start // minute),
+            _minutes_to_slot(-(-clock_end // minute), round_up=True)
+        )
+    return mask
+
+
+def days_between(start, end, calendar):
+    """區間 [start, end) 所涵蓋的店家當地日期"""
+    day = calendar.local_date(start)
+    last_day = calendar.local_date(end - timedelta(microseconds=1)) if end > start else day
+    days = []
+    while day <= last_day:
+        days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def _load_schedules(therapist_ids, first_day, last_day):
+    """一次讀取多位師傅的班表與日期範圍內的例外（兩次查詢）"""
+    shifts_by_therapist = defaultdict(list)
+    for shift in TherapistShift.objects.filter(therapist_id__in=therapist_ids):
+        shifts_by_therapist[shift.therapist_id].append(shift)
+
+    exceptions_by_day = defaultdict(list)
+    for exception in TherapistScheduleException.objects.filter(
+        therapist_id__in=therapist_ids, date__gte=first_day, date__lte=last_day
+    ):
+        exceptions_by_day[(exception.therapist_id, exception.date)].append(exception)
+
+    return shifts_by_therapist, exceptions_by_day
+
+
+def _working_mask(therapist_id, day, shifts_by_therapist, exceptions_by_day, calendar):
+    """依例外 > 每週班表 > 店家營業時間的順序決定當天上班 bits"""
+    exceptions = exceptions_by_day.get((therapist_id, day))
+    if exceptions:
+        if any(exception.is_day_off for exception in exceptions):
+            return 0
+        mask = 0
+        for exception in exceptions:
+            if exception.start_time and exception.end_time:
+                mask |= time_range_mask(exception.start_time, exception.end_time)
+        return mask
+
+    shifts = shifts_by_therapist.get(therapist_id)
+    if not shifts:
+        return calendar.business_mask(day)
+
+    mask = 0
+    for shift in shifts:
+        if shift.weekday == day.weekday():
+            mask |= time_range_mask(shift.start_time, shift.end_time)
+    return mask
+
+
+def _working_masks(therapist_ids, day, calendar):
+    """批次計算多位師傅當天的上班 bits（兩次查詢）"""
+    shifts_by_therapist, exceptions_by_day = _load_schedules(therapist_ids, day, day)
+    return {
+        therapist_id: _working_mask(
+            therapist_id, day, shifts_by_therapist, exceptions_by_day, calendar
+        )
+        for therapist_id in therapist_ids
+    }
+
+
+def _busy_masks(therapist_ids, day, calendar):
+    """批次計算多位師傅當天被預約與邀請佔用的 bits（兩次查詢）"""
+    start, end = calendar.day_range(day)
+    masks = defaultdict(int)
+
+    reservations = Reservation.objects.filter(
+        therapist_id__in=therapist_ids,
+        appointment_time__gte=start - RESERVATION_LOOKBACK,
+        appointment_time__lt=end,
+    ).values_list('therapist_id', 'appointment_time', 'massage_plan__duration')
+    for therapist_id, appointment_time, duration in reservations:
+        masks[therapist_id] |= datetime_range_mask(
+            day, appointment_time, appointment_time + timedelta(minutes=duration), calendar
+        )
+
+    invitations = MassageInvitation.objects.filter(
+        therapist_id__in=therapist_ids,
+        available_start__lt=end,
+        available_end__gt=start,
+    ).values_list('therapist_id', 'available_start', 'available_end')
+    for therapist_id, available_start, available_end in invitations:
+        masks[therapist_id] |= datetime_range_mask(
+            day, available_start, available_end, calendar
+        )
+
+    return masks
+
+
+def build_day(therapist_ids, day, calendar):
+    """計算多位師傅當天的 (working, free) bits，不寫入資料庫"""
+    working = _working_masks(therapist_ids, day, calendar)
+    busy = _busy_masks(therapist_ids, day, calendar)
+    return {
+        therapist_id: (working[therapist_id], working[therapist_id] & ~busy[therapist_id])
+        for therapist_id in therapist_ids
+    }
+
+
+def _is_current(row, calendar):
+    """
+    列是否可以直接使用：佔位列（寫入端剛建立、尚未計算）的 working_bits 是空的，
+    行事曆版本不同的列是依舊的營業時間或時區計算的
+    """
+    return len(row.working_bits) == BITMAP_BYTES and row.calendar_version == calendar.version
+
+
+def get_day_bitmaps(therapist_ids, day, calendar):
+    """
+    取得多位師傅當天的 (working, free) bits
+    已物化的直接讀取，缺少的一次建好並寫入
+    """
+    therapist_ids = list(therapist_ids)
+    result = {}
+    outdated = []
+    for row in TherapistDayAvailability.objects.filter(therapist_id__in=therapist_ids, date=day):
+        if _is_current(row, calendar):
+            result[row.therapist_id] = (from_bytes(row.working_bits), from_bytes(row.free_bits))
+        else:
+            outdated.append(row.therapist_id)
+
+    if outdated:
+        built = rebuild_many({therapist_id: [day] for therapist_id in outdated}, calendar)
+        result.update((therapist_id, bits) for (therapist_id, _), bits in built.items())
+
+    missing = [therapist_id for therapist_id in therapist_ids if therapist_id not in result]
+    if missing:
+        built = build_day(missing, day, calendar)
+        # 已經有寫入端建立的列時放棄寫入，以寫入端的結果為準
+        TherapistDayAvailability.objects.bulk_create(
+            [
+                TherapistDayAvailability(
+                    therapist_id=therapist_id,
+                    date=day,
+                    working_bits=to_bytes(working),
+                    free_bits=to_bytes(free),
+                    calendar_version=calendar.version,
+                )
+                for therapist_id, (working, free) in built.items()
+            ],
+            ignore_conflicts=True
+        )
+        result.update(built)
+    return result
+
+
+def _lock_days(days_by_therapist):
+    """
+    鎖住這些 (師傅, 日期) 的列並回傳 {(therapist_id, day): row}，缺少的先建立佔位列
+    需在交易中呼叫；依師傅與日期排序建立與鎖定，降低交叉等待的機會
+    """
+    keys = sorted(
+        (therapist_id, day)
+        for therapist_id, days in days_by_therapist.items()
+        for day in days
+    )
+    if not keys:
+        return {}
+    therapist_ids = {therapist_id for therapist_id, _ in keys}
+    dates = {day for _, day in keys}
+
+    def locked():
+        rows = TherapistDayAvailability.objects.select_for_update().filter(
+            therapist_id__in=therapist_ids, date__in=dates
+        ).order_by('therapist_id', 'date')
+        return {
+            (row.therapist_id, row.date): row
+            for row in rows if (row.therapist_id, row.date) in wanted
+        }
+
+    wanted = set(keys)
+    rows = locked()
+    missing = [key for key in keys if key not in rows]
+    if missing:
+        TherapistDayAvailability.objects.bulk_create(
+            [
+                TherapistDayAvailability(
+                    therapist_id=therapist_id, date=day, working_bits=b'', free_bits=b''
+                )
+                for therapist_id, day in missing
+            ],
+            ignore_conflicts=True
+        )
+        # 重新查詢才看得到其他交易剛 commit 的列
+        rows = locked()
+    return rows
+
+
+def _write_built(rows, days_by_therapist, calendar):
+    """
+    依目前的預約與班表計算並寫入這些列（列已由 _lock_days 鎖住）
+    回傳 {(therapist_id, day): (working, free)}
+    """
+    therapists_by_day = defaultdict(list)
+    for therapist_id, days in days_by_therapist.items():
+        for day in days:
+            therapists_by_day[day].append(therapist_id)
+
+    built = {}
+    for day, therapist_ids in therapists_by_day.items():
+        for therapist_id, bits in build_day(therapist_ids, day, calendar).items():
+            built[(therapist_id, day)] = bits
+            row = rows[(therapist_id, day)]
+            row.working_bits = to_bytes(bits[0])
+            row.free_bits = to_bytes(bits[1])
+            row.calendar_version = calendar.version
+    _save_rows([rows[key] for key in built])
+    return built
+
+
+def _save_rows(rows):
+    if rows:
+        now = timezone.now()
+        for row in rows:
+            row.updated_at = now
+        TherapistDayAvailability.objects.bulk_update(
+            rows, ['working_bits', 'free_bits', 'calendar_version', 'updated_at']
+        )
+
+
+def rebuild_many(days_by_therapist, calendar):
+    """
+    重新計算 {therapist_id: days} 的 bits；同一天的師傅一起計算
+    回傳 {(therapist_id, day): (working, free)}
+    """
+    days_by_therapist = {
+        therapist_id: set(days) for therapist_id, days in days_by_therapist.items() if therapist_id and days
+    }
+    if not days_by_therapist:
+        return {}
+    with transaction.atomic():
+        rows = _lock_days(days_by_therapist)
+        return _write_built(rows, days_by_therapist, calendar)
+
+
+def rebuild_days(therapist_id, days, calendar):
+    """重新計算某位師傅指定日期的 bits"""
+    rebuild_many({therapist_id: days}, calendar)
+
+
+def mark_busy(therapist_id, start, end, calendar):
+    """
+    新的預約或邀請：直接把已物化日期的對應 bits 清掉
+    沒有物化的日期在鎖住後才計算（包含這筆預約），不會被同時讀取的舊結果蓋掉
+    """
+    days = days_between(start, end, calendar)
+    with transaction.atomic():
+        rows = _lock_days({therapist_id: days})
+        pending = [day for day in days if not _is_current(rows[(therapist_id, day)], calendar)]
+        if pending:
+            _write_built(rows, {therapist_id: pending}, calendar)
+
+        changed = []
+        for day in days:
+            if day in pending:
+                continue
+            row = rows[(therapist_id, day)]
+            mask = datetime_range_mask(day, start, end, calendar)
+            row.free_bits = to_bytes(from_bytes(row.free_bits) & ~mask)
+            changed.append(row)
+        _save_rows(changed)
+
+
+def invalidate(therapist_id, days=None, from_day=None):
+    """刪除物化結果，下次讀取時重建（班表異動時使用）"""
+    rows = TherapistDayAvailability.objects.filter(therapist_id=therapist_id)
+    if days is not None:
+        rows = rows.filter(date__in=days)
+    if from_day is not None:
+        rows = rows.filter(date__gte=from_day)
+    rows.delete()
+
+
+def reservation_days(reservations, calendar):
+    """
+    預約 (therapist_id, appointment_time, duration) 佔用的 {therapist_id: days}
+    """
+    days_by_therapist = defaultdict(set)
+    for therapist_id, appointment_time, duration in reservations:
+        if therapist_id:
+            days_by_therapist[therapist_id].update(days_between(
+                appointment_time, appointment_time + timedelta(minutes=duration), calendar
+            ))
+    return days_by_therapist
+
+
+def rebuild_store_availability(store_id, calendar, from_day=None):
+    """
+    重新計算店家已物化的點陣圖（預設今天以後），回傳重建的列數
+    以 bulk_create / queryset.update 大量寫入預約、邀請或班表之後使用
+    """
+    from_day = from_day or calendar.today()
+    days_by_therapist = defaultdict(set)
+    for therapist_id, day in TherapistDayAvailability.objects.filter(
+        therapist__store_id=store_id, date__gte=from_day
+    ).values_list('therapist_id', 'date').iterator():
+        days_by_therapist[therapist_id].add(day)
+    for therapist_id, days in days_by_therapist.items():
+        rebuild_days(therapist_id, days, calendar)
+    return sum(len(days) for days in days_by_therapist.values())
+
+
+def free_therapist_ids(therapist_ids, start, duration, calendar):
+    """
+    回傳在 start 開始、持續 duration 分鐘都有空的師傅
+    每個涉及的日期只需要一次查詢
+    """
+    end = start + timedelta(minutes=duration)
+    candidates = list(therapist_ids)
+    for day in days_between(start, end, calendar):
+        if not candidates:
+            break
+        mask = datetime_range_mask(day, start, end, calendar)
+        bitmaps = get_day_bitmaps(candidates, day, calendar)
+        candidates = [
+            therapist_id for therapist_id in candidates
+            if bitmaps[therapist_id][1] & mask == mask
+        ]
+    return candidates
+
+
+def mask_runs(bits):
+    """把 bits 轉成連續區段 [(start_slot, end_slot), ...]"""
+    runs = []
+    slot = 0
+    while bits:
+        # 跳過結尾的 0
+        zeros = (bits & -bits).bit_length() - 1
+        bits >>= zeros
+        slot += zeros
+        # 計算連續的 1
+        ones = (~bits & (bits + 1)).bit_length() - 1
+        runs.append((slot, slot + ones))
+        bits >>= ones
+        slot += ones
+    return runs
+
+
+def _merged_busy_intervals(therapist_ids, start, end):
+    """
+    一次讀取期間內所有預約與邀請（兩次查詢），
+    依師傅排序並合併重疊區間
+    """
+    intervals = defaultdict(list)
+
+    reservations = Reservation.objects.filter(
+        therapist_id__in=therapist_ids,
+        appointment_time__gte=start - RESERVATION_LOOKBACK,
+        appointment_time__lt=end,
+    ).values_list('therapist_id', 'appointment_time', 'massage_plan__duration')
+    for therapist_id, appointment_time, duration in reservations:
+        intervals[therapist_id].append(
+            (appointment_time, appointment_time + timedelta(minutes=duration))
+        )
+
+    invitations = MassageInvitation.objects.filter(
+        therapist_id__in=therapist_ids,
+        available_start__lt=end,
+        available_end__gt=start,
+    ).values_list('therapist_id', 'available_start', 'available_end')
+    for therapist_id, available_start, available_end in invitations:
+        intervals[therapist_id].append((available_start, available_end))
+
+    merged = {}
+    for therapist_id, therapist_intervals in intervals.items():
+        therapist_intervals.sort()
+        result = []
+        for interval_start, interval_end in therapist_intervals:
+            if result and interval_start <= result[-1][1]:
+                if interval_end > result[-1][1]:
+                    result[-1] = (result[-1][0], interval_end)
+            else:
+                result.append((interval_start, interval_end))
+        merged[therapist_id] = result
+    return merged
+
+
+def find_next_slots(therapist_ids, duration, start, days, limit, calendar):
+    """
+    從 start 開始的 days 天內，找出最早的 limit 個可開始時間
+
+    以一次查詢取得整段期間的預約與邀請，各師傅的上班區段與合併後的
+    忙碌區段做一次掃描，回傳 [(開始時間, [師傅 id, ...]), ...]。
+    開始時間對齊店家的預約時段間隔。
+    """
+    therapist_ids = list(therapist_ids)
+    if not therapist_ids or limit <= 0:
+        return []
+
+    first_day = calendar.local_date(start)
+    last_day = first_day + timedelta(days=days - 1)
+    horizon_end = calendar.day_range(last_day)[1]
+    length = timedelta(minutes=duration)
+
+    shifts_by_therapist, exceptions_by_day = _load_schedules(
+        therapist_ids, first_day, last_day
+    )
+    busy_by_therapist = _merged_busy_intervals(therapist_ids, start, horizon_end)
+
+    candidates = defaultdict(list)
+    for therapist_id in therapist_ids:
+        busy = busy_by_therapist.get(therapist_id, [])
+        busy_index = 0
+        found = 0
+        day = first_day
+        while day <= last_day and found < limit:
+            working = _working_mask(
+                therapist_id, day, shifts_by_therapist, exceptions_by_day, calendar
+            )
+            for start_slot, end_slot in mask_runs(working):
+                run_start = calendar.at(day, start_slot * SLOT_MINUTES)
+                run_end = calendar.at(day, end_slot * SLOT_MINUTES)
+                if run_end <= start:
+                    continue
+
+                # 第一個可能的開始時間：不早於 start，並對齊當地時鐘的時段間隔
+                candidate = calendar.align(max(run_start, start))
+
+                while candidate + length <= run_end and found < limit:
+                    # 略過已經結束的忙碌區段
+                    while busy_index < len(busy) and busy[busy_index][1] <= candidate:
+                        busy_index += 1
+                    if busy_index < len(busy) and busy[busy_index][0] < candidate + length:
+                        # 與忙碌區段重疊，跳到區段結束後的下一個對齊時間
+                        candidate = calendar.align(busy[busy_index][1])
+                        continue
+                    candidates[candidate].append(therapist_id)
+                    found += 1
+                    candidate = calendar.align(candidate + timedelta(minutes=calendar.slot_minutes))
+            day += timedelta(days=1)
+
+    return [
+        (slot_start, candidates[slot_start])
+        for slot_start in sorted(candidates)[:limit]
+    ]
@@ -0,0 +1,264 @@
+"""
+預約批次操作：取消、改派師傅、整批移動時間
+
+逐筆 PUT / DELETE 每筆都要跑一次重疊查詢與所有 signals。批次操作改為：
+
+- 在一個交易中鎖住整批預約（SELECT ... FOR UPDATE）
+- 以一次範圍查詢取出相關師傅在期間內的其他預約，依師傅排序後在記憶體中掃描重疊
+  （同一批的預約彼此也會檢查），有衝突的項目維持原狀並回報原因
+- 通過的項目以 bulk_update（取消則是一次 DELETE）寫入
+- 客戶統計、營收彙總、師傅空檔依整批的異動前後一次更新，不經過逐筆的 signals
+
+每個項目各自回報結果，部分失敗時其餘項目照常套用。
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import availability
+from .customers import rebuild_customer_stats
+from .events import (
+    publish_store_event, reservation_payload, RESERVATION_DELETED, RESERVATION_UPDATED
+)
+from .models import Reservation
+from .revenue import apply_revenue_delta, revenue_entry
+from .store_calendar import get_store_calendar
+from .tasks import schedule_customer_visits
+
+# 一次最多處理的預約數
+BULK_MAX_ITEMS = 200
+# 整批移動時間的上限（分鐘，一年）
+BULK_SHIFT_MAX_MINUTES = 366 * 24 * 60
+
+NOT_FOUND = "找不到預約"
+PAST_RESERVATION = "已經開始的預約不能修改"
+PAST_TIME = "預約時間必須是未來時間"
+CONFLICT = "該師傅在此時間段已有其他預約"
+
+
+def _interval(reservation):
+    start = reservation.appointment_time
+    return start, start + timedelta(minutes=reservation.massage_plan.duration)
+
+
+def _snapshot(reservation):
+    """預約異動前的 (therapist_id, appointment_time, 營收 key 與金額)"""
+    return reservation.therapist_id, reservation.appointment_time, revenue_entry(reservation)
+
+
+def _lock(store, ids):
+    """鎖住店家的這些預約，回傳 id -> Reservation"""
+    return {
+        reservation.id: reservation
+        for reservation in Reservation.objects.select_for_update(of=('self',)).filter(
+            store=store, id__in=ids
+        ).select_related('massage_plan')
+    }
+
+
+def _sweep(intervals):
+    """
+    intervals: (start, end, id)，id 為 None 表示不在這批的預約
+    回傳與其他預約重疊的這批預約 id；兩筆都在這批時開始較晚的那筆失敗
+    """
+    failed = set()
+    latest = None
+    for current in sorted(intervals, key=lambda item: (item[0], item[1])):
+        if latest and current[0] < latest[1]:
+            if current[2] is not None:
+                failed.add(current[2])
+                continue
+            if latest[2] is not None:
+                failed.add(latest[2])
+                latest = current
+            elif current[1] > latest[1]:
+                latest = current
+            continue
+        if latest is None or current[1] > latest[1]:
+            latest = current
+    return failed
+
+
+def _find_conflicts(moved, before):
+    """
+    moved：通過其他檢查、準備寫入的 id -> Reservation（已改成新的師傅 / 時間）
+    before：異動前的快照；衝突的項目還原後，原本的時段也要納入檢查
+    回傳衝突的 id（已從 moved 移除並還原）
+    """
+    conflicts = set()
+    if not moved:
+        return conflicts
+
+    therapist_ids = {reservation.therapist_id for reservation in moved.values() if reservation.therapist_id}
+    if not therapist_ids:
+        return conflicts
+    starts, ends = zip(*(_interval(reservation) for reservation in moved.values()))
+
+    # 一次範圍查詢取出相關師傅在期間內的其他預約
+    fixed = defaultdict(list)
+    existing = Reservation.objects.filter(
+        therapist_id__in=therapist_ids,
+        appointment_time__gte=min(starts) - availability.RESERVATION_LOOKBACK,
+        appointment_time__lt=max(ends),
+    ).exclude(id__in=list(moved)).values_list('therapist_id', 'appointment_time', 'massage_plan__duration')
+    for therapist_id, appointment_time, duration in existing:
+        fixed[therapist_id].append((appointment_time, appointment_time + timedelta(minutes=duration), None))
+
+    while True:
+        intervals = defaultdict(list, {therapist_id: list(items) for therapist_id, items in fixed.items()})
+        for reservation_id, reservation in moved.items():
+            if reservation.therapist_id:
+                intervals[reservation.therapist_id].append((*_interval(reservation), reservation_id))
+        failed = set()
+        for therapist_id in therapist_ids:
+            failed |= _sweep(intervals[therapist_id])
+        if not failed:
+            return conflicts
+
+        # 衝突的項目維持原本的師傅與時間，並佔住原本的時段
+        for reservation_id in failed:
+            reservation = moved.pop(reservation_id)
+            reservation.therapist_id, reservation.appointment_time, _ = before[reservation_id]
+            if reservation.therapist_id:
+                fixed[reservation.therapist_id].append((*_interval(reservation), None))
+        conflicts |= failed
+
+
+def _sync_derived(store_id, before, after, customer_ids):
+    """
+    依異動前後的快照（_snapshot）更新營收彙總、師傅空檔與客戶統計
+    """
+    totals = defaultdict(lambda: [0, Decimal('0'), Decimal('0')])
+    for snapshots, sign in ((before, -1), (after, 1)):
+        for _, _, (key, (list_price, price_charged)) in snapshots:
+            total = totals[key]
+            total[0] += sign
+            total[1] += list_price * sign
+            total[2] += price_charged * sign
+    for key, (count, list_revenue, revenue) in totals.items():
+        if count or list_revenue or revenue:
+            apply_revenue_delta(key, count, list_revenue, revenue)
+
+    # 受影響的日期在鎖住後重建，同一天的師傅一起計算
+    calendar = get_store_calendar(store_id)
+    availability.rebuild_many(
+        availability.reservation_days(
+            (
+                (therapist_id, appointment_time, int(availability.RESERVATION_LOOKBACK.total_seconds() // 60))
+                for therapist_id, appointment_time, _ in (*before, *after)
+            ),
+            calendar
+        ),
+        calendar
+    )
+
+    customer_ids = {customer_id for customer_id in customer_ids if customer_id}
+    if customer_ids:
+        at = rebuild_customer_stats(customer_ids)
+        if at:
+            schedule_customer_visits(at)
+
+
+def _results(ids, errors):
+    return [
+        {'id': reservation_id, 'ok': False, 'error': errors[reservation_id]}
+        if reservation_id in errors else {'id': reservation_id, 'ok': True}
+        for reservation_id in ids
+    ]
+
+
+def _move(store, ids, change):
+    """
+    change(reservation) 修改師傅 / 時間，不能修改時回傳錯誤訊息
+    通過的項目一次寫入，回傳每個項目的結果
+    """
+    with transaction.atomic():
+        reservations = _lock(store, ids)
+        errors = {reservation_id: NOT_FOUND for reservation_id in ids if reservation_id not in reservations}
+        before = {reservation_id: _snapshot(reservation) for reservation_id, reservation in reservations.items()}
+
+        moved = {}
+        for reservation_id, reservation in reservations.items():
+            error = change(reservation)
+            if error:
+                errors[reservation_id] = error
+                reservation.therapist_id, reservation.appointment_time, _ = before[reservation_id]
+            elif (reservation.therapist_id, reservation.appointment_time) != before[reservation_id][:2]:
+                moved[reservation_id] = reservation
+
+        for reservation_id in _find_conflicts(moved, before):
+            errors[reservation_id] = CONFLICT
+
+        if moved:
+            now = timezone.now()
+            for reservation in moved.values():
+                reservation.updated_at = now
+            Reservation.objects.bulk_update(
+                list(moved.values()), ['therapist', 'appointment_time', 'updated_at']
+            )
+            _sync_derived(
+                store.id,
+                [before[reservation_id] for reservation_id in moved],
+                [_snapshot(reservation) for reservation in moved.values()],
+                [reservation.customer_id for reservation in moved.values()],
+            )
+            for reservation in moved.values():
+                publish_store_event(store.id, RESERVATION_UPDATED, reservation_payload(reservation))
+    return _results(ids, errors)
+
+
+def bulk_reassign(store, ids, therapist):
+    """把預約改派給 therapist（呼叫前已確認師傅屬於店家且可接單）"""
+    now = timezone.now()
+
+    def change(reservation):
+        if reservation.appointment_time <= now:
+            return PAST_RESERVATION
+        reservation.therapist_id = therapist.id
+        return None
+
+    return _move(store, ids, change)
+
+
+def bulk_shift(store, ids, minutes):
+    """把預約整批往後（minutes > 0）或往前移動"""
+    now = timezone.now()
+    delta = timedelta(minutes=minutes)
+
+    def change(reservation):
+        if reservation.appointment_time <= now:
+            return PAST_RESERVATION
+        if reservation.appointment_time + delta <= now:
+            return PAST_TIME
+        reservation.appointment_time += delta
+        return None
+
+    return _move(store, ids, change)
+
+
+def bulk_cancel(store, ids):
+    """取消（刪除）預約，回傳每個項目的結果"""
+    with transaction.atomic():
+        reservations = _lock(store, ids)
+        errors = {reservation_id: NOT_FOUND for reservation_id in ids if reservation_id not in reservations}
+        if reservations:
+            # 沒有其他資料表參照預約，直接以一個 DELETE 刪除：
+            # 不經過 QuerySet.delete() 的 Collector，不逐筆觸發 post_delete，衍生資料在下面一次更新
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {connection.ops.quote_name(Reservation._meta.db_table)} "
+                    f"WHERE id IN ({', '.join(['%s'] * len(reservations))})",
+                    list(reservations)
+                )
+            _sync_derived(
+                store.id,
+                [_snapshot(reservation) for reservation in reservations.values()],
+                [],
+                [reservation.customer_id for reservation in reservations.values()],
+            )
+            for reservation_id in reservations:
+                publish_store_event(store.id, RESERVATION_DELETED, {'id': reservation_id})
+    return _results(ids, errors)
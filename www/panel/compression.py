@@ -0,0 +1,108 @@
+"""
+API 回應壓縮
+
+依 Accept-Encoding 協商 br / gzip，只壓縮 JSON 且大於
+RESPONSE_COMPRESSION_MIN_BYTES 的回應。HTML 頁面含 CSRF token，
+壓縮後有 BREACH 風險，所以不處理；串流回應（SSE）也不壓縮，
+否則事件會被緩衝住。
+"""
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # 沒有安裝 brotli 時只提供 gzip
+    brotli = None
+
+COMPRESSIBLE_CONTENT_TYPES = ('application/json',)
+
+
+def _compress_gzip(content):
+    return gzip.compress(content, compresslevel=settings.RESPONSE_COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def _compress_brotli(content):
+    return brotli.compress(content, quality=settings.RESPONSE_COMPRESSION_BROTLI_QUALITY)
+
+
+COMPRESSORS = {'gzip': _compress_gzip}
+if brotli is not None:
+    COMPRESSORS['br'] = _compress_brotli
+
+# 客戶端偏好相同時的選擇順序
+ENCODING_PREFERENCE = ('br', 'gzip')
+
+
+def compress(content, encoding):
+    """用指定的編碼（br / gzip）壓縮 bytes"""
+    return COMPRESSORS[encoding](content)
+
+
+def parse_accept_encoding(header):
+    """'gzip, br;q=0.8' -> {'gzip': 1.0, 'br': 0.8}"""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(header):
+    """回傳伺服器支援且客戶端最偏好的編碼，都不接受時回傳 None"""
+    accepted = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for coding in ENCODING_PREFERENCE:
+        if coding not in COMPRESSORS:
+            continue
+        quality = accepted.get(coding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class ResponseCompressionMiddleware:
+    """依 Accept-Encoding 壓縮較大的 JSON 回應"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in COMPRESSIBLE_CONTENT_TYPES:
+            return response
+        if len(response.content) < settings.RESPONSE_COMPRESSION_MIN_BYTES:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+
+        # 壓縮後內容不同，強 ETag 改為弱 ETag（同 GZipMiddleware）
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
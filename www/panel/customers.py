@@ -0,0 +1,121 @@
+"""
+客戶識別與來店統計
+
+預約建立時依店家與正規化後的電話找到（或建立）Customer 並關聯；
+Customer 上的來店次數、最近來店時間、累計消費只計入預約時間已到的預約，
+查詢客戶時不需要掃描預約表：
+
+- 預約新增、修改、刪除時由 signals 重新計算該客戶（走 (customer, appointment_time) 索引，
+  只讀這位客戶的預約）
+- next_visit_at 記錄下一筆尚未計入的預約時間，背景工作在那個時間推進
+  （與邀請狀態相同的排程方式，見 tasks.schedule_customer_visits）
+
+電話只保留數字，台灣國碼 886 開頭的換成 0，
+「0912-345-678」、「+886 912 345 678」視為同一位客戶。
+"""
+import re
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Customer, Reservation
+from .revenue import reservation_prices
+
+PHONE_MAX_LENGTH = Customer._meta.get_field('phone').max_length
+STATS_FIELDS = ['visit_count', 'last_visit_at', 'lifetime_spend', 'next_visit_at']
+# 推進來店統計時每批重新計算的客戶數
+ADVANCE_BATCH_SIZE = 500
+
+
+def normalize_phone(phone):
+    """回傳只含數字的電話，無法辨識時回傳空字串"""
+    digits = re.sub(r'\D', '', phone or '')
+    if digits.startswith('886') and len(digits) in (11, 12):
+        digits = '0' + digits[3:].lstrip('0')
+    return digits[:PHONE_MAX_LENGTH]
+
+
+def get_or_create_customer(store_id, name, phone):
+    """
+    依店家與電話取得客戶，沒有時建立；姓名以最新一次預約為準
+    電話無法辨識時回傳 None（預約仍可建立，只是不關聯客戶）
+    """
+    normalized = normalize_phone(phone)
+    if not normalized:
+        return None
+    customer, created = Customer.objects.get_or_create(
+        store_id=store_id, phone=normalized, defaults={'name': name}
+    )
+    if not created and name and customer.name != name:
+        customer.name = name
+        customer.save(update_fields=['name', 'updated_at'])
+    return customer
+
+
+def reservation_amount(reservation):
+    """預約計入累計消費的金額（實收金額）"""
+    return reservation_prices(
+        reservation.list_price, reservation.price_charged, reservation.massage_plan.price
+    )[1]
+
+
+def rebuild_customer_stats(customer_ids, now=None):
+    """
+    從預約重新計算客戶的來店統計與下次來店時間，回傳其中最早的下次來店時間（排程用）
+
+    先鎖住客戶再讀預約，同一位客戶的重新計算依序執行，後 commit 的一定讀到先前的異動
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        customers = list(
+            Customer.objects.select_for_update().filter(id__in=customer_ids).order_by('id')
+        )
+        visits = {
+            row['customer_id']: row
+            for row in Reservation.objects.filter(customer_id__in=customer_ids, appointment_time__lte=now)
+            .values('customer_id')
+            .annotate(
+                count=Count('id'),
+                last=Max('appointment_time'),
+                spend=Sum(Coalesce('price_charged', 'list_price', 'massage_plan__price')),
+            )
+            .order_by()  # 預設排序會被加進 GROUP BY
+        }
+        upcoming = dict(
+            Reservation.objects.filter(customer_id__in=customer_ids, appointment_time__gt=now)
+            .values('customer_id')
+            .annotate(next=Min('appointment_time'))
+            .order_by()
+            .values_list('customer_id', 'next')
+        )
+        for customer in customers:
+            row = visits.get(customer.id)
+            customer.visit_count = row['count'] if row else 0
+            customer.last_visit_at = row['last'] if row else None
+            customer.lifetime_spend = row['spend'] if row else Decimal('0')
+            customer.next_visit_at = upcoming.get(customer.id)
+        Customer.objects.bulk_update(customers, STATS_FIELDS)
+    return min(upcoming.values(), default=None)
+
+
+def advance_visits(now=None):
+    """把下次來店時間已到的客戶重新計算（部分索引範圍查詢，分批處理），回傳處理的客戶數"""
+    now = now or timezone.now()
+    total = 0
+    while True:
+        customer_ids = list(
+            Customer.objects.filter(next_visit_at__lte=now)
+            .order_by('next_visit_at').values_list('id', flat=True)[:ADVANCE_BATCH_SIZE]
+        )
+        if not customer_ids:
+            return total
+        rebuild_customer_stats(customer_ids, now)
+        total += len(customer_ids)
+
+
+def next_visit_at():
+    """所有客戶中最早的下次來店時間，沒有時回傳 None"""
+    return Customer.objects.aggregate(value=Min('next_visit_at'))['value']
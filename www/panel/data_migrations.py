@@ -0,0 +1,198 @@
+"""
+分批、可中斷續跑的資料遷移
+
+大量資料的回填不能在 migration 的單一交易裡用 ORM 迴圈處理（長時間鎖表、記憶體隨筆數成長），
+改為註冊一個資料遷移，由 run_data_migration 依主鍵順序分批執行：
+
+- 每批只取出主鍵，交給註冊的函式處理，各自在一個短交易中 commit
+- 每批處理完與進度（DataMigrationCheckpoint）在同一個交易中寫入，中斷後從上次的主鍵繼續
+- 每批之間暫停 pause 秒節流，time_limit 秒後停止（下次執行時接著做）
+- dry_run 時每批執行後 rollback，只回報會修改的筆數，不記錄進度
+
+註冊的函式接收 (apps, ids)，以 apps.get_model 取得 model，回傳修改筆數；
+migration 中以 data_migration_operation(name) 執行（migration 需設定 atomic = False），
+也可以先在線上以 `manage.py run_data_migration <name> --pause 0.5` 慢慢處理，
+之後 migration 看到已完成的進度就會略過。
+"""
+import logging
+import time
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import migrations, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import partitioning
+from .invitation_status import UPCOMING, status_case
+from .store_scope import fill_store_ids
+
+logger = logging.getLogger(__name__)
+
+# name -> (model label, queryset, handler)
+_registry = {}
+
+
+def register_data_migration(name, model, queryset=None):
+    """
+    註冊資料遷移
+
+    model 為 'app_label.ModelName'；queryset(model) 回傳需要處理的資料（預設全部），
+    例如只處理欄位還是 NULL 的資料，重新執行時已處理過的不會再被取出
+    """
+    def decorator(func):
+        _registry[name] = (model, queryset, func)
+        return func
+    return decorator
+
+
+def registered_data_migrations():
+    """已註冊的資料遷移 name -> model label"""
+    return {name: model for name, (model, _, _) in _registry.items()}
+
+
+def run_data_migration(name, apps=None, batch_size=None, pause=None, time_limit=None,
+                       dry_run=False, restart=False, checkpoint=True, progress=None):
+    """
+    執行資料遷移，回傳這次執行的統計
+    {'processed', 'changed', 'last_id', 'finished'}
+
+    apps 為 migration 的歷史 apps（預設目前的 models）；
+    checkpoint=False 時不讀寫進度（進度資料表建立之前的 migration 使用），只依 queryset 續跑；
+    progress(stats) 於每批完成後呼叫，stats 另外包含 max_id 與 elapsed 秒數
+    """
+    if name not in _registry:
+        raise ValueError(f"未註冊的資料遷移：{name}")
+    model_label, queryset, handler = _registry[name]
+    apps = apps or global_apps
+    batch_size = batch_size or settings.DATA_MIGRATION_BATCH_SIZE
+    pause = settings.DATA_MIGRATION_PAUSE_SECONDS if pause is None else pause
+
+    model = apps.get_model(model_label)
+    rows = queryset(model) if queryset else model._base_manager.all()
+    rows = rows.order_by('pk')
+
+    state = None
+    last_id = 0
+    if checkpoint:
+        Checkpoint = apps.get_model('panel', 'DataMigrationCheckpoint')
+        state = Checkpoint.objects.filter(name=name).first()
+        if state and not restart:
+            if state.finished_at:
+                return {'processed': 0, 'changed': 0, 'last_id': state.last_id, 'finished': True}
+            last_id = state.last_id
+        if dry_run:
+            # 從上次的進度開始試跑，但不寫入進度
+            state = None
+        elif state is None:
+            state = Checkpoint.objects.create(name=name)
+        elif restart:
+            state.last_id = state.processed = state.changed = 0
+            state.started_at = timezone.now()
+            state.finished_at = None
+            state.save()
+
+    stats = {'processed': 0, 'changed': 0, 'last_id': last_id, 'finished': False}
+    # 進度只用來估算百分比，取整張表的最大主鍵（只讀索引）
+    max_id = model._base_manager.aggregate(max_id=Max('pk'))['max_id'] or 0
+    started = time.monotonic()
+    while True:
+        with transaction.atomic():
+            ids = list(rows.filter(pk__gt=stats['last_id']).values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                stats['finished'] = True
+                break
+            changed = handler(apps, ids) or 0
+            if dry_run:
+                transaction.set_rollback(True)
+            elif state:
+                state.last_id = ids[-1]
+                state.processed += len(ids)
+                state.changed += changed
+                state.save(update_fields=['last_id', 'processed', 'changed', 'updated_at'])
+        stats['processed'] += len(ids)
+        stats['changed'] += changed
+        stats['last_id'] = ids[-1]
+
+        elapsed = time.monotonic() - started
+        logger.info("資料遷移 %s：已處理 %s 筆（id %s / %s）", name, stats['processed'], ids[-1], max_id)
+        if progress:
+            progress(dict(stats, max_id=max_id, elapsed=elapsed))
+        if time_limit and elapsed >= time_limit:
+            break
+        if pause:
+            time.sleep(pause)
+
+    if state and stats['finished']:
+        state.finished_at = timezone.now()
+        state.save(update_fields=['finished_at', 'updated_at'])
+    return stats
+
+
+def data_migration_operation(name, **options):
+    """
+    migration 中執行已註冊資料遷移的 RunPython 操作
+    migration 往回退時清除進度，再次套用時會重新執行
+    """
+    def forwards(apps, schema_editor):
+        run_data_migration(name, apps=apps, **options)
+
+    def backwards(apps, schema_editor):
+        apps.get_model('panel', 'DataMigrationCheckpoint').objects.filter(name=name).delete()
+
+    return migrations.RunPython(forwards, backwards)
+
+
+# ====== 資料遷移 ======
+
+@register_data_migration(
+    'survey_store_id', 'panel.ServiceSurvey',
+    queryset=lambda model: model._base_manager.filter(store__isnull=True),
+)
+def survey_store_id(apps, ids):
+    """問卷的店家 id 依師傅回填"""
+    return fill_store_ids(
+        apps.get_model('panel', 'ServiceSurvey'), apps.get_model('panel', 'Therapist'), 'therapist', ids
+    )
+
+
+@register_data_migration(
+    'invitation_store_id', 'panel.MassageInvitation',
+    queryset=lambda model: model._base_manager.filter(store__isnull=True),
+)
+def invitation_store_id(apps, ids):
+    """邀請的店家 id 依方案回填"""
+    return fill_store_ids(
+        apps.get_model('panel', 'MassageInvitation'), apps.get_model('panel', 'MassagePlan'), 'massage_plan', ids
+    )
+
+
+@register_data_migration(
+    'invitation_status', 'panel.MassageInvitation',
+    queryset=lambda model: model._base_manager.filter(status=UPCOMING, available_start__lte=timezone.now()),
+)
+def invitation_status(apps, ids):
+    """既有邀請依目前時間計算狀態（新增欄位時全部預設為尚未開始）"""
+    return apps.get_model('panel', 'MassageInvitation')._base_manager.filter(id__in=ids).update(
+        status=status_case(timezone.now())
+    )
+
+
+def _rows_to_partition(model):
+    """還沒轉換成分割表時的全部資料（依主鍵分批複製，已由 trigger 同步的資料略過）"""
+    if not partitioning.shadow_exists(model._meta.db_table):
+        return model._base_manager.none()
+    return model._base_manager.all()
+
+
+@register_data_migration('partition_reservation', 'panel.Reservation', queryset=_rows_to_partition)
+def partition_reservation(apps, ids):
+    """預約複製到分割表"""
+    return partitioning.copy_to_shadow(apps.get_model('panel', 'Reservation')._meta.db_table, ids)
+
+
+@register_data_migration('partition_invitation', 'panel.MassageInvitation', queryset=_rows_to_partition)
+def partition_invitation(apps, ids):
+    """邀請複製到分割表（slug 登記表由分割表上的 trigger 寫入）"""
+    return partitioning.copy_to_shadow(apps.get_model('panel', 'MassageInvitation')._meta.db_table, ids)
+
@@ -0,0 +1,212 @@
+"""
+店家即時事件
+
+管理頁面透過 /api/store-events/（見 panel/asgi.py）訂閱自己店家的事件，
+預約新增/修改/刪除、邀請被預約、新問卷都會在交易 commit 後發佈。
+公開邀請頁透過 /api/public-invitations/<slug>/events/ 訂閱該邀請被預約的事件。
+訂閱的 key 是店家 id 或 invitation_channel(slug)。
+
+Broker 有兩種：
+- memory：同一個 process 內的訂閱者（單一 ASGI process 時使用）
+- postgres（預設）：透過 LISTEN/NOTIFY 跨 process 傳遞（WSGI worker 發佈、ASGI process 推送）
+
+docker-compose 的 events 服務以 uvicorn 執行 project.asgi，nginx 把兩種事件串流轉給它，
+其餘請求仍由 web（gunicorn / runserver）處理。
+"""
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+RESERVATION_CREATED = 'reservation.created'
+RESERVATION_UPDATED = 'reservation.updated'
+RESERVATION_DELETED = 'reservation.deleted'
+INVITATION_BOOKED = 'invitation.booked'
+SURVEY_CREATED = 'survey.created'
+# 公開邀請頁的事件（瀏覽器 EventSource 的事件名稱）
+PUBLIC_INVITATION_BOOKED = 'booked'
+
+# LISTEN 連線中斷後重新連線的最長等待秒數
+LISTEN_MAX_RETRY_SECONDS = 30
+
+
+class InProcessBroker:
+    """把事件送給同一個 process 內訂閱該 key（店家 id 或邀請）的 asyncio queue"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, key, loop, queue):
+        with self._lock:
+            self._subscribers[key].add((loop, queue))
+
+    def unsubscribe(self, key, loop, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(key)
+            if subscribers:
+                subscribers.discard((loop, queue))
+                if not subscribers:
+                    del self._subscribers[key]
+
+    def publish(self, key, message):
+        self.dispatch(key, message)
+
+    def dispatch(self, key, message):
+        """可從任何 thread 呼叫，事件會排進各訂閱者的 event loop"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(key, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_put_nowait, queue, message)
+
+
+class PostgresBroker(InProcessBroker):
+    """
+    透過 PostgreSQL LISTEN/NOTIFY 傳遞事件
+    發佈端只需要一個 pg_notify；有訂閱者的 process 會啟動一條 LISTEN thread
+    """
+
+    def __init__(self, channel):
+        super().__init__()
+        self.channel = channel
+        self._listener = None
+
+    def publish(self, key, message):
+        payload = json.dumps({'key': key, 'message': message})
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, payload])
+
+    def subscribe(self, key, loop, queue):
+        super().subscribe(key, loop, queue)
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen, name='store-events-listener', daemon=True
+                )
+                self._listener.start()
+
+    def _listen(self):
+        """連線中斷時等待後重新連線並重新 LISTEN，中斷期間的事件會遺失（前端重新整理時補齊）"""
+        delay = 1
+        while True:
+            started = time.monotonic()
+            try:
+                self._listen_once()
+            except Exception:
+                if time.monotonic() - started > LISTEN_MAX_RETRY_SECONDS:
+                    # 連線維持了一段時間才中斷，重新從短的等待開始
+                    delay = 1
+                logger.exception('店家事件 LISTEN 連線中斷，%s 秒後重新連線', delay)
+            time.sleep(delay)
+            delay = min(delay * 2, LISTEN_MAX_RETRY_SECONDS)
+
+    def _listen_once(self):
+        import psycopg2
+
+        db = settings.DATABASES['default']
+        conn = psycopg2.connect(
+            dbname=db['NAME'],
+            user=db['USER'],
+            password=db['PASSWORD'],
+            host=db['HOST'],
+            port=db['PORT'],
+        )
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            while True:
+                if select.select([conn], [], [], 60) == ([], [], []):
+                    # 閒置時確認連線仍然存在，斷線會拋出例外後重新連線
+                    with conn.cursor() as cursor:
+                        cursor.execute('SELECT 1')
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    try:
+                        data = json.loads(notify.payload)
+                    except ValueError:
+                        logger.warning('無法解析店家事件: %s', notify.payload)
+                        continue
+                    self.dispatch(data['key'], data['message'])
+        finally:
+            conn.close()
+
+
+def _put_nowait(queue, message):
+    # 訂閱者太慢時丟掉事件，避免記憶體無限成長；前端會在下次事件或重新整理時補齊
+    if not queue.full():
+        queue.put_nowait(message)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                if settings.STORE_EVENTS_BROKER == 'postgres':
+                    _broker = PostgresBroker(settings.STORE_EVENTS_CHANNEL)
+                else:
+                    _broker = InProcessBroker()
+    return _broker
+
+
+def publish_store_event(store_id, event_type, data):
+    """在目前交易 commit 之後發佈店家事件"""
+    if store_id is None:
+        return
+
+    message = json.loads(json.dumps(
+        {'type': event_type, 'data': data}, cls=DjangoJSONEncoder
+    ))
+
+    def _publish():
+        try:
+            get_broker().publish(store_id, message)
+        except Exception:
+            # 推播失敗不應影響原本的請求
+            logger.exception('發佈店家事件失敗: %s', event_type)
+
+    transaction.on_commit(_publish)
+
+
+def invitation_channel(slug):
+    """公開邀請事件的訂閱 key"""
+    return f"invitation:{slug}"
+
+
+def publish_invitation_event(slug, event_type):
+    """在目前交易 commit 之後通知訂閱該邀請的公開頁面，頁面狀態由 ASGI 端重新讀取"""
+    message = {'type': event_type, 'data': {'slug': str(slug)}}
+
+    def _publish():
+        try:
+            get_broker().publish(invitation_channel(slug), message)
+        except Exception:
+            logger.exception('發佈邀請事件失敗: %s', event_type)
+
+    transaction.on_commit(_publish)
+
+
+def reservation_payload(reservation):
+    """預約事件的內容"""
+    return {
+        'id': reservation.id,
+        'customer_name': reservation.customer_name,
+        'appointment_time': reservation.appointment_time,
+        'massage_plan_id': reservation.massage_plan_id,
+        'therapist_id': reservation.therapist_id,
+    }
@@ -0,0 +1,266 @@
+"""
+公開邀請依 slug 查詢的快取
+
+公開頁面與 API 每次都以 slug 查詢邀請（分割表上要探測每個月份的索引），
+之後再分別載入方案、師傅與店家；隨機 UUID 的掃描也全部打到資料庫。這裡分成兩層：
+
+- 快照：邀請連同方案、師傅、店家一次 select_related 載入後整個放進 cache，
+  記下當時的店家版本號（panel/store_cache.py），師傅、方案、店家異動時版本號遞增，
+  舊的快照在下次讀取時重新載入；邀請本身異動或刪除時由 signals 刪除快照。
+  點擊次數由背景工作以 UPDATE 累加，快照中的數字最多落後 INVITATION_SLUG_CACHE_SECONDS 秒；
+  狀態在每次讀取時依當下時間重新計算，不受背景工作推進的影響。
+- slug 篩選器：每個 process 在記憶體中保留所有 slug 的 Bloom filter。
+  不在篩選器中的 slug 一定不存在，直接回應找不到，不查資料庫也不寫入 cache；
+  誤判（約 1%）或已刪除的邀請查詢一次資料庫後，短暫快取「不存在」。
+
+新增邀請時（commit 後）遞增 cache 中的世代號，各 process 看到世代號改變時
+只補讀最近建立的 slug（依 created_at 索引）。整個重建（讀取所有 slug）在背景 thread 執行，
+不佔用請求：每 INVITATION_SLUG_FILTER_REBUILD_SECONDS 秒重建一次以移除已刪除的 slug，
+重建期間繼續使用舊的篩選器；以 bulk_create 匯入邀請後呼叫 rebuild_slug_filters 要求立即重建，
+舊的篩選器不含匯入的 slug，重建完成前視為可能存在。
+
+世代號必須存在各 process 共用的 cache，否則其他 process 看不到新邀請，會把存在的 slug 判斷為不存在；
+CACHES 是 process 內的快取（LocMemCache、DummyCache）時不使用篩選器，所有 slug 都視為可能存在。
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+from uuid import UUID
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .invitation_status import status_at
+from .models import MassageInvitation
+from .store_cache import get_store_version
+
+# 快取「不存在」的值（快照為 tuple）
+MISSING = 'missing'
+
+# 補讀新 slug 時往前多讀的時間，涵蓋較晚 commit 的交易
+REFRESH_LOOKBACK = timedelta(minutes=10)
+
+# Bloom filter 的誤判率
+FALSE_POSITIVE_RATE = 0.01
+
+GENERATION_KEY = "invitation-slugs:generation"
+REBUILD_KEY = "invitation-slugs:rebuild"
+
+
+def parse_slug(slug):
+    """slug 轉成 UUID，格式不正確時回傳 None"""
+    if isinstance(slug, UUID):
+        return slug
+    try:
+        return UUID(str(slug))
+    except ValueError:
+        return None
+
+
+def slug_cache_key(slug):
+    return f"invitation-slug:{slug}"
+
+
+# ====== slug 篩選器 ======
+
+class SlugFilter:
+    """
+    固定大小的 Bloom filter，容量用完時由 _slug_filter 重建
+    以 blake2b 的兩個 64 位元值做 double hashing 產生各個位置
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(capacity, 1024)
+        self.size = int(-self.capacity * math.log(FALSE_POSITIVE_RATE) / (math.log(2) ** 2))
+        self.hashes = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, slug):
+        digest = hashlib.blake2b(slug.bytes, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, slug):
+        for position in self._positions(slug):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, slug):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(slug))
+
+
+_filter_lock = threading.Lock()
+# filter、建立時的兩個世代號、建立時間（monotonic）、上次補讀的時間、背景重建的 thread
+_filter_state = {
+    'filter': None, 'generation': None, 'rebuild': None, 'built': 0, 'refreshed_at': None, 'building': None,
+}
+
+
+def _shared_cache():
+    """世代號能否在 process 之間共用"""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def _current_generations():
+    """(新增邀請的世代號, 要求整個重建的世代號)"""
+    values = cache.get_many([GENERATION_KEY, REBUILD_KEY])
+    for key in (GENERATION_KEY, REBUILD_KEY):
+        if values.get(key) is None:
+            # 世代號被清掉時從目前時間重新開始，各 process 會重新讀取一次
+            cache.add(key, time.time_ns(), None)
+            values[key] = cache.get(key)
+    return values[GENERATION_KEY], values[REBUILD_KEY]
+
+
+def bump_slug_generation():
+    """新增邀請後遞增世代號，各 process 下次查詢時補讀新的 slug"""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def rebuild_slug_filters():
+    """
+    要求各 process 整個重建篩選器
+    以 bulk_create 或指定 created_at 匯入邀請後使用（不經過 signals，也不在補讀的時間範圍內）
+    """
+    cache.set(REBUILD_KEY, time.time_ns(), None)
+
+
+def _build_filter(generation, rebuild):
+    """讀取所有 slug 建立新的篩選器（背景 thread 執行），完成後取代舊的"""
+    try:
+        refreshed_at = timezone.now()
+        slugs = MassageInvitation.objects.order_by().values_list('slug', flat=True)
+        slug_filter = SlugFilter(slugs.count() * 2)
+        for slug in slugs.iterator(chunk_size=10000):
+            slug_filter.add(slug)
+        with _filter_lock:
+            _filter_state.update(
+                filter=slug_filter, generation=generation, rebuild=rebuild,
+                built=time.monotonic(), refreshed_at=refreshed_at
+            )
+    finally:
+        with _filter_lock:
+            _filter_state['building'] = None
+        connection.close()
+
+
+def _start_build(generation, rebuild):
+    if _filter_state['building'] is not None:
+        return
+    thread = threading.Thread(
+        target=_build_filter, args=(generation, rebuild), name='slug-filter-rebuild', daemon=True
+    )
+    _filter_state['building'] = thread
+    thread.start()
+
+
+def _refresh_filter(generation):
+    """補讀上次之後建立的 slug（依 created_at 索引）"""
+    refreshed_at = timezone.now()
+    slug_filter = _filter_state['filter']
+    for slug in MassageInvitation.objects.filter(
+        created_at__gte=_filter_state['refreshed_at'] - REFRESH_LOOKBACK
+    ).order_by().values_list('slug', flat=True):
+        slug_filter.add(slug)
+    _filter_state.update(generation=generation, refreshed_at=refreshed_at)
+
+
+def _slug_filter():
+    """目前可用的篩選器；沒有共用快取、還沒建好或要求重建時回傳 None（視為可能存在）"""
+    if not _shared_cache():
+        return None
+    with _filter_lock:
+        # 世代號在讀取資料庫之前取得，期間新增的邀請下次會再補讀
+        generation, rebuild = _current_generations()
+        slug_filter = _filter_state['filter']
+        if slug_filter is None or rebuild != _filter_state['rebuild']:
+            _start_build(generation, rebuild)
+            return None
+        if (
+            slug_filter.count > slug_filter.capacity
+            or time.monotonic() - _filter_state['built'] >= settings.INVITATION_SLUG_FILTER_REBUILD_SECONDS
+        ):
+            # 誤判率上升或可能含已刪除的 slug，仍然不會漏掉存在的 slug，重建完成前繼續使用
+            _start_build(generation, rebuild)
+        if generation != _filter_state['generation']:
+            _refresh_filter(generation)
+        return slug_filter
+
+
+def slug_may_exist(slug):
+    """slug 可能是既有的邀請；回傳 False 時一定不存在"""
+    slug = parse_slug(slug)
+    if slug is None:
+        return False
+    slug_filter = _slug_filter()
+    return slug_filter is None or slug in slug_filter
+
+
+# ====== 快照 ======
+
+def _load(slug):
+    invitation = MassageInvitation.objects.select_related(
+        'massage_plan__store', 'therapist'
+    ).filter(slug=slug).first()
+    if invitation is None:
+        cache.set(slug_cache_key(slug), MISSING, settings.INVITATION_SLUG_MISS_CACHE_SECONDS)
+        return None
+    store_id = invitation.massage_plan.store_id
+    cache.set(
+        slug_cache_key(slug),
+        (store_id, get_store_version(store_id), invitation),
+        settings.INVITATION_SLUG_CACHE_SECONDS
+    )
+    return invitation
+
+
+def get_cached_invitation(slug):
+    """
+    依 slug 取得邀請（已載入方案、師傅與店家），找不到時回傳 None
+    回傳的是快照的複本，修改不會影響其他請求
+    """
+    slug = parse_slug(slug)
+    if slug is None:
+        return None
+
+    entry = cache.get(slug_cache_key(slug))
+    if entry == MISSING:
+        return None
+    invitation = None
+    if entry is not None:
+        store_id, version, invitation = entry
+        if version != get_store_version(store_id):
+            invitation = None
+    elif not slug_may_exist(slug):
+        return None
+
+    if invitation is None:
+        invitation = _load(slug)
+        if invitation is None:
+            return None
+    invitation.status = status_at(invitation.available_start, invitation.available_end, timezone.now())
+    return invitation
+
+
+def invalidate_cached_invitation(slug):
+    """邀請異動或刪除時，交易 commit 後刪除快照"""
+    transaction.on_commit(lambda: cache.delete(slug_cache_key(slug)))
+
+
+def invitation_created(slug):
+    """新增邀請時，交易 commit 後清掉可能存在的「不存在」快取並遞增世代號"""
+    def created():
+        cache.delete(slug_cache_key(slug))
+        bump_slug_generation()
+    transaction.on_commit(created)
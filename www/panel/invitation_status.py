@@ -0,0 +1,157 @@
+"""
+邀請狀態
+
+MassageInvitation.status 是依可預約時間物化的狀態（尚未開始 / 進行中 / 已結束）：
+儲存時由 signals 依當下時間計算，之後由背景工作 invitation.status（panel/tasks.py）
+在下一個轉換時間推進。工作以 run_at 排在最近一次轉換的時間，不需要定期掃描整張表，
+每次推進只讀取部分索引中已到期的邀請。店家依狀態的列表與計數因此只需要索引查詢。
+
+公開頁面只需要知道「是否已被預約 / 是否進行中 / 剩餘時間」，
+不需要完整序列化邀請，也不應該累加點擊次數。
+這裡把會變動的部分（是否已預約）放進 cache，
+時間相關的欄位則在每次讀取時依當下時間計算。
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Min, Value, When
+from django.utils import timezone
+
+from .models import MassageInvitation
+
+UPCOMING = MassageInvitation.UPCOMING
+ACTIVE = MassageInvitation.ACTIVE
+EXPIRED = MassageInvitation.EXPIRED
+
+# 結束時間之後才算已結束，推進的工作排在結束時間之後一點
+END_MARGIN = timedelta(milliseconds=1)
+
+
+def status_at(available_start, available_end, now):
+    """邀請在 now 時的狀態"""
+    if now < available_start:
+        return UPCOMING
+    if now <= available_end:
+        return ACTIVE
+    return EXPIRED
+
+
+def minutes_remaining_at(available_start, available_end, now):
+    """now 時距離開始（尚未開始）或結束（進行中）的分鐘數，已結束為 0"""
+    status = status_at(available_start, available_end, now)
+    if status == EXPIRED:
+        return 0
+    target = available_start if status == UPCOMING else available_end
+    return int((target - now).total_seconds() / 60)
+
+
+def status_case(now):
+    """在 SQL 中依 now 計算狀態的運算式（批次更新用）"""
+    return Case(
+        When(available_end__lt=now, then=Value(EXPIRED)),
+        When(available_start__lte=now, then=Value(ACTIVE)),
+        default=Value(UPCOMING),
+    )
+
+
+def next_transition(invitation):
+    """邀請下一次改變狀態的時間，已結束時回傳 None"""
+    if invitation.status == UPCOMING:
+        return invitation.available_start
+    if invitation.status == ACTIVE:
+        return invitation.available_end + END_MARGIN
+    return None
+
+
+def advance_statuses(now=None):
+    """把轉換時間已到的邀請推進到目前的狀態（兩次部分索引範圍更新），回傳更新筆數"""
+    now = now or timezone.now()
+    started = MassageInvitation.objects.filter(
+        status=UPCOMING, available_start__lte=now
+    ).update(status=status_case(now))
+    ended = MassageInvitation.objects.filter(
+        status=ACTIVE, available_end__lt=now
+    ).update(status=EXPIRED)
+    return started + ended
+
+
+def next_transition_at():
+    """所有邀請中最近的一次狀態轉換時間，沒有時回傳 None"""
+    start = MassageInvitation.objects.filter(status=UPCOMING).aggregate(
+        value=Min('available_start')
+    )['value']
+    end = MassageInvitation.objects.filter(status=ACTIVE).aggregate(
+        value=Min('available_end')
+    )['value']
+    candidates = [value for value in (start, end + END_MARGIN if end else None) if value]
+    return min(candidates) if candidates else None
+
+
+def status_cache_key(slug):
+    return f"invitation-status:{slug}"
+
+
+def _load_snapshot(slug):
+    """從資料庫讀取狀態快照，找不到邀請時回傳 None"""
+    invitation = MassageInvitation.objects.select_related(
+        'massage_plan'
+    ).filter(slug=slug).first()
+    if invitation is None:
+        return None
+
+    return {
+        'available_start': invitation.available_start,
+        'available_end': invitation.available_end,
+        'duration': invitation.massage_plan.duration,
+        'click_count': invitation.click_count,
+        'is_booked': invitation.has_reservation(),
+    }
+
+
+def get_status_snapshot(slug):
+    """
+    邀請狀態的快照，找不到邀請時回傳 None
+
+    快照最多快取 INVITATION_STATUS_CACHE_SECONDS 秒，
+    大量同時開啟的頁面只會打到 cache。
+    """
+    key = status_cache_key(slug)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = _load_snapshot(slug)
+        if snapshot is None:
+            return None
+        cache.set(key, snapshot, settings.INVITATION_STATUS_CACHE_SECONDS)
+    return snapshot
+
+
+def last_bookable_time(snapshot):
+    """最後可預約的時間，之後邀請視為過期"""
+    return snapshot['available_end'] - timedelta(minutes=snapshot['duration'])
+
+
+def status_from_snapshot(snapshot, now):
+    """公開狀態 API 的內容，時間相關的欄位依 now 計算"""
+    available_start = snapshot['available_start']
+    available_end = snapshot['available_end']
+    return {
+        'is_booked': snapshot['is_booked'],
+        'is_active': status_at(available_start, available_end, now) == ACTIVE,
+        'is_expired': now > last_bookable_time(snapshot),
+        'time_remaining': minutes_remaining_at(available_start, available_end, now),
+        'click_count': snapshot['click_count'],
+    }
+
+
+def get_invitation_status(slug):
+    """取得邀請狀態，找不到邀請時回傳 None"""
+    snapshot = get_status_snapshot(slug)
+    if snapshot is None:
+        return None
+    return status_from_snapshot(snapshot, timezone.now())
+
+
+def invalidate_invitation_status(slug):
+    """邀請狀態改變（例如被預約）時清除快取"""
+    cache.delete(status_cache_key(slug))
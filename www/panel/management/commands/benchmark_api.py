@@ -0,0 +1,84 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from panel.compression import COMPRESSORS, compress
+from panel.models import Store
+from panel.renderers import ORJSONRenderer, orjson
+from panel.viewsets import MassageInvitationViewSet, ReservationViewSet
+
+ENDPOINTS = (
+    ('reservations', ReservationViewSet, '/api/reservations/'),
+    ('invitations', MassageInvitationViewSet, '/api/massage-invitations/'),
+)
+
+
+def _timed(func, repeat):
+    """執行 repeat 次，回傳 (最後結果, 單次最短毫秒)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+class Command(BaseCommand):
+    help = "比較預約與邀請列表的 JSON 輸出時間與壓縮後大小"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--store', type=int, help="店家 ID（預設為預約最多的店家）")
+        parser.add_argument('--repeat', type=int, default=20, help="每項量測執行次數，取最短時間")
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("尚未安裝 orjson")
+        if options['repeat'] < 1:
+            raise CommandError("執行次數至少為 1")
+
+        store = self._get_store(options['store'])
+        repeat = options['repeat']
+        factory = APIRequestFactory()
+        self.stdout.write(f"店家 {store.id} {store.name}，每項執行 {repeat} 次取最短時間")
+
+        for label, viewset, path in ENDPOINTS:
+            request = factory.get(path)
+            force_authenticate(request, user=store.user)
+            response = viewset.as_view({'get': 'list'})(request)
+            data = response.data
+
+            stdlib_body, stdlib_ms = _timed(lambda: JSONRenderer().render(data), repeat)
+            orjson_body, orjson_ms = _timed(lambda: ORJSONRenderer().render(data), repeat)
+            if json.loads(stdlib_body) != json.loads(orjson_body):
+                raise CommandError(f"{label}：orjson 輸出與內建 renderer 不一致")
+
+            self.stdout.write(f"\n{label}：{len(data)} 筆，{len(orjson_body):,} bytes")
+            self.stdout.write(
+                f"  render  json {stdlib_ms:8.2f} ms   orjson {orjson_ms:8.2f} ms"
+                f"   ({stdlib_ms / max(orjson_ms, 0.001):.1f}x)"
+            )
+            for encoding in COMPRESSORS:
+                compressed, compress_ms = _timed(lambda: compress(orjson_body, encoding), repeat)
+                ratio = len(compressed) / max(len(orjson_body), 1)
+                self.stdout.write(
+                    f"  {encoding:<6}  {len(compressed):>10,} bytes ({ratio:6.1%})   {compress_ms:8.2f} ms"
+                )
+
+    def _get_store(self, store_id):
+        stores = Store.objects.select_related('user')
+        if store_id is not None:
+            store = stores.filter(id=store_id).first()
+            if store is None:
+                raise CommandError(f"找不到店家 {store_id}")
+            return store
+
+        store = stores.annotate(reservation_count=Count('reservations')).order_by('-reservation_count', 'id').first()
+        if store is None:
+            raise CommandError("沒有任何店家資料")
+        return store
@@ -0,0 +1,222 @@
+import math
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from panel.models import MassageInvitation, Therapist
+from panel.public_cache import plan_key, purge_paths
+
+# nginx 對沒有 Cache-Control 的 404 保存的秒數（nginx.conf 的 proxy_cache_valid）
+NOT_FOUND_SECONDS = 60
+# X-Cache-Status 中由快取回應的狀態
+CACHE_SERVED = {'HIT', 'STALE', 'UPDATING', 'REVALIDATED'}
+
+
+class _SharedCache:
+    """
+    以 nginx proxy_cache 的規則模擬共用快取：
+    依 X-Accel-Expires（其次 Cache-Control s-maxage）保存，
+    有 Set-Cookie 或 Cache-Control: private / no-store 的回應不保存
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, path, now):
+        expires = self.entries.get(path)
+        return expires is not None and expires > now
+
+    def store(self, path, response, now):
+        if response.cookies:
+            return
+        cache_control = response.get('Cache-Control', '')
+        if 'private' in cache_control or 'no-store' in cache_control:
+            return
+        seconds = response.get('X-Accel-Expires')
+        if seconds is not None:
+            seconds = int(seconds)
+        else:
+            seconds = _shared_max_age(cache_control)
+        if seconds is None and response.status_code == 404:
+            seconds = NOT_FOUND_SECONDS
+        if seconds:
+            self.entries[path] = now + seconds
+
+    def purge(self, paths):
+        for path in paths:
+            self.entries.pop(path, None)
+
+
+def _shared_max_age(cache_control):
+    for directive in cache_control.split(','):
+        name, _, value = directive.strip().partition('=')
+        if name == 's-maxage' and value.isdigit():
+            return int(value)
+    return None
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = "量測公開頁面（評論頁、邀請頁）HTTP 快取的命中率與上游負載"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000, help="請求數")
+        parser.add_argument('--pages', type=int, default=300, help="取樣的邀請與師傅頁面數")
+        parser.add_argument('--zipf', type=float, default=1.1, help="頁面熱門程度的 Zipf 指數")
+        parser.add_argument('--unknown-ratio', type=float, default=0.1, help="不存在網址（掃描）的比例")
+        parser.add_argument('--change-every', type=int, default=500,
+                            help="每隔幾個請求模擬一次方案異動（清除該方案的頁面），0 表示不異動")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--base-url', help="對實際的 nginx 送出請求（例如 http://localhost:8000），依 X-Cache-Status 統計")
+        parser.add_argument('--concurrency', type=int, default=8, help="--base-url 時同時送出的請求數")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError("請求數至少為 1")
+        rng = random.Random(options['seed'])
+        pages = self._sample_pages(options['pages'], rng)
+        if not pages:
+            raise CommandError("沒有任何公開頁面資料")
+        requests = self._traffic(pages, options, rng)
+        unique = len({path for path, _ in requests})
+        self.stdout.write(
+            f"{len(requests):,} 個請求，{unique:,} 個不同網址，"
+            f"不存在的網址 {options['unknown_ratio']:.0%}，Zipf {options['zipf']}"
+        )
+
+        if options['base_url']:
+            self._run_remote(options['base_url'], requests, options['concurrency'])
+            return
+
+        changes = self._changes(requests, options['change_every'], rng)
+        client = Client()
+        # 先讓 Django 端的快取（店家版本、邀請快照、slug 篩選器）暖機，兩次量測都在穩定狀態
+        for path in {path for path, _ in requests}:
+            client.get(path)
+
+        baseline = self._run_local(client, requests, changes, None)
+        cached = self._run_local(client, requests, changes, _SharedCache())
+        self._report(baseline, cached)
+
+    def _sample_pages(self, count, rng):
+        """(路徑, 方案 id) list，依熱門程度排序；師傅頁面沒有方案"""
+        invitations = list(
+            MassageInvitation.objects.exclude(status=MassageInvitation.EXPIRED)
+            .order_by('-created_at').values_list('slug', 'massage_plan_id')[:count]
+        )
+        therapists = list(
+            Therapist.objects.filter(enabled=True).order_by('id').values_list('id', flat=True)[:max(count // 4, 1)]
+        )
+        pages = [(reverse('public_massage_invitation', args=[slug]), plan_id) for slug, plan_id in invitations]
+        pages += [(reverse('public_review_therapist', args=[therapist_id]), None) for therapist_id in therapists]
+        rng.shuffle(pages)
+        return pages
+
+    def _traffic(self, pages, options, rng):
+        weights = [1 / math.pow(rank, options['zipf']) for rank in range(1, len(pages) + 1)]
+        requests = []
+        for page in rng.choices(pages, weights=weights, k=options['requests']):
+            if rng.random() < options['unknown_ratio']:
+                page = (reverse('public_massage_invitation', args=[uuid.UUID(int=rng.getrandbits(128), version=4)]), None)
+            requests.append(page)
+        return requests
+
+    def _changes(self, requests, every, rng):
+        """第幾個請求之前異動哪個方案：{index: plan_id}"""
+        if not every:
+            return {}
+        plan_ids = sorted({plan_id for _, plan_id in requests if plan_id})
+        if not plan_ids:
+            return {}
+        return {index: rng.choice(plan_ids) for index in range(every, len(requests), every)}
+
+    def _run_local(self, client, requests, changes, shared_cache):
+        stats = {'upstream': 0, 'queries': 0, 'ms': [], 'purged': 0, 'statuses': {}}
+        for index, (path, _) in enumerate(requests):
+            if index in changes and shared_cache is not None:
+                # 與 worker 相同的 key -> 路徑對應
+                paths = purge_paths([plan_key(changes[index])])
+                shared_cache.purge(paths)
+                stats['purged'] += len(paths)
+
+            now = time.monotonic()
+            if shared_cache is not None and shared_cache.get(path, now):
+                continue
+
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(path)
+            stats['ms'].append((time.perf_counter() - started) * 1000)
+            stats['queries'] += len(queries.captured_queries)
+            stats['upstream'] += 1
+            stats['statuses'][response.status_code] = stats['statuses'].get(response.status_code, 0) + 1
+            if shared_cache is not None:
+                shared_cache.store(path, response, now)
+        stats['total'] = len(requests)
+        return stats
+
+    def _report(self, baseline, cached):
+        self.stdout.write(f"\n{'':<12}{'送到 Django':>12}{'查詢數':>10}{'處理時間 ms':>14}{'p95 ms':>10}")
+        for label, stats in (('沒有快取', baseline), ('共用快取', cached)):
+            self.stdout.write(
+                f"{label:<12}{stats['upstream']:>12,}{stats['queries']:>10,}"
+                f"{sum(stats['ms']):>14,.0f}{_percentile(stats['ms'], 0.95):>10.2f}"
+            )
+        hits = cached['total'] - cached['upstream']
+        self.stdout.write(
+            f"\n命中率 {hits / cached['total']:.1%}，上游請求減少 "
+            f"{1 - cached['upstream'] / max(baseline['upstream'], 1):.1%}，查詢減少 "
+            f"{1 - cached['queries'] / max(baseline['queries'], 1):.1%}，處理時間減少 "
+            f"{1 - sum(cached['ms']) / max(sum(baseline['ms']), 0.001):.1%}"
+        )
+        self.stdout.write(f"方案異動清除的頁面 {cached['purged']:,} 個，上游回應狀態 {cached['statuses']}")
+
+    def _run_remote(self, base_url, requests, concurrency):
+        base_url = base_url.rstrip('/')
+
+        def fetch(path):
+            started = time.perf_counter()
+            try:
+                with urlopen(base_url + path, timeout=10) as response:
+                    response.read()
+                    status = response.headers.get('X-Cache-Status', '-')
+            except HTTPError as error:
+                status = error.headers.get('X-Cache-Status', '-')
+            return status, (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+            results = list(executor.map(fetch, [path for path, _ in requests]))
+        elapsed = time.perf_counter() - started
+
+        counts = {}
+        for status, _ in results:
+            counts[status] = counts.get(status, 0) + 1
+        served = sum(count for status, count in counts.items() if status in CACHE_SERVED)
+        latencies = [ms for _, ms in results]
+        self.stdout.write(f"X-Cache-Status：{counts}")
+        if counts.get('-') == len(results):
+            self.stdout.write(self.style.WARNING("回應沒有 X-Cache-Status，請確認 nginx 已啟用 proxy_cache"))
+        self.stdout.write(
+            f"命中率 {served / len(results):.1%}，送到上游 {len(results) - served:,} 個"
+            f"（上游請求減少 {served / len(results):.1%}）"
+        )
+        self.stdout.write(
+            f"{len(results) / elapsed:,.0f} 請求/秒，p50 {_percentile(latencies, 0.5):.2f} ms，"
+            f"p95 {_percentile(latencies, 0.95):.2f} ms"
+        )
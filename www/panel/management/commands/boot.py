@@ -0,0 +1,60 @@
+import hashlib
+import os
+import time
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+# 上次 collectstatic 時來源檔的雜湊，放在 STATIC_ROOT
+SOURCES_FINGERPRINT = 'staticfiles.sources'
+
+
+def _sources_fingerprint():
+    """所有 staticfiles finder 找到的來源檔（路徑與內容）的雜湊"""
+    files = []
+    for finder in finders.get_finders():
+        for path, storage in finder.list(['CVS', '.*', '*~']):
+            prefix = getattr(storage, 'prefix', None) or ''
+            files.append((os.path.join(prefix, path), storage.path(path)))
+    digest = hashlib.sha256()
+    for name, full_path in sorted(files):
+        digest.update(name.encode() + b'\0')
+        with open(full_path, 'rb') as source:
+            digest.update(hashlib.sha256(source.read()).digest())
+    return digest.hexdigest()
+
+
+class Command(BaseCommand):
+    help = "容器快速啟動：在同一個 process 中檢查 migration、建立分割、必要時 collectstatic"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        call_command('check_migrations', apply=True, stdout=self.stdout)
+
+        if connection.vendor == 'postgresql':
+            call_command('manage_partitions', stdout=self.stdout, stderr=self.stderr)
+
+        # 靜態檔應在部署時 collect，這裡只在來源檔與上次 collect 時不同（或缺少 manifest）時補做
+        manifest = os.path.join(settings.STATIC_ROOT, 'staticfiles.json')
+        fingerprint_path = os.path.join(settings.STATIC_ROOT, SOURCES_FINGERPRINT)
+        fingerprint = _sources_fingerprint()
+        collected = None
+        if os.path.exists(manifest) and os.path.exists(fingerprint_path):
+            with open(fingerprint_path) as fingerprint_file:
+                collected = fingerprint_file.read().strip()
+        if collected == fingerprint:
+            self.stdout.write("靜態檔與來源相同，略過 collectstatic")
+        else:
+            call_command('collectstatic', interactive=False, verbosity=0)
+            with open(fingerprint_path, 'w') as fingerprint_file:
+                fingerprint_file.write(fingerprint)
+            self.stdout.write("已執行 collectstatic")
+
+        connection.close()
+        self.stdout.write(self.style.SUCCESS(
+            f"啟動準備完成（{(time.perf_counter() - started) * 1000:.0f} ms）"
+        ))
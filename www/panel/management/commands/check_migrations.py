@@ -0,0 +1,31 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+class Command(BaseCommand):
+    help = "檢查是否有尚未套用的 migration（不產生新的 migration），可選擇直接套用"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--apply', action='store_true',
+            help="有待套用的 migration 時執行 migrate，沒有時直接結束"
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        executor = MigrationExecutor(connection)
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+        if not plan:
+            self.stdout.write("資料庫已是最新版本")
+            return
+
+        pending = [f"{migration.app_label}.{migration.name}" for migration, _ in plan]
+        if not options['apply']:
+            raise CommandError("尚有未套用的 migration：" + ", ".join(pending))
+
+        self.stdout.write(f"套用 {len(pending)} 個 migration")
+        call_command('migrate', database=options['database'], interactive=False)
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from panel.partitioning import (
+    PARTITIONED_TABLES, add_months, archive_partitions, ensure_partitions, is_partitioned
+)
+
+
+class Command(BaseCommand):
+    help = "建立預約與邀請之後幾個月的分割，並可把舊月份移到封存表"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead', type=int, default=settings.PARTITION_MONTHS_AHEAD,
+            help="預先建立的月份數（預設 PARTITION_MONTHS_AHEAD）"
+        )
+        parser.add_argument(
+            '--archive-after-months', type=int, default=settings.PARTITION_ARCHIVE_AFTER_MONTHS,
+            help="封存幾個月以前的分割，0 表示不封存（預設 PARTITION_ARCHIVE_AFTER_MONTHS）"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("資料表分割只支援 PostgreSQL")
+
+        months_ahead = options['months_ahead']
+        archive_after_months = options['archive_after_months']
+        if months_ahead < 0 or archive_after_months < 0:
+            raise CommandError("月份數不能小於 0")
+
+        for table in PARTITIONED_TABLES:
+            with connection.cursor() as cursor:
+                if not is_partitioned(cursor, table):
+                    raise CommandError(f"{table} 尚未分割，請先執行 migrate")
+
+            created, skipped = ensure_partitions(table, months_ahead)
+            for name in created:
+                self.stdout.write(f"建立分割 {name}")
+            for name in skipped:
+                self.stderr.write(f"{name} 已封存，但 {table}_default 中仍有該月資料")
+
+            if archive_after_months:
+                today = timezone.localdate()
+                before_year, before_month = add_months(today.year, today.month, -archive_after_months)
+                for name in archive_partitions(table, before_year, before_month):
+                    self.stdout.write(f"封存分割 {name}")
+
+        self.stdout.write(self.style.SUCCESS("分割維護完成"))
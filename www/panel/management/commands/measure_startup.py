@@ -0,0 +1,83 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = ['/login/', '/api/massage-plans/']
+
+# 在全新的 process 中載入 WSGI application，並直接以 WSGI 呼叫量測前兩次請求
+CHILD_SCRIPT = """
+import io, json, sys, time
+
+started = time.perf_counter()
+from project.wsgi import application
+boot_ms = (time.perf_counter() - started) * 1000
+
+
+def request(path):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+        'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+    }
+    started = time.perf_counter()
+    response = application(environ, lambda status, headers: None)
+    b''.join(response)
+    response.close()
+    return (time.perf_counter() - started) * 1000
+
+
+paths = sys.argv[1:]
+first = {path: request(path) for path in paths}
+second = {path: request(path) for path in paths}
+print(json.dumps({'boot': boot_ms, 'first': first, 'second': second}))
+"""
+
+
+class Command(BaseCommand):
+    help = "量測載入 WSGI application 的時間與第一個請求的延遲（比較有無 warm-up）"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help="每種模式啟動幾次，取中位數")
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help=f"要請求的路徑，可重複指定（預設 {' '.join(DEFAULT_PATHS)}）"
+        )
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError("執行次數至少為 1")
+        paths = options['paths'] or DEFAULT_PATHS
+
+        if settings.DEBUG:
+            self.stdout.write("注意：DEBUG 開啟時不使用 cached template loader，模板暖機沒有效果")
+
+        for warmup in (0, 1):
+            runs = [self._run_child(warmup, paths) for _ in range(options['runs'])]
+            self.stdout.write(f"\nWARMUP_ON_BOOT={warmup}")
+            self.stdout.write(f"  載入 application  {self._median(runs, 'boot'):8.1f} ms")
+            for path in paths:
+                self.stdout.write(
+                    f"  {path:<28} 第一次 {self._median(runs, 'first', path):8.1f} ms"
+                    f"   第二次 {self._median(runs, 'second', path):8.1f} ms"
+                )
+
+    def _run_child(self, warmup, paths):
+        env = dict(os.environ, WARMUP_ON_BOOT=str(warmup))
+        result = subprocess.run(
+            [sys.executable, '-c', CHILD_SCRIPT, *paths],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise CommandError(f"子 process 執行失敗：\n{result.stderr}")
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    @staticmethod
+    def _median(runs, key, path=None):
+        values = [run[key] if path is None else run[key][path] for run in runs]
+        return statistics.median(values)
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from panel.availability import rebuild_store_availability
+from panel.models import Store
+from panel.store_calendar import get_store_calendar
+
+
+def _date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f"日期格式錯誤：{value}，請使用 YYYY-MM-DD")
+
+
+class Command(BaseCommand):
+    help = "依預約、邀請與班表重新計算師傅空檔點陣圖（大量匯入或直接修改資料庫之後使用）"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--store', type=int, action='append', dest='stores', help="店家 id，可重複指定（預設全部）")
+        parser.add_argument('--start', help="開始日期 YYYY-MM-DD（店家當地日期，預設今天）")
+
+    def handle(self, *args, **options):
+        start = _date(options['start']) if options['start'] else None
+
+        stores = Store.objects.order_by('id')
+        if options['stores']:
+            stores = stores.filter(id__in=options['stores'])
+
+        total = 0
+        for store_id in stores.values_list('id', flat=True).iterator():
+            total += rebuild_store_availability(store_id, get_store_calendar(store_id), start)
+        self.stdout.write(self.style.SUCCESS(f"已重建 {total} 筆師傅每日空檔"))
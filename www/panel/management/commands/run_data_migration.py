@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from panel.data_migrations import registered_data_migrations, run_data_migration
+from panel.models import DataMigrationCheckpoint
+
+
+class Command(BaseCommand):
+    help = "分批執行已註冊的資料遷移（每批各自 commit，中斷後從上次的進度繼續）"
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help="資料遷移名稱")
+        parser.add_argument('--list', action='store_true', help="列出已註冊的資料遷移與進度")
+        parser.add_argument('--batch-size', type=int, help="每批筆數（預設 DATA_MIGRATION_BATCH_SIZE）")
+        parser.add_argument('--pause', type=float, help="每批之間暫停的秒數（預設 DATA_MIGRATION_PAUSE_SECONDS）")
+        parser.add_argument('--time-limit', type=float, help="執行超過此秒數後停止，下次從進度繼續")
+        parser.add_argument('--dry-run', action='store_true', help="每批執行後 rollback，只回報會修改的筆數")
+        parser.add_argument('--restart', action='store_true', help="忽略已記錄的進度，從頭開始")
+
+    def handle(self, *args, **options):
+        registered = registered_data_migrations()
+        if options['list']:
+            checkpoints = DataMigrationCheckpoint.objects.in_bulk(list(registered), field_name='name')
+            for name, model in registered.items():
+                state = checkpoints.get(name)
+                if not state:
+                    status = "未執行"
+                elif state.finished_at:
+                    status = f"已完成 {timezone.localtime(state.finished_at):%Y-%m-%d %H:%M}，共 {state.processed} 筆"
+                else:
+                    status = f"進行中，已處理 {state.processed} 筆（id {state.last_id}）"
+                self.stdout.write(f"{name}（{model}）：{status}")
+            return
+
+        names = options['names']
+        if not names:
+            raise CommandError("請指定資料遷移名稱，或以 --list 列出")
+        unknown = [name for name in names if name not in registered]
+        if unknown:
+            raise CommandError(f"未註冊的資料遷移：{'、'.join(unknown)}")
+        if options['batch_size'] is not None and options['batch_size'] <= 0:
+            raise CommandError("每批筆數必須大於 0")
+        if options['pause'] is not None and options['pause'] < 0:
+            raise CommandError("暫停秒數不能小於 0")
+
+        prefix = "[試跑] " if options['dry_run'] else ""
+        for name in names:
+            def progress(stats):
+                percent = stats['last_id'] * 100 / stats['max_id'] if stats['max_id'] else 100
+                self.stdout.write(
+                    f"{prefix}{name}：已處理 {stats['processed']} 筆，修改 {stats['changed']} 筆"
+                    f"（id {stats['last_id']} / {stats['max_id']}，約 {percent:.1f}%，{stats['elapsed']:.1f} 秒）"
+                )
+
+            stats = run_data_migration(
+                name,
+                batch_size=options['batch_size'],
+                pause=options['pause'],
+                time_limit=options['time_limit'],
+                dry_run=options['dry_run'],
+                restart=options['restart'],
+                progress=progress,
+            )
+            if stats['finished']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{prefix}{name}：完成，這次處理 {stats['processed']} 筆，修改 {stats['changed']} 筆"
+                ))
+            else:
+                self.stdout.write(self.style.WARNING(
+                    f"{prefix}{name}：已達時間上限，停在 id {stats['last_id']}，再次執行會從這裡繼續"
+                ))
@@ -0,0 +1,82 @@
+import os
+import signal
+import socket
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from panel.tasks import (
+    claim_tasks, purge_finished_tasks, release_stale_tasks, run_tasks,
+    schedule_customer_visits, schedule_invitation_status
+)
+
+# 回收卡住的工作、清除舊工作的間隔秒數
+MAINTENANCE_INTERVAL_SECONDS = 60
+
+
+class Command(BaseCommand):
+    help = "執行背景工作佇列（panel.tasks）"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.TASK_QUEUE_BATCH_SIZE,
+            help="每次取出的工作數（預設 TASK_QUEUE_BATCH_SIZE）"
+        )
+        parser.add_argument(
+            '--idle-sleep', type=float, default=settings.TASK_QUEUE_IDLE_SECONDS,
+            help="沒有工作時等待的秒數（預設 TASK_QUEUE_IDLE_SECONDS）"
+        )
+        parser.add_argument('--once', action='store_true', help="處理完目前所有到期的工作後結束")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size 至少為 1")
+
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        totals = defaultdict(Counter)
+        next_maintenance = 0
+        self.stdout.write(f"worker {worker_id} 開始執行")
+
+        while not self.stopping:
+            close_old_connections()
+            if time.monotonic() >= next_maintenance:
+                released = release_stale_tasks()
+                if released:
+                    self.stderr.write(f"處理 {released} 筆逾時的工作（放回佇列或標記為失敗）")
+                purge_finished_tasks()
+                # 邀請狀態與來店統計的工作會自己排定下一次；失敗或資料直接匯入時由這裡補排
+                schedule_invitation_status()
+                schedule_customer_visits()
+                next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL_SECONDS
+
+            tasks = claim_tasks(worker_id, options['batch_size'])
+            if not tasks:
+                if options['once']:
+                    break
+                time.sleep(options['idle_sleep'])
+                continue
+
+            for name, (done, failed, ms) in run_tasks(tasks).items():
+                totals[name].update({'done': done, 'failed': failed, 'ms': ms})
+                self.stdout.write(
+                    f"{name}: 完成 {done} 筆、失敗 {failed} 筆，平均 {ms / max(done + failed, 1):.1f} ms"
+                )
+
+        for name, counter in totals.items():
+            count = counter['done'] + counter['failed']
+            self.stdout.write(
+                f"總計 {name}: 完成 {counter['done']} 筆、失敗 {counter['failed']} 筆，"
+                f"平均 {counter['ms'] / max(count, 1):.1f} ms"
+            )
+        self.stdout.write("worker 結束")
+
+    def _stop(self, signum, frame):
+        # 目前這一批執行完才結束
+        self.stopping = True
@@ -0,0 +1,435 @@
+import math
+import multiprocessing
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+from panel.customers import rebuild_customer_stats
+from panel.invitation_cache import rebuild_slug_filters
+from panel.invitation_status import status_at
+from panel.revenue import rebuild_revenue
+from panel.survey_search import update_search_vectors
+from panel.models import (
+    Customer, MassageInvitation, MassagePlan, Reservation, RevenueDaily, ServiceSurvey, Store, Therapist
+)
+from panel.partitioning import PARTITIONED_TABLES, ensure_partitions, is_partitioned
+from panel.store_calendar import get_store_calendar
+from panel.tasks import schedule_invitation_status
+
+SURNAMES = '陳林黃張李王吳劉蔡楊許鄭謝洪郭邱曾廖賴徐周葉蘇莊呂江何蕭羅高潘簡朱鍾游彭詹胡施沈余盧梁趙顏柯翁魏孫戴范方宋鄧'
+GIVEN_NAMES = '志明俊傑家豪雅婷怡君淑芬美玲宗翰建宏冠宇承恩佳穎宜蓁彥廷欣子涵柏詩思妤文華秀英國強麗珍'
+
+# (名稱, 分鐘, 價格)
+PLAN_TEMPLATES = [
+    ('全身指壓', 60, 1200), ('全身精油', 90, 1800), ('腳底按摩', 40, 700),
+    ('肩頸放鬆', 30, 600), ('熱石精油', 120, 2600), ('運動按摩', 90, 2000),
+    ('頭部舒壓', 30, 500), ('全身經絡', 120, 2400),
+]
+
+SURVEY_COMMENTS = [
+    '', '', '', '力道剛好，很舒服', '師傅很專業', '環境乾淨', '下次還會再來',
+    '力道稍微太重', '時間有點趕', '肩頸放鬆很多', '服務親切', '等候時間有點久',
+]
+RATING_WEIGHTS = [2, 3, 10, 30, 55]  # 1~5 星
+
+# 一週各天（週一=0）與一天各時段的需求比例
+WEEKDAY_FACTORS = [0.8, 0.8, 0.85, 0.9, 1.15, 1.4, 1.3]
+HOUR_FACTORS = {
+    9: 0.4, 10: 0.5, 11: 0.6, 12: 0.8, 13: 0.9, 14: 1.0, 15: 1.0,
+    16: 1.0, 17: 1.1, 18: 1.3, 19: 1.6, 20: 1.5, 21: 1.0, 22: 0.6,
+}
+# 預約開始時間的間隔（分鐘），實務上多為整點或半點
+START_STEP_MINUTES = 30
+
+
+def _poisson(rng, mean):
+    """平均為 mean 的 Poisson 亂數（mean 不大時使用 Knuth 演算法）"""
+    if mean <= 0:
+        return 0
+    if mean > 30:
+        return max(0, round(rng.gauss(mean, math.sqrt(mean))))
+    limit = math.exp(-mean)
+    count, product = 0, rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def _person_name(rng):
+    return rng.choice(SURNAMES) + rng.choice(GIVEN_NAMES) + rng.choice(GIVEN_NAMES)
+
+
+def _phone(rng):
+    return f"09{rng.randrange(10 ** 8):08d}"
+
+
+def _season(day):
+    """全年需求變化：以年中為低點，年底到農曆年前為高點"""
+    return 1 + 0.15 * math.cos(2 * math.pi * (day.timetuple().tm_yday - 15) / 365)
+
+
+# fork 出的 worker 由此取得 command 與店家（避免 pickle 整個 command）
+_worker_state = None
+
+
+def _seed_store_in_worker(index):
+    command, stores = _worker_state
+    command.counts = {}
+    command.buffers = {}
+    command._create_store_data(index, stores[index])
+    command._flush_all()
+    return command.counts
+
+
+@contextmanager
+def _explicit_timestamps(*models):
+    """
+    bulk_create 會把 auto_now / auto_now_add 欄位覆寫為現在時間，
+    產生歷史資料時暫時關閉，改用物件上設定的時間
+    """
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = "產生效能測試用的假資料（店家、師傅、方案、預約、邀請、問卷），相同 --seed 產生相同資料"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stores', type=int, default=1, help="店家數")
+        parser.add_argument('--therapists', type=int, default=10, help="每家店的師傅數")
+        parser.add_argument('--plans', type=int, default=5, help="每家店的方案數")
+        parser.add_argument('--days', type=int, default=180, help="產生今天以前幾天的歷史資料")
+        parser.add_argument('--future-days', type=int, default=14, help="產生今天以後幾天的預約")
+        parser.add_argument('--reservations-per-day', type=float, default=40, help="每家店每天平均預約數")
+        parser.add_argument('--invitations-per-day', type=float, default=5, help="每家店每天平均邀請數")
+        parser.add_argument('--survey-rate', type=float, default=0.3, help="已完成的預約填寫問卷的比例")
+        parser.add_argument('--seed', type=int, default=0, help="亂數種子")
+        parser.add_argument('--today', help="以此日期（YYYY-MM-DD）為今天，固定後每次產生的時間都相同")
+        parser.add_argument('--prefix', default='seed', help="店家帳號名稱前綴，不可與既有帳號重複")
+        parser.add_argument('--password', help="店家帳號密碼（預設為不可登入）")
+        parser.add_argument('--chunk-size', type=int, default=5000, help="每次 bulk_create 的筆數")
+        parser.add_argument('--workers', type=int, default=1, help="同時產生資料的 process 數（依店家分配）")
+
+    def handle(self, *args, **options):
+        for name in ('stores', 'therapists', 'plans', 'chunk_size', 'workers'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} 至少為 1")
+        if options['days'] < 0 or options['future_days'] < 0:
+            raise CommandError("天數不能小於 0")
+        if User.objects.filter(username__startswith=options['prefix']).exists():
+            raise CommandError(f"已有 {options['prefix']} 開頭的帳號，請改用其他 --prefix")
+
+        self.options = options
+        self.chunk_size = options['chunk_size']
+        self.counts = {}
+        self.buffers = {}
+        if options['today']:
+            try:
+                self.today = datetime.strptime(options['today'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("--today 格式應為 YYYY-MM-DD")
+            # 固定日期時以當天中午為現在時間，問卷與點擊數才會每次相同
+            self.now = timezone.make_aware(datetime.combine(self.today, dt_time(12)))
+        else:
+            self.today = timezone.localdate()
+            self.now = timezone.now()
+        self.first_day = self.today - timedelta(days=options['days'])
+        self.last_day = self.today + timedelta(days=options['future_days'])
+        started = time.perf_counter()
+
+        self._prepare_partitions()
+        with _explicit_timestamps(Store, Therapist, MassagePlan, Customer, Reservation, MassageInvitation):
+            stores = self._create_stores()
+            if options['workers'] > 1:
+                self._seed_stores_parallel(stores, options['workers'])
+            else:
+                for index, store in enumerate(stores):
+                    self._create_store_data(index, store)
+                    self._report_progress(index + 1, len(stores))
+                self._flush_all()
+        self._rebuild_customer_stats(stores)
+        # 營收彙總同樣由 signals 維護，寫完後依預約重建
+        for store in stores:
+            rebuild_revenue(store.id)
+        # 問卷的檢索向量在 pre_save 產生，bulk_create 不會經過
+        update_search_vectors(
+            ServiceSurvey.objects.filter(store__in=stores, search_vector__isnull=True),
+            batch_size=self.chunk_size
+        )
+        # 邀請狀態在建立時依 self.now 計算，之後的轉換交給 worker
+        schedule_invitation_status()
+        # 邀請以 bulk_create 寫入，公開頁面的 slug 篩選器要重建才認得
+        rebuild_slug_filters()
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for model in (Therapist, MassagePlan, Customer, Reservation, RevenueDaily, MassageInvitation,
+                              ServiceSurvey):
+                    cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+
+        elapsed = time.perf_counter() - started
+        total = sum(self.counts.values())
+        for label, count in self.counts.items():
+            self.stdout.write(f"  {label:<20} {count:>12,}")
+        self.stdout.write(self.style.SUCCESS(
+            f"共 {total:,} 筆，{elapsed:.1f} 秒（{total / max(elapsed, 0.001):,.0f} 筆/秒）"
+        ))
+
+    def _report_progress(self, done, total):
+        if done % 10 == 0 or done == total:
+            self.stdout.write(f"  已完成 {done}/{total} 家店")
+
+    def _seed_stores_parallel(self, stores, workers):
+        """
+        每家店的亂數種子各自獨立，分給多個 process 產生的資料與單一 process 相同；
+        Python 端建立 model 與組 SQL 是主要成本，多個 process 可以同時寫入
+        """
+        global _worker_state
+        self._flush_all()
+        # 子 process 不能共用父 process 的資料庫連線
+        connections.close_all()
+        _worker_state = (self, stores)
+        try:
+            with multiprocessing.get_context('fork').Pool(workers) as pool:
+                results = pool.imap_unordered(_seed_store_in_worker, range(len(stores)))
+                for done, counts in enumerate(results, start=1):
+                    for label, count in counts.items():
+                        self.counts[label] = self.counts.get(label, 0) + count
+                    self._report_progress(done, len(stores))
+        finally:
+            _worker_state = None
+
+    # ====== 寫入 ======
+
+    def _add(self, obj):
+        buffer = self.buffers.setdefault(type(obj), [])
+        buffer.append(obj)
+        if len(buffer) >= self.chunk_size:
+            self._flush(type(obj))
+
+    def _flush(self, model):
+        buffer = self.buffers.get(model)
+        if not buffer:
+            return
+        model.objects.bulk_create(buffer, batch_size=self.chunk_size)
+        label = model._meta.model_name
+        self.counts[label] = self.counts.get(label, 0) + len(buffer)
+        self.buffers[model] = []
+
+    def _flush_all(self):
+        for model in list(self.buffers):
+            self._flush(model)
+
+    def _prepare_partitions(self):
+        """先建立資料期間每個月的分割，避免大量資料寫進 default 分割後再搬移"""
+        if connection.vendor != 'postgresql':
+            return
+        months = set()
+        # 邀請以結束時間分割，可能落在最後一天的隔天
+        day = self.first_day.replace(day=1)
+        while day <= self.last_day + timedelta(days=1):
+            months.add((day.year, day.month))
+            day = (day + timedelta(days=32)).replace(day=1)
+        for table in PARTITIONED_TABLES:
+            with connection.cursor() as cursor:
+                if not is_partitioned(cursor, table):
+                    continue
+            ensure_partitions(table, settings.PARTITION_MONTHS_AHEAD, extra_months=months)
+
+    # ====== 店家、師傅、方案 ======
+
+    def _create_stores(self):
+        options = self.options
+        prefix = options['prefix']
+        password = make_password(options['password']) if options['password'] else make_password(None)
+        created_at = timezone.make_aware(datetime.combine(self.first_day, dt_time.min)) - timedelta(days=30)
+
+        usernames = [f"{prefix}{index + 1:05d}" for index in range(options['stores'])]
+        User.objects.bulk_create(
+            [User(username=username, password=password) for username in usernames],
+            batch_size=self.chunk_size
+        )
+        user_ids = dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+        self.counts['user'] = len(user_ids)
+
+        for index, username in enumerate(usernames):
+            rng = random.Random(f"{options['seed']}:store:{index}")
+            self._add(Store(
+                user_id=user_ids[username], name=f"測試店家 {index + 1:05d}",
+                address=f"台北市測試路 {index + 1} 號", phone=_phone(rng),
+                created_at=created_at, updated_at=created_at,
+            ))
+        self._flush(Store)
+        stores = {store.user_id: store for store in Store.objects.filter(user_id__in=user_ids.values())}
+        return [stores[user_ids[username]] for username in usernames]
+
+    def _create_store_data(self, index, store):
+        options = self.options
+        rng = random.Random(f"{options['seed']}:data:{index}")
+        created_at = store.created_at
+
+        for number in range(options['therapists']):
+            self._add(Therapist(
+                store=store, name=_person_name(rng), nick_name=f"{number + 1} 號",
+                phone=_phone(rng), created_at=created_at, updated_at=created_at,
+            ))
+        for number in range(options['plans']):
+            name, duration, price = PLAN_TEMPLATES[number % len(PLAN_TEMPLATES)]
+            if number >= len(PLAN_TEMPLATES):
+                name = f"{name} {number // len(PLAN_TEMPLATES) + 1}"
+            price = round(price * rng.uniform(0.9, 1.1) / 50) * 50
+            self._add(MassagePlan(
+                store=store, name=name, duration=duration, price=Decimal(price),
+                created_at=created_at, updated_at=created_at,
+            ))
+        self._flush(Therapist)
+        self._flush(MassagePlan)
+
+        therapist_ids = list(
+            Therapist.objects.filter(store=store).order_by('id').values_list('id', flat=True)
+        )
+        plans = list(MassagePlan.objects.filter(store=store).order_by('id').values_list('id', 'duration', 'price'))
+        # 越短的方案越熱門
+        plan_weights = [1 / duration for _, duration, _ in plans]
+        # 每位師傅每週固定休一天
+        days_off = {therapist_id: rng.randrange(7) for therapist_id in therapist_ids}
+
+        expected = options['reservations_per_day'] * (options['days'] + options['future_days'])
+        customers = [(_person_name(rng), _phone(rng)) for _ in range(max(50, int(expected / 4)))]
+        customers = self._create_customers(store, customers)
+
+        calendar = get_store_calendar(store)
+        day = self.first_day
+        while day <= self.last_day:
+            self._create_day(rng, store, calendar, day, therapist_ids, days_off, plans, plan_weights, customers)
+            day += timedelta(days=1)
+
+    def _create_customers(self, store, customers):
+        """建立客戶並回傳 (姓名, 電話, 客戶 id)；同一支電話以第一次出現的姓名建立"""
+        names = {}
+        for name, phone in customers:
+            names.setdefault(phone, name)
+        for phone, name in names.items():
+            self._add(Customer(
+                store=store, phone=phone, name=name,
+                created_at=store.created_at, updated_at=store.created_at,
+            ))
+        self._flush(Customer)
+        ids = dict(Customer.objects.filter(store=store).values_list('phone', 'id'))
+        return [(name, phone, ids[phone]) for name, phone in customers]
+
+    def _rebuild_customer_stats(self, stores):
+        """bulk_create 不會觸發 signals，寫完後一次計算客戶的來店統計"""
+        customer_ids = list(
+            Customer.objects.filter(store__in=stores).order_by('id').values_list('id', flat=True)
+        )
+        for start in range(0, len(customer_ids), self.chunk_size):
+            rebuild_customer_stats(customer_ids[start:start + self.chunk_size])
+
+    # ====== 每天的預約、問卷與邀請 ======
+
+    def _start_candidates(self, calendar, day):
+        """當天可作為預約開始時間的位移與權重，以及營業結束的位移"""
+        offsets = [offset for offset, _ in calendar.slots(day)]
+        if not offsets:
+            return [], 0
+        day_end = offsets[-1] + calendar.slot_minutes
+        candidates = [
+            (offset, HOUR_FACTORS.get(offset // 60, 0.5))
+            for offset in offsets if offset % START_STEP_MINUTES == 0
+        ]
+        return candidates, day_end
+
+    def _create_day(self, rng, store, calendar, day, therapist_ids, days_off, plans, plan_weights, customers):
+        options = self.options
+        candidates, day_end = self._start_candidates(calendar, day)
+        if not candidates:
+            return
+        demand = WEEKDAY_FACTORS[day.weekday()] * _season(day)
+        if day > self.today:
+            # 越後面的日期預約越少
+            demand *= max(0.1, 1 - (day - self.today).days / (options['future_days'] + 1))
+        mean_per_therapist = options['reservations_per_day'] * demand / len(therapist_ids)
+
+        for therapist_id in therapist_ids:
+            if days_off[therapist_id] == day.weekday():
+                continue
+            count = _poisson(rng, mean_per_therapist)
+            if count:
+                self._create_reservations(
+                    rng, store, calendar, day, day_end, candidates, therapist_id, count,
+                    plans, plan_weights, customers
+                )
+
+        for _ in range(_poisson(rng, options['invitations_per_day'] * WEEKDAY_FACTORS[day.weekday()])):
+            self._create_invitation(rng, store, calendar, day, day_end, candidates, therapist_ids, plans)
+
+    def _create_reservations(self, rng, store, calendar, day, day_end, candidates, therapist_id, count,
+                             plans, plan_weights, customers):
+        # 依時段權重不重複抽樣（Efraimidis-Spirakis），再依序放入不重疊的時段
+        ordered = sorted(candidates, key=lambda item: rng.random() ** (1 / item[1]), reverse=True)
+        booked = []
+        for offset, _ in ordered:
+            plan_id, duration, price = rng.choices(plans, plan_weights)[0]
+            end = offset + duration
+            if end > day_end or any(offset < other_end and other_start < end for other_start, other_end in booked):
+                continue
+            booked.append((offset, end))
+
+            appointment_time = calendar.at(day, offset)
+            created_at = min(appointment_time - timedelta(hours=rng.uniform(1, 14 * 24)), self.now)
+            name, phone, customer_id = customers[int(len(customers) * rng.random() ** 2)]
+            self._add(Reservation(
+                store=store, customer_id=customer_id, customer_name=name, customer_phone=phone,
+                appointment_time=appointment_time, massage_plan_id=plan_id, therapist_id=therapist_id,
+                list_price=price, price_charged=price,
+                created_at=created_at, updated_at=created_at,
+            ))
+
+            finished_at = appointment_time + timedelta(minutes=duration)
+            if finished_at < self.now and rng.random() < self.options['survey_rate']:
+                self._add(ServiceSurvey(
+                    therapist_id=therapist_id, store=store,
+                    rating=rng.choices(range(1, 6), RATING_WEIGHTS)[0],
+                    comment=rng.choice(SURVEY_COMMENTS),
+                    created_at=min(finished_at + timedelta(hours=rng.uniform(0, 48)), self.now),
+                ))
+            if len(booked) >= count:
+                break
+
+    def _create_invitation(self, rng, store, calendar, day, day_end, candidates, therapist_ids, plans):
+        plan_id, duration, price = rng.choice(plans)
+        offset = rng.choice(candidates)[0]
+        length = duration + rng.choice([0, 30, 60, 120])
+        available_start = calendar.at(day, offset)
+        available_end = calendar.at(day, min(offset + length, max(day_end, offset + duration)))
+        created_at = min(available_start - timedelta(hours=rng.uniform(1, 72)), self.now)
+        clicks = int(rng.lognormvariate(1.5, 1.0)) if created_at < self.now else 0
+        self._add(MassageInvitation(
+            therapist_id=rng.choice(therapist_ids), massage_plan_id=plan_id, store=store,
+            available_start=available_start, available_end=available_end,
+            discount_price=(price * Decimal(rng.choice(['0.7', '0.75', '0.8', '0.85', '0.9']))).quantize(Decimal('1')),
+            slug=uuid.UUID(int=rng.getrandbits(128), version=4), click_count=clicks,
+            status=status_at(available_start, available_end, self.now),
+            created_at=created_at, updated_at=created_at,
+        ))
@@ -0,0 +1,73 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panel', '0015_auto_20250818_1146'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TherapistShift',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, '星期一'), (1, '星期二'), (2, '星期三'), (3, '星期四'), (4, '星期五'), (5, '星期六'), (6, '星期日')], verbose_name='星期')),
+                ('start_time', models.TimeField(verbose_name='上班時間')),
+                ('end_time', models.TimeField(verbose_name='下班時間')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='建立時間')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新時間')),
+                ('therapist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shifts', to='panel.therapist', verbose_name='師傅')),
+            ],
+            options={
+                'verbose_name': '師傅班表',
+                'verbose_name_plural': '師傅班表',
+                'ordering': ['therapist', 'weekday', 'start_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TherapistScheduleException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('is_day_off', models.BooleanField(default=True, verbose_name='休假')),
+                ('start_time', models.TimeField(blank=True, null=True, verbose_name='上班時間')),
+                ('end_time', models.TimeField(blank=True, null=True, verbose_name='下班時間')),
+                ('notes', models.TextField(blank=True, null=True, verbose_name='備註')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='建立時間')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新時間')),
+                ('therapist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_exceptions', to='panel.therapist', verbose_name='師傅')),
+            ],
+            options={
+                'verbose_name': '師傅班表例外',
+                'verbose_name_plural': '師傅班表例外',
+                'ordering': ['therapist', 'date', 'start_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TherapistDayAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('working_bits', models.BinaryField(verbose_name='上班點陣圖')),
+                ('free_bits', models.BinaryField(verbose_name='空檔點陣圖')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新時間')),
+                ('therapist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='day_availabilities', to='panel.therapist', verbose_name='師傅')),
+            ],
+            options={
+                'verbose_name': '師傅每日空檔',
+                'verbose_name_plural': '師傅每日空檔',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='therapistscheduleexception',
+            index=models.Index(fields=['therapist', 'date'], name='panel_thera_therapi_b75811_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='therapistdayavailability',
+            unique_together={('therapist', 'date')},
+        ),
+    ]
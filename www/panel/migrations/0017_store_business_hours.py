@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panel', '0016_therapist_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='store',
+            name='slot_minutes',
+            field=models.PositiveSmallIntegerField(default=30, verbose_name='預約時段間隔（分鐘）'),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='time_zone',
+            field=models.CharField(default='Asia/Taipei', max_length=64, verbose_name='時區'),
+        ),
+        migrations.CreateModel(
+            name='StoreBusinessHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, '星期一'), (1, '星期二'), (2, '星期三'), (3, '星期四'), (4, '星期五'), (5, '星期六'), (6, '星期日')], verbose_name='星期')),
+                ('open_time', models.TimeField(verbose_name='開始營業')),
+                ('close_time', models.TimeField(verbose_name='結束營業')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='建立時間')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新時間')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='business_hours', to='panel.store', verbose_name='店家')),
+            ],
+            options={
+                'verbose_name': '營業時間',
+                'verbose_name_plural': '營業時間',
+                'ordering': ['store', 'weekday', 'open_time'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panel', '0017_store_business_hours'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='massageinvitation',
+            index=models.Index(fields=['created_at'], name='panel_massa_created_ba4dd3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['appointment_time'], name='panel_reser_appoint_9aba4b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['store', 'appointment_time'], name='panel_reser_store_i_76c55f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicesurvey',
+            index=models.Index(fields=['created_at'], name='panel_servi_created_14a386_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panel', '0018_admin_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='therapist',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['store', 'created_at'], name='therapist_store_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='therapist',
+            index=models.Index(condition=models.Q(('enabled', True), ('is_deleted', False)), fields=['store', 'name'], name='therapist_store_enabled_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:45
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panel', '0019_therapist_soft_delete_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='工作名稱')),
+                ('payload', models.JSONField(default=dict, verbose_name='參數')),
+                ('status', models.CharField(choices=[('pending', '等待中'), ('running', '執行中'), ('done', '完成'), ('failed', '失敗')], default='pending', max_length=10, verbose_name='狀態')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='已執行次數')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5, verbose_name='最多執行次數')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='預定執行時間')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='開始執行時間')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='執行的 worker')),
+                ('duration_ms', models.FloatField(blank=True, null=True, verbose_name='執行毫秒數')),
+                ('last_error', models.TextField(blank=True, verbose_name='最後錯誤')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='建立時間')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成時間')),
+            ],
+            options={
+                'verbose_name': '背景工作',
+                'verbose_name_plural': '背景工作',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['run_at', 'id'], name='task_pending_run_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'running')), fields=['locked_at'], name='task_running_locked_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'finished_at'], name='panel_task_status_a94393_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panel', '0020_task_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Customer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone', models.CharField(max_length=20, verbose_name='電話（僅數字）')),
+                ('name', models.CharField(max_length=255, verbose_name='姓名')),
+                ('visit_count', models.PositiveIntegerField(default=0, verbose_name='來店次數')),
+                ('last_visit_at', models.DateTimeField(blank=True, null=True, verbose_name='最近來店時間')),
+                ('lifetime_spend', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='累計消費')),
+                ('next_visit_at', models.DateTimeField(blank=True, null=True, verbose_name='下次來店時間')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='建立時間')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新時間')),
+            ],
+            options={
+                'verbose_name': '客戶',
+                'verbose_name_plural': '客戶',
+                'ordering': ['-last_visit_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='store',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='customers', to='panel.store', verbose_name='店家'),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='customer',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reservations', to='panel.customer', verbose_name='客戶'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['customer', 'appointment_time'], name='panel_reser_custome_689cb2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['phone'], name='customer_phone_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(condition=models.Q(('next_visit_at__isnull', False)), fields=['next_visit_at'], name='customer_next_visit_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='customer',
+            constraint=models.UniqueConstraint(fields=('store', 'phone'), name='customer_store_phone_uniq'),
+        ),
+    ]
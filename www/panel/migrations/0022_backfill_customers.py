@@ -0,0 +1,113 @@
+from django.db import migrations, transaction
+from django.db.models import Count, Max, Min, Sum
+from django.utils import timezone
+
+from panel.customers import normalize_phone
+
+BATCH_SIZE = 2000
+
+
+def link_reservations(apps, schema_editor):
+    """
+    依店家與正規化電話建立客戶並關聯既有預約，每批各自 commit；
+    中斷後重新執行只會處理還沒關聯的預約
+    """
+    Customer = apps.get_model('panel', 'Customer')
+    Reservation = apps.get_model('panel', 'Reservation')
+
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Reservation.objects.filter(customer__isnull=True, id__gt=last_id)
+                .order_by('id')
+                .values_list('id', 'store_id', 'customer_name', 'customer_phone')[:BATCH_SIZE]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            names = {}
+            for _, store_id, name, phone in rows:
+                phone = normalize_phone(phone)
+                if phone:
+                    names[(store_id, phone)] = name
+            Customer.objects.bulk_create(
+                [Customer(store_id=store_id, phone=phone, name=name)
+                 for (store_id, phone), name in names.items()],
+                ignore_conflicts=True
+            )
+            customer_ids = {
+                (store_id, phone): customer_id
+                for customer_id, store_id, phone in Customer.objects.filter(
+                    store_id__in={store_id for store_id, _ in names},
+                    phone__in={phone for _, phone in names},
+                ).values_list('id', 'store_id', 'phone')
+            }
+
+            reservations = []
+            for reservation_id, store_id, _, phone in rows:
+                customer_id = customer_ids.get((store_id, normalize_phone(phone)))
+                if customer_id:
+                    reservations.append(Reservation(id=reservation_id, customer_id=customer_id))
+            Reservation.objects.bulk_update(reservations, ['customer_id'], batch_size=500)
+
+
+def rebuild_stats(apps, schema_editor):
+    """只計入預約時間已到的預約；之後的由背景工作在 next_visit_at 推進"""
+    Customer = apps.get_model('panel', 'Customer')
+    Reservation = apps.get_model('panel', 'Reservation')
+
+    now = timezone.now()
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            customer_ids = list(
+                Customer.objects.filter(id__gt=last_id).order_by('id')
+                .values_list('id', flat=True)[:BATCH_SIZE]
+            )
+            if not customer_ids:
+                break
+            last_id = customer_ids[-1]
+
+            customers = {customer_id: Customer(id=customer_id) for customer_id in customer_ids}
+            for row in (
+                Reservation.objects.filter(customer_id__in=customer_ids, appointment_time__lte=now)
+                .values('customer_id')
+                .annotate(count=Count('id'), last=Max('appointment_time'), spend=Sum('massage_plan__price'))
+                .order_by()
+            ):
+                customer = customers[row['customer_id']]
+                customer.visit_count = row['count']
+                customer.last_visit_at = row['last']
+                customer.lifetime_spend = row['spend']
+            for row in (
+                Reservation.objects.filter(customer_id__in=customer_ids, appointment_time__gt=now)
+                .values('customer_id')
+                .annotate(next=Min('appointment_time'))
+                .order_by()
+            ):
+                customers[row['customer_id']].next_visit_at = row['next']
+            Customer.objects.bulk_update(
+                customers.values(),
+                ['visit_count', 'last_visit_at', 'lifetime_spend', 'next_visit_at'],
+                batch_size=500
+            )
+
+
+def backfill_customers(apps, schema_editor):
+    link_reservations(apps, schema_editor)
+    rebuild_stats(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+    # 每批各自 commit，大量資料時不會長時間鎖住整張表
+    atomic = False
+
+    dependencies = [
+        ('panel', '0021_customer'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_customers, migrations.RunPython.noop),
+    ]
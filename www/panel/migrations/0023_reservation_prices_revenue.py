@@ -0,0 +1,54 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panel', '0022_backfill_customers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='list_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='原價'),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='price_charged',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='實收金額'),
+        ),
+        migrations.CreateModel(
+            name='RevenueDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('reservation_count', models.IntegerField(default=0, verbose_name='預約數')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='實收金額')),
+                ('list_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='原價金額')),
+                ('massage_plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revenue_daily', to='panel.massageplan', verbose_name='方案')),
+                ('store', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='revenue_daily', to='panel.store', verbose_name='店家')),
+                ('therapist', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='revenue_daily', to='panel.therapist', verbose_name='師傅')),
+            ],
+            options={
+                'verbose_name': '每日營收',
+                'verbose_name_plural': '每日營收',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='revenuedaily',
+            index=models.Index(fields=['store', 'date'], name='revenue_daily_store_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='revenuedaily',
+            constraint=models.UniqueConstraint(condition=models.Q(('therapist__isnull', False)), fields=('store', 'date', 'therapist', 'massage_plan'), name='revenue_daily_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='revenuedaily',
+            constraint=models.UniqueConstraint(condition=models.Q(('therapist__isnull', True)), fields=('store', 'date', 'massage_plan'), name='revenue_daily_no_therapist_uniq'),
+        ),
+    ]
@@ -0,0 +1,122 @@
+import re
+from collections import defaultdict
+from decimal import Decimal
+
+import pytz
+from django.db import migrations, transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+BATCH_SIZE = 2000
+
+# PublicMassageInvitationViewSet.book 寫入的備註
+INVITATION_NOTES = re.compile(r'原價: ([\d.]+), 優惠價: ([\d.]+)')
+
+
+def backfill_prices(apps, schema_editor):
+    """
+    既有預約的價格快照：優惠邀請預約從備註取得原價與優惠價，其餘以方案目前價格計算
+    每批各自 commit，重新執行只處理還沒有價格的預約
+    """
+    Reservation = apps.get_model('panel', 'Reservation')
+
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Reservation.objects.filter(list_price__isnull=True, id__gt=last_id)
+                .order_by('id')
+                .values_list('id', 'notes', 'massage_plan__price')[:BATCH_SIZE]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            reservations = []
+            for reservation_id, notes, plan_price in rows:
+                list_price = price_charged = plan_price
+                match = INVITATION_NOTES.search(notes or '')
+                if match:
+                    list_price, price_charged = Decimal(match.group(1)), Decimal(match.group(2))
+                reservations.append(Reservation(
+                    id=reservation_id, list_price=list_price, price_charged=price_charged
+                ))
+            Reservation.objects.bulk_update(
+                reservations, ['list_price', 'price_charged'], batch_size=500
+            )
+
+
+def rebuild_revenue(apps, schema_editor):
+    """依預約建立每日營收彙總（每家店一個交易）"""
+    Store = apps.get_model('panel', 'Store')
+    Reservation = apps.get_model('panel', 'Reservation')
+    RevenueDaily = apps.get_model('panel', 'RevenueDaily')
+
+    for store_id, time_zone in Store.objects.order_by('id').values_list('id', 'time_zone'):
+        tz = pytz.timezone(time_zone)
+        totals = defaultdict(lambda: [0, Decimal('0'), Decimal('0')])
+        rows = Reservation.objects.filter(store_id=store_id).values_list(
+            'appointment_time', 'therapist_id', 'massage_plan_id', 'list_price', 'price_charged'
+        ).order_by()
+        for appointment_time, therapist_id, massage_plan_id, list_price, price_charged in rows.iterator():
+            total = totals[(timezone.localtime(appointment_time, tz).date(), therapist_id, massage_plan_id)]
+            total[0] += 1
+            total[1] += price_charged
+            total[2] += list_price
+
+        with transaction.atomic():
+            RevenueDaily.objects.filter(store_id=store_id).delete()
+            RevenueDaily.objects.bulk_create([
+                RevenueDaily(
+                    store_id=store_id, date=day, therapist_id=therapist_id, massage_plan_id=massage_plan_id,
+                    reservation_count=count, revenue=revenue, list_revenue=list_revenue,
+                )
+                for (day, therapist_id, massage_plan_id), (count, revenue, list_revenue) in totals.items()
+            ], batch_size=1000)
+
+
+def rebuild_customer_spend(apps, schema_editor):
+    """客戶累計消費改以實收金額計算（同樣只計入預約時間已到的預約）"""
+    Customer = apps.get_model('panel', 'Customer')
+    Reservation = apps.get_model('panel', 'Reservation')
+
+    now = timezone.now()
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            customer_ids = list(
+                Customer.objects.filter(id__gt=last_id).order_by('id')
+                .values_list('id', flat=True)[:BATCH_SIZE]
+            )
+            if not customer_ids:
+                break
+            last_id = customer_ids[-1]
+
+            customers = [
+                Customer(id=row['customer_id'], lifetime_spend=row['spend'])
+                for row in Reservation.objects.filter(customer_id__in=customer_ids, appointment_time__lte=now)
+                .values('customer_id')
+                .annotate(spend=Coalesce(Sum('price_charged'), Decimal('0')))
+                .order_by()
+            ]
+            Customer.objects.bulk_update(customers, ['lifetime_spend'], batch_size=500)
+
+
+def backfill(apps, schema_editor):
+    backfill_prices(apps, schema_editor)
+    rebuild_revenue(apps, schema_editor)
+    rebuild_customer_spend(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+    # 每批各自 commit，大量資料時不會長時間鎖住整張表
+    atomic = False
+
+    dependencies = [
+        ('panel', '0023_reservation_prices_revenue'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, transaction
+from django.db.models import Value
+
+from panel.survey_search import CONFIG, tokenize
+
+BATCH_SIZE = 2000
+
+
+class AddPostgresIndex(migrations.AddIndex):
+    """GIN 索引只在 PostgreSQL 建立，其他資料庫只記錄在 migration state"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def backfill_search_vectors(apps, schema_editor):
+    """既有問卷的檢索向量，每批各自 commit，重新執行只處理還沒有向量的問卷"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    ServiceSurvey = apps.get_model('panel', 'ServiceSurvey')
+
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            surveys = list(
+                ServiceSurvey.objects.filter(search_vector__isnull=True, id__gt=last_id)
+                .order_by('id').only('id', 'comment')[:BATCH_SIZE]
+            )
+            if not surveys:
+                break
+            last_id = surveys[-1].id
+            for survey in surveys:
+                survey.search_vector = SearchVector(Value(' '.join(tokenize(survey.comment))), config=CONFIG)
+            ServiceSurvey.objects.bulk_update(surveys, ['search_vector'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    # 回填每批各自 commit
+    atomic = False
+
+    dependencies = [
+        ('panel', '0024_backfill_prices_revenue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='servicesurvey',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        AddPostgresIndex(
+            model_name='servicesurvey',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='survey_search_vector_idx'),
+        ),
+    ]
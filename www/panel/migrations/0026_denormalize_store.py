@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panel', '0025_survey_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='massageinvitation',
+            name='store',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='invitations', to='panel.store', verbose_name='店家'),
+        ),
+        migrations.AddField(
+            model_name='servicesurvey',
+            name='store',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='service_surveys', to='panel.store', verbose_name='店家'),
+        ),
+        migrations.AddIndex(
+            model_name='massageinvitation',
+            index=models.Index(fields=['store', 'created_at'], name='invitation_store_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicesurvey',
+            index=models.Index(fields=['store', 'created_at'], name='survey_store_created_idx'),
+        ),
+    ]
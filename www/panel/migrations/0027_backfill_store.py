@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from panel.data_migrations import run_data_migration
+
+
+def backfill_store(apps, schema_editor):
+    """
+    依師傅 / 方案回填問卷與邀請的店家 id，每批各自 commit；
+    資料量大時可先以 `manage.py run_data_migration survey_store_id invitation_store_id --pause 0.5`
+    在線上分批回填，這裡只會處理剩下的資料（進度資料表在 0028 才建立，依 store IS NULL 續跑）
+    """
+    run_data_migration('survey_store_id', apps=apps, checkpoint=False)
+    run_data_migration('invitation_store_id', apps=apps, checkpoint=False)
+
+
+class Migration(migrations.Migration):
+    # 每批各自 commit，大量資料時不會長時間鎖住整張表
+    atomic = False
+
+    dependencies = [
+        ('panel', '0026_denormalize_store'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_store, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panel', '0027_backfill_store'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataMigrationCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='資料遷移名稱')),
+                ('last_id', models.BigIntegerField(default=0, verbose_name='已處理到的 id')),
+                ('processed', models.BigIntegerField(default=0, verbose_name='已處理筆數')),
+                ('changed', models.BigIntegerField(default=0, verbose_name='已修改筆數')),
+                ('started_at', models.DateTimeField(auto_now_add=True, verbose_name='開始時間')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新時間')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成時間')),
+            ],
+            options={
+                'verbose_name': '資料遷移進度',
+                'verbose_name_plural': '資料遷移進度',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panel', '0028_data_migration_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='massageinvitation',
+            name='status',
+            field=models.CharField(choices=[('upcoming', '尚未開始'), ('active', '進行中'), ('expired', '已結束')], default='upcoming', editable=False, max_length=10, verbose_name='狀態'),
+        ),
+        migrations.AddIndex(
+            model_name='massageinvitation',
+            index=models.Index(fields=['store', 'status', 'created_at'], name='invitation_store_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='massageinvitation',
+            index=models.Index(condition=models.Q(('status', 'upcoming')), fields=['available_start'], name='invitation_upcoming_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='massageinvitation',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['available_end'], name='invitation_active_end_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+from panel.data_migrations import data_migration_operation
+
+
+class Migration(migrations.Migration):
+    # 每批各自 commit，大量資料時不會長時間鎖住整張表
+    atomic = False
+
+    dependencies = [
+        ('panel', '0029_invitation_status'),
+    ]
+
+    operations = [
+        # 已開始的邀請依目前時間改為進行中或已結束；之後的轉換由 worker 的 invitation.status 工作推進
+        data_migration_operation('invitation_status'),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:33
+
+from django.db import migrations, models
+import panel.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panel', '0030_backfill_invitation_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='store',
+            name='calendar_version',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='行事曆版本'),
+        ),
+        migrations.AddField(
+            model_name='therapistdayavailability',
+            name='calendar_version',
+            field=models.BigIntegerField(default=0, verbose_name='行事曆版本'),
+        ),
+        migrations.AlterField(
+            model_name='store',
+            name='time_zone',
+            field=models.CharField(default='Asia/Taipei', max_length=64, validators=[panel.models.validate_time_zone], verbose_name='時區'),
+        ),
+    ]
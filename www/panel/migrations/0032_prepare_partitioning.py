@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from panel.partitioning import drop_partitioned_tables, prepare_partitioned_tables
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('panel', '0031_store_calendar_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(prepare_partitioned_tables, drop_partitioned_tables),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+from panel.data_migrations import data_migration_operation
+
+
+class Migration(migrations.Migration):
+    # 每批各自 commit，可先在線上以 run_data_migration 執行
+    atomic = False
+
+    dependencies = [
+        ('panel', '0032_prepare_partitioning'),
+    ]
+
+    operations = [
+        data_migration_operation('partition_reservation'),
+        data_migration_operation('partition_invitation'),
+    ]
@@ -0,0 +1,35 @@
+import uuid
+
+from django.db import migrations, models
+
+from panel.partitioning import partition_tables, unpartition_tables
+
+
+class Migration(migrations.Migration):
+    """
+    資料庫上 slug 的唯一限制隨分割表改為 (slug, available_end)，slug 本身由登記表保證；
+    model 狀態同步改為複合唯一限制。其他資料庫不修改，維持較嚴格的 slug 唯一限制
+    """
+
+    dependencies = [
+        ('panel', '0033_copy_partitioned_rows'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(partition_tables, unpartition_tables)],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='massageinvitation',
+                    name='slug',
+                    field=models.UUIDField(default=uuid.uuid4, editable=False, verbose_name='網址slug'),
+                ),
+                migrations.AddConstraint(
+                    model_name='massageinvitation',
+                    constraint=models.UniqueConstraint(
+                        fields=('slug', 'available_end'), name='panel_massageinvitation_slug_key'
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -1,3 +1,7 @@
+import pytz
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth import get_user_model
@@ -14,6 +18,11 @@ class Specialization(models.Model):
 
 
 
+def validate_time_zone(value):
+    if value not in pytz.all_timezones_set:
+        raise ValidationError(f"無效的時區：{value}")
+
+
 class Store(models.Model):
     # ⚠️ 改動：移除原本的 email/password 欄位，改用 OneToOne 綁 User
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="store")
@@ -21,6 +30,14 @@ class Store(models.Model):
     address = models.TextField(blank=True, null=True)
     phone = models.CharField(max_length=20, blank=True, null=True)
     page_view_data = models.TextField(blank=True, null=True)
+    time_zone = models.CharField(
+        max_length=64, default="Asia/Taipei", validators=[validate_time_zone], verbose_name="時區"
+    )
+    slot_minutes = models.PositiveSmallIntegerField(
+        default=30, verbose_name="預約時段間隔（分鐘）"
+    )
+    # 時區、時段間隔或營業時間異動時由 signals 換成新的值，師傅空檔點陣圖依此判斷是否過期
+    calendar_version = models.BigIntegerField(default=0, editable=False, verbose_name="行事曆版本")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="建立時間")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新時間")
 
@@ -33,6 +50,40 @@ class Store(models.Model):
         return self.name or getattr(self.user, "email", self.user.username)
 
 
+# 店家營業時間（每週）
+class StoreBusinessHours(models.Model):
+    WEEKDAY_CHOICES = [
+        (0, '星期一'), (1, '星期二'), (2, '星期三'), (3, '星期四'),
+        (4, '星期五'), (5, '星期六'), (6, '星期日'),
+    ]
+    store = models.ForeignKey(
+        Store,
+        on_delete=models.CASCADE,
+        related_name="business_hours",
+        verbose_name="店家"
+    )
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES, verbose_name="星期")
+    open_time = models.TimeField(verbose_name="開始營業")
+    close_time = models.TimeField(verbose_name="結束營業")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="建立時間")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新時間")
+
+    class Meta:
+        verbose_name = "營業時間"
+        verbose_name_plural = "營業時間"
+        ordering = ['store', 'weekday', 'open_time']
+
+    def __str__(self):
+        return f"{self.store} {self.get_weekday_display()} {self.open_time}-{self.close_time}"
+
+
+
+
+class TherapistManager(models.Manager):
+    """預設排除已軟刪除的師傅，需要包含已刪除資料時使用 Therapist.all_objects"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
 
 
 class Therapist(models.Model):
@@ -57,19 +108,127 @@ class Therapist(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="建立時間")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新時間")
 
+    # 關聯存取（reservation.therapist）與 cascade 刪除走 _base_manager，不受影響
+    objects = TherapistManager()
+    all_objects = models.Manager()
+
     class Meta:
         verbose_name = "按摩師"
         verbose_name_plural = "按摩師"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['store', 'created_at'],
+                condition=models.Q(is_deleted=False),
+                name='therapist_store_created_idx'
+            ),
+            models.Index(
+                fields=['store', 'name'],
+                condition=models.Q(is_deleted=False, enabled=True),
+                name='therapist_store_enabled_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
+
+
+# 師傅每週固定班表
+class TherapistShift(models.Model):
+    WEEKDAY_CHOICES = StoreBusinessHours.WEEKDAY_CHOICES
+    therapist = models.ForeignKey(
+        Therapist,
+        on_delete=models.CASCADE,
+        related_name="shifts",
+        verbose_name="師傅"
+    )
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES, verbose_name="星期")
+    start_time = models.TimeField(verbose_name="上班時間")
+    end_time = models.TimeField(verbose_name="下班時間")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="建立時間")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新時間")
+
+    class Meta:
+        verbose_name = "師傅班表"
+        verbose_name_plural = "師傅班表"
+        ordering = ['therapist', 'weekday', 'start_time']
+
+    def __str__(self):
+        return f"{self.therapist} {self.get_weekday_display()} {self.start_time}-{self.end_time}"
+
+
+# 師傅特定日期的例外（休假或調整時段）
+class TherapistScheduleException(models.Model):
+    therapist = models.ForeignKey(
+        Therapist,
+        on_delete=models.CASCADE,
+        related_name="schedule_exceptions",
+        verbose_name="師傅"
+    )
+    date = models.DateField(verbose_name="日期")
+    is_day_off = models.BooleanField(default=True, verbose_name="休假")
+    start_time = models.TimeField(blank=True, null=True, verbose_name="上班時間")
+    end_time = models.TimeField(blank=True, null=True, verbose_name="下班時間")
+    notes = models.TextField(blank=True, null=True, verbose_name="備註")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="建立時間")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新時間")
+
+    class Meta:
+        verbose_name = "師傅班表例外"
+        verbose_name_plural = "師傅班表例外"
+        ordering = ['therapist', 'date', 'start_time']
+        indexes = [
+            models.Index(fields=['therapist', 'date']),
+        ]
+
+    def __str__(self):
+        if self.is_day_off:
+            return f"{self.therapist} {self.date} 休假"
+        return f"{self.therapist} {self.date} {self.start_time}-{self.end_time}"
+
+
+# 師傅每日空檔點陣圖（由 panel.availability 維護，可隨時重建）
+class TherapistDayAvailability(models.Model):
+    therapist = models.ForeignKey(
+        Therapist,
+        on_delete=models.CASCADE,
+        related_name="day_availabilities",
+        verbose_name="師傅"
+    )
+    date = models.DateField(verbose_name="日期")
+    # 每個 bit 代表一格（AVAILABILITY_SLOT_MINUTES 分鐘）
+    # working_bits：1 表示有上班；free_bits：1 表示有上班且沒有預約或邀請
+    working_bits = models.BinaryField(verbose_name="上班點陣圖")
+    free_bits = models.BinaryField(verbose_name="空檔點陣圖")
+    # 計算時的店家行事曆版本，與 Store.calendar_version 不同時視為過期
+    calendar_version = models.BigIntegerField(default=0, verbose_name="行事曆版本")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新時間")
+
+    class Meta:
+        verbose_name = "師傅每日空檔"
+        verbose_name_plural = "師傅每日空檔"
+        unique_together = ['therapist', 'date']
+
+    def __str__(self):
+        return f"{self.therapist} {self.date}"
+
   
 # 師傅服務問卷
 class ServiceSurvey(models.Model):
     therapist = models.ForeignKey(
         'Therapist', on_delete=models.CASCADE, related_name='service_surveys'
     )
+    # 師傅所屬店家（反正規化，儲存時由 signals 同步），店家列表不需要再查師傅
+    store = models.ForeignKey(
+        Store,
+        on_delete=models.CASCADE,
+        related_name='service_surveys',
+        verbose_name='店家',
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=False  # 由 (store, created_at) 索引涵蓋
+    )
     RATING_CHOICES = [(i, f'{i} 星') for i in range(1, 6)]
     rating = models.PositiveSmallIntegerField(
         choices=RATING_CHOICES,
@@ -80,11 +239,19 @@ class ServiceSurvey(models.Model):
     created_at = models.DateTimeField(
         default=timezone.now, verbose_name='填寫時間'
     )
+    # 備註的全文檢索向量（中文切成單字與雙字詞，見 panel/survey_search.py）
+    search_vector = SearchVectorField(blank=True, null=True, editable=False)
 
     class Meta:
         verbose_name = '服務問卷'
         verbose_name_plural = '服務問卷'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['store', 'created_at'], name='survey_store_created_idx'),
+            # 只在 PostgreSQL 建立（migration 0025）
+            GinIndex(fields=['search_vector'], name='survey_search_vector_idx'),
+        ]
 
     def __str__(self):
         return f'{self.therapist} - {self.rating} 星'
@@ -115,6 +282,53 @@ class MassagePlan(models.Model):
     def __str__(self):
         return f"{self.name} ({self.store.name})"
 
+# 客戶（依店家與正規化電話識別，見 panel/customers.py）
+class Customer(models.Model):
+    store = models.ForeignKey(
+        Store,
+        on_delete=models.CASCADE,
+        related_name="customers",
+        verbose_name="店家"
+    )
+    phone = models.CharField(max_length=20, verbose_name="電話（僅數字）")
+    name = models.CharField(max_length=255, verbose_name="姓名")
+    # 以下只計入預約時間已到的預約，由 customers.rebuild_customer_stats 維護
+    visit_count = models.PositiveIntegerField(default=0, verbose_name="來店次數")
+    last_visit_at = models.DateTimeField(blank=True, null=True, verbose_name="最近來店時間")
+    lifetime_spend = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name="累計消費"
+    )
+    # 下一筆尚未計入的預約時間，到時由背景工作重新計算
+    next_visit_at = models.DateTimeField(blank=True, null=True, verbose_name="下次來店時間")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="建立時間")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新時間")
+
+    class Meta:
+        verbose_name = "客戶"
+        verbose_name_plural = "客戶"
+        ordering = ['-last_visit_at']
+        indexes = [
+            # 後台不分店家以電話搜尋（唯一限制的索引以店家開頭）
+            models.Index(fields=['phone'], name='customer_phone_idx'),
+            models.Index(
+                fields=['next_visit_at'],
+                name='customer_next_visit_idx',
+                condition=models.Q(next_visit_at__isnull=False),
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['store', 'phone'],
+                name='customer_store_phone_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.phone})"
+
 class Reservation(models.Model):
     store = models.ForeignKey(
         Store,
@@ -122,6 +336,15 @@ class Reservation(models.Model):
         related_name="reservations",
         verbose_name="店家"
     )
+    customer = models.ForeignKey(
+        Customer,
+        on_delete=models.SET_NULL,
+        related_name="reservations",
+        verbose_name="客戶",
+        blank=True,
+        null=True,
+        db_index=False  # 由 (customer, appointment_time) 索引涵蓋
+    )
     customer_name = models.CharField(max_length=255, verbose_name="客戶姓名")
     customer_phone = models.CharField(max_length=20, verbose_name="客戶電話")
     appointment_time = models.DateTimeField(verbose_name="預約時間")
@@ -139,6 +362,21 @@ class Reservation(models.Model):
         blank=True,
         null=True
     )
+    # 預約當下的價格快照（舊資料回填前為空）
+    list_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        verbose_name="原價"
+    )
+    price_charged = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        verbose_name="實收金額"
+    )
     notes = models.TextField(blank=True, null=True, verbose_name="備註")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="建立時間")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新時間")
@@ -147,11 +385,25 @@ class Reservation(models.Model):
         verbose_name = "預約"
         verbose_name_plural = "預約"
         ordering = ['-appointment_time']
+        indexes = [
+            models.Index(fields=['appointment_time']),
+            models.Index(fields=['store', 'appointment_time']),
+            models.Index(fields=['customer', 'appointment_time']),
+        ]
 
     def __str__(self):
         return f"{self.customer_name} - {self.appointment_time} ({self.store.name})"
 
 class MassageInvitation(models.Model):
+    UPCOMING = 'upcoming'
+    ACTIVE = 'active'
+    EXPIRED = 'expired'
+    STATUS_CHOICES = [
+        (UPCOMING, '尚未開始'),
+        (ACTIVE, '進行中'),
+        (EXPIRED, '已結束'),
+    ]
+
     available_start = models.DateTimeField(verbose_name="可預約開始時間")
     available_end = models.DateTimeField(verbose_name="可預約結束時間")
     massage_plan = models.ForeignKey(
@@ -166,14 +418,25 @@ class MassageInvitation(models.Model):
         related_name="invitations",
         verbose_name="師傅"
     )
+    # 方案所屬店家（反正規化，儲存時由 signals 同步），店家列表不需要再 join 方案
+    store = models.ForeignKey(
+        Store,
+        on_delete=models.CASCADE,
+        related_name="invitations",
+        verbose_name="店家",
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=False  # 由 (store, created_at) 索引涵蓋
+    )
     discount_price = models.DecimalField(
         max_digits=10,
         decimal_places=2,
         verbose_name="特價"
     )
+    # 資料庫上只能保證 (slug, available_end) 不重複（分割表的限制），slug 本身由登記表保證（panel/partitioning.py）
     slug = models.UUIDField(
         default=uuid4,
-        unique=True,
         editable=False,
         verbose_name="網址slug"
     )
@@ -182,6 +445,10 @@ class MassageInvitation(models.Model):
         verbose_name="多少人點開"
     )
     notes = models.TextField(blank=True, null=True, verbose_name="備註")
+    # 依可預約時間物化的狀態：儲存時由 signals 計算，之後由背景工作在轉換時間推進（見 panel/invitation_status.py）
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=UPCOMING, editable=False, verbose_name="狀態"
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="建立時間")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新時間")
 
@@ -189,9 +456,161 @@ class MassageInvitation(models.Model):
         verbose_name = "按摩邀請"
         verbose_name_plural = "按摩邀請"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['store', 'created_at'], name='invitation_store_created_idx'),
+            # 店家依狀態列表與計數
+            models.Index(fields=['store', 'status', 'created_at'], name='invitation_store_status_idx'),
+            # 背景工作只掃描下一次轉換已到期的邀請
+            models.Index(
+                fields=['available_start'],
+                name='invitation_upcoming_start_idx',
+                condition=models.Q(status='upcoming'),
+            ),
+            models.Index(
+                fields=['available_end'],
+                name='invitation_active_end_idx',
+                condition=models.Q(status='active'),
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['slug', 'available_end'], name='panel_massageinvitation_slug_key'),
+        ]
 
     def __str__(self):
         return (
             f"{self.massage_plan.name} - {self.therapist.name} "
             f"({self.available_start} 至 {self.available_end})"
         )
+
+    def has_reservation(self):
+        """檢查邀請是否已被預約（一個邀請只能有一個預約）"""
+        return Reservation.objects.filter(
+            massage_plan_id=self.massage_plan_id,
+            therapist_id=self.therapist_id,
+            appointment_time__gte=self.available_start,
+            appointment_time__lte=self.available_end,
+        ).exists()
+
+
+# 每日營收彙總（依店家當地日期、師傅、方案，見 panel/revenue.py）
+class RevenueDaily(models.Model):
+    store = models.ForeignKey(
+        Store,
+        on_delete=models.CASCADE,
+        related_name="revenue_daily",
+        verbose_name="店家",
+        db_index=False  # 由 (store, date) 索引涵蓋
+    )
+    date = models.DateField(verbose_name="日期")
+    # 師傅被刪除時彙總列一起刪除，由 signals 排入重建（預約保留、師傅改為 NULL）
+    therapist = models.ForeignKey(
+        Therapist,
+        on_delete=models.CASCADE,
+        related_name="revenue_daily",
+        verbose_name="師傅",
+        blank=True,
+        null=True
+    )
+    massage_plan = models.ForeignKey(
+        MassagePlan,
+        on_delete=models.CASCADE,
+        related_name="revenue_daily",
+        verbose_name="方案"
+    )
+    reservation_count = models.IntegerField(default=0, verbose_name="預約數")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="實收金額")
+    list_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="原價金額")
+
+    class Meta:
+        verbose_name = "每日營收"
+        verbose_name_plural = "每日營收"
+        ordering = ['-date']
+        indexes = [
+            # 報表依店家與日期範圍讀取（部分唯一索引帶條件，查詢用不到）
+            models.Index(fields=['store', 'date'], name='revenue_daily_store_date_idx'),
+        ]
+        constraints = [
+            # 未指定師傅的預約另外彙總（NULL 不會觸發唯一限制）
+            models.UniqueConstraint(
+                fields=['store', 'date', 'therapist', 'massage_plan'],
+                condition=models.Q(therapist__isnull=False),
+                name='revenue_daily_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['store', 'date', 'massage_plan'],
+                condition=models.Q(therapist__isnull=True),
+                name='revenue_daily_no_therapist_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.store} {self.date} {self.revenue}"
+
+
+# 背景工作佇列（見 panel/tasks.py）
+class Task(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, '等待中'),
+        (RUNNING, '執行中'),
+        (DONE, '完成'),
+        (FAILED, '失敗'),
+    ]
+
+    name = models.CharField(max_length=100, verbose_name="工作名稱")
+    payload = models.JSONField(default=dict, verbose_name="參數")
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name="狀態"
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="已執行次數")
+    max_attempts = models.PositiveSmallIntegerField(default=5, verbose_name="最多執行次數")
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="預定執行時間")
+    locked_at = models.DateTimeField(blank=True, null=True, verbose_name="開始執行時間")
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name="執行的 worker")
+    duration_ms = models.FloatField(blank=True, null=True, verbose_name="執行毫秒數")
+    last_error = models.TextField(blank=True, verbose_name="最後錯誤")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="建立時間")
+    finished_at = models.DateTimeField(blank=True, null=True, verbose_name="完成時間")
+
+    class Meta:
+        verbose_name = "背景工作"
+        verbose_name_plural = "背景工作"
+        indexes = [
+            # worker 只掃描等待中的工作
+            models.Index(
+                fields=['run_at', 'id'],
+                name='task_pending_run_at_idx',
+                condition=models.Q(status='pending'),
+            ),
+            models.Index(
+                fields=['locked_at'],
+                name='task_running_locked_at_idx',
+                condition=models.Q(status='running'),
+            ),
+            models.Index(fields=['status', 'finished_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.get_status_display()})"
+
+
+# 長時間資料遷移的進度（見 panel/data_migrations.py）
+class DataMigrationCheckpoint(models.Model):
+    name = models.CharField(max_length=100, unique=True, verbose_name="資料遷移名稱")
+    last_id = models.BigIntegerField(default=0, verbose_name="已處理到的 id")
+    processed = models.BigIntegerField(default=0, verbose_name="已處理筆數")
+    changed = models.BigIntegerField(default=0, verbose_name="已修改筆數")
+    started_at = models.DateTimeField(auto_now_add=True, verbose_name="開始時間")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新時間")
+    finished_at = models.DateTimeField(blank=True, null=True, verbose_name="完成時間")
+
+    class Meta:
+        verbose_name = "資料遷移進度"
+        verbose_name_plural = "資料遷移進度"
+
+    def __str__(self):
+        return f"{self.name} ({self.last_id})"
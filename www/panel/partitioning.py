@@ -0,0 +1,617 @@
+"""
+PostgreSQL 宣告式分割（每月 range partition）與封存
+
+Reservation 依 appointment_time、MassageInvitation 依 available_end 按月分割：
+
+    panel_reservation                  分割主表，Django 照常讀寫
+    ├─ panel_reservation_p2025_01      每月一個分割（月份以 settings.TIME_ZONE 計算）
+    └─ panel_reservation_default       沒有對應月份的資料，下次執行 manage_partitions 時搬出
+    panel_reservation_archive          封存主表，已封存的月份分割掛在這裡
+    panel_reservation_history          熱資料 + 封存資料的 UNION ALL view，給報表查詢
+
+封存只是把分割從熱資料主表 detach 再 attach 到封存主表，不需要搬資料，
+熱資料的索引只涵蓋還沒封存的月份。view 會擋住修改欄位的 migration，
+所以 migrate 前先移除（pre_migrate），結束後再依新的欄位重建（post_migrate）。
+
+分割表的主鍵與唯一限制必須包含分割欄位，所以資料庫上的主鍵改為
+(id, 分割欄位)，MassageInvitation.slug 的唯一限制改為 (slug, available_end)，
+slug 本身的唯一性改由不分割的登記表保證（見下方 slug 登記表）。Django 端仍以 id 為主鍵。
+
+既有資料表分三個 migration 轉換，不在單一交易中複製整張表：
+
+    0032  建立分割表（暫時名稱 *_partitioned），trigger 把原資料表的寫入同步過去
+    0033  資料遷移依主鍵分批複製既有資料（可先在線上以 run_data_migration 執行）
+    0034  短暫鎖住原資料表，刪除後由分割表改名取代
+"""
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+# 資料表 -> 分割欄位
+PARTITIONED_TABLES = {
+    'panel_reservation': 'appointment_time',
+    'panel_massageinvitation': 'available_end',
+}
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def month_start(year, month):
+    """settings.TIME_ZONE 當地時間該月 1 日 00:00"""
+    return timezone.make_aware(datetime(year, month, 1))
+
+
+def add_months(year, month, count):
+    index = year * 12 + month - 1 + count
+    return index // 12, index % 12 + 1
+
+
+def partition_name(table, year, month):
+    return f"{table}_p{year:04d}_{month:02d}"
+
+
+def _parse_partition_name(table, name):
+    """panel_reservation_p2025_01 -> (2025, 1)，不符合命名規則時回傳 None"""
+    prefix = f"{table}_p"
+    if not name.startswith(prefix):
+        return None
+    try:
+        year, month = name[len(prefix):].split('_')
+        return int(year), int(month)
+    except ValueError:
+        return None
+
+
+def _table_exists(cursor, name):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    return cursor.fetchone()[0]
+
+
+def is_partitioned(cursor, table):
+    cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+        [table]
+    )
+    return cursor.fetchone()[0]
+
+
+def _partitions(cursor, parent):
+    """parent 底下的分割名稱"""
+    cursor.execute(
+        """
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass(%s)
+        ORDER BY child.relname
+        """,
+        [parent]
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _columns(cursor, table):
+    """[(欄位名稱, 型別), ...]，依欄位順序"""
+    cursor.execute(
+        """
+        SELECT attname, format_type(atttypid, atttypmod) FROM pg_attribute
+        WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped
+        ORDER BY attnum
+        """,
+        [table]
+    )
+    return cursor.fetchall()
+
+
+def _months_in(cursor, table, column):
+    """資料表中出現過的月份 [(year, month), ...]"""
+    cursor.execute(
+        f"SELECT DISTINCT date_trunc('month', {_quote(column)} AT TIME ZONE %s) FROM {_quote(table)}",
+        [settings.TIME_ZONE]
+    )
+    return sorted((value.year, value.month) for value, in cursor.fetchall())
+
+
+def _upcoming_months(months_ahead):
+    today = timezone.localdate()
+    return [add_months(today.year, today.month, offset) for offset in range(months_ahead + 1)]
+
+
+def _create_partition(cursor, table, column, year, month):
+    """
+    建立某月的分割；default 分割裡已有該月資料時，
+    先建成一般資料表搬入資料，再 attach 上去
+    """
+    name = partition_name(table, year, month)
+    start = month_start(year, month)
+    end = month_start(*add_months(year, month, 1))
+    default = f"{table}_default"
+
+    cursor.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {_quote(default)} "
+        f"WHERE {_quote(column)} >= %s AND {_quote(column)} < %s)",
+        [start, end]
+    )
+    if not cursor.fetchone()[0]:
+        cursor.execute(
+            f"CREATE TABLE {_quote(name)} PARTITION OF {_quote(table)} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [start, end]
+        )
+        return
+
+    cursor.execute(f"CREATE TABLE {_quote(name)} (LIKE {_quote(table)} INCLUDING DEFAULTS)")
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {_quote(default)} "
+        f"WHERE {_quote(column)} >= %s AND {_quote(column)} < %s RETURNING *) "
+        f"INSERT INTO {_quote(name)} SELECT * FROM moved",
+        [start, end]
+    )
+    cursor.execute(
+        f"ALTER TABLE {_quote(table)} ATTACH PARTITION {_quote(name)} "
+        f"FOR VALUES FROM (%s) TO (%s)",
+        [start, end]
+    )
+
+
+def ensure_partitions(table, months_ahead, extra_months=()):
+    """
+    建立本月起 months_ahead 個月的分割，並把 default 分割中的資料搬到對應月份
+    extra_months 為其他也要建立的月份 [(year, month), ...]（例如大量匯入歷史資料前）
+    回傳 (新建立的分割, 已封存而留在 default 分割的月份)
+    """
+    column = PARTITIONED_TABLES[table]
+    created = []
+    skipped = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        existing = set(_partitions(cursor, table))
+        archived = set()
+        if _table_exists(cursor, f"{table}_archive"):
+            archived = set(_partitions(cursor, f"{table}_archive"))
+
+        months = set(_upcoming_months(months_ahead)) | set(extra_months)
+        months.update(_months_in(cursor, f"{table}_default", column))
+        for year, month in sorted(months):
+            name = partition_name(table, year, month)
+            if name in existing:
+                continue
+            if name in archived:
+                # 已封存的月份又有新資料，留在 default 分割由人工處理
+                skipped.append(name)
+                continue
+            _create_partition(cursor, table, column, year, month)
+            created.append(name)
+    return created, skipped
+
+
+def _add_missing_columns(cursor, source, target):
+    """把 source 有而 target 沒有的欄位加到 target（可為 NULL）"""
+    target_columns = {name for name, _ in _columns(cursor, target)}
+    for name, column_type in _columns(cursor, source):
+        if name not in target_columns:
+            cursor.execute(
+                f"ALTER TABLE {_quote(target)} ADD COLUMN {_quote(name)} {column_type}"
+            )
+
+
+def _ensure_archive(cursor, table, column):
+    """建立封存主表，並補上熱資料表之後新增的欄位"""
+    archive = f"{table}_archive"
+    if not _table_exists(cursor, archive):
+        cursor.execute(
+            f"CREATE TABLE {_quote(archive)} (LIKE {_quote(table)}) "
+            f"PARTITION BY RANGE ({_quote(column)})"
+        )
+    else:
+        _add_missing_columns(cursor, table, archive)
+
+
+def refresh_history_view(cursor, table):
+    """重建熱資料 + 封存資料的 view，欄位以熱資料表為準"""
+    view = f"{table}_history"
+    columns = ', '.join(_quote(name) for name, _ in _columns(cursor, table))
+    cursor.execute(f"DROP VIEW IF EXISTS {_quote(view)}")
+    cursor.execute(
+        f"CREATE VIEW {_quote(view)} AS "
+        f"SELECT {columns} FROM {_quote(table)} "
+        f"UNION ALL SELECT {columns} FROM {_quote(table + '_archive')}"
+    )
+
+
+def drop_history_views(using='default', **kwargs):
+    """pre_migrate：移除 view，migration 才能修改或刪除欄位"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            cursor.execute(f"DROP VIEW IF EXISTS {_quote(table + '_history')}")
+
+
+def refresh_history_views(using='default', **kwargs):
+    """post_migrate：封存主表補上新欄位並重建 view"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for table, column in PARTITIONED_TABLES.items():
+            if _table_exists(cursor, f"{table}_archive"):
+                _ensure_archive(cursor, table, column)
+                refresh_history_view(cursor, table)
+
+
+def archive_partitions(table, before_year, before_month):
+    """
+    把 before 月份（不含）之前的分割移到封存主表
+    封存的分割會移除外鍵，刪除店家或師傅時不會被歷史資料擋住
+    回傳封存的分割名稱
+    """
+    column = PARTITIONED_TABLES[table]
+    archive = f"{table}_archive"
+    archived = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        _ensure_archive(cursor, table, column)
+        for name in _partitions(cursor, table):
+            month = _parse_partition_name(table, name)
+            if month is None or month >= (before_year, before_month):
+                continue
+
+            cursor.execute(f"ALTER TABLE {_quote(table)} DETACH PARTITION {_quote(name)}")
+            # 熱資料表已刪除的欄位仍保留在封存主表
+            _add_missing_columns(cursor, archive, name)
+            cursor.execute(
+                "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+                [name]
+            )
+            for constraint, in cursor.fetchall():
+                cursor.execute(
+                    f"ALTER TABLE {_quote(name)} DROP CONSTRAINT {_quote(constraint)}"
+                )
+            cursor.execute(
+                f"ALTER TABLE {_quote(archive)} ATTACH PARTITION {_quote(name)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [month_start(*month), month_start(*add_months(*month, 1))]
+            )
+            archived.append(name)
+        refresh_history_view(cursor, table)
+    return archived
+
+
+
+
+# ====== 轉換成分割表 ======
+
+def shadow_table(table):
+    """轉換期間的分割表，資料複製完成後改名取代原資料表"""
+    return f"{table}_partitioned"
+
+
+def _temporary_name(name):
+    """分割表上的限制與索引先用暫時的名稱（原名稱還在舊表上），長度不超過 63"""
+    return f"{name[:54]}_{hashlib.md5(name.encode()).hexdigest()[:8]}"
+
+
+def _table_definition(cursor, table):
+    """(限制 [(名稱, 類型, 定義, 欄位)], 不屬於限制的索引 [(名稱, 定義)])"""
+    cursor.execute(
+        """
+        SELECT conname, contype, pg_get_constraintdef(oid),
+               ARRAY(SELECT attname FROM pg_attribute
+                     WHERE attrelid = conrelid AND attnum = ANY(conkey))
+        FROM pg_constraint WHERE conrelid = to_regclass(%s)
+        ORDER BY contype, conname
+        """,
+        [table]
+    )
+    constraints = cursor.fetchall()
+    cursor.execute(
+        """
+        SELECT index_class.relname, pg_get_indexdef(pg_index.indexrelid)
+        FROM pg_index JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+        WHERE pg_index.indrelid = to_regclass(%s)
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conindid = pg_index.indexrelid)
+        """,
+        [table]
+    )
+    return constraints, cursor.fetchall()
+
+
+def _constraint_definition(table, contype, definition, columns, partition_column):
+    """分割表的主鍵與唯一限制要包含分割欄位；還原成一般資料表時（partition_column 為 None）拿掉"""
+    if contype not in ('p', 'u'):
+        return definition
+    key_columns = [column for column in columns if column != PARTITIONED_TABLES[table]]
+    if partition_column:
+        key_columns.append(partition_column)
+    return '{} ({})'.format(
+        'PRIMARY KEY' if contype == 'p' else 'UNIQUE',
+        ', '.join(_quote(column) for column in key_columns)
+    )
+
+
+def _index_definition(definition, name, table):
+    """pg_get_indexdef 的定義改成建立在 table 上、名稱為 name"""
+    create = definition[:definition.index(' ON ')].rsplit(' ', 1)[0]
+    return f"{create} {_quote(name)} ON {_quote(table)}" + definition[definition.index(' USING '):]
+
+
+def _month_range(cursor, table, column):
+    """資料表中最早到最晚的每個月份 [(year, month), ...]（只讀分割欄位的最小、最大值）"""
+    cursor.execute(f"SELECT min({_quote(column)}), max({_quote(column)}) FROM {_quote(table)}")
+    first, last = cursor.fetchone()
+    if first is None:
+        return []
+    first, last = timezone.localtime(first), timezone.localtime(last)
+    months = []
+    month = (first.year, first.month)
+    while month <= (last.year, last.month):
+        months.append(month)
+        month = add_months(*month, 1)
+    return months
+
+
+def _create_partitions(cursor, table, parent, months):
+    """在 parent 底下建立 table 命名的月份分割"""
+    for year, month in months:
+        cursor.execute(
+            f"CREATE TABLE {_quote(partition_name(table, year, month))} "
+            f"PARTITION OF {_quote(parent)} FOR VALUES FROM (%s) TO (%s)",
+            [month_start(year, month), month_start(*add_months(year, month, 1))]
+        )
+
+
+def prepare_partitioning(cursor, table):
+    """
+    建立與 table 相同欄位、限制與索引的分割表（名稱暫時不同），
+    以 trigger 把之後對 table 的新增、修改、刪除同步寫入分割表；既有資料由 copy_to_shadow 分批複製
+    """
+    column = PARTITIONED_TABLES[table]
+    shadow = shadow_table(table)
+    if _table_exists(cursor, shadow):
+        return
+
+    constraints, indexes = _table_definition(cursor, table)
+    cursor.execute(
+        f"CREATE TABLE {_quote(shadow)} (LIKE {_quote(table)} INCLUDING DEFAULTS) "
+        f"PARTITION BY RANGE ({_quote(column)})"
+    )
+    cursor.execute(f"CREATE TABLE {_quote(table + '_default')} PARTITION OF {_quote(shadow)} DEFAULT")
+    _create_partitions(cursor, table, shadow, sorted(
+        set(_month_range(cursor, table, column)) | set(_upcoming_months(settings.PARTITION_MONTHS_AHEAD))
+    ))
+
+    # 原名稱記在註解中，改名取代時還原
+    for name, contype, definition, columns in constraints:
+        temporary = _temporary_name(name)
+        cursor.execute(
+            f"ALTER TABLE {_quote(shadow)} ADD CONSTRAINT {_quote(temporary)} "
+            + _constraint_definition(table, contype, definition, columns, column)
+        )
+        cursor.execute(f"COMMENT ON CONSTRAINT {_quote(temporary)} ON {_quote(shadow)} IS %s", [name])
+    for name, definition in indexes:
+        temporary = _temporary_name(name)
+        cursor.execute(_index_definition(definition, temporary, shadow))
+        cursor.execute(f"COMMENT ON INDEX {_quote(temporary)} IS %s", [name])
+
+    mirror = f"{table}_mirror"
+    cursor.execute(
+        f"""
+        CREATE FUNCTION {_quote(mirror)}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                DELETE FROM {_quote(shadow)} WHERE id = OLD.id;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                INSERT INTO {_quote(shadow)} SELECT (NEW).*;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    cursor.execute(
+        f"CREATE TRIGGER {_quote(mirror)} AFTER INSERT OR UPDATE OR DELETE ON {_quote(table)} "
+        f"FOR EACH ROW EXECUTE FUNCTION {_quote(mirror)}()"
+    )
+
+
+def copy_to_shadow(table, ids):
+    """
+    把 table 中這些 id 的資料複製到分割表，回傳複製的筆數
+    先鎖住來源資料，期間的修改會在複製之後才由 trigger 同步；已同步過的資料略過
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {_quote(shadow_table(table))} "
+            f"SELECT * FROM {_quote(table)} WHERE id = ANY(%s) ORDER BY id FOR UPDATE "
+            f"ON CONFLICT DO NOTHING",
+            [list(ids)]
+        )
+        return cursor.rowcount
+
+
+def shadow_exists(table):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        return _table_exists(cursor, shadow_table(table))
+
+
+def finish_partitioning(cursor, table):
+    """
+    分割表取代原資料表：移除 trigger 與原資料表，分割表改名並還原限制與索引的名稱
+    只需短暫鎖住原資料表，不搬動資料
+    """
+    shadow = shadow_table(table)
+    mirror = f"{table}_mirror"
+    cursor.execute(f"LOCK TABLE {_quote(table)} IN ACCESS EXCLUSIVE MODE")
+    cursor.execute(f"DROP TRIGGER {_quote(mirror)} ON {_quote(table)}")
+    cursor.execute(f"DROP FUNCTION {_quote(mirror)}()")
+
+    # id 的 sequence 屬於原資料表，先解除才不會跟著被刪掉
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+    sequence = cursor.fetchone()[0]
+    cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+    cursor.execute(f"DROP TABLE {_quote(table)}")
+    cursor.execute(f"ALTER TABLE {_quote(shadow)} RENAME TO {_quote(table)}")
+
+    cursor.execute(
+        "SELECT conname, obj_description(oid, 'pg_constraint') FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND obj_description(oid, 'pg_constraint') IS NOT NULL",
+        [table]
+    )
+    for temporary, name in cursor.fetchall():
+        cursor.execute(f"COMMENT ON CONSTRAINT {_quote(temporary)} ON {_quote(table)} IS NULL")
+        cursor.execute(f"ALTER TABLE {_quote(table)} RENAME CONSTRAINT {_quote(temporary)} TO {_quote(name)}")
+    cursor.execute(
+        "SELECT index_class.relname, obj_description(index_class.oid, 'pg_class') FROM pg_index "
+        "JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid "
+        "WHERE pg_index.indrelid = to_regclass(%s) AND obj_description(index_class.oid, 'pg_class') IS NOT NULL",
+        [table]
+    )
+    for temporary, name in cursor.fetchall():
+        cursor.execute(f"COMMENT ON INDEX {_quote(temporary)} IS NULL")
+        cursor.execute(f"ALTER INDEX {_quote(temporary)} RENAME TO {_quote(name)}")
+    cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {_quote(table)}.id")
+
+
+def _unpartition(cursor, table):
+    """
+    還原成一般資料表（只給 migration 往回退使用，在同一個交易中複製全部資料）
+    """
+    old = f"{table}_unpartitioning"
+    constraints, indexes = _table_definition(cursor, table)
+    cursor.execute(f"ALTER TABLE {_quote(table)} RENAME TO {_quote(old)}")
+    for name, *_ in constraints:
+        cursor.execute(f"ALTER TABLE {_quote(old)} DROP CONSTRAINT {_quote(name)}")
+    for name, _ in indexes:
+        cursor.execute(f"DROP INDEX {_quote(name)}")
+
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [old])
+    sequence = cursor.fetchone()[0]
+    cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+
+    cursor.execute(f"CREATE TABLE {_quote(table)} (LIKE {_quote(old)} INCLUDING DEFAULTS)")
+    for name, contype, definition, columns in constraints:
+        cursor.execute(
+            f"ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(name)} "
+            + _constraint_definition(table, contype, definition, columns, None)
+        )
+    for name, definition in indexes:
+        cursor.execute(_index_definition(definition, name, table))
+
+    cursor.execute(f"INSERT INTO {_quote(table)} SELECT * FROM {_quote(old)}")
+    cursor.execute(f"DROP TABLE {_quote(old)}")
+    cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {_quote(table)}.id")
+
+
+# ====== slug 登記表 ======
+#
+# 分割表的唯一限制必須包含分割欄位，資料庫上只能保證 (slug, available_end) 不重複。
+# slug 本身的唯一性由不分割的登記表（slug 為主鍵）保證：分割表上的 trigger 在新增、刪除、
+# 修改 slug 時同步登記表，重複的 slug 在寫入登記表時違反主鍵，整個交易失敗。
+
+SLUG_REGISTRY_TABLE = 'panel_massageinvitation_slug'
+SLUG_TABLE = 'panel_massageinvitation'
+
+
+def _create_slug_registry(cursor, target):
+    """建立登記表與 target（分割表）上的 trigger"""
+    registry = _quote(SLUG_REGISTRY_TABLE)
+    sync = f"{SLUG_REGISTRY_TABLE}_sync"
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {registry} (slug uuid PRIMARY KEY, invitation_id bigint NOT NULL)"
+    )
+    cursor.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION {_quote(sync)}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                DELETE FROM {registry} WHERE slug = OLD.slug AND invitation_id = OLD.id;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                INSERT INTO {registry} (slug, invitation_id) VALUES (NEW.slug, NEW.id);
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    # Django 儲存時會更新所有欄位，只在 slug 或 id 真的改變時同步
+    cursor.execute(
+        f"CREATE TRIGGER {_quote(sync)} AFTER INSERT OR DELETE ON {_quote(target)} "
+        f"FOR EACH ROW EXECUTE FUNCTION {_quote(sync)}()"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER {_quote(sync + '_update')} AFTER UPDATE ON {_quote(target)} "
+        f"FOR EACH ROW WHEN (OLD.slug IS DISTINCT FROM NEW.slug OR OLD.id IS DISTINCT FROM NEW.id) "
+        f"EXECUTE FUNCTION {_quote(sync)}()"
+    )
+
+
+def _drop_slug_registry(cursor):
+    sync = f"{SLUG_REGISTRY_TABLE}_sync"
+    cursor.execute(f"DROP FUNCTION IF EXISTS {_quote(sync)}() CASCADE")
+    cursor.execute(f"DROP TABLE IF EXISTS {_quote(SLUG_REGISTRY_TABLE)}")
+
+
+# ====== migration ======
+
+def prepare_partitioned_tables(apps, schema_editor):
+    """migration 用：建立分割表與同步 trigger（既有資料由之後的資料遷移分批複製）"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            prepare_partitioning(cursor, table)
+        _create_slug_registry(cursor, shadow_table(SLUG_TABLE))
+
+
+def drop_partitioned_tables(apps, schema_editor):
+    """migration 往回退：移除還沒取代原資料表的分割表與 trigger"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        _drop_slug_registry(cursor)
+        for table in PARTITIONED_TABLES:
+            if _table_exists(cursor, shadow_table(table)):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {_quote(table + '_mirror')} ON {_quote(table)}")
+                cursor.execute(f"DROP FUNCTION IF EXISTS {_quote(table + '_mirror')}()")
+                cursor.execute(f"DROP TABLE {_quote(shadow_table(table))}")
+
+
+def partition_tables(apps, schema_editor):
+    """
+    migration 用：分割表取代原資料表
+    資料遷移沒有執行過時（例如往回退後重新套用）在這裡建立並一次複製
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            if not _table_exists(cursor, shadow_table(table)):
+                prepare_partitioning(cursor, table)
+                if table == SLUG_TABLE:
+                    _drop_slug_registry(cursor)
+                    _create_slug_registry(cursor, shadow_table(table))
+            cursor.execute(
+                f"INSERT INTO {_quote(shadow_table(table))} SELECT * FROM {_quote(table)} "
+                f"ON CONFLICT DO NOTHING"
+            )
+            finish_partitioning(cursor, table)
+
+
+def unpartition_tables(apps, schema_editor):
+    """migration 用：還原成一般資料表（已有封存資料時不允許）"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            if _table_exists(cursor, f"{table}_archive"):
+                raise RuntimeError(f"{table} 已有封存資料，請先處理 {table}_archive")
+            if is_partitioned(cursor, table):
+                _unpartition(cursor, table)
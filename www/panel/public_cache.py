@@ -0,0 +1,139 @@
+"""
+公開頁面（師傅評論頁、按摩邀請頁）的 HTTP 快取
+
+回應帶 Cache-Control（瀏覽器 PUBLIC_PAGE_MAX_AGE 秒、共用快取 PUBLIC_PAGE_SHARED_MAX_AGE 秒）
+與 Surrogate-Key（店家、師傅、方案、邀請），由 nginx proxy_cache 快取（nginx/nginx.conf）。
+同一個網址對所有人的回應必須相同：頁面不設定 CSRF cookie（公開 API 不檢查 CSRF）、不讀取 session，
+邀請的點擊次數改由頁面載入後呼叫 click API 累加，不在頁面回應中計算。
+
+資料異動時 signals 依 surrogate key 排入清除工作（panel/tasks.py），worker 把 key 換成頁面路徑，
+對 PUBLIC_CACHE_PURGE_URLS 中每個快取伺服器送出請求：
+
+- GET（預設）：送到 nginx 只在內部網路開放、略過快取讀取的 server，重新取得頁面並覆蓋快取，
+  不需要額外的 nginx 模組；已刪除的資料取得 404，同樣覆蓋舊的頁面
+- PURGE：ngx_cache_purge、Varnish 等支援 PURGE 方法的快取直接刪除
+
+店家、師傅、方案的 key 只換成尚未結束的邀請頁面，已結束的邀請頁面在 s-maxage 到期後自然更新。
+"""
+import logging
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+
+from .models import MassageInvitation, Therapist
+
+logger = logging.getLogger(__name__)
+
+
+def store_key(store_id):
+    return f"store-{store_id}"
+
+
+def therapist_key(therapist_id):
+    return f"therapist-{therapist_id}"
+
+
+def plan_key(plan_id):
+    return f"plan-{plan_id}"
+
+
+def invitation_key(slug):
+    return f"invitation-{slug}"
+
+
+def review_page_keys(therapist):
+    return [store_key(therapist.store_id), therapist_key(therapist.id)]
+
+
+def invitation_page_keys(invitation):
+    return [
+        store_key(invitation.massage_plan.store_id),
+        therapist_key(invitation.therapist_id),
+        plan_key(invitation.massage_plan_id),
+        invitation_key(invitation.slug),
+    ]
+
+
+def cache_public_page(response, keys):
+    """
+    加上共用快取的 Cache-Control 與 Surrogate-Key
+    X-Accel-Expires 給 nginx 使用（優先於 Cache-Control，不會傳給客戶端）
+    """
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=settings.PUBLIC_PAGE_MAX_AGE,
+        s_maxage=settings.PUBLIC_PAGE_SHARED_MAX_AGE,
+    )
+    response['X-Accel-Expires'] = str(settings.PUBLIC_PAGE_SHARED_MAX_AGE)
+    response['Surrogate-Key'] = ' '.join(keys)
+    return response
+
+
+def is_purge_enabled():
+    return bool(settings.PUBLIC_CACHE_PURGE_URLS)
+
+
+def purge_paths(keys):
+    """surrogate key 對應的頁面路徑（排序後的 list）"""
+    ids = {'store': set(), 'therapist': set(), 'plan': set(), 'invitation': set()}
+    for key in keys:
+        kind, _, value = key.partition('-')
+        if kind in ids and value:
+            ids[kind].add(value)
+
+    therapist_ids = set(ids['therapist'])
+    if ids['store']:
+        therapist_ids.update(
+            str(therapist_id) for therapist_id in
+            Therapist.objects.filter(store_id__in=ids['store']).values_list('id', flat=True)
+        )
+
+    slugs = set(ids['invitation'])
+    related = Q()
+    if ids['store']:
+        related |= Q(store_id__in=ids['store'])
+    if ids['therapist']:
+        related |= Q(therapist_id__in=ids['therapist'])
+    if ids['plan']:
+        related |= Q(massage_plan_id__in=ids['plan'])
+    if related:
+        slugs.update(
+            str(slug) for slug in
+            MassageInvitation.objects.filter(related).exclude(
+                status=MassageInvitation.EXPIRED
+            ).order_by().values_list('slug', flat=True)
+        )
+
+    paths = [reverse('public_review_therapist', args=[int(therapist_id)]) for therapist_id in therapist_ids]
+    paths += [reverse('public_massage_invitation', args=[slug]) for slug in slugs]
+    return sorted(paths)
+
+
+def send_purge(paths):
+    """
+    對每個快取伺服器送出清除請求，回傳送出的請求數
+    任何狀態碼的回應都代表快取已處理；連不上的伺服器在全部送完後拋出例外，讓工作重試
+    """
+    failed = []
+    sent = 0
+    for base_url in settings.PUBLIC_CACHE_PURGE_URLS:
+        for path in paths:
+            request = Request(base_url.rstrip('/') + path, method=settings.PUBLIC_CACHE_PURGE_METHOD)
+            try:
+                with urlopen(request, timeout=settings.PUBLIC_CACHE_PURGE_TIMEOUT_SECONDS):
+                    pass
+            except HTTPError:
+                pass
+            except (URLError, OSError) as error:
+                failed.append(f"{base_url}{path}: {error}")
+                continue
+            sent += 1
+    if failed:
+        logger.warning("公開頁面快取清除失敗 %s 筆", len(failed))
+        raise RuntimeError("公開頁面快取清除失敗：\n" + '\n'.join(failed[:20]))
+    return sent
@@ -0,0 +1,66 @@
+"""
+以 orjson 處理 API 的 JSON 輸出與輸入
+
+datetime / Decimal / UUID 等型別都交給 DRF 的 JSONEncoder 轉換
+（datetime 的 +00:00 改為 Z、Decimal 轉 float），\\u2028 / \\u2029 一樣跳脫，
+解析後的值與 DRF 內建的 JSONRenderer 相同。位元組並非完全一致：使用指數的浮點數
+orjson 寫成 1e16、1.5e-7，內建的 json 模組寫成 1e+16、1.5e-07（同樣是最短的表示法，數值相同）。
+orjson 無法處理的情況（縮排不是 2、ensure_ascii、超過 64 bit 的整數等）改用內建 renderer，
+沒有安裝 orjson 時也一樣。
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # 沒有安裝 orjson 時使用 DRF 內建實作
+    orjson = None
+
+_encoder = JSONEncoder()
+
+if orjson is not None:
+    # datetime 系列交給 DRF 的 encoder，格式才會與原本一致
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent not in (None, 2):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        options = ORJSON_OPTIONS
+        if indent == 2:
+            options |= orjson.OPT_INDENT_2
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # 與 DRF 相同，輸出必須是合法的 JavaScript 字串
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower().replace('_', '-') != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            # orjson 本身就不接受 NaN / Infinity，與 STRICT_JSON 相同
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
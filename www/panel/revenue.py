@@ -0,0 +1,142 @@
+"""
+預約價格與每日營收彙總
+
+預約建立時記錄原價（list_price）與實收金額（price_charged）；
+RevenueDaily 依店家當地日期、師傅、方案彙總預約數與金額，由預約的 signals 增量維護，
+月報表只需要讀取一個月份的彙總列，不需要掃描預約表。
+
+bulk_create / queryset.update 不會觸發 signals，
+大量寫入後以 rebuild_revenue（或 `manage.py rebuild_revenue`）依預約重新計算。
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Reservation, RevenueDaily
+from .store_calendar import get_store_calendar
+
+
+def reservation_prices(list_price, price_charged, plan_price):
+    """(原價, 實收金額)；舊資料沒有價格快照時以方案目前價格計算"""
+    if list_price is None:
+        list_price = plan_price
+    if price_charged is None:
+        price_charged = list_price
+    return list_price, price_charged
+
+
+def revenue_key(store_id, appointment_time, therapist_id, massage_plan_id):
+    """預約在彙總表中的 (店家, 當地日期, 師傅, 方案)"""
+    day = get_store_calendar(store_id).local_date(appointment_time)
+    return store_id, day, therapist_id, massage_plan_id
+
+
+def revenue_entry(reservation):
+    """預約的彙總 key 與 (原價, 實收金額)"""
+    key = revenue_key(
+        reservation.store_id, reservation.appointment_time,
+        reservation.therapist_id, reservation.massage_plan_id
+    )
+    prices = reservation_prices(
+        reservation.list_price, reservation.price_charged, reservation.massage_plan.price
+    )
+    return key, prices
+
+
+def apply_revenue(key, count, list_price, price_charged):
+    """把一筆（count=1）或扣掉一筆（count=-1）預約的金額加進彙總列"""
+    apply_revenue_delta(key, count, list_price * count, price_charged * count)
+
+
+def apply_revenue_delta(key, count, list_revenue, revenue):
+    """彙總列加上預約數與金額的變化量（批次操作時同一列的變化先合併）"""
+    store_id, day, therapist_id, massage_plan_id = key
+    lookup = {
+        'store_id': store_id, 'date': day,
+        'therapist_id': therapist_id, 'massage_plan_id': massage_plan_id,
+    }
+    values = {
+        'reservation_count': F('reservation_count') + count,
+        'revenue': F('revenue') + revenue,
+        'list_revenue': F('list_revenue') + list_revenue,
+    }
+    if RevenueDaily.objects.filter(**lookup).update(**values):
+        if count < 0:
+            RevenueDaily.objects.filter(**lookup, reservation_count__lte=0).delete()
+        return
+    if count <= 0:
+        return
+    try:
+        # 同時有其他請求建立同一列時改為更新
+        with transaction.atomic():
+            RevenueDaily.objects.create(
+                **lookup, reservation_count=count, revenue=revenue, list_revenue=list_revenue,
+            )
+    except IntegrityError:
+        RevenueDaily.objects.filter(**lookup).update(**values)
+
+
+def rebuild_revenue(store_id, start=None, end=None):
+    """
+    依預約重新計算店家的彙總列，start / end 為當地日期（含），回傳寫入的列數
+    範圍內的舊彙總會先刪除
+    """
+    calendar = get_store_calendar(store_id)
+    reservations = Reservation.objects.filter(store_id=store_id)
+    summaries = RevenueDaily.objects.filter(store_id=store_id)
+    if start:
+        reservations = reservations.filter(appointment_time__gte=calendar.day_start(start))
+        summaries = summaries.filter(date__gte=start)
+    if end:
+        reservations = reservations.filter(appointment_time__lt=calendar.day_range(end)[1])
+        summaries = summaries.filter(date__lte=end)
+
+    totals = defaultdict(lambda: [0, Decimal('0'), Decimal('0')])
+    rows = reservations.values_list(
+        'appointment_time', 'therapist_id', 'massage_plan_id',
+        Coalesce('list_price', 'massage_plan__price'),
+        Coalesce('price_charged', 'list_price', 'massage_plan__price'),
+    ).order_by()
+    for appointment_time, therapist_id, massage_plan_id, list_price, price_charged in rows.iterator():
+        day = calendar.local_date(appointment_time)
+        total = totals[(day, therapist_id, massage_plan_id)]
+        total[0] += 1
+        total[1] += price_charged
+        total[2] += list_price
+
+    with transaction.atomic():
+        summaries.delete()
+        RevenueDaily.objects.bulk_create([
+            RevenueDaily(
+                store_id=store_id, date=day, therapist_id=therapist_id, massage_plan_id=massage_plan_id,
+                reservation_count=count, revenue=revenue, list_revenue=list_revenue,
+            )
+            for (day, therapist_id, massage_plan_id), (count, revenue, list_revenue) in totals.items()
+        ], batch_size=1000)
+    return len(totals)
+
+
+REPORT_GROUPS = {
+    'day': 'date',
+    'therapist': 'therapist_id',
+    'massage_plan': 'massage_plan_id',
+}
+
+
+def revenue_report(store_id, start, end, group_by):
+    """店家 start ~ end（含）的營收合計與依 group_by 分組的明細"""
+    summaries = RevenueDaily.objects.filter(store_id=store_id, date__gte=start, date__lte=end)
+    aggregates = {
+        'reservation_count': Coalesce(Sum('reservation_count'), 0),
+        'revenue': Coalesce(Sum('revenue'), Decimal('0')),
+        'list_revenue': Coalesce(Sum('list_revenue'), Decimal('0')),
+    }
+    column = REPORT_GROUPS[group_by]
+    rows = list(
+        summaries.values(column).annotate(**aggregates).order_by(column)
+    )
+    total = summaries.aggregate(**aggregates)
+    return total, rows
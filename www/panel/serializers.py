@@ -1,6 +1,15 @@
 from rest_framework import serializers
-from .models import MassagePlan, Therapist, ServiceSurvey, Reservation, MassageInvitation
+from django.conf import settings
+from django.db import transaction
+from .models import (
+    MassagePlan, Therapist, ServiceSurvey, Reservation, MassageInvitation, Customer,
+    TherapistShift, TherapistScheduleException, StoreBusinessHours
+)
 from django.utils import timezone
+from .assignment import assign_therapist
+from .bulk_reservations import BULK_MAX_ITEMS, BULK_SHIFT_MAX_MINUTES
+from .customers import get_or_create_customer
+from .invitation_status import ACTIVE, minutes_remaining_at, status_at
 
 
 class TherapistSerializer(serializers.ModelSerializer):
@@ -33,6 +42,87 @@ class TherapistSerializer(serializers.ModelSerializer):
             return value.strip()
         return value
     
+class StoreBusinessHoursSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StoreBusinessHours
+        fields = ['id', 'weekday', 'open_time', 'close_time', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+    def validate(self, data):
+        """驗證結束營業在開始營業之後（00:00 視為當天結束）"""
+        open_time = data.get('open_time', getattr(self.instance, 'open_time', None))
+        close_time = data.get('close_time', getattr(self.instance, 'close_time', None))
+        if open_time and close_time and close_time.hour + close_time.minute != 0 and close_time <= open_time:
+            raise serializers.ValidationError({
+                'close_time': '結束營業時間必須在開始營業時間之後'
+            })
+        return data
+
+
+class TherapistShiftSerializer(serializers.ModelSerializer):
+    therapist_name = serializers.CharField(source='therapist.name', read_only=True)
+
+    class Meta:
+        model = TherapistShift
+        fields = ['id', 'therapist', 'therapist_name', 'weekday', 'start_time', 'end_time',
+                  'created_at', 'updated_at']
+        read_only_fields = ['id', 'therapist_name', 'created_at', 'updated_at']
+
+    def validate_therapist(self, value):
+        """驗證師傅是否屬於當前店家"""
+        request = self.context.get('request')
+        if request and hasattr(request, 'user'):
+            store = getattr(request.user, "store", None)
+            if store and value.store != store:
+                raise serializers.ValidationError("所選師傅不屬於您的店家")
+        return value
+
+    def validate(self, data):
+        """驗證下班時間在上班時間之後（00:00 視為當天結束）"""
+        start_time = data.get('start_time', getattr(self.instance, 'start_time', None))
+        end_time = data.get('end_time', getattr(self.instance, 'end_time', None))
+        if start_time and end_time and end_time.hour + end_time.minute != 0 and end_time <= start_time:
+            raise serializers.ValidationError({
+                'end_time': '下班時間必須在上班時間之後'
+            })
+        return data
+
+
+class TherapistScheduleExceptionSerializer(serializers.ModelSerializer):
+    therapist_name = serializers.CharField(source='therapist.name', read_only=True)
+
+    class Meta:
+        model = TherapistScheduleException
+        fields = ['id', 'therapist', 'therapist_name', 'date', 'is_day_off', 'start_time',
+                  'end_time', 'notes', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'therapist_name', 'created_at', 'updated_at']
+
+    def validate_therapist(self, value):
+        """驗證師傅是否屬於當前店家"""
+        request = self.context.get('request')
+        if request and hasattr(request, 'user'):
+            store = getattr(request.user, "store", None)
+            if store and value.store != store:
+                raise serializers.ValidationError("所選師傅不屬於您的店家")
+        return value
+
+    def validate(self, data):
+        """非休假時必須提供上下班時間"""
+        is_day_off = data.get('is_day_off', getattr(self.instance, 'is_day_off', True))
+        start_time = data.get('start_time', getattr(self.instance, 'start_time', None))
+        end_time = data.get('end_time', getattr(self.instance, 'end_time', None))
+        if not is_day_off:
+            if not start_time or not end_time:
+                raise serializers.ValidationError({
+                    'start_time': '調整時段需提供上班與下班時間'
+                })
+            if end_time.hour + end_time.minute != 0 and end_time <= start_time:
+                raise serializers.ValidationError({
+                    'end_time': '下班時間必須在上班時間之後'
+                })
+        return data
+
+
 class ServiceSurveySerializer(serializers.ModelSerializer):
     therapist_name = serializers.CharField(source='therapist.name', read_only=True)
     
@@ -119,12 +209,13 @@ class ReservationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Reservation
         fields = [
-            'id', 'customer_name', 'customer_phone', 'appointment_time',
+            'id', 'customer', 'customer_name', 'customer_phone', 'appointment_time',
             'massage_plan', 'massage_plan_name', 'massage_plan_price', 'massage_plan_duration',
             'therapist', 'therapist_name', 'store', 'store_name',
+            'list_price', 'price_charged',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'store', 'store_name', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'customer', 'store', 'store_name', 'list_price', 'created_at', 'updated_at']
 
     def validate_customer_name(self, value):
         """驗證客戶姓名不能為空"""
@@ -144,6 +235,12 @@ class ReservationSerializer(serializers.ModelSerializer):
         
         return value.strip()
 
+    def validate_price_charged(self, value):
+        """實收金額不能為負數（不填時等於方案原價）"""
+        if value is not None and value < 0:
+            raise serializers.ValidationError("實收金額不能為負數")
+        return value
+
     def validate_appointment_time(self, value):
         """驗證預約時間"""
         if value <= timezone.now():
@@ -207,6 +304,53 @@ class ReservationSerializer(serializers.ModelSerializer):
 
         return data
 
+    def create(self, validated_data):
+        """
+        依電話關聯客戶、記錄方案原價；未指定師傅時自動派工
+        客戶、派工與建立預約在同一個交易中完成
+        """
+        validated_data['list_price'] = validated_data['massage_plan'].price
+        if validated_data.get('price_charged') is None:
+            validated_data['price_charged'] = validated_data['list_price']
+
+        with transaction.atomic():
+            validated_data['customer'] = get_or_create_customer(
+                validated_data['store'].id,
+                validated_data['customer_name'],
+                validated_data['customer_phone']
+            )
+            if validated_data.get('therapist') or not settings.RESERVATION_AUTO_ASSIGN:
+                return super().create(validated_data)
+
+            therapist = assign_therapist(
+                validated_data['store'],
+                validated_data['appointment_time'],
+                validated_data['massage_plan'].duration
+            )
+            if therapist is None:
+                raise serializers.ValidationError({
+                    'therapist': '該時段沒有可接單的師傅'
+                })
+            validated_data['therapist'] = therapist
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        """修改客戶姓名或電話時重新關聯客戶；更換方案時依新方案重新計價"""
+        massage_plan = validated_data.get('massage_plan')
+        if massage_plan and massage_plan.id != instance.massage_plan_id:
+            validated_data['list_price'] = massage_plan.price
+            if validated_data.get('price_charged') is None:
+                validated_data['price_charged'] = massage_plan.price
+
+        with transaction.atomic():
+            if 'customer_name' in validated_data or 'customer_phone' in validated_data:
+                validated_data['customer'] = get_or_create_customer(
+                    instance.store_id,
+                    validated_data.get('customer_name', instance.customer_name),
+                    validated_data.get('customer_phone', instance.customer_phone)
+                )
+            return super().update(instance, validated_data)
+
 
 class SimpleReservationSerializer(serializers.ModelSerializer):
     """簡化版預約序列化器，用於列表顯示"""
@@ -216,11 +360,57 @@ class SimpleReservationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Reservation
         fields = [
-            'id', 'customer_name', 'customer_phone', 'appointment_time',
+            'id', 'customer', 'customer_name', 'customer_phone', 'appointment_time',
             'massage_plan_name', 'therapist_name'
         ]
 
 
+# 主鍵（bigint）的上限，超過時查詢會在資料庫端溢位
+MAX_ID = 2 ** 63 - 1
+
+
+class BulkReservationSerializer(serializers.Serializer):
+    """批次操作的預約 id（去除重複，保留順序）"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=MAX_ID),
+        allow_empty=False,
+        max_length=BULK_MAX_ITEMS,
+        error_messages={
+            'empty': "請提供預約 id 列表",
+            'max_length': f"一次最多處理 {BULK_MAX_ITEMS} 筆預約",
+        },
+    )
+
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))
+
+
+class BulkReassignSerializer(BulkReservationSerializer):
+    therapist = serializers.IntegerField(min_value=1, max_value=MAX_ID)
+
+
+class BulkShiftSerializer(BulkReservationSerializer):
+    """minutes 正數往後、負數往前，最多移動 BULK_SHIFT_MAX_MINUTES 分鐘"""
+    minutes = serializers.IntegerField(min_value=-BULK_SHIFT_MAX_MINUTES, max_value=BULK_SHIFT_MAX_MINUTES)
+
+    def validate_minutes(self, value):
+        if not value:
+            raise serializers.ValidationError("移動的分鐘數不能為 0")
+        return value
+
+
+class CustomerSerializer(serializers.ModelSerializer):
+    """客戶與來店統計（統計欄位只計入預約時間已到的預約，唯讀）"""
+
+    class Meta:
+        model = Customer
+        fields = [
+            'id', 'name', 'phone', 'visit_count', 'last_visit_at', 'lifetime_spend', 'next_visit_at',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
 class MassageInvitationSerializer(serializers.ModelSerializer):
     massage_plan_name = serializers.CharField(source='massage_plan.name', read_only=True)
     massage_plan_duration = serializers.IntegerField(
@@ -233,6 +423,7 @@ class MassageInvitationSerializer(serializers.ModelSerializer):
     store_name = serializers.CharField(source='massage_plan.store.name', read_only=True)
     invitation_url = serializers.SerializerMethodField()
     discount_amount = serializers.SerializerMethodField()
+    status = serializers.SerializerMethodField()
     is_active = serializers.SerializerMethodField()
     time_remaining = serializers.SerializerMethodField()
 
@@ -243,10 +434,10 @@ class MassageInvitationSerializer(serializers.ModelSerializer):
             'massage_plan_name', 'massage_plan_duration',
             'massage_plan_original_price', 'therapist', 'therapist_name',
             'discount_price', 'discount_amount', 'slug', 'click_count',
-            'notes', 'store_name', 'invitation_url', 'is_active',
+            'notes', 'store_name', 'invitation_url', 'status', 'is_active',
             'time_remaining', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'slug', 'click_count', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'slug', 'click_count', 'status', 'created_at', 'updated_at']
 
     def get_invitation_url(self, obj):
         """生成完整的邀請連結"""
@@ -261,20 +452,17 @@ class MassageInvitationSerializer(serializers.ModelSerializer):
             return float(obj.massage_plan.price - obj.discount_price)
         return 0
 
+    def get_status(self, obj):
+        """目前的狀態（依可預約時間計算；status 欄位供篩選與計數）"""
+        return status_at(obj.available_start, obj.available_end, timezone.now())
+
     def get_is_active(self, obj):
-        """檢查邀請是否仍然有效"""
-        now = timezone.now()
-        return obj.available_start <= now <= obj.available_end
+        """邀請目前是否進行中（依可預約時間計算，物化的 status 欄位可能還沒推進）"""
+        return status_at(obj.available_start, obj.available_end, timezone.now()) == ACTIVE
 
     def get_time_remaining(self, obj):
-        """計算剩餘時間（分鐘）"""
-        now = timezone.now()
-        if now > obj.available_end:
-            return 0
-        elif now < obj.available_start:
-            return int((obj.available_start - now).total_seconds() / 60)
-        else:
-            return int((obj.available_end - now).total_seconds() / 60)
+        """距離開始（尚未開始）或結束（進行中）的分鐘數"""
+        return minutes_remaining_at(obj.available_start, obj.available_end, timezone.now())
 
     def validate_available_start(self, value):
         """驗證開始時間"""
@@ -378,16 +566,9 @@ class PublicMassageInvitationSerializer(serializers.ModelSerializer):
         return 0
 
     def get_is_active(self, obj):
-        """檢查邀請是否仍然有效"""
-        now = timezone.now()
-        return obj.available_start <= now <= obj.available_end
+        """邀請目前是否進行中（依可預約時間計算，物化的 status 欄位可能還沒推進）"""
+        return status_at(obj.available_start, obj.available_end, timezone.now()) == ACTIVE
 
     def get_time_remaining(self, obj):
-        """計算剩餘時間（分鐘）"""
-        now = timezone.now()
-        if now > obj.available_end:
-            return 0
-        elif now < obj.available_start:
-            return int((obj.available_start - now).total_seconds() / 60)
-        else:
-            return int((obj.available_end - now).total_seconds() / 60)
\ No newline at end of file
+        """距離開始（尚未開始）或結束（進行中）的分鐘數"""
+        return minutes_remaining_at(obj.available_start, obj.available_end, timezone.now())
\ No newline at end of file
@@ -0,0 +1,439 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import availability
+from .store_calendar import get_store_calendar, new_calendar_version
+from .store_cache import invalidate_store_cache
+from .customers import rebuild_customer_stats, reservation_amount
+from .revenue import apply_revenue, reservation_prices, revenue_entry, revenue_key
+from . import survey_search
+from .store_scope import STORE_SOURCES, source_store_id
+from .invitation_status import next_transition, status_at
+from .invitation_cache import invalidate_cached_invitation, invitation_created
+from . import public_cache
+from .tasks import (
+    enqueue, schedule_customer_visits, schedule_invitation_status, PUBLIC_CACHE_PURGE, REVENUE_REBUILD
+)
+from .models import (
+    Store, StoreBusinessHours, Therapist, MassagePlan, Reservation, ServiceSurvey, MassageInvitation,
+    TherapistShift, TherapistScheduleException
+)
+from .events import (
+    publish_store_event, reservation_payload, RESERVATION_CREATED, RESERVATION_UPDATED,
+    RESERVATION_DELETED, SURVEY_CREATED
+)
+
+
+@receiver(post_save, sender=Reservation)
+def reservation_saved(sender, instance, created, **kwargs):
+    """預約新增/修改時通知店家"""
+    publish_store_event(
+        instance.store_id,
+        RESERVATION_CREATED if created else RESERVATION_UPDATED,
+        reservation_payload(instance)
+    )
+
+
+@receiver(post_delete, sender=Reservation)
+def reservation_deleted(sender, instance, **kwargs):
+    """預約刪除時通知店家"""
+    publish_store_event(
+        instance.store_id, RESERVATION_DELETED, {'id': instance.id}
+    )
+
+
+@receiver(pre_save, sender=ServiceSurvey)
+def survey_search_vector(sender, instance, update_fields=None, **kwargs):
+    """寫入時一併產生備註的檢索向量（與 INSERT 同一個 SQL）"""
+    if update_fields is not None and 'comment' not in update_fields:
+        return
+    if survey_search.is_supported():
+        instance.search_vector = survey_search.search_vector_for(instance.comment)
+
+
+@receiver(post_save, sender=ServiceSurvey)
+def survey_created(sender, instance, created, **kwargs):
+    """新問卷時通知店家"""
+    if not created:
+        return
+    publish_store_event(
+        instance.store_id,
+        SURVEY_CREATED,
+        {
+            'id': instance.id,
+            'therapist_id': instance.therapist_id,
+            'rating': instance.rating,
+        }
+    )
+
+
+# ====== 師傅空檔點陣圖維護 ======
+
+def _reservation_interval(therapist_id, appointment_time, duration):
+    return therapist_id, appointment_time, appointment_time + timedelta(minutes=duration)
+
+
+def _refresh_intervals(old, new, created, calendar):
+    """
+    依異動前後的 (therapist_id, start, end) 更新點陣圖
+    新建立的直接清掉 bits，其餘重建受影響的日期
+    """
+    if created:
+        if new[0]:
+            availability.mark_busy(*new, calendar)
+        return
+
+    days_by_therapist = {}
+    for interval in (old, new):
+        if interval and interval[0]:
+            therapist_id, start, end = interval
+            days_by_therapist.setdefault(therapist_id, set()).update(
+                availability.days_between(start, end, calendar)
+            )
+    for therapist_id, days in days_by_therapist.items():
+        availability.rebuild_days(therapist_id, days, calendar)
+
+
+@receiver(pre_save, sender=Reservation)
+def reservation_remember_interval(sender, instance, **kwargs):
+    """記住修改前的時段、客戶與金額，儲存後才能重建舊的日期、調整客戶統計與營收彙總"""
+    instance._previous_interval = None
+    instance._previous_booking = None
+    instance._previous_revenue = None
+    if instance.pk:
+        previous = Reservation.objects.filter(pk=instance.pk).values_list(
+            'therapist_id', 'appointment_time', 'massage_plan__duration',
+            'customer_id', 'store_id', 'massage_plan_id',
+            'list_price', 'price_charged', 'massage_plan__price'
+        ).first()
+        if previous:
+            (therapist_id, appointment_time, duration, customer_id, store_id, massage_plan_id,
+             list_price, price_charged, plan_price) = previous
+            prices = reservation_prices(list_price, price_charged, plan_price)
+            instance._previous_interval = _reservation_interval(therapist_id, appointment_time, duration)
+            instance._previous_booking = (customer_id, appointment_time, prices[1])
+            instance._previous_revenue = (
+                revenue_key(store_id, appointment_time, therapist_id, massage_plan_id), prices
+            )
+
+
+@receiver(post_save, sender=Reservation)
+def reservation_update_availability(sender, instance, created, **kwargs):
+    new = _reservation_interval(
+        instance.therapist_id, instance.appointment_time, instance.massage_plan.duration
+    )
+    _refresh_intervals(
+        getattr(instance, '_previous_interval', None), new, created,
+        get_store_calendar(instance.store_id)
+    )
+
+
+def _invalidate_interval(therapist_id, start, end, calendar):
+    """
+    刪除時只清掉物化結果，下次讀取再重建
+    （刪除可能來自師傅的 cascade，此時不能再寫入新的列）
+    """
+    if therapist_id:
+        availability.invalidate(
+            therapist_id, days=availability.days_between(start, end, calendar)
+        )
+
+
+@receiver(post_delete, sender=Reservation)
+def reservation_release_availability(sender, instance, **kwargs):
+    start = instance.appointment_time
+    end = start + availability.RESERVATION_LOOKBACK
+    _invalidate_interval(
+        instance.therapist_id, start, end, get_store_calendar(instance.store_id)
+    )
+
+
+@receiver(pre_save, sender=MassageInvitation)
+def invitation_remember_interval(sender, instance, **kwargs):
+    instance._previous_interval = None
+    if instance.pk:
+        instance._previous_interval = MassageInvitation.objects.filter(
+            pk=instance.pk
+        ).values_list('therapist_id', 'available_start', 'available_end').first()
+
+
+@receiver(post_save, sender=MassageInvitation)
+def invitation_update_availability(sender, instance, created, **kwargs):
+    new = (instance.therapist_id, instance.available_start, instance.available_end)
+    _refresh_intervals(
+        getattr(instance, '_previous_interval', None), new, created,
+        get_store_calendar(instance.therapist.store_id)
+    )
+
+
+@receiver(post_delete, sender=MassageInvitation)
+def invitation_release_availability(sender, instance, **kwargs):
+    _invalidate_interval(
+        instance.therapist_id, instance.available_start, instance.available_end,
+        get_store_calendar(instance.therapist.store_id)
+    )
+
+
+@receiver(pre_save, sender=MassagePlan)
+def plan_remember_duration(sender, instance, **kwargs):
+    instance._previous_duration = None
+    if instance.pk:
+        instance._previous_duration = MassagePlan.objects.filter(
+            pk=instance.pk
+        ).values_list('duration', flat=True).first()
+
+
+@receiver(post_save, sender=MassagePlan)
+def plan_duration_changed(sender, instance, created, **kwargs):
+    """方案時間改變時，重建尚未結束的預約在新舊時間所涵蓋的日期"""
+    previous_duration = getattr(instance, '_previous_duration', None)
+    if created or previous_duration is None or previous_duration == instance.duration:
+        return
+    calendar = get_store_calendar(instance.store_id)
+    longest = max(previous_duration, instance.duration)
+    reservations = Reservation.objects.filter(
+        massage_plan=instance,
+        appointment_time__gte=timezone.now() - timedelta(minutes=longest),
+    ).values_list('therapist_id', 'appointment_time')
+    availability.rebuild_many(
+        availability.reservation_days(
+            ((therapist_id, appointment_time, longest) for therapist_id, appointment_time in reservations),
+            calendar
+        ),
+        calendar
+    )
+
+
+@receiver(pre_save, sender=TherapistShift)
+def shift_remember_therapist(sender, instance, **kwargs):
+    instance._previous_therapist_id = None
+    if instance.pk:
+        instance._previous_therapist_id = TherapistShift.objects.filter(
+            pk=instance.pk
+        ).values_list('therapist_id', flat=True).first()
+
+
+@receiver(post_save, sender=TherapistShift)
+@receiver(post_delete, sender=TherapistShift)
+def shift_changed(sender, instance, **kwargs):
+    """每週班表影響之後所有日期，清掉今天以後的結果（改到其他師傅時兩位都清）"""
+    calendar = get_store_calendar(instance.therapist.store_id)
+    therapist_ids = {instance.therapist_id, getattr(instance, '_previous_therapist_id', None)}
+    for therapist_id in therapist_ids - {None}:
+        availability.invalidate(therapist_id, from_day=calendar.today())
+
+
+@receiver(pre_save, sender=TherapistScheduleException)
+def exception_remember_date(sender, instance, **kwargs):
+    instance._previous_date = None
+    if instance.pk:
+        instance._previous_date = TherapistScheduleException.objects.filter(
+            pk=instance.pk
+        ).values_list('therapist_id', 'date').first()
+
+
+@receiver(post_save, sender=TherapistScheduleException)
+@receiver(post_delete, sender=TherapistScheduleException)
+def exception_changed(sender, instance, **kwargs):
+    availability.invalidate(instance.therapist_id, days={instance.date})
+    previous = getattr(instance, '_previous_date', None)
+    if previous and previous != (instance.therapist_id, instance.date):
+        availability.invalidate(previous[0], days={previous[1]})
+
+
+# ====== 客戶來店統計 ======
+
+def _rebuild_customers(customer_ids):
+    """重新計算客戶的來店統計，在最早的下次來店時間排定推進工作"""
+    customer_ids = {customer_id for customer_id in customer_ids if customer_id}
+    if customer_ids:
+        at = rebuild_customer_stats(customer_ids)
+        if at:
+            schedule_customer_visits(at)
+
+
+@receiver(post_save, sender=Reservation)
+def reservation_update_customer(sender, instance, created, **kwargs):
+    """客戶、時間或金額有變動時重新計算新舊客戶"""
+    new = (instance.customer_id, instance.appointment_time, reservation_amount(instance))
+    previous = None if created else getattr(instance, '_previous_booking', None)
+    if previous == new:
+        return
+    _rebuild_customers({new[0], previous[0] if previous else None})
+
+
+@receiver(post_delete, sender=Reservation)
+def reservation_rebuild_customer(sender, instance, **kwargs):
+    _rebuild_customers({instance.customer_id})
+
+
+# ====== 店家 id 反正規化 ======
+
+@receiver(pre_save, sender=ServiceSurvey)
+@receiver(pre_save, sender=MassageInvitation)
+def sync_store_id(sender, instance, update_fields=None, **kwargs):
+    """問卷 / 邀請的店家 id 跟著師傅 / 方案"""
+    field_name = STORE_SOURCES[sender][0]
+    if update_fields is not None and field_name not in update_fields:
+        return
+    instance.store_id = source_store_id(instance)
+
+
+# ====== 邀請狀態 ======
+
+@receiver(pre_save, sender=MassageInvitation)
+def invitation_sync_status(sender, instance, update_fields=None, **kwargs):
+    """依當下時間計算狀態，之後的轉換由背景工作推進"""
+    if update_fields is not None and not {'available_start', 'available_end'} & set(update_fields):
+        return
+    instance.status = status_at(instance.available_start, instance.available_end, timezone.now())
+
+
+@receiver(post_save, sender=MassageInvitation)
+def invitation_schedule_status(sender, instance, update_fields=None, **kwargs):
+    """在下一次轉換時間排定推進工作（與邀請同一個交易寫入）"""
+    if update_fields is not None and not {'available_start', 'available_end'} & set(update_fields):
+        return
+    at = next_transition(instance)
+    if at:
+        schedule_invitation_status(at)
+
+
+# ====== 公開邀請 slug 快取 ======
+# 師傅、方案、店家異動由店家版本號處理（見下方店家資料快取版本）
+
+@receiver(post_save, sender=MassageInvitation)
+def invitation_cache_saved(sender, instance, created, **kwargs):
+    if created:
+        invitation_created(instance.slug)
+    else:
+        invalidate_cached_invitation(instance.slug)
+
+
+@receiver(post_delete, sender=MassageInvitation)
+def invitation_cache_deleted(sender, instance, **kwargs):
+    invalidate_cached_invitation(instance.slug)
+
+
+# ====== 每日營收彙總 ======
+
+@receiver(post_save, sender=Reservation)
+def reservation_update_revenue(sender, instance, created, **kwargs):
+    new = revenue_entry(instance)
+    previous = None if created else getattr(instance, '_previous_revenue', None)
+    if previous == new:
+        return
+    if previous:
+        apply_revenue(previous[0], -1, *previous[1])
+    apply_revenue(new[0], 1, *new[1])
+
+
+@receiver(post_delete, sender=Reservation)
+def reservation_remove_revenue(sender, instance, **kwargs):
+    key, prices = revenue_entry(instance)
+    apply_revenue(key, -1, *prices)
+
+
+@receiver(post_delete, sender=Therapist)
+def therapist_rebuild_revenue(sender, instance, **kwargs):
+    """
+    師傅被刪除時預約保留（師傅改為 NULL），該師傅的彙總列則一起刪除，
+    由 worker 依預約重建店家的彙總，併入未指定師傅的列（與刪除同一個交易排入）
+    """
+    enqueue(REVENUE_REBUILD, {'store_id': instance.store_id})
+
+
+# ====== 店家營業時間與時區 ======
+# 換掉行事曆版本：各 process 的行事曆與版本不同的點陣圖列在下次讀取時重建
+
+@receiver(pre_save, sender=Store)
+def store_remember_calendar(sender, instance, **kwargs):
+    instance._previous_calendar = None
+    if instance.pk:
+        previous = Store.objects.filter(pk=instance.pk).values_list(
+            'time_zone', 'slot_minutes', 'calendar_version'
+        ).first()
+        if previous:
+            instance._previous_calendar = previous[:2]
+            # 記憶體中的 Store 可能是營業時間異動前載入的，不要寫回舊的版本號
+            instance.calendar_version = previous[2]
+
+
+@receiver(post_save, sender=Store)
+def store_calendar_changed(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_calendar', None)
+    if created or previous is None or previous == (instance.time_zone, instance.slot_minutes):
+        return
+    instance.calendar_version = new_calendar_version()
+    Store.objects.filter(pk=instance.pk).update(calendar_version=instance.calendar_version)
+    if previous[0] != instance.time_zone:
+        # 營收彙總的日期以店家當地日期計算，時區改變後由 worker 整個重建（與這次儲存同一個交易排入）
+        enqueue(REVENUE_REBUILD, {'store_id': instance.pk})
+
+
+@receiver(post_save, sender=StoreBusinessHours)
+@receiver(post_delete, sender=StoreBusinessHours)
+def business_hours_changed(sender, instance, **kwargs):
+    Store.objects.filter(pk=instance.store_id).update(calendar_version=new_calendar_version())
+
+
+# ====== 店家資料快取版本 ======
+
+@receiver(post_save, sender=Store)
+@receiver(post_delete, sender=Store)
+def store_cache_store_changed(sender, instance, **kwargs):
+    invalidate_store_cache(instance.id)
+
+
+@receiver(post_save, sender=Therapist)
+@receiver(post_delete, sender=Therapist)
+@receiver(post_save, sender=MassagePlan)
+@receiver(post_delete, sender=MassagePlan)
+@receiver(post_save, sender=StoreBusinessHours)
+@receiver(post_delete, sender=StoreBusinessHours)
+def store_cache_data_changed(sender, instance, **kwargs):
+    invalidate_store_cache(instance.store_id)
+
+
+# ====== 公開頁面 HTTP 快取清除 ======
+# 放在最後：commit 後先清掉頁面資料的快取（店家版本號、邀請快照），再排入清除工作，
+# worker 重新取得頁面時不會讀到舊的快取
+
+def _purge_public_pages(key):
+    if public_cache.is_purge_enabled():
+        transaction.on_commit(lambda: enqueue(PUBLIC_CACHE_PURGE, {'keys': [key]}))
+
+
+@receiver(post_save, sender=MassageInvitation)
+def invitation_purge_page(sender, instance, created, **kwargs):
+    # 新邀請的頁面還沒有被快取
+    if not created:
+        _purge_public_pages(public_cache.invitation_key(instance.slug))
+
+
+@receiver(post_delete, sender=MassageInvitation)
+def invitation_deleted_purge_page(sender, instance, **kwargs):
+    _purge_public_pages(public_cache.invitation_key(instance.slug))
+
+
+@receiver(post_save, sender=Therapist)
+@receiver(post_delete, sender=Therapist)
+def therapist_purge_pages(sender, instance, **kwargs):
+    _purge_public_pages(public_cache.therapist_key(instance.id))
+
+
+@receiver(post_save, sender=MassagePlan)
+@receiver(post_delete, sender=MassagePlan)
+def plan_purge_pages(sender, instance, **kwargs):
+    _purge_public_pages(public_cache.plan_key(instance.id))
+
+
+@receiver(post_save, sender=Store)
+@receiver(post_delete, sender=Store)
+def store_purge_pages(sender, instance, **kwargs):
+    _purge_public_pages(public_cache.store_key(instance.id))
+
@@ -0,0 +1,48 @@
+"""
+靜態檔案儲存：檔名帶內容雜湊（ManifestStaticFilesStorage），
+並在 collectstatic 時預先產生 .gz / .br，由 nginx 直接回傳壓縮檔
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # 沒有安裝 brotli 時只產生 gzip
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.xml')
+# 壓縮後至少要小這麼多才保留
+MIN_SAVING_RATIO = 0.95
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if not isinstance(processed, Exception):
+                processed_names.add(name)
+                if hashed_name:
+                    processed_names.add(hashed_name)
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+        for name in sorted(processed_names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                self._write_compressed(name)
+
+    def _write_compressed(self, name):
+        with self.open(name) as original:
+            content = original.read()
+
+        variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content)))
+
+        path = self.path(name)
+        for suffix, compressed in variants:
+            if len(compressed) < len(content) * MIN_SAVING_RATIO:
+                with open(path + suffix, 'wb') as handle:
+                    handle.write(compressed)
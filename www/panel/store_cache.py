@@ -0,0 +1,99 @@
+"""
+依店家版本號快取變動不頻繁的資料（師傅、方案、營業時間列表與頁面下拉選單）
+
+每家店有一個版本號，師傅、方案、店家、營業時間異動時（signals）在交易 commit 後遞增；
+快取 key 含店家、版本號與查詢參數，版本一變舊的 key 就不會再被讀到，
+等 STORE_CACHE_SECONDS 到期自然清除，不需要逐一刪除。
+
+版本號存在 Django cache，多個 worker 時要使用共用快取（memcached / redis），
+否則其他 process 要等快取到期才會看到異動。
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import urlencode
+from rest_framework.response import Response
+
+from .models import Therapist, MassagePlan
+
+
+def _version_key(store_id):
+    return f"store_version:{store_id}"
+
+
+def get_store_version(store_id):
+    version = cache.get(_version_key(store_id))
+    if version is None:
+        # 版本號被清掉後從目前時間重新開始，不會與之前用過的版本號重複
+        cache.add(_version_key(store_id), time.time_ns(), None)
+        version = cache.get(_version_key(store_id))
+    return version
+
+
+def bump_store_version(store_id):
+    """立即遞增店家版本號"""
+    try:
+        cache.incr(_version_key(store_id))
+    except ValueError:
+        cache.set(_version_key(store_id), time.time_ns(), None)
+
+
+def invalidate_store_cache(store_id):
+    """
+    交易 commit 後才遞增版本號；
+    提早遞增的話，其他請求可能讀到尚未 commit 的舊資料並存進新版本
+    """
+    transaction.on_commit(lambda: bump_store_version(store_id))
+
+
+def store_cache_key(store_id, name, params=None):
+    """params 為 QueryDict，順序不同的相同參數對應同一個 key"""
+    key = f"store:{store_id}:v{get_store_version(store_id)}:{name}"
+    if params:
+        query = urlencode(sorted(params.lists()), doseq=True)
+        key += ':' + hashlib.md5(query.encode()).hexdigest()
+    return key
+
+
+def cache_store_list(name):
+    """
+    ViewSet list 的裝飾器：依店家、版本與查詢參數快取序列化後的資料
+
+        @cache_store_list('therapists')
+        def list(self, request, *args, **kwargs):
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            store = getattr(request.user, "store", None)
+            if not store:
+                return method(self, request, *args, **kwargs)
+
+            key = store_cache_key(store.id, name, request.query_params)
+            data = cache.get(key)
+            if data is not None:
+                return Response(data)
+
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, settings.STORE_CACHE_SECONDS)
+            return response
+        return wrapper
+    return decorator
+
+
+def get_store_reference_data(store_id):
+    """管理頁面下拉選單用的師傅與方案（依名稱排序）"""
+    key = store_cache_key(store_id, 'reference_data')
+    data = cache.get(key)
+    if data is None:
+        data = {
+            'therapists': list(Therapist.objects.filter(store_id=store_id).order_by('name')),
+            'massage_plans': list(MassagePlan.objects.filter(store_id=store_id).order_by('name')),
+        }
+        cache.set(key, data, settings.STORE_CACHE_SECONDS)
+    return data
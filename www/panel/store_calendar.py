@@ -0,0 +1,187 @@
+"""
+店家行事曆：時區、營業時間與預約時段範本
+
+每家店每個星期幾的可預約時段（當地時鐘距離 00:00 的分鐘數）與營業時間點陣圖
+只在第一次使用時計算，之後依 Store.calendar_version 放在 process 記憶體中重複使用。
+範本的位移是時鐘時間：日光節約時間轉換的那天 09:00 仍是當地 09:00，
+跳過的時刻不提供時段，重複的時刻取第二次。
+
+時區、時段間隔或營業時間異動時 signals 在同一個交易中換掉 calendar_version，
+每次取得行事曆只查詢一次版本號，其他 process 在 commit 後立即改用新的行事曆；
+師傅空檔點陣圖記錄計算時的版本，版本不同的列在讀取時重建。
+"""
+import logging
+import threading
+import time as time_module
+from datetime import datetime, time, timedelta
+
+import pytz
+from django.conf import settings
+from django.utils import timezone
+
+from . import availability
+from .models import Store, StoreBusinessHours
+
+logger = logging.getLogger(__name__)
+
+
+class StoreCalendar:
+    def __init__(self, store_id, time_zone, slot_minutes, hours_by_weekday, version=0):
+        self.store_id = store_id
+        self.version = version
+        try:
+            self.tz = pytz.timezone(time_zone)
+        except pytz.UnknownTimeZoneError:
+            # 時區在儲存時驗證；舊資料或直接寫入資料庫的錯誤值改用系統時區，不讓整家店的預約中斷
+            logger.warning("店家 %s 的時區無效：%s，改用 %s", store_id, time_zone, settings.TIME_ZONE)
+            self.tz = pytz.timezone(settings.TIME_ZONE)
+        self.slot_minutes = slot_minutes
+        self.hours_by_weekday = hours_by_weekday
+
+        # 每個星期幾的可預約開始時間（分鐘位移）與營業時間 bits
+        self.slot_templates = {}
+        self.business_masks = {}
+        for weekday in range(7):
+            offsets = []
+            mask = 0
+            for open_time, close_time in hours_by_weekday.get(weekday, ()):
+                open_minutes = open_time.hour * 60 + open_time.minute
+                close_minutes = close_time.hour * 60 + close_time.minute or 24 * 60
+                offsets.extend(range(open_minutes, close_minutes, slot_minutes))
+                mask |= availability.time_range_mask(open_time, close_time)
+            self.slot_templates[weekday] = tuple(sorted(set(offsets)))
+            self.business_masks[weekday] = mask
+
+    def _localize(self, naive):
+        """
+        當地時鐘時間轉成 aware datetime，回傳 (datetime, 該時刻是否存在)
+        日光節約時間開始時跳過的時刻改為跳過之後的第一個時間；結束時重複的時刻取第二次
+        """
+        value = self.tz.normalize(self.tz.localize(naive))
+        if value.replace(tzinfo=None) == naive:
+            return value, True
+        earlier = self.tz.normalize(self.tz.localize(naive, is_dst=True))
+        return self._transition(earlier, value), False
+
+    def _transition(self, start, end):
+        """
+        start 與 end 的 UTC 時差不同時，回傳 (start, end] 中第一個時差改變的時間，否則回傳 None
+        時區轉換都在整分鐘，以分鐘二分搜尋
+        """
+        offset = start.astimezone(self.tz).utcoffset()
+        if end.astimezone(self.tz).utcoffset() == offset:
+            return None
+        base = start.replace(second=0, microsecond=0)
+        low, high = 0, -(-(end - base) // timedelta(minutes=1))
+        while high - low > 1:
+            middle = (low + high) // 2
+            if (base + timedelta(minutes=middle)).astimezone(self.tz).utcoffset() == offset:
+                low = middle
+            else:
+                high = middle
+        return (base + timedelta(minutes=high)).astimezone(self.tz)
+
+    def at(self, day, minutes):
+        """當天當地時鐘 00:00 之後 minutes 分鐘（時鐘時間，不是經過的時間）"""
+        return self._localize(datetime.combine(day, time.min) + timedelta(minutes=minutes))[0]
+
+    def day_start(self, day):
+        """當地時間當天 00:00"""
+        return self.at(day, 0)
+
+    def day_range(self, day):
+        """當天 [00:00, 隔天 00:00)"""
+        start = self.day_start(day)
+        return start, self.day_start(day + timedelta(days=1))
+
+    def local_date(self, value):
+        return timezone.localtime(value, self.tz).date()
+
+    def today(self):
+        return self.local_date(timezone.now())
+
+    def clock_offset(self, day, value):
+        """value 的當地時鐘距離 day 00:00 的時間（timedelta，前一天為負值）"""
+        return timezone.localtime(value, self.tz).replace(tzinfo=None) - datetime.combine(day, time.min)
+
+    def clock_segments(self, start, end):
+        """把 [start, end) 在 UTC 時差改變處切開，每段的當地時鐘是連續的"""
+        segments = []
+        while start < end:
+            transition = self._transition(start, end)
+            if transition is None:
+                segments.append((start, end))
+                break
+            segments.append((start, transition))
+            start = transition
+        return segments
+
+    def align(self, value):
+        """不早於 value、當地時鐘對齊預約時段間隔的時間（當地時區）"""
+        step = timedelta(minutes=self.slot_minutes)
+        local = timezone.localtime(value, self.tz)
+        remainder = (local.replace(tzinfo=None) - datetime.combine(local.date(), time.min)) % step
+        return (local + (step - remainder)).astimezone(self.tz) if remainder else local
+
+    def slots(self, day):
+        """當天所有可預約開始時間 [(分鐘位移, datetime), ...]，略過日光節約時間跳過的時刻"""
+        slots = []
+        for offset in self.slot_templates[day.weekday()]:
+            value, exists = self._localize(datetime.combine(day, time.min) + timedelta(minutes=offset))
+            if exists:
+                slots.append((offset, value))
+        return slots
+
+    def business_mask(self, day):
+        return self.business_masks[day.weekday()]
+
+
+_calendars = {}
+_calendars_lock = threading.Lock()
+
+
+def _build_calendar(store_id, time_zone, slot_minutes, version):
+    hours_by_weekday = {}
+    for weekday, open_time, close_time in StoreBusinessHours.objects.filter(
+        store_id=store_id
+    ).values_list('weekday', 'open_time', 'close_time'):
+        hours_by_weekday.setdefault(weekday, []).append((open_time, close_time))
+
+    # 尚未設定營業時間時每天使用預設時段
+    if not hours_by_weekday:
+        default_open, default_close = (
+            datetime.strptime(value, '%H:%M').time()
+            for value in settings.AVAILABILITY_DEFAULT_HOURS
+        )
+        hours_by_weekday = {
+            weekday: [(default_open, default_close)] for weekday in range(7)
+        }
+
+    return StoreCalendar(store_id, time_zone, slot_minutes, hours_by_weekday, version)
+
+
+def new_calendar_version():
+    """新的行事曆版本號；以時間產生，交易 rollback 後不會與之後的版本重複"""
+    return time_module.time_ns()
+
+
+def get_store_calendar(store):
+    """
+    取得店家行事曆（可傳入 Store 或 store id）
+    每次查詢一次店家的時區與版本號，版本相同時使用 process 中已建好的行事曆
+    """
+    store_id = store.id if isinstance(store, Store) else store
+    time_zone, slot_minutes, version = Store.objects.filter(id=store_id).values_list(
+        'time_zone', 'slot_minutes', 'calendar_version'
+    ).get()
+
+    # 直接修改資料庫的時區或間隔（不經過 signals）也會重建
+    key = (time_zone, slot_minutes, version)
+    cached = _calendars.get(store_id)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    calendar = _build_calendar(store_id, time_zone, slot_minutes, version)
+    with _calendars_lock:
+        _calendars[store_id] = (key, calendar)
+    return calendar
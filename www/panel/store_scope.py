@@ -0,0 +1,45 @@
+"""
+問卷與按摩邀請上的反正規化店家 id
+
+ServiceSurvey.store 取自師傅、MassageInvitation.store 取自方案，
+儲存時由 signals 同步，店家列表以 (store, created_at) 索引直接查詢，
+不需要先查出店家的師傅 id 或 join 方案表。
+
+既有資料由資料遷移 survey_store_id / invitation_store_id 分批回填
+（migration 0027 或 `manage.py run_data_migration`，見 panel/data_migrations.py）。
+"""
+from django.db.models import OuterRef, Subquery
+
+from .models import MassageInvitation, MassagePlan, ServiceSurvey, Therapist
+
+# 反正規化的 model -> (店家 id 來源的外鍵欄位, 來源 model)
+STORE_SOURCES = {
+    ServiceSurvey: ('therapist', Therapist),
+    MassageInvitation: ('massage_plan', MassagePlan),
+}
+
+
+def source_store_id(instance):
+    """依外鍵取得店家 id；關聯物件已載入時不另外查詢"""
+    field_name, source_model = STORE_SOURCES[type(instance)]
+    field = instance._meta.get_field(field_name)
+    if field.is_cached(instance):
+        related = getattr(instance, field_name)
+        return related.store_id if related else None
+    related_id = getattr(instance, field.attname)
+    if related_id is None:
+        return None
+    return source_model._base_manager.filter(id=related_id).values_list(
+        'store_id', flat=True
+    ).first()
+
+
+def fill_store_ids(model, source_model, source_field, ids):
+    """
+    依外鍵回填 ids 的店家 id，回傳更新筆數
+    model / source_model 可以是 migration 的歷史 model
+    """
+    store_id = Subquery(
+        source_model._base_manager.filter(id=OuterRef(f'{source_field}_id')).values('store_id')[:1]
+    )
+    return model._base_manager.filter(id__in=ids).update(store_id=store_id)
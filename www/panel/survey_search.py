@@ -0,0 +1,122 @@
+"""
+問卷備註全文檢索
+
+PostgreSQL 內建的斷詞不認得中文（整串中文會變成一個詞），
+因此在寫入時先在 Python 端斷詞：
+
+- 連續的中日韓文字切成單字與相鄰兩字（「很舒服」→ 很 舒 服 很舒 舒服）
+- 英數字以整個詞為單位並轉小寫
+
+斷好的詞以 'simple' 設定轉成 tsvector 存在 ServiceSurvey.search_vector（GIN 索引），
+問卷建立時由 signals 寫入。查詢以相同方式斷詞：兩字以上的中文只用雙字詞，
+所有詞都要出現（AND），「舒服」不會比對到只有「舒」或「服」的備註。
+
+非 PostgreSQL 資料庫沒有 tsvector，退回逐詞 icontains，不計算相關度。
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, Value
+from django.utils.html import escape
+
+from .models import ServiceSurvey
+
+CONFIG = 'simple'
+
+# 中日韓統一表意文字、擴充 A、相容表意文字、日文假名、韓文
+CJK_RANGES = (
+    '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+    '\u3040-\u309f\u30a0-\u30ff\uac00-\ud7af'
+)
+TOKEN_RE = re.compile(rf'([{CJK_RANGES}]+)|([^\W{CJK_RANGES}]+)')
+
+# 查詢最多使用的詞數，避免過長的查詢字串產生巨大的 tsquery
+MAX_QUERY_TOKENS = 32
+
+
+def _cjk_grams(run, unigrams):
+    grams = list(run) if unigrams or len(run) == 1 else []
+    grams.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return grams
+
+
+def tokenize(text, for_query=False):
+    """
+    斷詞，回傳詞的 list
+    for_query=True 時兩字以上的中文只保留雙字詞
+    """
+    tokens = []
+    for cjk, word in TOKEN_RE.findall((text or '').lower()):
+        if cjk:
+            tokens.extend(_cjk_grams(cjk, unigrams=not for_query))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def is_supported():
+    return connection.vendor == 'postgresql'
+
+
+def search_vector_for(comment):
+    """寫入 search_vector 用的 SQL 運算式"""
+    return SearchVector(Value(' '.join(tokenize(comment))), config=CONFIG)
+
+
+def update_search_vectors(queryset, batch_size=1000):
+    """重新計算 queryset 中問卷的 search_vector（大量匯入後使用），回傳筆數"""
+    if not is_supported():
+        return 0
+    count = 0
+    surveys = []
+    for survey in queryset.only('id', 'comment').order_by().iterator(chunk_size=batch_size):
+        survey.search_vector = search_vector_for(survey.comment)
+        surveys.append(survey)
+        if len(surveys) >= batch_size:
+            ServiceSurvey.objects.bulk_update(surveys, ['search_vector'])
+            count += len(surveys)
+            surveys = []
+    if surveys:
+        ServiceSurvey.objects.bulk_update(surveys, ['search_vector'])
+        count += len(surveys)
+    return count
+
+
+def search_surveys(queryset, text):
+    """
+    依備註搜尋，回傳依相關度（其次依時間）排序的 queryset
+    查詢沒有可用的詞時回傳空的 queryset
+    """
+    tokens = tokenize(text, for_query=True)[:MAX_QUERY_TOKENS]
+    if not tokens:
+        return queryset.none()
+
+    if not is_supported():
+        for term in text.split():
+            queryset = queryset.filter(comment__icontains=term)
+        return queryset.order_by('-created_at')
+
+    query = SearchQuery(' '.join(tokens), config=CONFIG, search_type='plain')
+    return queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(F('search_vector'), query)
+    ).order_by('-rank', '-created_at')
+
+
+def highlight(comment, text):
+    """
+    把備註中出現的查詢字詞以 <mark> 標示，其餘內容做 HTML escape
+    逐字比對原文，中文不需要斷詞
+    """
+    terms = sorted({term for term in (text or '').split() if term}, key=len, reverse=True)
+    if not terms or not comment:
+        return escape(comment or '')
+    pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    parts = []
+    position = 0
+    for match in pattern.finditer(comment):
+        parts.append(escape(comment[position:match.start()]))
+        parts.append(f'<mark>{escape(match.group())}</mark>')
+        position = match.end()
+    parts.append(escape(comment[position:]))
+    return ''.join(parts)
@@ -0,0 +1,274 @@
+"""
+資料庫背景工作佇列
+
+請求中不影響回應的副作用（點擊數累加、公開評論寫入）改為 enqueue 一筆 Task，
+由 `manage.py run_tasks` worker 批次取出執行：
+
+- 以 SELECT ... FOR UPDATE SKIP LOCKED 取出一批，多個 worker 不會拿到同一筆
+- 失敗時依 TASK_QUEUE_RETRY_BASE_SECONDS 指數退避重試，超過 max_attempts 標記為失敗
+- 每筆工作記錄執行毫秒數
+- 註冊為 batch 的工作，同一批取出的會合併成一次呼叫（例如同一邀請的點擊合併成一個 UPDATE）
+
+enqueue 與請求在同一個交易中寫入，請求 rollback 時工作也不會留下。
+TASK_QUEUE_EAGER 開啟時不寫入資料表，交易 commit 後直接在請求中執行（開發、測試用）。
+"""
+import logging
+import time
+import traceback
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task, MassageInvitation, ServiceSurvey, Store
+from .customers import advance_visits, next_visit_at
+from .invitation_status import advance_statuses, next_transition_at
+from .public_cache import purge_paths, send_purge
+from .revenue import rebuild_revenue
+
+logger = logging.getLogger(__name__)
+
+# name -> (handler, batch)
+_registry = {}
+
+
+def register_task(name, batch=False):
+    """
+    註冊工作
+
+    一般工作的 handler 接收一個 payload；batch=True 時接收同一批取出的 payload list
+    """
+    def decorator(func):
+        _registry[name] = (func, batch)
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, delay=None, max_attempts=None):
+    """新增一筆工作，delay 為 timedelta 時延後執行"""
+    if name not in _registry:
+        raise ValueError(f"未註冊的工作：{name}")
+    payload = payload or {}
+
+    if settings.TASK_QUEUE_EAGER:
+        handler, batch = _registry[name]
+        transaction.on_commit(lambda: handler([payload]) if batch else handler(payload))
+        return None
+
+    return Task.objects.create(
+        name=name,
+        payload=payload,
+        run_at=timezone.now() + delay if delay else timezone.now(),
+        max_attempts=max_attempts or settings.TASK_QUEUE_MAX_ATTEMPTS,
+    )
+
+
+def claim_tasks(worker_id, batch_size):
+    """取出一批到期的工作並標記為執行中"""
+    now = timezone.now()
+    with transaction.atomic():
+        tasks = list(
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(status=Task.PENDING, run_at__lte=now)
+            .order_by('run_at', 'id')[:batch_size]
+        )
+        if tasks:
+            Task.objects.filter(id__in=[task.id for task in tasks]).update(
+                status=Task.RUNNING, locked_at=now, locked_by=worker_id,
+                attempts=F('attempts') + 1,
+            )
+    for task in tasks:
+        task.attempts += 1
+    return tasks
+
+
+def release_stale_tasks():
+    """
+    worker 中途結束而卡在執行中的工作，超過 TASK_QUEUE_LOCK_TIMEOUT_SECONDS 後放回佇列
+    已用完執行次數的標記為失敗（例如每次都讓 worker 當掉的工作），回傳處理的筆數
+    """
+    now = timezone.now()
+    stale = Task.objects.filter(
+        status=Task.RUNNING, locked_at__lt=now - timedelta(seconds=settings.TASK_QUEUE_LOCK_TIMEOUT_SECONDS)
+    )
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.FAILED, finished_at=now, locked_at=None, locked_by='',
+        last_error="worker 執行中斷，已達最多執行次數",
+    )
+    if failed:
+        logger.error("%s 筆工作執行中斷且已達最多執行次數，標記為失敗", failed)
+    return failed + stale.update(status=Task.PENDING, locked_at=None, locked_by='')
+
+
+def purge_finished_tasks():
+    """刪除超過 TASK_QUEUE_RETENTION_HOURS 的已完成工作"""
+    deadline = timezone.now() - timedelta(hours=settings.TASK_QUEUE_RETENTION_HOURS)
+    deleted, _ = Task.objects.filter(status=Task.DONE, finished_at__lt=deadline).delete()
+    return deleted
+
+
+def _finish(tasks, duration_ms):
+    Task.objects.filter(id__in=[task.id for task in tasks]).update(
+        status=Task.DONE, finished_at=timezone.now(), duration_ms=duration_ms,
+        locked_at=None, last_error='',
+    )
+
+
+def _fail(task, duration_ms, error):
+    now = timezone.now()
+    if task.attempts >= task.max_attempts:
+        Task.objects.filter(id=task.id).update(
+            status=Task.FAILED, finished_at=now, duration_ms=duration_ms,
+            locked_at=None, last_error=error,
+        )
+        logger.error("工作 %s #%s 已失敗 %s 次，不再重試", task.name, task.id, task.attempts)
+        return
+    retry_at = now + timedelta(seconds=settings.TASK_QUEUE_RETRY_BASE_SECONDS * 2 ** (task.attempts - 1))
+    Task.objects.filter(id=task.id).update(
+        status=Task.PENDING, run_at=retry_at, duration_ms=duration_ms,
+        locked_at=None, locked_by='', last_error=error,
+    )
+    logger.warning("工作 %s #%s 第 %s 次執行失敗，%s 重試", task.name, task.id, task.attempts, retry_at)
+
+
+def run_tasks(tasks):
+    """
+    執行一批已取出的工作，回傳 {工作名稱: (成功數, 失敗數, 總毫秒數)}
+    batch 工作同名的合併為一次呼叫，耗時平均分攤到每筆
+    """
+    stats = defaultdict(Counter)
+    groups = defaultdict(list)
+    for task in tasks:
+        groups[task.name].append(task)
+
+    for name, group in groups.items():
+        handler, batch = _registry.get(name, (None, False))
+        if handler is None:
+            for task in group:
+                _fail(task, None, f"未註冊的工作：{name}")
+                stats[name]['failed'] += 1
+            continue
+
+        units = [group] if batch else [[task] for task in group]
+        for unit in units:
+            started = time.perf_counter()
+            try:
+                # 工作的結果與完成狀態一起 commit，不會執行成功卻沒標記完成
+                with transaction.atomic():
+                    if batch:
+                        handler([task.payload for task in unit])
+                    else:
+                        handler(unit[0].payload)
+                    duration_ms = (time.perf_counter() - started) * 1000 / len(unit)
+                    _finish(unit, duration_ms)
+            except Exception:
+                duration_ms = (time.perf_counter() - started) * 1000 / len(unit)
+                error = traceback.format_exc()
+                for task in unit:
+                    _fail(task, duration_ms, error)
+                stats[name]['failed'] += len(unit)
+            else:
+                stats[name]['done'] += len(unit)
+            stats[name]['ms'] += duration_ms * len(unit)
+
+    return {name: (counter['done'], counter['failed'], counter['ms']) for name, counter in stats.items()}
+
+
+# ====== 工作 ======
+
+INVITATION_CLICK = 'invitation.click'
+SURVEY_CREATE = 'survey.create'
+INVITATION_STATUS = 'invitation.status'
+PUBLIC_CACHE_PURGE = 'public_cache.purge'
+REVENUE_REBUILD = 'revenue.rebuild'
+CUSTOMER_VISITS = 'customer.visits'
+
+
+@register_task(INVITATION_CLICK, batch=True)
+def count_invitation_clicks(payloads):
+    """同一批的點擊依邀請合併，每個邀請只 UPDATE 一次"""
+    clicks = Counter(payload['invitation_id'] for payload in payloads)
+    for invitation_id, count in clicks.items():
+        MassageInvitation.objects.filter(id=invitation_id).update(
+            click_count=F('click_count') + count
+        )
+
+
+@register_task(SURVEY_CREATE)
+def create_survey(payload):
+    ServiceSurvey.objects.create(
+        therapist_id=payload['therapist_id'],
+        rating=payload['rating'],
+        comment=payload['comment'],
+        created_at=payload['created_at'],
+    )
+
+
+@register_task(INVITATION_STATUS, batch=True)
+def advance_invitation_statuses(payloads):
+    """推進已到轉換時間的邀請狀態，再排定下一次轉換"""
+    advance_statuses()
+    schedule_invitation_status()
+
+
+def schedule_invitation_status(at=None):
+    """
+    在 at（預設為所有邀請中最近的一次轉換）排一筆推進邀請狀態的工作
+    已經有同時或更早的待執行工作時不重複排入；執行時會再排定下一次
+    TASK_QUEUE_EAGER 時沒有 worker 可以延後執行，不排程
+    """
+    if settings.TASK_QUEUE_EAGER:
+        return None
+    if at is None:
+        at = next_transition_at()
+        if at is None:
+            return None
+    if Task.objects.filter(name=INVITATION_STATUS, status=Task.PENDING, run_at__lte=at).exists():
+        return None
+    return enqueue(INVITATION_STATUS, delay=at - timezone.now())
+
+
+@register_task(CUSTOMER_VISITS, batch=True)
+def advance_customer_visits(payloads):
+    """把預約時間已到的客戶計入來店統計，再排定下一次"""
+    advance_visits()
+    schedule_customer_visits()
+
+
+def schedule_customer_visits(at=None):
+    """
+    在 at（預設為所有客戶中最早的下次來店時間）排一筆推進來店統計的工作
+    已經有同時或更早的待執行工作時不重複排入；TASK_QUEUE_EAGER 時不排程
+    """
+    if settings.TASK_QUEUE_EAGER:
+        return None
+    if at is None:
+        at = next_visit_at()
+        if at is None:
+            return None
+    if Task.objects.filter(name=CUSTOMER_VISITS, status=Task.PENDING, run_at__lte=at).exists():
+        return None
+    return enqueue(CUSTOMER_VISITS, delay=at - timezone.now())
+
+
+@register_task(PUBLIC_CACHE_PURGE, batch=True)
+def purge_public_pages(payloads):
+    """同一批的 surrogate key 合併後換成頁面路徑，每個頁面只清除一次"""
+    keys = {key for payload in payloads for key in payload['keys']}
+    send_purge(purge_paths(keys))
+
+
+@register_task(REVENUE_REBUILD, batch=True)
+def rebuild_store_revenue(payloads):
+    """
+    店家時區改變或師傅被刪除後重新計算營收彙總（同一批的店家只重建一次）
+    店家已經刪除時略過
+    """
+    store_ids = Store.objects.filter(
+        id__in={payload['store_id'] for payload in payloads}
+    ).order_by('id').values_list('id', flat=True)
+    for store_id in store_ids:
+        rebuild_revenue(store_id)
@@ -1,3 +1,512 @@
-from django.test import TestCase
+import random
+import threading
+import time as time_module
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import availability
+from .bulk_reservations import (
+    bulk_cancel, bulk_reassign, bulk_shift, CONFLICT, NOT_FOUND, PAST_RESERVATION, PAST_TIME
+)
+from .customers import advance_visits
+from .models import Customer, MassagePlan, Reservation, RevenueDaily, Store, Task, Therapist, TherapistShift
+from .revenue import rebuild_revenue, revenue_report
+from .store_calendar import StoreCalendar, get_store_calendar
+from .tasks import CUSTOMER_VISITS
+from .throttling import check_rate_limit
+
+
+class StoreDataMixin:
+    """一間店、三位每天 10:00～22:00 上班的師傅、60 / 90 分鐘兩個方案"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('store', password='password')
+        cls.store = Store.objects.create(user=user, name="測試店家")
+        cls.therapists = [
+            Therapist.objects.create(store=cls.store, name=f"師傅{index}") for index in range(3)
+        ]
+        for therapist in cls.therapists:
+            for weekday in range(7):
+                TherapistShift.objects.create(
+                    therapist=therapist, weekday=weekday, start_time=time(10), end_time=time(22)
+                )
+        cls.short_plan = MassagePlan.objects.create(
+            store=cls.store, name="60 分鐘", price=Decimal('1200'), duration=60
+        )
+        cls.long_plan = MassagePlan.objects.create(
+            store=cls.store, name="90 分鐘", price=Decimal('1800'), duration=90
+        )
+
+    def setUp(self):
+        self.calendar = get_store_calendar(self.store)
+        self.day = self.calendar.today() + timedelta(days=2)
+        self.therapist_ids = [therapist.id for therapist in self.therapists]
+
+    def at(self, hour, minute=0, days=0):
+        """self.day 之後 days 天的當地時間"""
+        return self.calendar.day_start(self.day + timedelta(days=days)) + timedelta(hours=hour, minutes=minute)
+
+    def reserve(self, therapist, hour, minute=0, days=0, plan=None, **fields):
+        return Reservation.objects.create(
+            store=self.store,
+            customer_name="客人",
+            customer_phone="0912345678",
+            appointment_time=self.at(hour, minute, days),
+            massage_plan=plan or self.short_plan,
+            therapist=therapist,
+            **fields
+        )
+
+
+class AvailabilityConsistencyTests(StoreDataMixin, TestCase):
+    """預約異動後，物化的點陣圖必須與從預約與班表重新計算的結果相同"""
+
+    def setUp(self):
+        super().setUp()
+        # 先物化，之後的異動才是增量維護
+        for offset in range(3):
+            availability.get_day_bitmaps(self.therapist_ids, self.day + timedelta(days=offset), self.calendar)
+
+    def assertBitmapsCurrent(self, days=3):
+        for offset in range(days):
+            day = self.day + timedelta(days=offset)
+            self.assertEqual(
+                availability.get_day_bitmaps(self.therapist_ids, day, self.calendar),
+                availability.build_day(self.therapist_ids, day, self.calendar),
+                f"{day} 的點陣圖與重新計算的結果不同",
+            )
+
+    def test_create(self):
+        self.reserve(self.therapists[0], 11)
+        self.reserve(self.therapists[1], 21, 30, plan=self.long_plan)
+        self.assertBitmapsCurrent()
+
+    def test_move_time_and_therapist(self):
+        reservation = self.reserve(self.therapists[0], 11)
+        reservation.appointment_time = self.at(15, days=1)
+        reservation.therapist = self.therapists[2]
+        reservation.save()
+        self.assertBitmapsCurrent()
+
+    def test_change_plan(self):
+        reservation = self.reserve(self.therapists[0], 11)
+        reservation.massage_plan = self.long_plan
+        reservation.save()
+        self.assertBitmapsCurrent()
+
+    def test_plan_duration_change(self):
+        self.reserve(self.therapists[0], 11)
+        self.short_plan.duration = 120
+        self.short_plan.save()
+        self.assertBitmapsCurrent()
+
+    def test_delete(self):
+        reservation = self.reserve(self.therapists[0], 11)
+        self.reserve(self.therapists[0], 13)
+        reservation.delete()
+        self.assertBitmapsCurrent()
+
+    def test_bulk_operations(self):
+        first = self.reserve(self.therapists[0], 11)
+        second = self.reserve(self.therapists[0], 14)
+        third = self.reserve(self.therapists[1], 11)
+        bulk_shift(self.store, [first.id, second.id], 24 * 60 + 30)
+        self.assertBitmapsCurrent()
+        bulk_reassign(self.store, [third.id], self.therapists[2])
+        self.assertBitmapsCurrent()
+        bulk_cancel(self.store, [first.id, third.id])
+        self.assertBitmapsCurrent()
+
+    def test_shift_moved_to_other_therapist(self):
+        shift = TherapistShift.objects.create(
+            therapist=self.therapists[0], weekday=self.day.weekday(), start_time=time(6), end_time=time(8)
+        )
+        shift.therapist = self.therapists[1]
+        shift.save()
+        self.assertBitmapsCurrent(days=1)
+
+
+class DaylightSavingTests(StoreDataMixin, TestCase):
+    """日光節約時間轉換的那天，時段、預約 bits 與班表 bits 都依當地時鐘時間"""
+
+    # 紐約 2025-03-09 02:00 跳到 03:00，倫敦 2025-10-26 02:00 回到 01:00
+    SPRING_FORWARD = ('America/New_York', date(2025, 3, 9))
+    FALL_BACK = ('Europe/London', date(2025, 10, 26))
+
+    def test_slots_follow_clock_time(self):
+        hours = {weekday: [(time(9), time(12))] for weekday in range(7)}
+        for time_zone, day in (self.SPRING_FORWARD, self.FALL_BACK):
+            calendar = StoreCalendar(self.store.id, time_zone, 60, hours)
+            self.assertEqual(
+                [value.strftime('%H:%M') for _, value in calendar.slots(day)], ['09:00', '10:00', '11:00'], time_zone
+            )
+
+    def test_skipped_times_have_no_slots(self):
+        time_zone, day = self.SPRING_FORWARD
+        calendar = StoreCalendar(self.store.id, time_zone, 30, {day.weekday(): [(time(1), time(4))]})
+        self.assertEqual(
+            [value.strftime('%H:%M') for _, value in calendar.slots(day)],
+            ['01:00', '01:30', '03:00', '03:30'],
+        )
+
+    def test_reservation_bits_match_shift_bits(self):
+        for time_zone, day in (self.SPRING_FORWARD, self.FALL_BACK):
+            self.store.time_zone = time_zone
+            self.store.save()
+            calendar = get_store_calendar(self.store)
+            reservation = Reservation.objects.create(
+                store=self.store, customer_name="客人", customer_phone="0912345678",
+                appointment_time=calendar.at(day, 15 * 60), massage_plan=self.short_plan,
+                therapist=self.therapists[0],
+            )
+            working, free = availability.build_day(self.therapist_ids[:1], day, calendar)[self.therapist_ids[0]]
+            self.assertEqual(working, availability.time_range_mask(time(10), time(22)), time_zone)
+            self.assertEqual(free, working & ~availability.time_range_mask(time(15), time(16)), time_zone)
+            reservation.delete()
+
+    def test_range_across_transition(self):
+        # 倫敦 01:30（夏令時間）開始的 60 分鐘結束在 01:30（標準時間），佔用時鐘 01:00～02:00
+        time_zone, day = self.FALL_BACK
+        calendar = StoreCalendar(self.store.id, time_zone, 30, {})
+        start = calendar.tz.localize(datetime(2025, 10, 26, 1, 30), is_dst=True)
+        self.assertEqual(
+            availability.datetime_range_mask(day, start, start + timedelta(minutes=60), calendar),
+            availability.time_range_mask(time(1), time(2)),
+        )
+
+    def test_next_slots(self):
+        time_zone, day = self.SPRING_FORWARD
+        self.store.time_zone = time_zone
+        self.store.save()
+        calendar = get_store_calendar(self.store)
+        slots = availability.find_next_slots(
+            self.therapist_ids[:1], 60, calendar.day_start(day), 1, 2, calendar
+        )
+        self.assertEqual(
+            [timezone.localtime(start, calendar.tz).strftime('%H:%M') for start, _ in slots], ['10:00', '10:30']
+        )
+
+
+class RevenueConsistencyTests(StoreDataMixin, TestCase):
+    """預約異動後，增量維護的營收彙總必須與 rebuild_revenue 重新計算的結果相同"""
+
+    def revenue_rows(self):
+        return sorted(
+            RevenueDaily.objects.filter(store=self.store).values_list(
+                'date', 'therapist_id', 'massage_plan_id', 'reservation_count', 'revenue', 'list_revenue'
+            )
+        )
+
+    def assertRevenueRebuilt(self):
+        rows = self.revenue_rows()
+        rebuild_revenue(self.store.id)
+        self.assertEqual(rows, self.revenue_rows())
+
+    def test_create(self):
+        self.reserve(self.therapists[0], 11)
+        self.reserve(self.therapists[0], 13, plan=self.long_plan, price_charged=Decimal('1500'))
+        self.reserve(self.therapists[1], 23, 30)
+        self.assertRevenueRebuilt()
+
+    def test_update(self):
+        reservation = self.reserve(self.therapists[0], 11)
+        reservation.appointment_time = self.at(12, days=1)
+        reservation.therapist = self.therapists[1]
+        reservation.massage_plan = self.long_plan
+        reservation.price_charged = Decimal('999')
+        reservation.save()
+        self.assertRevenueRebuilt()
+
+    def test_delete(self):
+        reservation = self.reserve(self.therapists[0], 11)
+        self.reserve(self.therapists[0], 13)
+        reservation.delete()
+        self.assertRevenueRebuilt()
+        Reservation.objects.filter(store=self.store).delete()
+        self.assertEqual(self.revenue_rows(), [])
+
+    def test_bulk_operations(self):
+        first = self.reserve(self.therapists[0], 11)
+        second = self.reserve(self.therapists[0], 14, plan=self.long_plan)
+        third = self.reserve(self.therapists[1], 11, price_charged=Decimal('800'))
+        bulk_shift(self.store, [first.id, second.id], 24 * 60)
+        self.assertRevenueRebuilt()
+        bulk_reassign(self.store, [third.id], self.therapists[2])
+        self.assertRevenueRebuilt()
+        bulk_cancel(self.store, [second.id, third.id])
+        self.assertRevenueRebuilt()
+
+    @override_settings(TASK_QUEUE_EAGER=1)
+    def test_therapist_hard_delete(self):
+        # 刪除師傅後預約改為未指定師傅，與原本未指定師傅的預約併入同一列
+        self.reserve(self.therapists[0], 11)
+        self.reserve(self.therapists[0], 14, price_charged=Decimal('1000'))
+        self.reserve(None, 11)
+        total = revenue_report(self.store.id, self.day, self.day, 'day')[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            Therapist.all_objects.filter(id=self.therapists[0].id).delete()
+        self.assertRevenueRebuilt()
+        self.assertEqual(revenue_report(self.store.id, self.day, self.day, 'day')[0], total)
+        # 之後異動這些預約仍然以未指定師傅的列增減
+        reservation = Reservation.objects.filter(store=self.store, therapist=None).first()
+        reservation.appointment_time = self.at(12, days=1)
+        reservation.save()
+        self.assertRevenueRebuilt()
+
+    @override_settings(TASK_QUEUE_EAGER=1)
+    def test_time_zone_change(self):
+        # 台北凌晨 00:30 在洛杉磯是前一天，改時區後彙總的日期不同
+        self.reserve(self.therapists[0], 23, 30)
+        self.reserve(self.therapists[1], 0, 30, days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.store.time_zone = 'America/Los_Angeles'
+            self.store.save()
+        self.assertRevenueRebuilt()
+        self.calendar = get_store_calendar(self.store)
+        self.reserve(self.therapists[0], 12)
+        self.assertRevenueRebuilt()
+
+
+class CustomerVisitTests(StoreDataMixin, TestCase):
+    """來店統計只計入預約時間已到的預約，之後的由背景工作在下次來店時間推進"""
+
+    def setUp(self):
+        super().setUp()
+        self.customer = Customer.objects.create(store=self.store, phone="0912345678", name="客人")
+
+    def stats(self, customer=None):
+        customer = customer or self.customer
+        customer.refresh_from_db()
+        return customer.visit_count, customer.last_visit_at, customer.lifetime_spend, customer.next_visit_at
+
+    def test_counted_when_due(self):
+        past = self.reserve(self.therapists[0], 11, days=-5, customer=self.customer)
+        future = self.reserve(
+            self.therapists[0], 11, customer=self.customer, price_charged=Decimal('1000')
+        )
+        self.assertEqual(self.stats(), (1, past.appointment_time, Decimal('1200'), future.appointment_time))
+        self.assertTrue(Task.objects.filter(name=CUSTOMER_VISITS, status=Task.PENDING).exists())
+
+        self.assertEqual(advance_visits(now=future.appointment_time - timedelta(minutes=1)), 0)
+        self.assertEqual(advance_visits(now=future.appointment_time), 1)
+        self.assertEqual(self.stats(), (2, future.appointment_time, Decimal('2200'), None))
+
+    def test_update_and_delete(self):
+        past = self.reserve(self.therapists[0], 11, days=-5, customer=self.customer)
+        future = self.reserve(self.therapists[1], 11, customer=self.customer)
+        # 改到已經過去的時間時立刻計入
+        future.appointment_time = self.at(13, days=-4)
+        future.save()
+        self.assertEqual(self.stats(), (2, future.appointment_time, Decimal('2400'), None))
+
+        past.delete()
+        self.assertEqual(self.stats(), (1, future.appointment_time, Decimal('1200'), None))
+
+        other = Customer.objects.create(store=self.store, phone="0987654321", name="其他客人")
+        future.customer = other
+        future.save()
+        self.assertEqual(self.stats(), (0, None, Decimal('0'), None))
+        self.assertEqual(self.stats(other), (1, future.appointment_time, Decimal('1200'), None))
+
+    def test_bulk_operations(self):
+        first = self.reserve(self.therapists[0], 11, customer=self.customer)
+        second = self.reserve(self.therapists[1], 15, customer=self.customer)
+        self.assertEqual(self.stats()[3], self.at(11))
+        bulk_shift(self.store, [first.id], 24 * 60)
+        self.assertEqual(self.stats()[3], self.at(15))
+        bulk_cancel(self.store, [second.id])
+        self.assertEqual(self.stats(), (0, None, Decimal('0'), self.at(11, days=1)))
+
+
+class AdminSearchTests(StoreDataMixin, TestCase):
+    """後台以電話搜尋預約時，任意格式的電話都透過客戶找到"""
+
+    def test_reservation_phone_search(self):
+        customer = Customer.objects.create(store=self.store, phone="0912345678", name="客人")
+        linked = self.reserve(self.therapists[0], 11, customer=customer)
+        other = Customer.objects.create(store=self.store, phone="0987654321", name="其他客人")
+        self.reserve(self.therapists[1], 11, customer=other)
+        admin_user = User.objects.create_superuser('admin', password='password')
+        self.client.force_login(admin_user)
+        url = reverse('admin:panel_reservation_changelist')
+        for term in ("+886 912-345-678", "0912345678"):
+            response = self.client.get(url, {'q': term})
+            self.assertEqual([row.id for row in response.context['cl'].result_list], [linked.id])
+        response = self.client.get(url, {'q': "abc"})
+        self.assertEqual(list(response.context['cl'].result_list), [])
+
+
+class BulkReservationTests(StoreDataMixin, TestCase):
+    """批次改派與移動時間：衝突的項目維持原狀，套用後同一位師傅的預約不能重疊"""
+
+    def assertNoOverlaps(self):
+        intervals = defaultdict(list)
+        for reservation in Reservation.objects.filter(store=self.store).select_related('massage_plan'):
+            start = reservation.appointment_time
+            intervals[reservation.therapist_id].append(
+                (start, start + timedelta(minutes=reservation.massage_plan.duration), reservation.id)
+            )
+        for therapist_id, items in intervals.items():
+            items.sort()
+            for (_, end, first), (start, _, second) in zip(items, items[1:]):
+                self.assertLessEqual(end, start, f"師傅 {therapist_id} 的預約 {first} 與 {second} 重疊")
+
+    def assertUnchanged(self, reservation):
+        current = Reservation.objects.get(id=reservation.id)
+        self.assertEqual(
+            (current.therapist_id, current.appointment_time),
+            (reservation.therapist_id, reservation.appointment_time),
+        )
+
+    def errors(self, results):
+        return {result['id']: result.get('error') for result in results}
+
+    def test_reassign_conflicts_with_existing(self):
+        self.reserve(self.therapists[1], 11)
+        overlapping = self.reserve(self.therapists[0], 11, 30)
+        free = self.reserve(self.therapists[0], 14)
+        results = bulk_reassign(self.store, [overlapping.id, free.id], self.therapists[1])
+        self.assertEqual(self.errors(results), {overlapping.id: CONFLICT, free.id: None})
+        self.assertUnchanged(overlapping)
+        self.assertEqual(Reservation.objects.get(id=free.id).therapist_id, self.therapists[1].id)
+        self.assertNoOverlaps()
+
+    def test_reassign_conflicts_within_batch(self):
+        # 兩筆都改派給同一位師傅，開始較晚的那筆失敗
+        earlier = self.reserve(self.therapists[0], 11)
+        later = self.reserve(self.therapists[1], 11, 30, plan=self.long_plan)
+        results = bulk_reassign(self.store, [later.id, earlier.id], self.therapists[2])
+        self.assertEqual(self.errors(results), {later.id: CONFLICT, earlier.id: None})
+        self.assertUnchanged(later)
+        self.assertNoOverlaps()
+
+    def test_reverted_item_keeps_original_slot(self):
+        # second 撞到不在這批的 blocker 而維持 12:00，first 移到 12:00 也因此失敗
+        first = self.reserve(self.therapists[0], 11)
+        second = self.reserve(self.therapists[0], 12)
+        self.reserve(self.therapists[0], 13, 30)
+        results = bulk_shift(self.store, [first.id, second.id], 60)
+        self.assertEqual(self.errors(results), {first.id: CONFLICT, second.id: CONFLICT})
+        self.assertUnchanged(first)
+        self.assertUnchanged(second)
+        self.assertNoOverlaps()
+
+    def test_slot_freed_within_batch(self):
+        # first 移到 second 原本的時段，second 同時讓出
+        first = self.reserve(self.therapists[0], 11)
+        second = self.reserve(self.therapists[0], 12)
+        results = bulk_shift(self.store, [first.id, second.id], 60)
+        self.assertEqual(self.errors(results), {first.id: None, second.id: None})
+        self.assertEqual(Reservation.objects.get(id=first.id).appointment_time, self.at(12))
+        self.assertNoOverlaps()
+
+    def test_past_and_missing(self):
+        past = self.reserve(self.therapists[0], 11, days=-5)
+        soon = Reservation.objects.create(
+            store=self.store, customer_name="客人", customer_phone="0912345678",
+            appointment_time=timezone.now() + timedelta(minutes=30),
+            massage_plan=self.short_plan, therapist=self.therapists[0],
+        )
+        other_user = User.objects.create_user('other', password='password')
+        other = Store.objects.create(user=other_user, name="其他店家")
+        foreign = Reservation.objects.create(
+            store=other, customer_name="客人", customer_phone="0912345678",
+            appointment_time=self.at(11), massage_plan=self.short_plan, therapist=self.therapists[0],
+        )
+        missing = foreign.id + 1000
+        results = bulk_shift(self.store, [past.id, soon.id, foreign.id, missing], -60)
+        self.assertEqual(self.errors(results), {
+            past.id: PAST_RESERVATION, soon.id: PAST_TIME, foreign.id: NOT_FOUND, missing: NOT_FOUND,
+        })
+        results = bulk_cancel(self.store, [foreign.id, missing])
+        self.assertEqual(self.errors(results), {foreign.id: NOT_FOUND, missing: NOT_FOUND})
+        self.assertTrue(Reservation.objects.filter(id=foreign.id).exists())
+
+    def test_random_batches(self):
+        rng = random.Random(1)
+        for therapist in self.therapists:
+            for hour in rng.sample(range(10, 21), 6):
+                self.reserve(therapist, hour, days=rng.randrange(2))
+        ids = list(Reservation.objects.filter(store=self.store).values_list('id', flat=True))
+        for _ in range(30):
+            batch = rng.sample(ids, rng.randint(1, 8))
+            if rng.random() < 0.5:
+                results = bulk_shift(self.store, batch, rng.choice([-90, -30, 15, 30, 60, 24 * 60]))
+            else:
+                results = bulk_reassign(self.store, batch, rng.choice(self.therapists))
+            self.assertEqual([result['id'] for result in results], batch)
+            self.assertNoOverlaps()
+        for offset in range(3):
+            day = self.day + timedelta(days=offset)
+            self.assertEqual(
+                availability.get_day_bitmaps(self.therapist_ids, day, self.calendar),
+                availability.build_day(self.therapist_ids, day, self.calendar),
+            )
+
+    def test_api_validation(self):
+        reservation = self.reserve(self.therapists[0], 11)
+        self.client.force_login(self.store.user)
+        url = reverse('api:reservation-bulk-shift')
+        for minutes in (0, 10 ** 12, 'abc'):
+            response = self.client.post(
+                url, {'ids': [reservation.id], 'minutes': minutes}, content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 400, minutes)
+            self.assertIn('minutes', response.json())
+        response = self.client.post(
+            reverse('api:reservation-bulk-reassign'),
+            {'ids': [reservation.id], 'therapist': 2 ** 70}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(url, {'ids': [], 'minutes': 30}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertUnchanged(reservation)
+
+
+@override_settings(PUBLIC_RATE_LIMITS={'invitation_book': {'ip': '10/min', 'slug': '30/min'}})
+class RateLimitTests(SimpleTestCase):
+    """同時送達的請求不能一起通過限流"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_burst(self):
+        # 讀取變慢時，先讀後寫的做法會讓同時的請求都讀到同樣的剩餘次數
+        slow_get = LocMemCache.get
+
+        def get(cache_backend, *args, **kwargs):
+            value = slow_get(cache_backend, *args, **kwargs)
+            time_module.sleep(0.01)
+            return value
+
+        results = []
+        start = threading.Barrier(50)
+
+        def request():
+            start.wait()
+            results.append(check_rate_limit('invitation_book', {'ip': '1.2.3.4', 'slug': 'a'}))
+
+        threads = [threading.Thread(target=request) for _ in range(50)]
+        with mock.patch.object(LocMemCache, 'get', get):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(results.count(None), 10)
+        self.assertTrue(all(wait > 0 for wait in results if wait is not None))
+
+    def test_keys_are_independent(self):
+        for _ in range(10):
+            self.assertIsNone(check_rate_limit('invitation_book', {'ip': '1.2.3.4'}))
+        self.assertIsNotNone(check_rate_limit('invitation_book', {'ip': '1.2.3.4'}))
+        self.assertIsNone(check_rate_limit('invitation_book', {'ip': '5.6.7.8'}))
@@ -0,0 +1,191 @@
+"""
+公開寫入端點的限流（sliding window 計數，存放於 Django cache）
+
+每個端點（scope）可依 IP、邀請 slug、師傅各自設定速率，
+設定在 settings.PUBLIC_RATE_LIMITS，例如：
+
+    'invitation_book': {'ip': '10/min', 'slug': '30/min'}
+
+代表每個 IP 每分鐘最多 10 次（可瞬間用完），每個邀請每分鐘最多 30 次。
+所有判斷都在進入 view 之前完成，不會碰到資料庫。
+
+每個期間一個計數器，以 cache.add + cache.incr 累加（memcached 上是原子操作），
+同時送達的請求各自拿到不同的計數，不會一起通過；上一個期間的計數依經過的比例遞減後一併計算。
+被拒絕的請求也會計入，持續送出請求的來源要停下來才會恢復。
+計數器與拒絕次數都在 cache 中，多個 worker 時必須使用共用快取（docker-compose 的 memcached），
+否則每個 process 各自計算，實際上限變成設定值乘以 process 數。
+"""
+import json
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_rate(rate):
+    """'10/min' -> (10, 60)"""
+    num, period = rate.split('/')
+    return int(num), PERIODS[period]
+
+
+def get_client_ip(request):
+    """
+    取得客戶端 IP
+    nginx 以 $proxy_add_x_forwarded_for 把實際連線 IP 接在最後，
+    前面的值可由客戶端偽造，所以取最後一個。
+    """
+    forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded_for:
+        return forwarded_for.split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR')
+
+
+def _increment(cache_key, timeout):
+    """原子地把計數器加一並回傳新的值"""
+    cache.add(cache_key, 0, timeout)
+    try:
+        return cache.incr(cache_key)
+    except ValueError:
+        # 計數器剛好過期或被清掉
+        cache.set(cache_key, 1, timeout)
+        return 1
+
+
+def _consume(scope, key_type, ident, rate):
+    """
+    計入一次請求，回傳 (是否允許, 需等待秒數)
+    目前期間的計數加上前一期間依剩餘比例折算的計數，超過上限時拒絕
+    """
+    capacity, period = parse_rate(rate)
+    now = time.time()
+    window, elapsed = divmod(now, period)
+    prefix = f"ratelimit:{scope}:{key_type}:{ident}"
+
+    count = _increment(f"{prefix}:{int(window)}", period * 2)
+    previous = cache.get(f"{prefix}:{int(window) - 1}", 0)
+    if count + previous * (1 - elapsed / period) <= capacity:
+        return True, 0
+
+    if count > capacity:
+        # 這個期間已經用完，等到下一個期間
+        return False, period - elapsed
+    # 等前一期間折算的計數降到剩餘的額度以內
+    return False, (1 - (capacity - count) / previous) * period - elapsed
+
+
+def _record_rejection(scope, key_type):
+    counter_key = f"ratelimit-rejected:{scope}:{key_type}"
+    cache.add(counter_key, 0, None)
+    try:
+        cache.incr(counter_key)
+    except ValueError:
+        # 計數器剛好被清掉
+        cache.set(counter_key, 1, None)
+
+
+def check_rate_limit(scope, idents):
+    """
+    依序檢查各 bucket，回傳需等待秒數；允許時回傳 None
+
+    idents: {'ip': '1.2.3.4', 'slug': '...'}，值為 None 的 key 會被略過
+    """
+    limits = settings.PUBLIC_RATE_LIMITS.get(scope, {})
+    for key_type, rate in limits.items():
+        ident = idents.get(key_type)
+        if ident is None:
+            continue
+        allowed, wait = _consume(scope, key_type, ident, rate)
+        if not allowed:
+            _record_rejection(scope, key_type)
+            return wait
+    return None
+
+
+def get_rejection_counts():
+    """取得各端點被拒絕的次數，供監控使用"""
+    counts = {}
+    for scope, limits in settings.PUBLIC_RATE_LIMITS.items():
+        counts[scope] = {
+            key_type: cache.get(f"ratelimit-rejected:{scope}:{key_type}", 0)
+            for key_type in limits
+        }
+    return counts
+
+
+class RateLimitThrottle(BaseThrottle):
+    """DRF 用的限流，子類別設定 scope 並實作 get_idents"""
+    scope = None
+
+    def get_idents(self, request, view):
+        return {'ip': get_client_ip(request)}
+
+    def allow_request(self, request, view):
+        if not settings.PUBLIC_RATE_LIMITS_ENABLED:
+            return True
+        self._wait = check_rate_limit(self.scope, self.get_idents(request, view))
+        return self._wait is None
+
+    def wait(self):
+        return self._wait
+
+
+class InvitationBookThrottle(RateLimitThrottle):
+    """公開邀請預約：依 IP 與邀請 slug 限流"""
+    scope = 'invitation_book'
+
+    def get_idents(self, request, view):
+        idents = super().get_idents(request, view)
+        idents['slug'] = view.kwargs.get('slug')
+        return idents
+
+
+class InvitationClickThrottle(RateLimitThrottle):
+    """公開邀請點擊：依 IP 限流，避免灌點擊次數"""
+    scope = 'invitation_click'
+
+
+class SurveyCreateThrottle(RateLimitThrottle):
+    """匿名問卷：依 IP 與師傅限流"""
+    scope = 'survey_create'
+
+    def get_idents(self, request, view):
+        idents = super().get_idents(request, view)
+        therapist = request.data.get('therapist')
+        idents['therapist'] = str(therapist) if therapist else None
+        return idents
+
+
+def rate_limit(scope):
+    """
+    一般 Django view 用的限流 decorator
+    JSON body 中的 therapist 會作為師傅 key
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            if not settings.PUBLIC_RATE_LIMITS_ENABLED:
+                return view_func(request, *args, **kwargs)
+
+            idents = {'ip': get_client_ip(request)}
+            try:
+                therapist = json.loads(request.body).get('therapist')
+            except (ValueError, AttributeError):
+                therapist = None
+            idents['therapist'] = str(therapist) if therapist else None
+
+            wait = check_rate_limit(scope, idents)
+            if wait is not None:
+                response = JsonResponse(
+                    {'error': '請求過於頻繁，請稍後再試'},
+                    status=429
+                )
+                response['Retry-After'] = str(int(wait) + 1)
+                return response
+            return view_func(request, *args, **kwargs)
+        return wrapped
+    return decorator
@@ -5,8 +5,11 @@ from rest_framework.routers import DefaultRouter
 from .views import (login_view, logout_view, portal_home, manage_therapists, 
                    manage_surveys, manage_massage_plans, manage_reservations, manage_invitations)
 from .views.public_views import public_review_therapist, public_massage_invitation, public_submit_review
+from .views.monitoring_views import rate_limit_stats
 from .viewsets import (TherapistViewSet, ServiceSurveyViewSet, MassagePlanViewSet, 
-                      ReservationViewSet, MassageInvitationViewSet, PublicMassageInvitationViewSet)
+                      ReservationViewSet, MassageInvitationViewSet, PublicMassageInvitationViewSet,
+                      TherapistShiftViewSet, TherapistScheduleExceptionViewSet, StoreBusinessHoursViewSet,
+                      CustomerViewSet)
 
 # API Router
 router = DefaultRouter()
@@ -15,6 +18,10 @@ router.register(r'service-surveys', ServiceSurveyViewSet)
 router.register(r'massage-plans', MassagePlanViewSet)
 router.register(r'reservations', ReservationViewSet)
 router.register(r'massage-invitations', MassageInvitationViewSet)
+router.register(r'therapist-shifts', TherapistShiftViewSet)
+router.register(r'therapist-schedule-exceptions', TherapistScheduleExceptionViewSet)
+router.register(r'store-business-hours', StoreBusinessHoursViewSet)
+router.register(r'customers', CustomerViewSet)
 # 為 PublicMassageInvitationViewSet 指定唯一的 basename
 router.register(r'public-invitations', PublicMassageInvitationViewSet, basename='public-invitation')
 
@@ -35,6 +42,10 @@ urlpatterns = [
 
     # Public API (CSRF exempt)
     path('api/public-reviews/', public_submit_review, name='public_submit_review'),
+    # 店家與邀請的事件串流（/api/store-events/、/api/public-invitations/<slug>/events/）由 panel/asgi.py 處理
+
+    # Monitoring
+    path('api/rate-limit-stats/', rate_limit_stats, name='rate_limit_stats'),
 
     # API URLs
     path('api/', include((router.urls, 'api'))),
@@ -0,0 +1,12 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from ..throttling import get_rejection_counts
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def rate_limit_stats(request):
+    """各公開端點被限流拒絕的次數（僅限管理員）"""
+    return Response({'rejected': get_rejection_counts()})
@@ -1,20 +1,27 @@
 from django.shortcuts import render, get_object_or_404
-from django.views.decorators.csrf import ensure_csrf_cookie, csrf_exempt
+from django.views.decorators.csrf import csrf_exempt
 from django.http import Http404, JsonResponse
 from django.views.decorators.http import require_http_methods
+from django.conf import settings
+from django.utils import timezone
 import json
 
-from ..models import Therapist, Store, ServiceSurvey, MassageInvitation
+from ..models import Therapist, Store
+from ..invitation_cache import get_cached_invitation
+from ..public_cache import cache_public_page, invitation_page_keys, review_page_keys
+from ..throttling import rate_limit
+from ..tasks import enqueue, SURVEY_CREATE
 
 
-@ensure_csrf_cookie
 def public_review_therapist(request, therapist_id):
-    """客人評論師傅的公開頁面"""
+    """
+    客人評論師傅的公開頁面
+    回應可由 nginx 快取（見 panel/public_cache.py），不設定 CSRF cookie（評論 API 不檢查 CSRF）
+    """
     try:
         therapist = get_object_or_404(
             Therapist, 
             id=therapist_id, 
-            is_deleted=False, 
             enabled=True
         )
         
@@ -30,11 +37,13 @@ def public_review_therapist(request, therapist_id):
         'store': therapist.store,
     }
     
-    return render(request, 'panel/public_review.html', context)
+    response = render(request, 'panel/public_review.html', context)
+    return cache_public_page(response, review_page_keys(therapist))
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@rate_limit('review_submit')
 def public_submit_review(request):
     """公開提交評論的 API 端點"""
     try:
@@ -62,7 +71,6 @@ def public_submit_review(request):
         try:
             therapist = Therapist.objects.get(
                 id=therapist_id, 
-                is_deleted=False, 
                 enabled=True
             )
         except Therapist.DoesNotExist:
@@ -71,24 +79,26 @@ def public_submit_review(request):
                 status=400
             )
         
-        # 建立評論
-        survey = ServiceSurvey.objects.create(
-            therapist=therapist,
-            rating=rating,
-            comment=comment.strip()
-        )
+        # 評論由背景工作寫入，請求直接回應
+        created_at = timezone.now()
+        comment = comment.strip()
+        enqueue(SURVEY_CREATE, {
+            'therapist_id': therapist.id,
+            'rating': rating,
+            'comment': comment,
+            'created_at': created_at.isoformat(),
+        })
         
         return JsonResponse({
             'message': '評論提交成功',
             'data': {
-                'id': survey.id,
-                'therapist': survey.therapist.id,
-                'therapist_name': survey.therapist.name,
-                'rating': survey.rating,
-                'comment': survey.comment,
-                'created_at': survey.created_at.isoformat()
+                'therapist': therapist.id,
+                'therapist_name': therapist.name,
+                'rating': rating,
+                'comment': comment,
+                'created_at': created_at.isoformat()
             }
-        }, status=201)
+        }, status=202)
         
     except json.JSONDecodeError:
         return JsonResponse(
@@ -102,26 +112,33 @@ def public_submit_review(request):
         )
 
 
-@ensure_csrf_cookie
 def public_massage_invitation(request, slug):
-    """客人查看按摩邀請的公開頁面"""
-    try:
-        invitation = get_object_or_404(MassageInvitation, slug=slug)
-        
-        # 增加點擊次數
-        invitation.click_count += 1
-        invitation.save(update_fields=['click_count'])
-        
-        context = {
-            'invitation': invitation,
-            'store': invitation.massage_plan.store,
-        }
-        
-        return render(request, 'panel/public_invitation.html', context)
-        
-    except MassageInvitation.DoesNotExist:
+    """
+    客人查看按摩邀請的公開頁面
+    回應可由 nginx 快取（見 panel/public_cache.py），點擊次數由頁面載入後呼叫 click API 累加
+    """
+    # 快照含方案、師傅與店家；不存在的 slug 不查資料庫
+    invitation = get_cached_invitation(slug)
+    if invitation is None:
         raise Http404("找不到指定的邀請")
 
+    context = {
+        'invitation': invitation,
+        'store': invitation.massage_plan.store,
+        # 頁面 script 需要的資料（json_script 輸出）
+        'invitation_config': {
+            'slug': str(invitation.slug),
+            'available_start': timezone.localtime(invitation.available_start).isoformat(),
+            'available_end': timezone.localtime(invitation.available_end).isoformat(),
+            'duration': invitation.massage_plan.duration,
+            'click_count': invitation.click_count,
+            'sse_enabled': bool(settings.INVITATION_SSE_ENABLED),
+        },
+    }
+    
+    response = render(request, 'panel/public_invitation.html', context)
+    return cache_public_page(response, invitation_page_keys(invitation))
+
 
 @csrf_exempt
 @require_http_methods(["POST"])
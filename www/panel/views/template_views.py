@@ -3,12 +3,17 @@ from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import ensure_csrf_cookie
 
 from ..models import Therapist, ServiceSurvey, MassagePlan, Reservation, MassageInvitation
+from ..store_cache import get_store_reference_data
 
 
 @ensure_csrf_cookie
 @login_required
 def manage_therapists(request):
-    therapists = Therapist.objects.all().order_by('-created_at').filter(is_deleted=False)
+    store = getattr(request.user, "store", None)
+    if store:
+        therapists = Therapist.objects.filter(store=store).order_by('-created_at')
+    else:
+        therapists = Therapist.objects.none()
     return render(request, 'panel/manage_therapists.html', {'therapists': therapists})
 
 
@@ -23,22 +28,13 @@ def manage_surveys(request):
     """師傅評論管理頁面"""
     store = getattr(request.user, "store", None)
     if store:
-        # 取得該店家的所有師傅
-        therapist_ids = Therapist.objects.filter(
-            store=store, 
-            is_deleted=False
-        ).values_list('id', flat=True)
-        
-        # 取得評論，並包含師傅資訊
+        # 取得評論（不含已刪除的師傅），並包含師傅資訊
         surveys = ServiceSurvey.objects.filter(
-            therapist_id__in=therapist_ids
+            store=store, therapist__is_deleted=False
         ).select_related('therapist').order_by('-created_at')
         
         # 取得師傅列表供過濾使用
-        therapists = Therapist.objects.filter(
-            store=store, 
-            is_deleted=False
-        ).order_by('name')
+        therapists = get_store_reference_data(store.id)['therapists']
     else:
         surveys = ServiceSurvey.objects.none()
         therapists = Therapist.objects.none()
@@ -82,14 +78,9 @@ def manage_reservations(request):
         ).select_related('massage_plan', 'therapist').order_by('-appointment_time')
         
         # 取得師傅和方案列表供篩選使用
-        therapists = Therapist.objects.filter(
-            store=store, 
-            is_deleted=False
-        ).order_by('name')
-        
-        massage_plans = MassagePlan.objects.filter(
-            store=store
-        ).order_by('name')
+        reference_data = get_store_reference_data(store.id)
+        therapists = reference_data['therapists']
+        massage_plans = reference_data['massage_plans']
     else:
         reservations = Reservation.objects.none()
         therapists = Therapist.objects.none()
@@ -112,18 +103,13 @@ def manage_invitations(request):
     store = getattr(request.user, "store", None)
     if store:
         invitations = MassageInvitation.objects.filter(
-            massage_plan__store=store
+            store=store
         ).select_related('massage_plan', 'therapist').order_by('-created_at')
         
         # 取得師傅和方案列表供篩選使用
-        therapists = Therapist.objects.filter(
-            store=store, 
-            is_deleted=False
-        ).order_by('name')
-        
-        massage_plans = MassagePlan.objects.filter(
-            store=store
-        ).order_by('name')
+        reference_data = get_store_reference_data(store.id)
+        therapists = reference_data['therapists']
+        massage_plans = reference_data['massage_plans']
     else:
         invitations = MassageInvitation.objects.none()
         therapists = Therapist.objects.none()
@@ -3,6 +3,9 @@ from .service_survey import ServiceSurveyViewSet
 from .massage_plan import MassagePlanViewSet
 from .reservation import ReservationViewSet
 from .massage_invitation import MassageInvitationViewSet, PublicMassageInvitationViewSet
+from .therapist_schedule import TherapistShiftViewSet, TherapistScheduleExceptionViewSet
+from .store_business_hours import StoreBusinessHoursViewSet
+from .customer import CustomerViewSet
 
 __all__ = [
     'TherapistViewSet', 
@@ -10,5 +13,9 @@ __all__ = [
     'MassagePlanViewSet', 
     'ReservationViewSet',
     'MassageInvitationViewSet',
-    'PublicMassageInvitationViewSet'
+    'PublicMassageInvitationViewSet',
+    'TherapistShiftViewSet',
+    'TherapistScheduleExceptionViewSet',
+    'StoreBusinessHoursViewSet',
+    'CustomerViewSet'
 ]
\ No newline at end of file
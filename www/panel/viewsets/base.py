@@ -25,4 +25,4 @@ class StoreFilteredViewSetMixin:
         store = getattr(self.request.user, "store", None)
         if not store:
             return self.queryset.none()
-        return self.queryset.filter(store=store, is_deleted=False)
+        return self.queryset.filter(store=store)
@@ -0,0 +1,78 @@
+from rest_framework import viewsets, status
+from rest_framework.response import Response
+from rest_framework.decorators import action
+from django.db.models import F
+
+from ..models import Customer, Reservation
+from ..serializers import CustomerSerializer, SimpleReservationSerializer
+from ..customers import normalize_phone
+
+# 列表與預約紀錄一次最多回傳的筆數
+CUSTOMER_LIST_MAX_LIMIT = 500
+CUSTOMER_HISTORY_MAX_LIMIT = 200
+
+
+def _limit(request, default, maximum):
+    try:
+        limit = int(request.query_params.get('limit', default))
+    except (TypeError, ValueError):
+        raise ValueError("筆數格式錯誤")
+    if limit <= 0:
+        raise ValueError("筆數必須大於 0")
+    return min(limit, maximum)
+
+
+class CustomerViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    客戶 ViewSet（唯讀）
+    客戶在建立預約時依電話自動建立，統計欄位由預約增量維護
+    """
+    serializer_class = CustomerSerializer
+    queryset = Customer.objects.all()
+
+    def get_queryset(self):
+        """只看自己店家的客戶"""
+        store = getattr(self.request.user, "store", None)
+        if not store:
+            return Customer.objects.none()
+        return Customer.objects.filter(store=store)
+
+    def list(self, request, *args, **kwargs):
+        """
+        列出客戶（最近來店的在前）
+        參數：phone（任意格式，正規化後完全比對）、name（部分比對）、limit（預設 100）
+        """
+        try:
+            limit = _limit(request, 100, CUSTOMER_LIST_MAX_LIMIT)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.get_queryset()
+
+        # 電話走 (store, phone) 唯一索引
+        phone = request.query_params.get('phone')
+        if phone:
+            queryset = queryset.filter(phone=normalize_phone(phone))
+
+        name = request.query_params.get('name')
+        if name:
+            queryset = queryset.filter(name__icontains=name)
+
+        queryset = queryset.order_by(F('last_visit_at').desc(nulls_last=True), '-id')[:limit]
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def reservations(self, request, pk=None):
+        """客戶的預約紀錄（最近的在前），參數：limit（預設 50）"""
+        customer = self.get_object()
+        try:
+            limit = _limit(request, 50, CUSTOMER_HISTORY_MAX_LIMIT)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = Reservation.objects.filter(customer=customer).select_related(
+            'massage_plan', 'therapist'
+        ).order_by('-appointment_time')[:limit]
+        serializer = SimpleReservationSerializer(queryset, many=True)
+        return Response(serializer.data)
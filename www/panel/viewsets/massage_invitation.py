@@ -6,12 +6,25 @@ from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.utils.cache import patch_cache_control
+from django.conf import settings
+from django.db.models import Count
 from datetime import datetime, timedelta
 
 from ..models import MassageInvitation, Reservation
 from ..serializers import (
     MassageInvitationSerializer, PublicMassageInvitationSerializer
 )
+from ..invitation_cache import get_cached_invitation, slug_may_exist
+from ..invitation_status import (
+    get_invitation_status, invalidate_invitation_status
+)
+from ..events import (
+    publish_invitation_event, publish_store_event, INVITATION_BOOKED, PUBLIC_INVITATION_BOOKED
+)
+from ..throttling import InvitationBookThrottle, InvitationClickThrottle
+from ..tasks import enqueue, INVITATION_CLICK
+from ..customers import get_or_create_customer
 
 
 class MassageInvitationViewSet(viewsets.ModelViewSet):
@@ -26,26 +39,17 @@ class MassageInvitationViewSet(viewsets.ModelViewSet):
             return MassageInvitation.objects.none()
 
         return MassageInvitation.objects.filter(
-            massage_plan__store=store
+            store=store
         ).select_related('massage_plan', 'therapist').order_by('-created_at')
 
     def list(self, request, *args, **kwargs):
         """列出所有邀請"""
         queryset = self.get_queryset()
 
-        # 狀態過濾
+        # 狀態過濾（物化的狀態欄位，走 (store, status, created_at) 索引）
         status_filter = request.query_params.get('status')
-        now = timezone.now()
-
-        if status_filter == 'active':
-            queryset = queryset.filter(
-                available_start__lte=now,
-                available_end__gte=now
-            )
-        elif status_filter == 'upcoming':
-            queryset = queryset.filter(available_start__gt=now)
-        elif status_filter == 'expired':
-            queryset = queryset.filter(available_end__lt=now)
+        if status_filter in dict(MassageInvitation.STATUS_CHOICES):
+            queryset = queryset.filter(status=status_filter)
 
         # 師傅過濾
         therapist_id = request.query_params.get('therapist_id')
@@ -146,11 +150,8 @@ class MassageInvitationViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def active(self, request):
-        """取得目前有效的邀請"""
-        now = timezone.now()
-        queryset = self.get_queryset().filter(
-            available_end__gte=now
-        )
+        """取得進行中的邀請（不含尚未開始的，尚未開始的請用 upcoming）"""
+        queryset = self.get_queryset().filter(status=MassageInvitation.ACTIVE)
 
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
@@ -158,12 +159,21 @@ class MassageInvitationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
         """取得即將開始的邀請"""
-        now = timezone.now()
-        queryset = self.get_queryset().filter(available_start__gt=now)
+        queryset = self.get_queryset().filter(status=MassageInvitation.UPCOMING)
 
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def counts(self, request):
+        """各狀態的邀請數"""
+        counts = dict(
+            self.get_queryset().values_list('status').annotate(count=Count('id')).order_by()
+        )
+        return Response({
+            value: counts.get(value, 0) for value, _ in MassageInvitation.STATUS_CHOICES
+        })
+
     @action(detail=True, methods=['post'])
     def duplicate(self, request, pk=None):
         """複製邀請"""
@@ -212,51 +222,87 @@ class PublicMassageInvitationViewSet(viewsets.GenericViewSet):
     @action(detail=True, methods=['get'])
     def view(self, request, slug=None):
         """查看邀請詳情並增加點擊次數"""
-        try:
-            invitation = get_object_or_404(MassageInvitation, slug=slug)
-
-            # 增加點擊次數
-            invitation.click_count += 1
-            invitation.save(update_fields=['click_count'])
-
-            # 檢查是否已被預約（一個邀請只能有一個預約）
-            has_reservation = Reservation.objects.filter(
-                massage_plan=invitation.massage_plan,
-                therapist=invitation.therapist,
-                appointment_time__gte=invitation.available_start,
-                appointment_time__lte=invitation.available_end,
-                # 可以加入其他條件來識別是透過這個邀請預約的
-            ).exists()
-
-            serializer = self.get_serializer(invitation)
-            response_data = serializer.data
-            response_data['is_booked'] = has_reservation
-            response_data['click_count'] = invitation.click_count
+        # 快照含方案、師傅與店家；不存在的 slug 不查資料庫
+        invitation = get_cached_invitation(slug)
+        if invitation is None:
+            return Response(
+                {"error": "邀請不存在"},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
-            return Response(response_data)
+        # 點擊次數由背景工作累加，回應先顯示加上這次的數字
+        enqueue(INVITATION_CLICK, {'invitation_id': invitation.id})
+        invitation.click_count += 1
+
+        # 檢查是否已被預約（一個邀請只能有一個預約）
+        has_reservation = invitation.has_reservation()
+
+        serializer = self.get_serializer(invitation)
+        response_data = serializer.data
+        response_data['is_booked'] = has_reservation
+        response_data['click_count'] = invitation.click_count
+
+        return Response(response_data)
+
+    @action(
+        detail=True, methods=['post'],
+        authentication_classes=[], throttle_classes=[InvitationClickThrottle]
+    )
+    def click(self, request, slug=None):
+        """
+        記錄一次點擊（公開頁面載入後以 sendBeacon 送出）
+        頁面本身由 nginx 快取，點擊次數不在頁面回應中累加
+        """
+        invitation = get_cached_invitation(slug)
+        if invitation is None:
+            return Response(
+                {"error": "邀請不存在"},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
-        except MassageInvitation.DoesNotExist:
+        enqueue(INVITATION_CLICK, {'invitation_id': invitation.id})
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['get'], url_path='status')
+    def current_status(self, request, slug=None):
+        """
+        輕量狀態查詢，供公開頁面輪詢使用
+        不序列化邀請、不增加點擊次數，結果可被快取
+        """
+        invitation_status = get_invitation_status(slug) if slug_may_exist(slug) else None
+        if invitation_status is None:
             return Response(
                 {"error": "邀請不存在"},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-    @action(detail=True, methods=['post'])
+        response = Response(invitation_status)
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.INVITATION_STATUS_CACHE_SECONDS
+        )
+        return response
+
+    @action(
+        detail=True, methods=['post'],
+        throttle_classes=[InvitationBookThrottle]
+    )
     @method_decorator(csrf_exempt)
     def book(self, request, slug=None):
         """預約邀請"""
+        # 不存在的 slug 不查資料庫；預約本身仍讀取最新的邀請資料
+        if not slug_may_exist(slug):
+            return Response(
+                {"error": "邀請不存在"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
         try:
             invitation = get_object_or_404(MassageInvitation, slug=slug)
 
             # 檢查是否已經有人預約了（先搶先贏）
-            existing_reservation = Reservation.objects.filter(
-                massage_plan=invitation.massage_plan,
-                therapist=invitation.therapist,
-                appointment_time__gte=invitation.available_start,
-                appointment_time__lte=invitation.available_end,
-            ).exists()
-
-            if existing_reservation:
+            if invitation.has_reservation():
                 return Response(
                     {"error": "此優惠已被預約"},
                     status=status.HTTP_400_BAD_REQUEST
@@ -334,19 +380,36 @@ class PublicMassageInvitationViewSet(viewsets.GenericViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # 創建預約
+            # 創建預約（依電話關聯客戶）
+            store = invitation.massage_plan.store
             reservation = Reservation.objects.create(
-                store=invitation.massage_plan.store,
+                store=store,
+                customer=get_or_create_customer(
+                    store.id, customer_name.strip(), customer_phone
+                ),
                 customer_name=customer_name.strip(),
                 customer_phone=customer_phone.strip(),
                 appointment_time=appointment_datetime,
                 massage_plan=invitation.massage_plan,
                 therapist=invitation.therapist,
+                list_price=invitation.massage_plan.price,
+                price_charged=invitation.discount_price,
                 notes=(
                     f"透過優惠邀請預約 (原價: {invitation.massage_plan.price}, "
                     f"優惠價: {invitation.discount_price})"
                 )
             )
+            invalidate_invitation_status(invitation.slug)
+            publish_invitation_event(invitation.slug, PUBLIC_INVITATION_BOOKED)
+            publish_store_event(
+                reservation.store_id,
+                INVITATION_BOOKED,
+                {
+                    'invitation_id': invitation.id,
+                    'reservation_id': reservation.id,
+                    'appointment_time': reservation.appointment_time,
+                }
+            )
 
             # 回傳預約資訊
             return Response({
@@ -4,6 +4,7 @@ from decimal import Decimal
 
 from ..models import MassagePlan, Store
 from ..serializers import MassagePlanSerializer
+from ..store_cache import cache_store_list
 
 
 class MassagePlanViewSet(viewsets.ModelViewSet):
@@ -21,6 +22,7 @@ class MassagePlanViewSet(viewsets.ModelViewSet):
             return MassagePlan.objects.none()
         return MassagePlan.objects.filter(store=store).order_by('-created_at')
 
+    @cache_store_list('massage_plans')
     def list(self, request, *args, **kwargs):
         """列出所有方案"""
         queryset = self.get_queryset()
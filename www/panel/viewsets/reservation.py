@@ -6,7 +6,20 @@ from django.db.models import Q
 from datetime import datetime, timedelta
 
 from ..models import Reservation, MassagePlan, Therapist
-from ..serializers import ReservationSerializer, SimpleReservationSerializer
+from ..serializers import (
+    BulkReassignSerializer, BulkReservationSerializer, BulkShiftSerializer,
+    ReservationSerializer, SimpleReservationSerializer
+)
+from .. import availability
+from ..store_calendar import get_store_calendar
+from ..revenue import REPORT_GROUPS, revenue_report
+from ..bulk_reservations import bulk_cancel, bulk_reassign, bulk_shift
+
+# 最早可預約時間搜尋的上限
+NEXT_AVAILABLE_MAX_DAYS = 31
+NEXT_AVAILABLE_MAX_LIMIT = 50
+# 營收報表一次查詢的最長天數
+REVENUE_MAX_DAYS = 366
 
 
 class ReservationViewSet(viewsets.ModelViewSet):
@@ -32,24 +45,38 @@ class ReservationViewSet(viewsets.ModelViewSet):
             return SimpleReservationSerializer
         return ReservationSerializer
 
+    def _store_calendar(self):
+        """目前店家的行事曆（時區、營業時間、時段間隔）"""
+        store = getattr(self.request.user, "store", None)
+        if not store:
+            return None
+        return get_store_calendar(store)
+
     def list(self, request, *args, **kwargs):
         """列出所有預約"""
         queryset = self.get_queryset()
+        calendar = self._store_calendar()
+        if calendar is None:
+            return Response([])
         
-        # 日期範圍過濾
+        # 日期範圍過濾（店家當地日期）
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
         
         if start_date:
             try:
-                start_datetime = datetime.strptime(start_date, '%Y-%m-%d')
+                start_datetime = calendar.day_start(
+                    datetime.strptime(start_date, '%Y-%m-%d').date()
+                )
                 queryset = queryset.filter(appointment_time__gte=start_datetime)
             except ValueError:
                 pass
                 
         if end_date:
             try:
-                end_datetime = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
+                end_datetime = calendar.day_range(
+                    datetime.strptime(end_date, '%Y-%m-%d').date()
+                )[1]
                 queryset = queryset.filter(appointment_time__lt=end_datetime)
             except ValueError:
                 pass
@@ -64,6 +91,11 @@ class ReservationViewSet(viewsets.ModelViewSet):
         if massage_plan_id:
             queryset = queryset.filter(massage_plan_id=massage_plan_id)
         
+        # 客戶過濾
+        customer_id = request.query_params.get('customer_id')
+        if customer_id:
+            queryset = queryset.filter(customer_id=customer_id)
+
         # 客戶姓名搜尋
         customer_name = request.query_params.get('customer_name')
         if customer_name:
@@ -83,8 +115,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
         elif time_filter == 'past':
             queryset = queryset.filter(appointment_time__lt=now)
         elif time_filter == 'today':
-            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            today_end = today_start + timedelta(days=1)
+            today_start, today_end = calendar.day_range(calendar.today())
             queryset = queryset.filter(
                 appointment_time__gte=today_start,
                 appointment_time__lt=today_end
@@ -155,10 +186,11 @@ class ReservationViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def today(self, request):
-        """取得今日預約"""
-        now = timezone.now()
-        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        today_end = today_start + timedelta(days=1)
+        """取得今日預約（店家當地日期）"""
+        calendar = self._store_calendar()
+        if calendar is None:
+            return Response([])
+        today_start, today_end = calendar.day_range(calendar.today())
         
         queryset = self.get_queryset().filter(
             appointment_time__gte=today_start,
@@ -177,9 +209,42 @@ class ReservationViewSet(viewsets.ModelViewSet):
         serializer = SimpleReservationSerializer(queryset, many=True)
         return Response(serializer.data)
 
+    def _store_therapist_ids(self, therapist_id=None):
+        """目前店家可接單的師傅 id"""
+        store = getattr(self.request.user, "store", None)
+        if not store:
+            return []
+        therapists = Therapist.objects.filter(store=store, enabled=True)
+        if therapist_id:
+            therapists = therapists.filter(id=therapist_id)
+        return list(therapists.values_list('id', flat=True))
+
+    def _requested_duration(self, request, default):
+        """從 massage_plan_id 或 duration 參數取得服務時長（分鐘）"""
+        massage_plan_id = request.query_params.get('massage_plan_id')
+        if massage_plan_id:
+            store = getattr(request.user, "store", None)
+            duration = MassagePlan.objects.filter(
+                id=massage_plan_id, store=store
+            ).values_list('duration', flat=True).first()
+            if duration is None:
+                raise ValueError("找不到指定的方案")
+            return duration
+
+        duration = request.query_params.get('duration')
+        if duration:
+            try:
+                duration = int(duration)
+            except (TypeError, ValueError):
+                raise ValueError("時間長度格式錯誤")
+            if duration <= 0:
+                raise ValueError("時間長度必須大於 0 分鐘")
+            return duration
+        return default
+
     @action(detail=False, methods=['get'])
     def available_slots(self, request):
-        """檢查指定日期的可用時段"""
+        """檢查指定日期的可用時段（依店家時段範本、師傅班表與已預約時段）"""
         date_str = request.query_params.get('date')
         therapist_id = request.query_params.get('therapist_id')
         
@@ -196,36 +261,284 @@ class ReservationViewSet(viewsets.ModelViewSet):
                 {"error": "日期格式錯誤，請使用 YYYY-MM-DD"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        # 生成該日期的時段（例如：09:00-21:00，每30分鐘一個時段）
+
+        calendar = self._store_calendar()
+        if calendar is None:
+            return Response(
+                {"error": "找不到使用者的店家資訊"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            duration = self._requested_duration(request, default=calendar.slot_minutes)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        bitmaps = availability.get_day_bitmaps(
+            self._store_therapist_ids(therapist_id), target_date, calendar
+        )
+        working = 0
+        for working_bits, _ in bitmaps.values():
+            working |= working_bits
+
+        # 時段來自店家當天的範本，只列出有師傅上班的時段
+        day_end = calendar.day_range(target_date)[1]
         available_slots = []
-        start_hour = 9
-        end_hour = 21
-        
-        for hour in range(start_hour, end_hour):
-            for minute in [0, 30]:
-                slot_time = datetime.combine(target_date, datetime.min.time().replace(hour=hour, minute=minute))
-                slot_datetime = timezone.make_aware(slot_time)
-                
-                # 檢查這個時段是否已被預約
-                if therapist_id:
-                    existing_reservation = self.get_queryset().filter(
-                        therapist_id=therapist_id,
-                        appointment_time=slot_datetime
-                    ).exists()
-                else:
-                    existing_reservation = self.get_queryset().filter(
-                        appointment_time=slot_datetime
-                    ).exists()
-                
-                available_slots.append({
-                    'time': slot_datetime.strftime('%H:%M'),
-                    'datetime': slot_datetime.isoformat(),
-                    'available': not existing_reservation
-                })
+
+        for offset, slot_datetime in calendar.slots(target_date):
+            start_slot = offset // availability.SLOT_MINUTES
+            if not (working >> start_slot) & 1:
+                continue
+            # 依實際經過的時間換算 bits，跨越日光節約時間轉換的時段也正確
+            slot_end = slot_datetime + timedelta(minutes=duration)
+            mask = availability.datetime_range_mask(target_date, slot_datetime, slot_end, calendar)
+            available = slot_end <= day_end and any(
+                free_bits & mask == mask for _, free_bits in bitmaps.values()
+            )
+            available_slots.append({
+                'time': slot_datetime.strftime('%H:%M'),
+                'datetime': slot_datetime.isoformat(),
+                'available': available
+            })
         
         return Response({
             'date': date_str,
             'therapist_id': therapist_id,
             'slots': available_slots
         })
+
+    @action(detail=False, methods=['get'])
+    def free_therapists(self, request):
+        """查詢指定時間有空的師傅（例如 15:00 誰能做 90 分鐘的方案）"""
+        start_str = request.query_params.get('start')
+        if not start_str:
+            return Response(
+                {"error": "請提供開始時間參數"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            start = datetime.fromisoformat(start_str.replace('Z', '+00:00'))
+        except ValueError:
+            return Response(
+                {"error": "開始時間格式錯誤"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        calendar = self._store_calendar()
+        if calendar is None:
+            return Response(
+                {"error": "找不到使用者的店家資訊"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if timezone.is_naive(start):
+            start = timezone.make_aware(start, calendar.tz)
+
+        try:
+            duration = self._requested_duration(request, default=60)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        therapist_ids = availability.free_therapist_ids(
+            self._store_therapist_ids(), start, duration, calendar
+        )
+        therapists = Therapist.objects.filter(id__in=therapist_ids).order_by('name')
+
+        return Response({
+            'start': start.isoformat(),
+            'duration': duration,
+            'therapists': [
+                {'id': therapist.id, 'name': therapist.name}
+                for therapist in therapists
+            ]
+        })
+
+    @action(detail=False, methods=['get'])
+    def next_available(self, request):
+        """
+        搜尋最早可預約的時間（跨師傅、跨日期）
+        參數：massage_plan_id（必填）、therapist_id、days（預設 7）、limit（預設 5）
+        """
+        massage_plan_id = request.query_params.get('massage_plan_id')
+        if not massage_plan_id:
+            return Response(
+                {"error": "請提供方案參數"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            duration = self._requested_duration(request, default=None)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            days = min(int(request.query_params.get('days', 7)), NEXT_AVAILABLE_MAX_DAYS)
+            limit = min(int(request.query_params.get('limit', 5)), NEXT_AVAILABLE_MAX_LIMIT)
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "天數或筆數格式錯誤"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if days <= 0 or limit <= 0:
+            return Response(
+                {"error": "天數與筆數必須大於 0"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        calendar = self._store_calendar()
+        if calendar is None:
+            return Response(
+                {"error": "找不到使用者的店家資訊"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        therapist_id = request.query_params.get('therapist_id')
+        therapist_ids = self._store_therapist_ids(therapist_id)
+        slots = availability.find_next_slots(
+            therapist_ids, duration, timezone.now(), days, limit, calendar
+        )
+
+        names = dict(
+            Therapist.objects.filter(id__in=therapist_ids).values_list('id', 'name')
+        )
+        return Response({
+            'massage_plan_id': massage_plan_id,
+            'therapist_id': therapist_id,
+            'duration': duration,
+            'slots': [
+                {
+                    'datetime': timezone.localtime(slot_start, calendar.tz).isoformat(),
+                    'therapists': [
+                        {'id': slot_therapist_id, 'name': names[slot_therapist_id]}
+                        for slot_therapist_id in slot_therapist_ids
+                    ]
+                }
+                for slot_start, slot_therapist_ids in slots
+            ]
+        })
+
+    def _revenue_range(self, request):
+        """month（YYYY-MM）或 start_date / end_date（YYYY-MM-DD，含）"""
+        month = request.query_params.get('month')
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+        if not month and not (start_date and end_date):
+            raise ValueError("請提供月份或開始、結束日期")
+        try:
+            if month:
+                start = datetime.strptime(month, '%Y-%m').date()
+                end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+                return start, end
+            return (
+                datetime.strptime(start_date, '%Y-%m-%d').date(),
+                datetime.strptime(end_date, '%Y-%m-%d').date(),
+            )
+        except ValueError:
+            raise ValueError("日期格式錯誤，請使用 YYYY-MM 或 YYYY-MM-DD")
+
+    @action(detail=False, methods=['get'])
+    def revenue(self, request):
+        """
+        營收報表（讀取每日營收彙總，依預約日期計算）
+        參數：month 或 start_date、end_date；group_by：day（預設）、therapist、massage_plan
+        """
+        store = getattr(request.user, "store", None)
+        if not store:
+            return Response(
+                {"error": "找不到使用者的店家資訊"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            start, end = self._revenue_range(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end or (end - start).days >= REVENUE_MAX_DAYS:
+            return Response(
+                {"error": f"日期範圍必須在 {REVENUE_MAX_DAYS} 天以內"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        group_by = request.query_params.get('group_by', 'day')
+        if group_by not in REPORT_GROUPS:
+            return Response(
+                {"error": f"group_by 只能是 {', '.join(REPORT_GROUPS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        total, rows = revenue_report(store.id, start, end, group_by)
+        if group_by == 'therapist':
+            names = dict(Therapist.all_objects.filter(
+                id__in=[row['therapist_id'] for row in rows]
+            ).values_list('id', 'name'))
+            for row in rows:
+                row['therapist_name'] = names.get(row['therapist_id'])
+        elif group_by == 'massage_plan':
+            names = dict(MassagePlan.objects.filter(
+                id__in=[row['massage_plan_id'] for row in rows]
+            ).values_list('id', 'name'))
+            for row in rows:
+                row['massage_plan_name'] = names.get(row['massage_plan_id'])
+
+        return Response({
+            'start_date': start.isoformat(),
+            'end_date': end.isoformat(),
+            'group_by': group_by,
+            'total': total,
+            'rows': rows,
+        })
+
+    def _bulk_response(self, results):
+        succeeded = sum(1 for result in results if result['ok'])
+        return Response({
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results,
+        })
+
+    @action(detail=False, methods=['post'])
+    def bulk_cancel(self, request):
+        """
+        批次取消預約
+        參數：ids；回傳每筆的結果
+        """
+        store = getattr(request.user, "store", None)
+        if not store:
+            return Response({"error": "找不到使用者的店家資訊"}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = BulkReservationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return self._bulk_response(bulk_cancel(store, serializer.validated_data['ids']))
+
+    @action(detail=False, methods=['post'])
+    def bulk_reassign(self, request):
+        """
+        批次改派師傅
+        參數：ids、therapist；與其他預約重疊的項目維持原狀並回報
+        """
+        store = getattr(request.user, "store", None)
+        if not store:
+            return Response({"error": "找不到使用者的店家資訊"}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = BulkReassignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        therapist = Therapist.objects.filter(
+            id=serializer.validated_data['therapist'], store=store, enabled=True
+        ).first()
+        if therapist is None:
+            return Response({"error": "所選師傅不可用"}, status=status.HTTP_400_BAD_REQUEST)
+        return self._bulk_response(bulk_reassign(store, serializer.validated_data['ids'], therapist))
+
+    @action(detail=False, methods=['post'])
+    def bulk_shift(self, request):
+        """
+        批次移動預約時間
+        參數：ids、minutes（正數往後、負數往前）；與其他預約重疊的項目維持原狀並回報
+        """
+        store = getattr(request.user, "store", None)
+        if not store:
+            return Response({"error": "找不到使用者的店家資訊"}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = BulkShiftSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return self._bulk_response(
+            bulk_shift(store, serializer.validated_data['ids'], serializer.validated_data['minutes'])
+        )
@@ -1,10 +1,20 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny
+from rest_framework.pagination import PageNumberPagination
 from django.db.models import Q
 
-from ..models import ServiceSurvey, Therapist
+from ..models import ServiceSurvey
 from ..serializers import ServiceSurveySerializer
+from ..throttling import SurveyCreateThrottle
+from ..survey_search import search_surveys, highlight
+
+
+class SurveySearchPagination(PageNumberPagination):
+    """備註搜尋結果分頁（page、page_size）"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
 
 
 class ServiceSurveyViewSet(viewsets.ModelViewSet):
@@ -29,6 +39,12 @@ class ServiceSurveyViewSet(viewsets.ModelViewSet):
             permission_classes = [IsAuthenticatedOrReadOnly]
         return [permission() for permission in permission_classes]
 
+    def get_throttles(self):
+        """匿名建立問卷需要限流"""
+        if self.action == 'create':
+            return [SurveyCreateThrottle()]
+        return super().get_throttles()
+
     def get_queryset(self):
         """只看自己店家師傅的問卷 (僅用於 list 和 retrieve)"""
         # 如果是匿名用戶，回傳空查詢集
@@ -39,18 +55,16 @@ class ServiceSurveyViewSet(viewsets.ModelViewSet):
         if not store:
             return ServiceSurvey.objects.none()
         
-        # 取得該店家的所有師傅
-        therapist_ids = Therapist.objects.filter(
-            store=store, 
-            is_deleted=False
-        ).values_list('id', flat=True)
-        
+        # (store, created_at) 索引；師傅已經 join 進來，排除已刪除師傅不需要另外查詢
         return ServiceSurvey.objects.filter(
-            therapist_id__in=therapist_ids
+            store=store, therapist__is_deleted=False
         ).select_related('therapist').order_by('-created_at')
 
     def list(self, request, *args, **kwargs):
-        """列出所有問卷 (需要登入)"""
+        """
+        列出所有問卷 (需要登入)
+        有 q 參數時依備註全文檢索，結果依相關度排序、分頁，並附上標示關鍵字的備註
+        """
         if not request.user.is_authenticated:
             return Response(
                 {"detail": "Authentication required"}, 
@@ -68,10 +82,23 @@ class ServiceSurveyViewSet(viewsets.ModelViewSet):
         rating = request.query_params.get('rating')
         if rating:
             queryset = queryset.filter(rating=rating)
+
+        search = request.query_params.get('q', '').strip()
+        if search:
+            return self._search(request, queryset, search)
         
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    def _search(self, request, queryset, search):
+        paginator = SurveySearchPagination()
+        page = paginator.paginate_queryset(search_surveys(queryset, search), request, view=self)
+        data = self.get_serializer(page, many=True).data
+        for item, survey in zip(data, page):
+            item['comment_highlighted'] = highlight(survey.comment, search)
+            item['rank'] = getattr(survey, 'rank', None)
+        return paginator.get_paginated_response(data)
+
     def retrieve(self, request, *args, **kwargs):
         """取得單一問卷 (需要登入)"""
         if not request.user.is_authenticated:
@@ -0,0 +1,44 @@
+from rest_framework import viewsets, status
+from rest_framework.response import Response
+
+from ..models import StoreBusinessHours
+from ..serializers import StoreBusinessHoursSerializer
+from ..store_cache import cache_store_list
+
+
+class StoreBusinessHoursViewSet(viewsets.ModelViewSet):
+    """
+    店家營業時間 ViewSet
+    提供完整的 CRUD 功能，異動後可預約時段會依新的營業時間重新計算
+    """
+    serializer_class = StoreBusinessHoursSerializer
+    queryset = StoreBusinessHours.objects.all()
+
+    def get_queryset(self):
+        """只看自己店家的營業時間"""
+        store = getattr(self.request.user, "store", None)
+        if not store:
+            return StoreBusinessHours.objects.none()
+        return StoreBusinessHours.objects.filter(store=store)
+
+    @cache_store_list('business_hours')
+    def list(self, request, *args, **kwargs):
+        """列出營業時間"""
+        return super().list(request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        """刪除營業時間"""
+        instance = self.get_object()
+        self.perform_destroy(instance)
+        return Response(
+            {"detail": "營業時間刪除成功"},
+            status=status.HTTP_200_OK
+        )
+
+    def perform_create(self, serializer):
+        """建立時關聯到當前使用者的店家"""
+        store = getattr(self.request.user, "store", None)
+        if store:
+            serializer.save(store=store)
+        else:
+            raise ValueError("找不到使用者的店家資訊")
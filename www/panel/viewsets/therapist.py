@@ -3,6 +3,7 @@ from rest_framework.response import Response
 
 from ..models import Therapist, Store
 from ..serializers import TherapistSerializer
+from ..store_cache import cache_store_list
 from .base import SoftDeleteViewSetMixin, StoreFilteredViewSetMixin
 
 
@@ -12,6 +13,11 @@ class TherapistViewSet(SoftDeleteViewSetMixin, StoreFilteredViewSetMixin, viewse
 
     # 移除原本的 get_queryset，因為已經在 StoreFilteredViewSetMixin 中實作了
 
+    @cache_store_list('therapists')
+    def list(self, request, *args, **kwargs):
+        """列出師傅"""
+        return super().list(request, *args, **kwargs)
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -0,0 +1,106 @@
+from rest_framework import viewsets, status
+from rest_framework.response import Response
+from datetime import datetime
+
+from ..models import TherapistShift, TherapistScheduleException
+from ..serializers import TherapistShiftSerializer, TherapistScheduleExceptionSerializer
+
+
+class TherapistShiftViewSet(viewsets.ModelViewSet):
+    """
+    師傅每週班表 ViewSet
+    提供完整的 CRUD 功能
+    """
+    serializer_class = TherapistShiftSerializer
+    queryset = TherapistShift.objects.all()
+
+    def get_queryset(self):
+        """只看自己店家師傅的班表"""
+        store = getattr(self.request.user, "store", None)
+        if not store:
+            return TherapistShift.objects.none()
+        queryset = TherapistShift.objects.filter(
+            therapist__store=store,
+            therapist__is_deleted=False
+        ).select_related('therapist')
+
+        # 師傅過濾
+        therapist_id = self.request.query_params.get('therapist_id')
+        if therapist_id:
+            queryset = queryset.filter(therapist_id=therapist_id)
+        return queryset
+
+    def destroy(self, request, *args, **kwargs):
+        """刪除班表"""
+        instance = self.get_object()
+        self.perform_destroy(instance)
+        return Response(
+            {"detail": "班表刪除成功"},
+            status=status.HTTP_200_OK
+        )
+
+    def get_serializer_context(self):
+        """傳遞 request 到 serializer"""
+        context = super().get_serializer_context()
+        context['request'] = self.request
+        return context
+
+
+class TherapistScheduleExceptionViewSet(viewsets.ModelViewSet):
+    """
+    師傅休假 / 特定日期調整時段 ViewSet
+    提供完整的 CRUD 功能
+    """
+    serializer_class = TherapistScheduleExceptionSerializer
+    queryset = TherapistScheduleException.objects.all()
+
+    def get_queryset(self):
+        """只看自己店家師傅的例外設定"""
+        store = getattr(self.request.user, "store", None)
+        if not store:
+            return TherapistScheduleException.objects.none()
+        queryset = TherapistScheduleException.objects.filter(
+            therapist__store=store,
+            therapist__is_deleted=False
+        ).select_related('therapist')
+
+        # 師傅過濾
+        therapist_id = self.request.query_params.get('therapist_id')
+        if therapist_id:
+            queryset = queryset.filter(therapist_id=therapist_id)
+
+        # 日期範圍過濾
+        start_date = self.request.query_params.get('start_date')
+        end_date = self.request.query_params.get('end_date')
+
+        if start_date:
+            try:
+                queryset = queryset.filter(
+                    date__gte=datetime.strptime(start_date, '%Y-%m-%d').date()
+                )
+            except ValueError:
+                pass
+
+        if end_date:
+            try:
+                queryset = queryset.filter(
+                    date__lte=datetime.strptime(end_date, '%Y-%m-%d').date()
+                )
+            except ValueError:
+                pass
+        return queryset
+
+    def destroy(self, request, *args, **kwargs):
+        """刪除例外設定"""
+        instance = self.get_object()
+        self.perform_destroy(instance)
+        return Response(
+            {"detail": "班表例外刪除成功"},
+            status=status.HTTP_200_OK
+        )
+
+    def get_serializer_context(self):
+        """傳遞 request 到 serializer"""
+        context = super().get_serializer_context()
+        context['request'] = self.request
+        return context
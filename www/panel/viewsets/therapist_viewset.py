@@ -14,7 +14,7 @@ class TherapistViewSet(viewsets.ModelViewSet):
         store = getattr(self.request.user, "store", None)
         if not store:
             return Therapist.objects.none()
-        return Therapist.objects.filter(store=store, is_deleted=False)
+        return Therapist.objects.filter(store=store)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
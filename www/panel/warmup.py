@@ -0,0 +1,96 @@
+"""
+啟動時預先完成第一個請求才會做的初始化
+
+- 解析所有 URL pattern（編譯 regex、建立 reverse 表，連帶 import 所有 view）
+- 編譯 panel 的模板（DEBUG 關閉時使用 cached loader，編譯結果會留在記憶體）
+- 建立所有 serializer 的欄位（model _meta 快取、DRF 欄位對應）
+- 載入翻譯檔與預設時區
+
+gunicorn 使用 preload_app 時在 master 執行一次，fork 出的 worker 直接共用；
+沒有 preload 時每個 worker 載入 WSGI application 時各自執行。
+不會留下資料庫連線，避免 fork 後多個 process 共用同一條連線。
+"""
+import logging
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.urls import URLResolver, get_resolver
+from django.utils import timezone, translation
+from rest_framework import serializers as drf_serializers
+
+logger = logging.getLogger(__name__)
+
+
+def _walk_patterns(patterns):
+    count = 0
+    for pattern in patterns:
+        pattern.pattern.regex  # 編譯並快取 regex
+        if isinstance(pattern, URLResolver):
+            count += _walk_patterns(pattern.url_patterns)
+        else:
+            count += 1
+    return count
+
+
+def warm_urls():
+    resolver = get_resolver()
+    count = _walk_patterns(resolver.url_patterns)
+    # 存取 reverse_dict 會建立所有 namespace 的 reverse 表
+    resolver.reverse_dict
+    for namespace in resolver.namespace_dict:
+        resolver.namespace_dict[namespace][1].reverse_dict
+    return count
+
+
+def warm_templates():
+    template_dir = os.path.join(apps.get_app_config('panel').path, 'templates')
+    count = 0
+    for engine in engines.all():
+        for root, _, files in os.walk(template_dir):
+            for filename in files:
+                if filename.endswith('.html'):
+                    name = os.path.relpath(os.path.join(root, filename), template_dir)
+                    engine.get_template(name.replace(os.sep, '/'))
+                    count += 1
+    return count
+
+
+def warm_serializers():
+    from . import serializers
+
+    count = 0
+    for value in vars(serializers).values():
+        if (isinstance(value, type) and issubclass(value, drf_serializers.Serializer)
+                and value.__module__ == serializers.__name__):
+            value(context={}).fields
+            count += 1
+    for model in apps.get_models():
+        model._meta.get_fields()
+    return count
+
+
+def warm_up():
+    """執行所有暖機步驟並記錄耗時，回傳 {步驟: (數量, 毫秒)}"""
+    results = {}
+    for name, step in (('urls', warm_urls), ('templates', warm_templates),
+                       ('serializers', warm_serializers)):
+        started = time.perf_counter()
+        count = step()
+        results[name] = (count, (time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.deactivate()
+    timezone.get_default_timezone()
+    results['i18n'] = (1, (time.perf_counter() - started) * 1000)
+
+    connections.close_all()
+    logger.info(
+        "warm-up 完成：%s",
+        ", ".join(f"{name} {count} 個 {ms:.0f} ms" for name, (count, ms) in results.items())
+    )
+    return results
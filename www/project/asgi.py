@@ -13,4 +13,27 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# get_asgi_application() 會先完成 django.setup()，之後才能 import app 模組
+from django.conf import settings  # noqa: E402
+from panel.asgi import (  # noqa: E402
+    INVITATION_EVENTS_PATH, STORE_EVENTS_PATH, invitation_events, store_events
+)
+
+if settings.WARMUP_ON_BOOT:
+    from panel.warmup import warm_up
+    warm_up()
+
+
+async def application(scope, receive, send):
+    # 即時事件是長連線，直接由 ASGI 處理，其餘交給 Django
+    if scope['type'] == 'http':
+        if scope['path'] == STORE_EVENTS_PATH:
+            await store_events(scope, receive, send)
+            return
+        match = INVITATION_EVENTS_PATH.match(scope['path'])
+        if match:
+            await invitation_events(scope, receive, send, match['slug'])
+            return
+    await django_application(scope, receive, send)
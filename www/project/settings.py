@@ -43,6 +43,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'panel.compression.ResponseCompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -131,6 +132,20 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 
+# collectstatic 時產生帶雜湊的檔名與 .gz / .br 預壓縮檔
+STATICFILES_STORAGE = 'panel.storage.CompressedManifestStaticFilesStorage'
+
+
+# Cache
+# 預設為各 process 各自的記憶體快取，只適合單一 process 開發；
+# 多個 worker 時限流、版本號與世代號都必須共用，docker-compose 使用 memcached（PyMemcacheCache）
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
@@ -141,4 +156,120 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CORS_ALLOW_ALL_ORIGINS = True
 
 # Update this to match your login page URL
-LOGIN_URL = '/login/'  
\ No newline at end of file
+LOGIN_URL = '/login/'
+
+# Public invitation status
+# 公開邀請頁輪詢狀態的快取秒數
+INVITATION_STATUS_CACHE_SECONDS = int(os.environ.get('INVITATION_STATUS_CACHE_SECONDS', 10))
+# 邀請頁的預約事件串流由 ASGI（events 服務）提供，nginx 必須把 /api/public-invitations/<slug>/events/ 轉給它；
+# 沒有 events 服務時保持關閉，頁面改為每 30 秒查詢狀態
+INVITATION_SSE_ENABLED = int(os.environ.get('INVITATION_SSE_ENABLED', 0))
+# 一條串流最長的秒數，之後瀏覽器自動重新連線
+INVITATION_SSE_MAX_SECONDS = int(os.environ.get('INVITATION_SSE_MAX_SECONDS', 300))
+
+# Store live events
+# memory：單一 ASGI process；postgres：用 LISTEN/NOTIFY 跨 process 傳遞（web 發佈、events 服務推送）
+STORE_EVENTS_BROKER = os.environ.get(
+    'STORE_EVENTS_BROKER',
+    'postgres' if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql' else 'memory'
+)
+STORE_EVENTS_CHANNEL = os.environ.get('STORE_EVENTS_CHANNEL', 'store_events')
+STORE_EVENTS_HEARTBEAT_SECONDS = int(os.environ.get('STORE_EVENTS_HEARTBEAT_SECONDS', 15))
+STORE_EVENTS_QUEUE_SIZE = int(os.environ.get('STORE_EVENTS_QUEUE_SIZE', 100))
+
+# Public rate limits (sliding window counters in the shared cache)
+# 每個端點可依 ip / slug / therapist 設定速率，格式同 DRF：次數/期間
+PUBLIC_RATE_LIMITS_ENABLED = int(os.environ.get('PUBLIC_RATE_LIMITS_ENABLED', 1))
+PUBLIC_RATE_LIMITS = {
+    'invitation_book': {'ip': '10/min', 'slug': '30/min'},
+    'review_submit': {'ip': '5/min', 'therapist': '60/min'},
+    'survey_create': {'ip': '5/min', 'therapist': '60/min'},
+    'invitation_click': {'ip': '60/min'},
+}
+
+# Therapist availability bitmaps
+# 每個 bit 代表的分鐘數（需能整除 1440）
+AVAILABILITY_SLOT_MINUTES = int(os.environ.get('AVAILABILITY_SLOT_MINUTES', 5))
+# 店家沒有設定營業時間時的預設時段
+AVAILABILITY_DEFAULT_HOURS = ('09:00', '21:00')
+
+# Reservation auto-assignment
+# 預約未指定師傅時自動派工；策略可為 least_loaded / round_robin / highest_rated 或 dotted path
+RESERVATION_AUTO_ASSIGN = int(os.environ.get('RESERVATION_AUTO_ASSIGN', 1))
+RESERVATION_ASSIGNMENT_POLICY = os.environ.get('RESERVATION_ASSIGNMENT_POLICY', 'least_loaded')
+
+# Admin changelists
+# 未篩選的資料表超過此筆數時改用 PostgreSQL 統計資訊估計筆數
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.environ.get('ADMIN_ESTIMATED_COUNT_THRESHOLD', 100000))
+# 有篩選條件時 COUNT 的時間上限（毫秒），逾時改為最多數到 ADMIN_FILTERED_COUNT_CAP 筆
+ADMIN_COUNT_TIMEOUT_MS = int(os.environ.get('ADMIN_COUNT_TIMEOUT_MS', 200))
+ADMIN_FILTERED_COUNT_CAP = int(os.environ.get('ADMIN_FILTERED_COUNT_CAP', 10000))
+
+# Table partitioning (PostgreSQL)
+# manage_partitions 預先建立的月份數
+PARTITION_MONTHS_AHEAD = int(os.environ.get('PARTITION_MONTHS_AHEAD', 3))
+# 超過幾個月的分割移到封存表；0 表示不自動封存
+PARTITION_ARCHIVE_AFTER_MONTHS = int(os.environ.get('PARTITION_ARCHIVE_AFTER_MONTHS', 0))
+
+# API JSON rendering
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'panel.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'panel.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# API response compression
+# 只壓縮超過此大小的 JSON 回應（bytes）
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.environ.get('RESPONSE_COMPRESSION_MIN_BYTES', 1024))
+RESPONSE_COMPRESSION_GZIP_LEVEL = int(os.environ.get('RESPONSE_COMPRESSION_GZIP_LEVEL', 6))
+# 動態回應用較低的 brotli 品質，壓縮率接近 gzip -9 但快很多
+RESPONSE_COMPRESSION_BROTLI_QUALITY = int(os.environ.get('RESPONSE_COMPRESSION_BROTLI_QUALITY', 4))
+
+# Per-store cache
+# 師傅、方案、營業時間列表與頁面下拉選單的快取秒數；資料異動時依店家版本號立即失效
+STORE_CACHE_SECONDS = int(os.environ.get('STORE_CACHE_SECONDS', 600))
+
+# Boot warm-up
+# 載入 WSGI / ASGI application 時預先解析 URL、編譯模板、建立 serializer 欄位
+WARMUP_ON_BOOT = int(os.environ.get('WARMUP_ON_BOOT', 0 if DEBUG else 1))
+
+# Background task queue
+# 開啟時不經過 worker，交易 commit 後直接在請求中執行
+TASK_QUEUE_EAGER = int(os.environ.get('TASK_QUEUE_EAGER', 0))
+TASK_QUEUE_BATCH_SIZE = int(os.environ.get('TASK_QUEUE_BATCH_SIZE', 100))
+TASK_QUEUE_IDLE_SECONDS = float(os.environ.get('TASK_QUEUE_IDLE_SECONDS', 1))
+TASK_QUEUE_MAX_ATTEMPTS = int(os.environ.get('TASK_QUEUE_MAX_ATTEMPTS', 5))
+# 第 n 次失敗後等待 BASE * 2^(n-1) 秒再重試
+TASK_QUEUE_RETRY_BASE_SECONDS = int(os.environ.get('TASK_QUEUE_RETRY_BASE_SECONDS', 10))
+# 執行中超過此秒數視為 worker 已中斷，放回佇列
+TASK_QUEUE_LOCK_TIMEOUT_SECONDS = int(os.environ.get('TASK_QUEUE_LOCK_TIMEOUT_SECONDS', 300))
+TASK_QUEUE_RETENTION_HOURS = int(os.environ.get('TASK_QUEUE_RETENTION_HOURS', 24))
+
+# Chunked data migrations
+# 每批處理的筆數與每批之間暫停的秒數（manage.py run_data_migration 可另外指定）
+DATA_MIGRATION_BATCH_SIZE = int(os.environ.get('DATA_MIGRATION_BATCH_SIZE', 2000))
+DATA_MIGRATION_PAUSE_SECONDS = float(os.environ.get('DATA_MIGRATION_PAUSE_SECONDS', 0))
+
+# Public invitation slug cache
+# 公開邀請依 slug 查詢的快照（含方案、師傅、店家）快取秒數
+INVITATION_SLUG_CACHE_SECONDS = int(os.environ.get('INVITATION_SLUG_CACHE_SECONDS', 300))
+# 不存在的 slug（篩選器誤判或已刪除）快取秒數
+INVITATION_SLUG_MISS_CACHE_SECONDS = int(os.environ.get('INVITATION_SLUG_MISS_CACHE_SECONDS', 30))
+# 各 process 的 slug 篩選器整個重建的間隔，移除已刪除的 slug
+INVITATION_SLUG_FILTER_REBUILD_SECONDS = int(os.environ.get('INVITATION_SLUG_FILTER_REBUILD_SECONDS', 600))
+
+# Public page HTTP cache
+# 公開頁面（評論頁、邀請頁）的瀏覽器與共用快取（nginx）秒數
+PUBLIC_PAGE_MAX_AGE = int(os.environ.get('PUBLIC_PAGE_MAX_AGE', 60))
+PUBLIC_PAGE_SHARED_MAX_AGE = int(os.environ.get('PUBLIC_PAGE_SHARED_MAX_AGE', 600))
+# 資料異動時送出清除請求的快取伺服器，逗號分隔（例如 http://nginx:8080），空白時不清除
+PUBLIC_CACHE_PURGE_URLS = [url for url in os.environ.get('PUBLIC_CACHE_PURGE_URLS', '').split(',') if url]
+# GET：重新取得頁面覆蓋快取（nginx 內部 server）；PURGE：支援 PURGE 方法的快取直接刪除
+PUBLIC_CACHE_PURGE_METHOD = os.environ.get('PUBLIC_CACHE_PURGE_METHOD', 'GET')
+PUBLIC_CACHE_PURGE_TIMEOUT_SECONDS = int(os.environ.get('PUBLIC_CACHE_PURGE_TIMEOUT_SECONDS', 5))
@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 
 application = get_wsgi_application()
+
+# 在接受請求前先解析 URL、編譯模板與建立 serializer 欄位
+from django.conf import settings  # noqa: E402
+
+if settings.WARMUP_ON_BOOT:
+    from panel.warmup import warm_up
+    warm_up()
@@ -0,0 +1,64 @@
+function toggleSidebar() {
+    const sidebar = document.getElementById('sidebar');
+    const mainContent = document.getElementById('mainContent');
+
+    sidebar.classList.toggle('open');
+    sidebar.classList.toggle('closed');
+}
+
+function toggleSection(sectionId) {
+    const menu = document.getElementById(sectionId);
+    const toggle = document.getElementById(sectionId + '-toggle');
+
+    menu.classList.toggle('collapsed');
+    toggle.classList.toggle('collapsed');
+}
+
+// 取得 cookie（API 請求的 CSRF token）
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+// 訂閱店家即時事件；伺服器未提供串流時 EventSource 會直接關閉，不會重試
+function subscribeStoreEvents(types, onEvent) {
+    if (!window.EventSource) return null;
+    const source = new EventSource('/api/store-events/');
+    types.forEach(type => {
+        source.addEventListener(type, e => onEvent(type, JSON.parse(e.data)));
+    });
+    return source;
+}
+
+// 有開啟中的 modal 時延後重新整理，避免打斷正在編輯的表單
+function reloadWhenIdle() {
+    if (document.querySelector('.modal.show')) {
+        setTimeout(reloadWhenIdle, 2000);
+        return;
+    }
+    window.location.reload();
+}
+
+// Close sidebar when clicking outside on mobile
+document.addEventListener('click', function(e) {
+    const sidebar = document.getElementById('sidebar');
+    const toggle = document.querySelector('.mobile-toggle');
+
+    if (window.innerWidth <= 768 && 
+        !sidebar.contains(e.target) && 
+        !toggle.contains(e.target) && 
+        sidebar.classList.contains('open')) {
+        sidebar.classList.remove('open');
+        sidebar.classList.add('closed');
+    }
+});
@@ -0,0 +1,90 @@
+// Form handling
+const loginForm = document.getElementById('loginForm');
+const loginBtn = document.getElementById('loginBtn');
+const loginText = document.getElementById('loginText');
+const errorMessage = document.getElementById('errorMessage');
+const emailInput = document.getElementById('email');
+const passwordInput = document.getElementById('password');
+
+// Show error message if there are login errors
+if (loginForm.dataset.hasError) {
+    document.addEventListener('DOMContentLoaded', function() {
+        showError();
+    });
+}
+
+// Form submission with loading state
+loginForm.addEventListener('submit', function(e) {
+    // Don't prevent default - let the form submit normally
+    showLoading();
+});
+
+// Input validation
+emailInput.addEventListener('input', function() {
+    validateInput(this);
+});
+
+passwordInput.addEventListener('input', function() {
+    validateInput(this);
+});
+
+function validateInput(input) {
+    const value = input.value.trim();
+
+    if (value === '') {
+        input.classList.remove('success', 'error');
+    } else if (value.length >= 3) {
+        input.classList.remove('error');
+        input.classList.add('success');
+    } else {
+        input.classList.remove('success');
+        input.classList.add('error');
+    }
+}
+
+function showLoading() {
+    loginBtn.disabled = true;
+    loginText.innerHTML = '<span class="loading"></span>登入中...';
+}
+
+function hideLoading() {
+    loginBtn.disabled = false;
+    loginText.innerHTML = '登入';
+}
+
+function showError() {
+    errorMessage.classList.add('show');
+    // Auto hide after 5 seconds
+    setTimeout(function() {
+        errorMessage.classList.remove('show');
+    }, 5000);
+}
+
+function showForgotPassword() {
+    alert('請聯繫系統管理員重設密碼');
+}
+
+// Auto focus on first input
+document.addEventListener('DOMContentLoaded', function() {
+    emailInput.focus();
+});
+
+// Clear error message when user starts typing
+[emailInput, passwordInput].forEach(input => {
+    input.addEventListener('input', function() {
+        errorMessage.classList.remove('show');
+    });
+});
+
+// Keyboard shortcuts
+document.addEventListener('keydown', function(e) {
+    // Enter key submits form
+    if (e.key === 'Enter' && !loginBtn.disabled) {
+        loginForm.submit();
+    }
+});
+
+// Prevent form resubmission on page refresh
+if (window.history.replaceState) {
+    window.history.replaceState(null, null, window.location.href);
+}
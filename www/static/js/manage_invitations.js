@@ -0,0 +1,708 @@
+// Global variables
+let isEditMode = false;
+let currentInvitationId = null;
+
+const csrftoken = getCookie('csrftoken');
+
+// Modal functions
+function openCreateModal() {
+    console.log('openCreateModal called');
+    const modal = document.getElementById('invitationModal');
+    const modalTitle = document.getElementById('modalTitle');
+    const form = document.getElementById('invitationForm');
+    const saveBtn = document.getElementById('saveBtn');
+
+    if (!modal) {
+        console.error('Modal element not found');
+        return;
+    }
+
+    modalTitle.textContent = '建立按摩邀請';
+    form.reset();
+    isEditMode = false;
+    currentInvitationId = null;
+    document.getElementById('invitationId').value = '';
+    setDefaultDateTime();
+
+    saveBtn.innerHTML = `
+        <svg width="16" height="16" fill="currentColor" viewBox="0 0 16 16">
+            <path d="M8 4a.5.5 0 0 1 .5.5v3h3a.5.5 0 0 1 0 1h-3v3a.5.5 0 0 1-1 0v-3h-3a.5.5 0 0 1 0-1h3v-3A.5.5 0 0 1 8 4z"/>
+        </svg>
+        建立邀請
+    `;
+
+    modal.classList.add('show');
+    setTimeout(() => {
+        const massagePlanEl = document.getElementById('massagePlan');
+        if (massagePlanEl) {
+            massagePlanEl.focus();
+        }
+    }, 100);
+}
+
+function closeModal() {
+    const modal = document.getElementById('invitationModal');
+    if (modal) {
+        modal.classList.remove('show');
+    }
+}
+
+// Initialize page
+document.addEventListener('DOMContentLoaded', function() {
+    console.log('DOM Content Loaded');
+
+    updateStatusBadges();
+    updateStatsCounts();
+    calculateSavings();
+    setDefaultDateTime();
+    setupFormHandlers();
+
+    // Set minimum date to today
+    const today = new Date().toISOString().split('T')[0];
+    const invitationDateEl = document.getElementById('invitationDate');
+    if (invitationDateEl) {
+        invitationDateEl.min = today;
+    }
+
+    // 每分鐘依目前時間更新狀態標籤（僅前端計算，不呼叫 API）
+    setInterval(updateStatusBadges, 60000);
+
+    // 邀請被預約時即時更新
+    subscribeStoreEvents(['invitation.booked'], reloadWhenIdle);
+
+    // Setup modal event listeners
+    setupModalEventListeners();
+});
+
+// Setup modal event listeners
+function setupModalEventListeners() {
+    // Close modals when clicking outside
+    window.onclick = function(event) {
+        const invitationModal = document.getElementById('invitationModal');
+
+        if (event.target === invitationModal) {
+            closeModal();
+        }
+    }
+
+    // Close modals with Escape key
+    document.addEventListener('keydown', function(event) {
+        if (event.key === 'Escape') {
+            closeModal();
+        }
+    });
+
+    // Form submission with Enter key
+    const form = document.getElementById('invitationForm');
+    if (form) {
+        form.addEventListener('keydown', function(event) {
+            if (event.key === 'Enter' && !event.shiftKey && event.target.tagName !== 'TEXTAREA') {
+                event.preventDefault();
+                saveInvitation();
+            }
+        });
+    }
+}
+
+// Calculate savings for all cards
+function calculateSavings() {
+    document.querySelectorAll('.savings-badge[data-original]').forEach(badge => {
+        const original = parseFloat(badge.getAttribute('data-original'));
+        const discount = parseFloat(badge.getAttribute('data-discount'));
+        const savings = original - discount;
+        const savingsAmountEl = badge.querySelector('.savings-amount');
+        if (savingsAmountEl) {
+            savingsAmountEl.textContent = savings.toFixed(0);
+        }
+    });
+}
+
+// Update status badges and card styles
+function updateStatusBadges() {
+    const now = new Date();
+    const today = new Date();
+    today.setHours(0, 0, 0, 0);
+    const tomorrow = new Date(today);
+    tomorrow.setDate(tomorrow.getDate() + 1);
+
+    document.querySelectorAll('.invitation-card[data-start-datetime]').forEach(card => {
+        const startTime = new Date(card.getAttribute('data-start-datetime'));
+        const endTime = new Date(card.getAttribute('data-end-datetime'));
+        const invitationId = card.getAttribute('data-id');
+        const statusBadge = document.getElementById(`status-${invitationId}`);
+        const availabilityEl = document.getElementById(`availability-${invitationId}`);
+
+        let status, statusClass, availability;
+
+        // Remove existing status classes
+        card.classList.remove('today', 'upcoming', 'past');
+
+        // Check if the service date is today, future, or past
+        if (startTime >= today && startTime < tomorrow) {
+            // Service is available today
+            status = '今日可預約';
+            statusClass = 'today';
+            card.classList.add('today');
+
+            if (now < startTime) {
+                const diffMinutes = Math.floor((startTime - now) / (1000 * 60));
+                availability = formatTimeRemaining(diffMinutes, '後開始');
+            } else if (now >= startTime && now <= endTime) {
+                const diffMinutes = Math.floor((endTime - now) / (1000 * 60));
+                availability = `剩餘 ${formatTimeRemaining(diffMinutes)}`;
+            } else {
+                availability = '今日時段已結束';
+            }
+        } else if (startTime >= tomorrow) {
+            // Service is in the future
+            status = '未來可預約';
+            statusClass = 'upcoming';
+            card.classList.add('upcoming');
+
+            const daysUntil = Math.floor((startTime - now) / (1000 * 60 * 60 * 24));
+            if (daysUntil === 1) {
+                availability = '明天';
+            } else if (daysUntil <= 7) {
+                availability = `${daysUntil} 天後`;
+            } else {
+                availability = startTime.toLocaleDateString('zh-TW', { month: 'numeric', day: 'numeric' });
+            }
+        } else {
+            // Service date has passed
+            status = '已過期';
+            statusClass = 'past';
+            card.classList.add('past');
+            availability = '時段已過';
+        }
+
+        if (statusBadge) {
+            statusBadge.textContent = status;
+        }
+        if (availabilityEl) {
+            availabilityEl.textContent = availability;
+        }
+    });
+}
+
+// Format time remaining
+function formatTimeRemaining(minutes, suffix = '') {
+    if (minutes < 60) {
+        return `${minutes} 分鐘${suffix}`;
+    } else if (minutes < 1440) {
+        const hours = Math.floor(minutes / 60);
+        const remainingMinutes = minutes % 60;
+        if (remainingMinutes === 0) {
+            return `${hours} 小時${suffix}`;
+        }
+        return `${hours} 小時 ${remainingMinutes} 分鐘${suffix}`;
+    } else {
+        const days = Math.floor(minutes / 1440);
+        const remainingHours = Math.floor((minutes % 1440) / 60);
+        if (remainingHours === 0) {
+            return `${days} 天${suffix}`;
+        }
+        return `${days} 天 ${remainingHours} 小時${suffix}`;
+    }
+}
+
+// Update statistics counts
+function updateStatsCounts() {
+    const now = new Date();
+    const today = new Date();
+    today.setHours(0, 0, 0, 0);
+    const tomorrow = new Date(today);
+    tomorrow.setDate(tomorrow.getDate() + 1);
+
+    let todayCount = 0;
+    let upcomingCount = 0;
+    let totalClicks = 0;
+
+    document.querySelectorAll('.invitation-card[data-start-datetime]').forEach(card => {
+        const startTime = new Date(card.getAttribute('data-start-datetime'));
+
+        // Get click count from the card
+        const clickElement = card.querySelector('.click-count');
+        if (clickElement) {
+            const clickText = clickElement.textContent.trim();
+            const clickMatch = clickText.match(/(\d+)/);
+            if (clickMatch) {
+                totalClicks += parseInt(clickMatch[1]);
+            }
+        }
+
+        // Count today's available services
+        if (startTime >= today && startTime < tomorrow) {
+            todayCount++;
+        } 
+        // Count future services
+        else if (startTime >= tomorrow) {
+            upcomingCount++;
+        }
+    });
+
+    document.getElementById('todayCount').textContent = todayCount;
+    document.getElementById('upcomingCount').textContent = upcomingCount;
+    document.getElementById('totalClicks').textContent = totalClicks;
+}
+
+// Set default date and time
+function setDefaultDateTime() {
+    const now = new Date();
+    const tomorrow = new Date(now);
+    tomorrow.setDate(tomorrow.getDate() + 1);
+
+    document.getElementById('invitationDate').value = tomorrow.toISOString().split('T')[0];
+    document.getElementById('startTime').value = '09:00';
+    document.getElementById('endTime').value = '18:00';
+}
+
+// Setup form event handlers
+function setupFormHandlers() {
+    // Plan selection handler
+    document.getElementById('massagePlan').addEventListener('change', function() {
+        const selectedOption = this.options[this.selectedIndex];
+        const price = selectedOption.getAttribute('data-price');
+
+        if (price) {
+            document.getElementById('originalPrice').value = parseFloat(price).toFixed(0);
+            updateSavings();
+        } else {
+            document.getElementById('originalPrice').value = '';
+            document.getElementById('savingsDisplay').value = '';
+        }
+    });
+
+    // Discount price handler
+    document.getElementById('discountPrice').addEventListener('input', updateSavings);
+}
+
+// Update savings calculation
+function updateSavings() {
+    const originalPriceText = document.getElementById('originalPrice').value;
+    const discountPrice = parseFloat(document.getElementById('discountPrice').value) || 0;
+
+    if (originalPriceText) {
+        const originalPrice = parseFloat(originalPriceText.replace(/[,$\s]/g, '')) || 0;
+
+        if (originalPrice > 0 && discountPrice > 0) {
+            const savings = originalPrice - discountPrice;
+            if (savings > 0) {
+                document.getElementById('savingsDisplay').value = `省 ${savings.toFixed(0)}`;
+            } else if (savings === 0) {
+                document.getElementById('savingsDisplay').value = '無折扣';
+            } else {
+                document.getElementById('savingsDisplay').value = '價格異常';
+            }
+        } else {
+            document.getElementById('savingsDisplay').value = '';
+        }
+    }
+}
+
+// Edit invitation
+function editInvitation(id) {
+    fetch('/api/massage-invitations/' + id + '/', {
+        method: 'GET',
+        headers: {
+            'X-CSRFToken': csrftoken
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        const modal = document.getElementById('invitationModal');
+        const modalTitle = document.getElementById('modalTitle');
+        const saveBtn = document.getElementById('saveBtn');
+
+        modalTitle.textContent = '編輯邀請';
+
+        // Fill form with existing data
+        document.getElementById('invitationId').value = data.id;
+        document.getElementById('massagePlan').value = data.massage_plan;
+        document.getElementById('therapist').value = data.therapist;
+
+        // Parse start and end times
+        const startTime = new Date(data.available_start);
+        const endTime = new Date(data.available_end);
+
+        document.getElementById('invitationDate').value = startTime.toISOString().split('T')[0];
+        document.getElementById('startTime').value = startTime.toTimeString().substring(0, 5);
+        document.getElementById('endTime').value = endTime.toTimeString().substring(0, 5);
+
+        document.getElementById('originalPrice').value = parseFloat(data.massage_plan_original_price).toFixed(0);
+        document.getElementById('discountPrice').value = parseFloat(data.discount_price).toFixed(0);
+        document.getElementById('notes').value = data.notes || '';
+
+        updateSavings();
+
+        isEditMode = true;
+        currentInvitationId = id;
+
+        saveBtn.innerHTML = '<svg width="16" height="16" fill="currentColor" viewBox="0 0 16 16"><path d="M12.146.146a.5.5 0 0 1 .708 0l3 3a.5.5 0 0 1 0 .708L9.708 9H9a.5.5 0 0 1-.5-.5v-.708l5.146-5.146z"/><path fill-rule="evenodd" d="M3 5a2 2 0 0 1 2-2h1.586l2 2H5a1 1 0 0 0-1 1v6a1 1 0 0 0 1 1h6a1 1 0 0 0 1-1V9.414l2-2V11a3 3 0 0 1-3 3H5a3 3 0 0 1-3-3V5z"/></svg> 更新邀請';
+
+        modal.classList.add('show');
+        setTimeout(() => {
+            document.getElementById('massagePlan').focus();
+        }, 100);
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('載入邀請資料失敗', 'error');
+    });
+}
+
+// Save invitation
+function saveInvitation() {
+    const form = document.getElementById('invitationForm');
+    const saveBtn = document.getElementById('saveBtn');
+
+    // Validate form
+    const massagePlan = document.getElementById('massagePlan').value;
+    const therapist = document.getElementById('therapist').value;
+    const invitationDate = document.getElementById('invitationDate').value;
+    const startTime = document.getElementById('startTime').value;
+    const endTime = document.getElementById('endTime').value;
+    const discountPrice = document.getElementById('discountPrice').value;
+
+    if (!massagePlan) {
+        showToast('請選擇方案', 'error');
+        document.getElementById('massagePlan').focus();
+        return;
+    }
+
+    if (!therapist) {
+        showToast('請選擇師傅', 'error');
+        document.getElementById('therapist').focus();
+        return;
+    }
+
+    if (!invitationDate || !startTime || !endTime) {
+        showToast('請設定師傅可服務時間', 'error');
+        return;
+    }
+
+    if (!discountPrice || discountPrice <= 0) {
+        showToast('請輸入有效的特價', 'error');
+        document.getElementById('discountPrice').focus();
+        return;
+    }
+
+    // Check if end time is after start time
+    if (endTime <= startTime) {
+        showToast('結束時間必須在開始時間之後', 'error');
+        document.getElementById('endTime').focus();
+        return;
+    }
+
+    showLoading(saveBtn);
+
+    // Combine date and time
+    const startDateTime = new Date(invitationDate + 'T' + startTime).toISOString();
+    const endDateTime = new Date(invitationDate + 'T' + endTime).toISOString();
+
+    const data = {
+        massage_plan: parseInt(massagePlan),
+        therapist: parseInt(therapist),
+        available_start: startDateTime,
+        available_end: endDateTime,
+        discount_price: parseFloat(discountPrice),
+        notes: document.getElementById('notes').value.trim()
+    };
+
+    const url = isEditMode 
+        ? '/api/massage-invitations/' + currentInvitationId + '/'
+        : '/api/massage-invitations/';
+
+    const method = isEditMode ? 'PUT' : 'POST';
+
+    fetch(url, {
+        method: method,
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrftoken
+        },
+        body: JSON.stringify(data)
+    })
+    .then(response => {
+        if (response.ok) {
+            return response.json();
+        }
+        return response.text().then(text => {
+            throw new Error('HTTP ' + response.status + ': ' + text);
+        });
+    })
+    .then(data => {
+        hideLoading(saveBtn);
+        closeModal();
+        showToast(isEditMode ? '邀請更新成功！' : '邀請建立成功！', 'success');
+        setTimeout(() => {
+            window.location.reload();
+        }, 1500);
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        hideLoading(saveBtn);
+        showToast('儲存失敗：' + error.message, 'error');
+    });
+}
+
+// Delete invitation
+function deleteInvitation(id, planName) {
+    const confirmMessage = "確定要刪除「" + planName + "」的邀請嗎？\n\n此操作無法復原！";
+
+    if (confirm(confirmMessage)) {
+        fetch('/api/massage-invitations/' + id + '/', {
+            method: 'DELETE',
+            headers: {
+                'X-CSRFToken': csrftoken,
+                'Content-Type': 'application/json'
+            }
+        })
+        .then(response => {
+            if (response.ok) {
+                return response.json();
+            }
+            return response.text().then(text => {
+                throw new Error('HTTP ' + response.status + ': ' + text);
+            });
+        })
+        .then(data => {
+            showToast('邀請刪除成功！', 'success');
+            setTimeout(() => {
+                window.location.reload();
+            }, 1500);
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showToast('刪除失敗：' + error.message, 'error');
+        });
+    }
+}
+
+// Copy invitation URL
+function copyInvitationUrl(slug, id) {
+    const baseUrl = window.location.origin;
+    const invitationUrl = baseUrl + '/invitation/' + slug + '/';
+
+    navigator.clipboard.writeText(invitationUrl).then(() => {
+        const copyBtn = document.querySelector('#url-' + id + ' + .copy-btn');
+        const originalText = copyBtn.textContent;
+
+        copyBtn.textContent = '已複製';
+        copyBtn.classList.add('copied');
+
+        setTimeout(() => {
+            copyBtn.textContent = originalText;
+            copyBtn.classList.remove('copied');
+        }, 2000);
+
+        showToast('連結已複製到剪貼簿！', 'success');
+    }).catch(() => {
+        showToast('複製失敗，請手動複製連結', 'error');
+    });
+}
+
+// Filter functions
+function applyFilters() {
+    const therapistFilter = document.getElementById('therapistFilter').value;
+    const planFilter = document.getElementById('planFilter').value;
+    const startDateFilter = document.getElementById('startDateFilter').value;
+    const endDateFilter = document.getElementById('endDateFilter').value;
+
+    const cards = document.querySelectorAll('.invitation-card[data-therapist]');
+    let visibleCount = 0;
+
+    cards.forEach(card => {
+        const therapist = card.getAttribute('data-therapist');
+        const plan = card.getAttribute('data-plan');
+        const cardStartDate = card.getAttribute('data-start-date');
+        const cardEndDate = card.getAttribute('data-end-date');
+
+        let show = true;
+
+        if (therapistFilter && therapist !== therapistFilter) {
+            show = false;
+        }
+
+        if (planFilter && plan !== planFilter) {
+            show = false;
+        }
+
+        if (startDateFilter && cardStartDate < startDateFilter) {
+            show = false;
+        }
+
+        if (endDateFilter && cardEndDate > endDateFilter) {
+            show = false;
+        }
+
+        card.style.display = show ? '' : 'none';
+        if (show) visibleCount++;
+    });
+
+    // Show empty state if no results
+    updateEmptyState(visibleCount, cards.length);
+}
+
+// Quick filter
+function quickFilter(type) {
+    // Remove active class from all quick filter buttons
+    document.querySelectorAll('.quick-filter-btn').forEach(btn => {
+        btn.classList.remove('active');
+    });
+
+    // Add active class to clicked button
+    event.target.classList.add('active');
+
+    const now = new Date();
+    const today = new Date();
+    today.setHours(0, 0, 0, 0);
+    const tomorrow = new Date(today);
+    tomorrow.setDate(tomorrow.getDate() + 1);
+
+    const cards = document.querySelectorAll('.invitation-card[data-start-datetime]');
+    let visibleCount = 0;
+
+    cards.forEach(card => {
+        const startTime = new Date(card.getAttribute('data-start-datetime'));
+        const endTime = new Date(card.getAttribute('data-end-datetime'));
+
+        let show = true;
+
+        switch (type) {
+            case 'today':
+                // Show services available today
+                show = startTime >= today && startTime < tomorrow;
+                break;
+            case 'upcoming':
+                // Show future services
+                show = startTime >= tomorrow;
+                break;
+            case 'past':
+                // Show past services
+                show = endTime < now;
+                break;
+            case 'all':
+            default:
+                show = true;
+                break;
+        }
+
+        card.style.display = show ? '' : 'none';
+        if (show) visibleCount++;
+    });
+
+    updateEmptyState(visibleCount, cards.length);
+}
+
+// Clear filters
+function clearFilters() {
+    document.getElementById('therapistFilter').value = '';
+    document.getElementById('planFilter').value = '';
+    document.getElementById('startDateFilter').value = '';
+    document.getElementById('endDateFilter').value = '';
+
+    // Reset quick filter to 'all'
+    document.querySelectorAll('.quick-filter-btn').forEach(btn => {
+        btn.classList.remove('active');
+    });
+    document.querySelector('.quick-filter-btn').classList.add('active');
+
+    // Show all cards
+    document.querySelectorAll('.invitation-card').forEach(card => {
+        card.style.display = '';
+    });
+
+    updateEmptyState(document.querySelectorAll('.invitation-card[data-id]').length, 0);
+}
+
+// Update empty state
+function updateEmptyState(visibleCount, totalCount) {
+    const existingEmptyState = document.querySelector('.empty-state');
+    const grid = document.getElementById('invitationsGrid');
+
+    if (existingEmptyState) {
+        existingEmptyState.remove();
+    }
+
+    if (visibleCount === 0 && totalCount > 0) {
+        const emptyState = document.createElement('div');
+        emptyState.className = 'empty-state';
+        emptyState.innerHTML = `
+            <div class="empty-icon">🔍</div>
+            <div class="empty-title">找不到符合條件的邀請</div>
+            <div class="empty-text">
+                請調整篩選條件或清除篩選器<br>
+                來查看更多邀請
+            </div>
+            <button class="btn btn-secondary" onclick="clearFilters()">
+                <svg width="16" height="16" fill="currentColor" viewBox="0 0 16 16">
+                    <path d="M2.146 2.854a.5.5 0 1 1 .708-.708L8 7.293l5.146-5.147a.5.5 0 0 1 .708.708L8.707 8l5.147 5.146a.5.5 0 0 1-.708.708L8 8.707l-5.146 5.147a.5.5 0 0 1-.708-.708L7.293 8 2.146 2.854Z"/>
+                </svg>
+                清除篩選
+            </button>
+        `;
+        grid.appendChild(emptyState);
+    }
+}
+
+// Loading states
+function showLoading(button) {
+    button.disabled = true;
+    const originalHTML = button.innerHTML;
+    button.setAttribute('data-original-html', originalHTML);
+    button.innerHTML = `
+        <div class="spinner"></div>
+        處理中...
+    `;
+}
+
+function hideLoading(button) {
+    button.disabled = false;
+    const originalHTML = button.getAttribute('data-original-html');
+    if (originalHTML) {
+        button.innerHTML = originalHTML;
+    }
+}
+
+// Toast notifications
+function showToast(message, type = 'success') {
+    // Remove existing toast
+    const existingToast = document.querySelector('.success-toast');
+    if (existingToast) {
+        existingToast.remove();
+    }
+
+    const toast = document.createElement('div');
+    toast.className = 'success-toast';
+
+    const icon = type === 'success' 
+        ? `<svg width="20" height="20" fill="currentColor" viewBox="0 0 16 16">
+             <path d="M16 8A8 8 0 1 1 0 8a8 8 0 0 1 16 0zm-3.97-3.03a.75.75 0 0 0-1.08.022L7.477 9.417 5.384 7.323a.75.75 0 0 0-1.06 1.061L6.97 11.03a.75.75 0 0 0 1.079-.02l3.992-4.99a.75.75 0 0 0-.01-1.05z"/>
+           </svg>`
+        : `<svg width="20" height="20" fill="currentColor" viewBox="0 0 16 16">
+             <path d="M16 8A8 8 0 1 1 0 8a8 8 0 0 1 16 0zM5.354 4.646a.5.5 0 1 0-.708.708L7.293 8l-2.647 2.646a.5.5 0 0 0 .708.708L8 8.707l2.646 2.647a.5.5 0 0 0 .708-.708L8.707 8l2.647-2.646a.5.5 0 0 0-.708-.708L8 7.293 5.354 4.646z"/>
+           </svg>`;
+
+    if (type === 'error') {
+        toast.style.background = 'linear-gradient(135deg, #dc3545, #c82333)';
+    }
+
+    toast.innerHTML = `${icon} ${message}`;
+
+    document.body.appendChild(toast);
+
+    // Trigger animation
+    setTimeout(() => {
+        toast.classList.add('show');
+    }, 100);
+
+    // Remove after 3 seconds
+    setTimeout(() => {
+        toast.classList.remove('show');
+        setTimeout(() => {
+            if (toast.parentNode) {
+                toast.parentNode.removeChild(toast);
+            }
+        }, 300);
+    }, 3000);
+}
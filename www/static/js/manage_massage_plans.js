@@ -0,0 +1,389 @@
+// CSRF Token helper function
+const csrftoken = getCookie('csrftoken');
+
+// Modal management
+let isEditMode = false;
+let currentPlanId = null;
+
+function openModal(mode) {
+    const modal = document.getElementById('planModal');
+    const modalTitle = document.getElementById('modalTitle');
+    const form = document.getElementById('planForm');
+
+    if (mode === 'add') {
+        modalTitle.textContent = '新增按摩方案';
+        form.reset();
+        isEditMode = false;
+        currentPlanId = null;
+        document.getElementById('planId').value = '';
+    }
+
+    modal.style.display = 'block';
+    setTimeout(() => {
+        modal.classList.add('show');
+    }, 10);
+
+    // Focus on first input
+    document.getElementById('name').focus();
+}
+
+function closeModal() {
+    const modal = document.getElementById('planModal');
+    modal.classList.remove('show');
+    setTimeout(() => {
+        modal.style.display = 'none';
+    }, 300);
+}
+
+function editPlan(id, name, price, duration, notes) {
+    const modal = document.getElementById('planModal');
+    const modalTitle = document.getElementById('modalTitle');
+
+    modalTitle.textContent = '編輯按摩方案';
+
+    // Fill form with existing data
+    document.getElementById('planId').value = id;
+    document.getElementById('name').value = name || '';
+    document.getElementById('price').value = price || '';
+    document.getElementById('duration').value = duration || '';
+    document.getElementById('notes').value = notes || '';
+
+    isEditMode = true;
+    currentPlanId = id;
+
+    modal.style.display = 'block';
+    setTimeout(() => {
+        modal.classList.add('show');
+    }, 10);
+
+    // Focus on name input
+    document.getElementById('name').focus();
+}
+
+function showLoading(button) {
+    button.disabled = true;
+    const originalText = button.innerHTML;
+    button.setAttribute('data-original-text', originalText);
+    button.innerHTML = '<svg class="animate-spin" width="16" height="16" viewBox="0 0 24 24"><circle class="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" stroke-width="4" fill="none"></circle><path class="opacity-75" fill="currentColor" d="m4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"></path></svg> 處理中...';
+}
+
+function hideLoading(button) {
+    button.disabled = false;
+    const originalText = button.getAttribute('data-original-text');
+    button.innerHTML = originalText || '儲存';
+}
+
+function savePlan() {
+    const form = document.getElementById('planForm');
+    const saveButton = document.querySelector('.modal-footer .btn-primary');
+
+    // Validate form
+    const nameInput = document.getElementById('name');
+    const priceInput = document.getElementById('price');
+    const durationInput = document.getElementById('duration');
+
+    if (!nameInput.value.trim()) {
+        alert('請輸入方案名稱');
+        nameInput.focus();
+        return;
+    }
+
+    if (!priceInput.value || priceInput.value <= 0) {
+        alert('請輸入有效的價格');
+        priceInput.focus();
+        return;
+    }
+
+    if (!durationInput.value || durationInput.value <= 0) {
+        alert('請輸入有效的時間長度');
+        durationInput.focus();
+        return;
+    }
+
+    showLoading(saveButton);
+
+    const formData = new FormData(form);
+
+    const data = {
+        name: formData.get('name').trim(),
+        price: parseFloat(formData.get('price')),
+        duration: parseInt(formData.get('duration')),
+        notes: formData.get('notes').trim()
+    };
+
+    const url = isEditMode 
+        ? `/api/massage-plans/${currentPlanId}/`
+        : '/api/massage-plans/';
+
+    const method = isEditMode ? 'PUT' : 'POST';
+
+    fetch(url, {
+        method: method,
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrftoken
+        },
+        body: JSON.stringify(data)
+    })
+    .then(response => {
+        if (response.ok) {
+            return response.json();
+        }
+        return response.text().then(text => {
+            throw new Error(`HTTP ${response.status}: ${text}`);
+        });
+    })
+    .then(data => {
+        hideLoading(saveButton);
+        closeModal();
+        showSuccessMessage(isEditMode ? '更新成功！' : '新增成功！');
+        setTimeout(() => {
+            window.location.reload();
+        }, 1000);
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        hideLoading(saveButton);
+        alert('儲存失敗：' + error.message);
+    });
+}
+
+function deletePlan(id, name) {
+    const confirmMessage = `確定要刪除方案 "${name}" 嗎？\n\n此操作無法復原！`;
+
+    if (confirm(confirmMessage)) {
+        fetch(`/api/massage-plans/${id}/`, {
+            method: 'DELETE',
+            headers: {
+                'X-CSRFToken': csrftoken,
+                'Content-Type': 'application/json'
+            }
+        })
+        .then(response => {
+            if (response.ok) {
+                return response.json();
+            }
+            return response.text().then(text => {
+                throw new Error(`HTTP ${response.status}: ${text}`);
+            });
+        })
+        .then(data => {
+            showSuccessMessage('刪除成功！');
+            setTimeout(() => {
+                window.location.reload();
+            }, 1000);
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('刪除失敗：' + error.message);
+        });
+    }
+}
+
+// Filter and Search Functions
+function filterPlans() {
+    const searchInput = document.getElementById('searchInput').value.toLowerCase();
+    const minPrice = parseFloat(document.getElementById('minPriceInput').value) || 0;
+    const maxPrice = parseFloat(document.getElementById('maxPriceInput').value) || Infinity;
+    const durationFilter = document.getElementById('durationFilter').value;
+
+    const rows = document.querySelectorAll('#plansTableBody tr[data-name]');
+    let visibleCount = 0;
+
+    rows.forEach(row => {
+        const name = row.getAttribute('data-name');
+        const price = parseFloat(row.getAttribute('data-price'));
+        const duration = parseInt(row.getAttribute('data-duration'));
+
+        let show = true;
+
+        // Name filter
+        if (searchInput && !name.includes(searchInput)) {
+            show = false;
+        }
+
+        // Price filter
+        if (price < minPrice || price > maxPrice) {
+            show = false;
+        }
+
+        // Duration filter
+        if (durationFilter) {
+            switch (durationFilter) {
+                case '30':
+                    if (duration > 30) show = false;
+                    break;
+                case '60':
+                    if (duration <= 30 || duration > 60) show = false;
+                    break;
+                case '90':
+                    if (duration <= 60 || duration > 90) show = false;
+                    break;
+                case '120':
+                    if (duration <= 90 || duration > 120) show = false;
+                    break;
+                case '120+':
+                    if (duration <= 120) show = false;
+                    break;
+            }
+        }
+
+        row.style.display = show ? '' : 'none';
+        if (show) visibleCount++;
+    });
+
+    // Show/hide no data message
+    const noDataRow = document.getElementById('noDataRow');
+    if (noDataRow) {
+        if (visibleCount === 0 && rows.length > 0) {
+            noDataRow.style.display = '';
+            noDataRow.children[0].innerHTML = `
+                <svg fill="currentColor" viewBox="0 0 16 16" style="width: 64px; height: 64px; margin-bottom: 15px; opacity: 0.5;">
+                    <path d="M11.742 10.344a6.5 6.5 0 1 0-1.397 1.398h-.001c.03.04.062.078.098.115l3.85 3.85a1 1 0 0 0 1.415-1.414l-3.85-3.85a1.007 1.007 0 0 0-.115-.1zM12 6.5a5.5 5.5 0 1 1-11 0 5.5 5.5 0 0 1 11 0z"/>
+                </svg>
+                <div>找不到符合條件的方案</div>
+            `;
+        } else {
+            noDataRow.style.display = 'none';
+        }
+    }
+}
+
+function clearFilters() {
+    document.getElementById('searchInput').value = '';
+    document.getElementById('minPriceInput').value = '';
+    document.getElementById('maxPriceInput').value = '';
+    document.getElementById('durationFilter').value = '';
+    filterPlans();
+}
+
+function showSuccessMessage(message) {
+    // Create success toast
+    const toast = document.createElement('div');
+    toast.style.cssText = `
+        position: fixed;
+        top: 20px;
+        right: 20px;
+        background: #28a745;
+        color: white;
+        padding: 12px 20px;
+        border-radius: 6px;
+        box-shadow: 0 4px 12px rgba(40, 167, 69, 0.3);
+        display: flex;
+        align-items: center;
+        gap: 8px;
+        font-weight: 500;
+        z-index: 1001;
+        animation: slideIn 0.3s ease;
+    `;
+
+    toast.innerHTML = `
+        <svg width="20" height="20" fill="currentColor" viewBox="0 0 16 16">
+            <path d="M16 8A8 8 0 1 1 0 8a8 8 0 0 1 16 0zm-3.97-3.03a.75.75 0 0 0-1.08.022L7.477 9.417 5.384 7.323a.75.75 0 0 0-1.06 1.061L6.97 11.03a.75.75 0 0 0 1.079-.02l3.992-4.99a.75.75 0 0 0-.01-1.05z"/>
+        </svg>
+        ${message}
+    `;
+
+    // Add animation styles if not already added
+    if (!document.querySelector('style[data-toast-animations]')) {
+        const style = document.createElement('style');
+        style.setAttribute('data-toast-animations', 'true');
+        style.textContent = `
+            @keyframes slideIn {
+                from { transform: translateX(100%); opacity: 0; }
+                to { transform: translateX(0); opacity: 1; }
+            }
+            @keyframes slideOut {
+                from { transform: translateX(0); opacity: 1; }
+                to { transform: translateX(100%); opacity: 0; }
+            }
+            .animate-spin {
+                animation: spin 1s linear infinite;
+            }
+            @keyframes spin {
+                from { transform: rotate(0deg); }
+                to { transform: rotate(360deg); }
+            }
+        `;
+        document.head.appendChild(style);
+    }
+
+    document.body.appendChild(toast);
+
+    // Remove toast after 3 seconds
+    setTimeout(() => {
+        toast.style.animation = 'slideOut 0.3s ease';
+        setTimeout(() => {
+            if (toast.parentNode) {
+                toast.parentNode.removeChild(toast);
+            }
+        }, 300);
+    }, 3000);
+}
+
+// Event listeners
+document.addEventListener('DOMContentLoaded', function() {
+    // Close modal when clicking outside
+    window.onclick = function(event) {
+        const modal = document.getElementById('planModal');
+        if (event.target == modal) {
+            closeModal();
+        }
+    }
+
+    // Close modal with Escape key
+    document.addEventListener('keydown', function(event) {
+        if (event.key === 'Escape') {
+            closeModal();
+        }
+    });
+
+    // Form submission with Enter key (except for textarea)
+    const form = document.getElementById('planForm');
+    if (form) {
+        form.addEventListener('keydown', function(event) {
+            if (event.key === 'Enter' && !event.shiftKey && event.target.tagName !== 'TEXTAREA') {
+                event.preventDefault();
+                savePlan();
+            }
+        });
+    }
+
+    // Input validation
+    const nameInput = document.getElementById('name');
+    if (nameInput) {
+        nameInput.addEventListener('input', function() {
+            if (this.value.trim()) {
+                this.style.borderColor = '#e0e0e0';
+            }
+        });
+    }
+
+    const priceInput = document.getElementById('price');
+    if (priceInput) {
+        priceInput.addEventListener('input', function() {
+            if (this.value > 0) {
+                this.style.borderColor = '#e0e0e0';
+            }
+        });
+    }
+
+    const durationInput = document.getElementById('duration');
+    if (durationInput) {
+        durationInput.addEventListener('input', function() {
+            if (this.value > 0) {
+                this.style.borderColor = '#e0e0e0';
+            }
+        });
+    }
+
+    // Real-time search as user types
+    const searchInput = document.getElementById('searchInput');
+    if (searchInput) {
+        let searchTimeout;
+        searchInput.addEventListener('input', function() {
+            clearTimeout(searchTimeout);
+            searchTimeout = setTimeout(filterPlans, 300);
+        });
+    }
+});
@@ -0,0 +1,586 @@
+// CSRF Token helper function
+const csrftoken = getCookie('csrftoken');
+
+// Modal management
+let isEditMode = false;
+let currentReservationId = null;
+
+// Initialize page
+document.addEventListener('DOMContentLoaded', function() {
+    updateStatusBadges();
+    updateStatsCounts();
+    setDefaultDate();
+
+    // Set minimum date to today
+    const today = new Date().toISOString().split('T')[0];
+    document.getElementById('appointmentDate').min = today;
+
+    // 有新預約或異動時即時更新列表
+    subscribeStoreEvents(
+        ['reservation.created', 'reservation.updated', 'reservation.deleted'],
+        reloadWhenIdle
+    );
+});
+
+function updateStatusBadges() {
+    const now = new Date();
+    const today = new Date(now.getFullYear(), now.getMonth(), now.getDate());
+    const tomorrow = new Date(today);
+    tomorrow.setDate(tomorrow.getDate() + 1);
+
+    document.querySelectorAll('#reservationsTableBody tr[data-datetime]').forEach(row => {
+        const appointmentTime = new Date(row.getAttribute('data-datetime'));
+        const appointmentDate = new Date(appointmentTime.getFullYear(), appointmentTime.getMonth(), appointmentTime.getDate());
+        const statusBadge = row.querySelector('.status-badge');
+
+        if (appointmentDate.getTime() === today.getTime()) {
+            statusBadge.textContent = '今日';
+            statusBadge.className = 'status-badge status-today';
+        } else if (appointmentTime > now) {
+            statusBadge.textContent = '未來';
+            statusBadge.className = 'status-badge status-upcoming';
+        } else {
+            statusBadge.textContent = '過去';
+            statusBadge.className = 'status-badge status-past';
+        }
+    });
+}
+
+function updateStatsCounts() {
+    const now = new Date();
+    const today = new Date(now.getFullYear(), now.getMonth(), now.getDate());
+    const tomorrow = new Date(today);
+    tomorrow.setDate(tomorrow.getDate() + 1);
+
+    let todayCount = 0;
+    let upcomingCount = 0;
+
+    document.querySelectorAll('#reservationsTableBody tr[data-datetime]').forEach(row => {
+        const appointmentTime = new Date(row.getAttribute('data-datetime'));
+        const appointmentDate = new Date(appointmentTime.getFullYear(), appointmentTime.getMonth(), appointmentTime.getDate());
+
+        if (appointmentDate.getTime() === today.getTime()) {
+            todayCount++;
+        } else if (appointmentTime > now) {
+            upcomingCount++;
+        }
+    });
+
+    document.getElementById('todayCount').textContent = todayCount;
+    document.getElementById('upcomingCount').textContent = upcomingCount;
+}
+
+function setDefaultDate() {
+    const today = new Date().toISOString().split('T')[0];
+    const startDateInput = document.getElementById('startDate');
+    const endDateInput = document.getElementById('endDate');
+
+    if (!startDateInput.value) {
+        startDateInput.value = today;
+    }
+}
+
+function openModal(mode) {
+    const modal = document.getElementById('reservationModal');
+    const modalTitle = document.getElementById('modalTitle');
+    const form = document.getElementById('reservationForm');
+
+    if (mode === 'add') {
+        modalTitle.textContent = '新增預約';
+        form.reset();
+        isEditMode = false;
+        currentReservationId = null;
+        document.getElementById('reservationId').value = '';
+
+        // Set default date and time
+        const now = new Date();
+        const tomorrow = new Date(now);
+        tomorrow.setDate(tomorrow.getDate() + 1);
+
+        document.getElementById('appointmentDate').value = tomorrow.toISOString().split('T')[0];
+        document.getElementById('appointmentTime').value = '10:00';
+    }
+
+    modal.style.display = 'block';
+    setTimeout(() => {
+        modal.classList.add('show');
+    }, 10);
+
+    document.getElementById('customerName').focus();
+}
+
+function closeModal() {
+    const modal = document.getElementById('reservationModal');
+    modal.classList.remove('show');
+    setTimeout(() => {
+        modal.style.display = 'none';
+    }, 300);
+}
+
+function closeViewModal() {
+    const modal = document.getElementById('viewReservationModal');
+    modal.classList.remove('show');
+    setTimeout(() => {
+        modal.style.display = 'none';
+    }, 300);
+}
+
+function editReservation(id) {
+    // Fetch reservation data from API
+    fetch(`/api/reservations/${id}/`, {
+        method: 'GET',
+        headers: {
+            'X-CSRFToken': csrftoken
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        const modal = document.getElementById('reservationModal');
+        const modalTitle = document.getElementById('modalTitle');
+
+        modalTitle.textContent = '編輯預約';
+
+        // Fill form with existing data
+        document.getElementById('reservationId').value = data.id;
+        document.getElementById('customerName').value = data.customer_name;
+        document.getElementById('customerPhone').value = data.customer_phone;
+
+        // Parse appointment time
+        const appointmentTime = new Date(data.appointment_time);
+        document.getElementById('appointmentDate').value = appointmentTime.toISOString().split('T')[0];
+        document.getElementById('appointmentTime').value = appointmentTime.toTimeString().substring(0, 5);
+
+        document.getElementById('massagePlan').value = data.massage_plan;
+        document.getElementById('therapist').value = data.therapist || '';
+
+        isEditMode = true;
+        currentReservationId = id;
+
+        modal.style.display = 'block';
+        setTimeout(() => {
+            modal.classList.add('show');
+        }, 10);
+
+        document.getElementById('customerName').focus();
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('載入預約資料失敗');
+    });
+}
+
+function viewReservation(id) {
+    // Fetch reservation data from API
+    fetch(`/api/reservations/${id}/`, {
+        method: 'GET',
+        headers: {
+            'X-CSRFToken': csrftoken
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        const modal = document.getElementById('viewReservationModal');
+
+        // Fill view modal with data
+        document.getElementById('viewCustomerName').textContent = data.customer_name;
+        document.getElementById('viewCustomerPhone').textContent = data.customer_phone;
+
+        const appointmentTime = new Date(data.appointment_time);
+        document.getElementById('viewAppointmentTime').textContent = 
+            appointmentTime.toLocaleDateString('zh-TW') + ' ' + 
+            appointmentTime.toLocaleTimeString('zh-TW', {hour: '2-digit', minute: '2-digit'});
+
+        document.getElementById('viewMassagePlan').textContent = 
+            `${data.massage_plan_name} - ${data.massage_plan_price} (${data.massage_plan_duration}分鐘)`;
+
+        document.getElementById('viewTherapist').textContent = 
+            data.therapist_name || '未指定師傅';
+
+        const createdAt = new Date(data.created_at);
+        document.getElementById('viewCreatedAt').textContent = 
+            createdAt.toLocaleDateString('zh-TW') + ' ' + 
+            createdAt.toLocaleTimeString('zh-TW', {hour: '2-digit', minute: '2-digit'});
+
+        modal.style.display = 'block';
+        setTimeout(() => {
+            modal.classList.add('show');
+        }, 10);
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('載入預約資料失敗');
+    });
+}
+
+function showLoading(button) {
+    button.disabled = true;
+    const originalText = button.innerHTML;
+    button.setAttribute('data-original-text', originalText);
+    button.innerHTML = '<svg class="animate-spin" width="16" height="16" viewBox="0 0 24 24"><circle class="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" stroke-width="4" fill="none"></circle><path class="opacity-75" fill="currentColor" d="m4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"></path></svg> 處理中...';
+}
+
+function hideLoading(button) {
+    button.disabled = false;
+    const originalText = button.getAttribute('data-original-text');
+    button.innerHTML = originalText || '儲存';
+}
+
+function saveReservation() {
+    const form = document.getElementById('reservationForm');
+    const saveButton = document.querySelector('#reservationModal .btn-primary');
+
+    // Validate form
+    const customerName = document.getElementById('customerName').value.trim();
+    const customerPhone = document.getElementById('customerPhone').value.trim();
+    const appointmentDate = document.getElementById('appointmentDate').value;
+    const appointmentTime = document.getElementById('appointmentTime').value;
+    const massagePlan = document.getElementById('massagePlan').value;
+
+    if (!customerName) {
+        alert('請輸入客戶姓名');
+        document.getElementById('customerName').focus();
+        return;
+    }
+
+    if (!customerPhone) {
+        alert('請輸入客戶電話');
+        document.getElementById('customerPhone').focus();
+        return;
+    }
+
+    if (!appointmentDate || !appointmentTime) {
+        alert('請選擇預約日期和時間');
+        return;
+    }
+
+    if (!massagePlan) {
+        alert('請選擇方案');
+        document.getElementById('massagePlan').focus();
+        return;
+    }
+
+    showLoading(saveButton);
+
+    // Combine date and time
+    const appointmentDateTime = new Date(`${appointmentDate}T${appointmentTime}`).toISOString();
+
+    const data = {
+        customer_name: customerName,
+        customer_phone: customerPhone,
+        appointment_time: appointmentDateTime,
+        massage_plan: parseInt(massagePlan),
+        therapist: document.getElementById('therapist').value || null
+    };
+
+    const url = isEditMode 
+        ? `/api/reservations/${currentReservationId}/`
+        : '/api/reservations/';
+
+    const method = isEditMode ? 'PUT' : 'POST';
+
+    fetch(url, {
+        method: method,
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrftoken
+        },
+        body: JSON.stringify(data)
+    })
+    .then(response => {
+        if (response.ok) {
+            return response.json();
+        }
+        return response.text().then(text => {
+            throw new Error(`HTTP ${response.status}: ${text}`);
+        });
+    })
+    .then(data => {
+        hideLoading(saveButton);
+        closeModal();
+        showSuccessMessage(isEditMode ? '預約更新成功！' : '預約建立成功！');
+        setTimeout(() => {
+            window.location.reload();
+        }, 1000);
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        hideLoading(saveButton);
+        alert('儲存失敗：' + error.message);
+    });
+}
+
+function cancelReservation(id, customerName) {
+    const confirmMessage = `確定要取消 "${customerName}" 的預約嗎？\n\n此操作無法復原！`;
+
+    if (confirm(confirmMessage)) {
+        fetch(`/api/reservations/${id}/`, {
+            method: 'DELETE',
+            headers: {
+                'X-CSRFToken': csrftoken,
+                'Content-Type': 'application/json'
+            }
+        })
+        .then(response => {
+            if (response.ok) {
+                return response.json();
+            }
+            return response.text().then(text => {
+                throw new Error(`HTTP ${response.status}: ${text}`);
+            });
+        })
+        .then(data => {
+            showSuccessMessage('預約取消成功！');
+            setTimeout(() => {
+                window.location.reload();
+            }, 1000);
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('取消失敗：' + error.message);
+        });
+    }
+}
+
+// Filter and Search Functions
+function filterReservations() {
+    const customerSearch = document.getElementById('customerSearch').value.toLowerCase();
+    const phoneSearch = document.getElementById('phoneSearch').value;
+    const therapistFilter = document.getElementById('therapistFilter').value;
+    const planFilter = document.getElementById('planFilter').value;
+    const startDate = document.getElementById('startDate').value;
+    const endDate = document.getElementById('endDate').value;
+
+    const rows = document.querySelectorAll('#reservationsTableBody tr[data-customer]');
+    let visibleCount = 0;
+
+    rows.forEach(row => {
+        const customer = row.getAttribute('data-customer');
+        const phone = row.getAttribute('data-phone');
+        const therapist = row.getAttribute('data-therapist');
+        const plan = row.getAttribute('data-plan');
+        const date = row.getAttribute('data-date');
+
+        let show = true;
+
+        // Customer name filter
+        if (customerSearch && !customer.includes(customerSearch)) {
+            show = false;
+        }
+
+        // Phone filter
+        if (phoneSearch && !phone.includes(phoneSearch)) {
+            show = false;
+        }
+
+        // Therapist filter
+        if (therapistFilter && therapist !== therapistFilter) {
+            show = false;
+        }
+
+        // Plan filter
+        if (planFilter && plan !== planFilter) {
+            show = false;
+        }
+
+        // Date range filter
+        if (startDate && date < startDate) {
+            show = false;
+        }
+
+        if (endDate && date > endDate) {
+            show = false;
+        }
+
+        row.style.display = show ? '' : 'none';
+        if (show) visibleCount++;
+    });
+
+    // Show/hide no data message
+    const noDataRow = document.getElementById('noDataRow');
+    if (noDataRow) {
+        if (visibleCount === 0 && rows.length > 0) {
+            noDataRow.style.display = '';
+            noDataRow.children[0].innerHTML = `
+                <svg fill="currentColor" viewBox="0 0 16 16" style="width: 64px; height: 64px; margin-bottom: 15px; opacity: 0.5;">
+                    <path d="M11.742 10.344a6.5 6.5 0 1 0-1.397 1.398h-.001c.03.04.062.078.098.115l3.85 3.85a1 1 0 0 0 1.415-1.414l-3.85-3.85a1.007 1.007 0 0 0-.115-.1zM12 6.5a5.5 5.5 0 1 1-11 0 5.5 5.5 0 0 1 11 0z"/>
+                </svg>
+                <div>找不到符合條件的預約</div>
+            `;
+        } else {
+            noDataRow.style.display = 'none';
+        }
+    }
+}
+
+function quickFilter(type) {
+    // Remove active class from all quick filter buttons
+    document.querySelectorAll('.quick-filter-btn').forEach(btn => {
+        btn.classList.remove('active');
+    });
+
+    // Add active class to clicked button
+    event.target.classList.add('active');
+
+    const now = new Date();
+    const today = new Date(now.getFullYear(), now.getMonth(), now.getDate());
+    const rows = document.querySelectorAll('#reservationsTableBody tr[data-datetime]');
+
+    rows.forEach(row => {
+        const appointmentTime = new Date(row.getAttribute('data-datetime'));
+        const appointmentDate = new Date(appointmentTime.getFullYear(), appointmentTime.getMonth(), appointmentTime.getDate());
+
+        let show = true;
+
+        switch (type) {
+            case 'today':
+                show = appointmentDate.getTime() === today.getTime();
+                break;
+            case 'upcoming':
+                show = appointmentTime > now;
+                break;
+            case 'past':
+                show = appointmentTime < now;
+                break;
+            case 'all':
+            default:
+                show = true;
+                break;
+        }
+
+        row.style.display = show ? '' : 'none';
+    });
+}
+
+function clearFilters() {
+    document.getElementById('customerSearch').value = '';
+    document.getElementById('phoneSearch').value = '';
+    document.getElementById('therapistFilter').value = '';
+    document.getElementById('planFilter').value = '';
+    document.getElementById('startDate').value = '';
+    document.getElementById('endDate').value = '';
+
+    // Reset quick filter to 'all'
+    document.querySelectorAll('.quick-filter-btn').forEach(btn => {
+        btn.classList.remove('active');
+    });
+    document.querySelector('.quick-filter-btn').classList.add('active');
+
+    filterReservations();
+}
+
+function showSuccessMessage(message) {
+    const toast = document.createElement('div');
+    toast.style.cssText = `
+        position: fixed;
+        top: 20px;
+        right: 20px;
+        background: #28a745;
+        color: white;
+        padding: 12px 20px;
+        border-radius: 6px;
+        box-shadow: 0 4px 12px rgba(40, 167, 69, 0.3);
+        display: flex;
+        align-items: center;
+        gap: 8px;
+        font-weight: 500;
+        z-index: 1001;
+        animation: slideIn 0.3s ease;
+    `;
+
+    toast.innerHTML = `
+        <svg width="20" height="20" fill="currentColor" viewBox="0 0 16 16">
+            <path d="M16 8A8 8 0 1 1 0 8a8 8 0 0 1 16 0zm-3.97-3.03a.75.75 0 0 0-1.08.022L7.477 9.417 5.384 7.323a.75.75 0 0 0-1.06 1.061L6.97 11.03a.75.75 0 0 0 1.079-.02l3.992-4.99a.75.75 0 0 0-.01-1.05z"/>
+        </svg>
+        ${message}
+    `;
+
+    // Add animation styles if not already added
+    if (!document.querySelector('style[data-toast-animations]')) {
+        const style = document.createElement('style');
+        style.setAttribute('data-toast-animations', 'true');
+        style.textContent = `
+            @keyframes slideIn {
+                from { transform: translateX(100%); opacity: 0; }
+                to { transform: translateX(0); opacity: 1; }
+            }
+            @keyframes slideOut {
+                from { transform: translateX(0); opacity: 1; }
+                to { transform: translateX(100%); opacity: 0; }
+            }
+            .animate-spin {
+                animation: spin 1s linear infinite;
+            }
+            @keyframes spin {
+                from { transform: rotate(0deg); }
+                to { transform: rotate(360deg); }
+            }
+        `;
+        document.head.appendChild(style);
+    }
+
+    document.body.appendChild(toast);
+
+    setTimeout(() => {
+        toast.style.animation = 'slideOut 0.3s ease';
+        setTimeout(() => {
+            if (toast.parentNode) {
+                toast.parentNode.removeChild(toast);
+            }
+        }, 300);
+    }, 3000);
+}
+
+// Event listeners
+document.addEventListener('DOMContentLoaded', function() {
+    // Close modals when clicking outside
+    window.onclick = function(event) {
+        const reservationModal = document.getElementById('reservationModal');
+        const viewModal = document.getElementById('viewReservationModal');
+
+        if (event.target == reservationModal) {
+            closeModal();
+        }
+        if (event.target == viewModal) {
+            closeViewModal();
+        }
+    }
+
+    // Close modals with Escape key
+    document.addEventListener('keydown', function(event) {
+        if (event.key === 'Escape') {
+            closeModal();
+            closeViewModal();
+        }
+    });
+
+    // Form submission with Enter key
+    const form = document.getElementById('reservationForm');
+    if (form) {
+        form.addEventListener('keydown', function(event) {
+            if (event.key === 'Enter' && !event.shiftKey) {
+                event.preventDefault();
+                saveReservation();
+            }
+        });
+    }
+
+    // Real-time search
+    const customerSearchInput = document.getElementById('customerSearch');
+    const phoneSearchInput = document.getElementById('phoneSearch');
+
+    if (customerSearchInput) {
+        let searchTimeout;
+        customerSearchInput.addEventListener('input', function() {
+            clearTimeout(searchTimeout);
+            searchTimeout = setTimeout(filterReservations, 300);
+        });
+    }
+
+    if (phoneSearchInput) {
+        let searchTimeout;
+        phoneSearchInput.addEventListener('input', function() {
+            clearTimeout(searchTimeout);
+            searchTimeout = setTimeout(filterReservations, 300);
+        });
+    }
+});
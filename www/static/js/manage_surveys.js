@@ -0,0 +1,303 @@
+const csrftoken = getCookie('csrftoken');
+
+// Calculate and display average rating
+function calculateStats() {
+    const rows = document.querySelectorAll('#surveysTableBody tr[data-rating]');
+    if (rows.length === 0) {
+        document.getElementById('avgRating').textContent = '-';
+        return;
+    }
+
+    let totalRating = 0;
+    rows.forEach(row => {
+        const rating = parseInt(row.getAttribute('data-rating'));
+        totalRating += rating;
+    });
+
+    const avgRating = (totalRating / rows.length).toFixed(1);
+    document.getElementById('avgRating').textContent = avgRating;
+}
+
+// Filter surveys
+function filterSurveys() {
+    const therapistFilter = document.getElementById('therapistFilter').value;
+    const ratingFilter = document.getElementById('ratingFilter').value;
+    const rows = document.querySelectorAll('#surveysTableBody tr[data-therapist]');
+
+    let visibleCount = 0;
+
+    rows.forEach(row => {
+        const therapistId = row.getAttribute('data-therapist');
+        const rating = row.getAttribute('data-rating');
+
+        let show = true;
+
+        if (therapistFilter && therapistId !== therapistFilter) {
+            show = false;
+        }
+
+        if (ratingFilter && rating !== ratingFilter) {
+            show = false;
+        }
+
+        row.style.display = show ? '' : 'none';
+        if (show) visibleCount++;
+    });
+
+    // Update total count
+    document.getElementById('totalSurveys').textContent = visibleCount;
+
+    // Show/hide no data message
+    const noDataRow = document.querySelector('#surveysTableBody tr:last-child');
+    if (visibleCount === 0 && noDataRow && noDataRow.children.length === 1) {
+        noDataRow.style.display = '';
+    } else if (noDataRow && noDataRow.children.length === 1) {
+        noDataRow.style.display = 'none';
+    }
+}
+
+// Clear filters
+function clearFilters() {
+    document.getElementById('therapistFilter').value = '';
+    document.getElementById('ratingFilter').value = '';
+    filterSurveys();
+    calculateStats();
+}
+
+// View survey details
+function viewSurveyDetails(id, therapistName, rating, comment, date) {
+    document.getElementById('modalTherapistName').textContent = therapistName;
+    document.getElementById('modalComment').textContent = comment || '無評論內容';
+    document.getElementById('modalDate').textContent = date;
+
+    // Create rating stars
+    const ratingContainer = document.getElementById('modalRating');
+    ratingContainer.innerHTML = '';
+
+    for (let i = 1; i <= 5; i++) {
+        const star = document.createElement('svg');
+        star.className = i <= rating ? 'star' : 'star empty';
+        star.setAttribute('viewBox', '0 0 16 16');
+        star.innerHTML = '<path d="M3.612 15.443c-.386.198-.824-.149-.746-.592l.83-4.73L.173 6.765c-.329-.314-.158-.888.283-.95l4.898-.696L7.538.792c.197-.39.73-.39.927 0l2.184 4.327 4.898.696c.441.062.612.636.282.95l-3.522 3.356.83 4.73c.078.443-.36.79-.746.592L8 13.187l-4.389 2.256z"/>';
+        ratingContainer.appendChild(star);
+    }
+
+    const ratingText = document.createElement('span');
+    ratingText.className = 'rating-text';
+    ratingText.textContent = `${rating}/5`;
+    ratingContainer.appendChild(ratingText);
+
+    const modal = document.getElementById('surveyModal');
+    modal.style.display = 'block';
+    setTimeout(() => {
+        modal.classList.add('show');
+    }, 10);
+}
+
+// Close modal
+function closeModal() {
+    const modal = document.getElementById('surveyModal');
+    modal.classList.remove('show');
+    setTimeout(() => {
+        modal.style.display = 'none';
+    }, 300);
+}
+
+// Add survey modal functions
+function openModal(mode) {
+    if (mode === 'add') {
+        const modal = document.getElementById('addSurveyModal');
+        const form = document.getElementById('surveyForm');
+        form.reset();
+
+        modal.style.display = 'block';
+        setTimeout(() => {
+            modal.classList.add('show');
+        }, 10);
+
+        document.getElementById('therapistSelect').focus();
+    }
+}
+
+function closeAddModal() {
+    const modal = document.getElementById('addSurveyModal');
+    modal.classList.remove('show');
+    setTimeout(() => {
+        modal.style.display = 'none';
+    }, 300);
+}
+
+function showLoading(button) {
+    button.disabled = true;
+    const originalText = button.innerHTML;
+    button.setAttribute('data-original-text', originalText);
+    button.innerHTML = '<svg class="animate-spin" width="16" height="16" viewBox="0 0 24 24"><circle class="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" stroke-width="4" fill="none"></circle><path class="opacity-75" fill="currentColor" d="m4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"></path></svg> 處理中...';
+}
+
+function hideLoading(button) {
+    button.disabled = false;
+    const originalText = button.getAttribute('data-original-text');
+    button.innerHTML = originalText || '儲存評論';
+}
+
+function saveSurvey() {
+    const form = document.getElementById('surveyForm');
+    const saveButton = document.querySelector('#addSurveyModal .btn-primary');
+
+    // Validate form
+    const therapistSelect = document.getElementById('therapistSelect');
+    const ratingSelect = document.getElementById('ratingSelect');
+
+    if (!therapistSelect.value) {
+        alert('請選擇師傅');
+        therapistSelect.focus();
+        return;
+    }
+
+    if (!ratingSelect.value) {
+        alert('請選擇評分');
+        ratingSelect.focus();
+        return;
+    }
+
+    showLoading(saveButton);
+
+    const formData = new FormData(form);
+    const data = {
+        therapist: parseInt(formData.get('therapist')),
+        rating: parseInt(formData.get('rating')),
+        comment: formData.get('comment').trim()
+    };
+
+    fetch('/api/service-surveys/', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrftoken
+        },
+        body: JSON.stringify(data)
+    })
+    .then(response => {
+        if (response.ok) {
+            return response.json();
+        }
+        return response.text().then(text => {
+            throw new Error(`HTTP ${response.status}: ${text}`);
+        });
+    })
+    .then(data => {
+        hideLoading(saveButton);
+        closeAddModal();
+        showSuccessMessage('評論新增成功！');
+        setTimeout(() => {
+            window.location.reload();
+        }, 1000);
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        hideLoading(saveButton);
+        alert('儲存失敗：' + error.message);
+    });
+}
+
+function showSuccessMessage(message) {
+    const toast = document.createElement('div');
+    toast.style.cssText = `
+        position: fixed;
+        top: 20px;
+        right: 20px;
+        background: #28a745;
+        color: white;
+        padding: 12px 20px;
+        border-radius: 6px;
+        box-shadow: 0 4px 12px rgba(40, 167, 69, 0.3);
+        display: flex;
+        align-items: center;
+        gap: 8px;
+        font-weight: 500;
+        z-index: 1001;
+        animation: slideIn 0.3s ease;
+    `;
+
+    toast.innerHTML = `
+        <svg width="20" height="20" fill="currentColor" viewBox="0 0 16 16">
+            <path d="M16 8A8 8 0 1 1 0 8a8 8 0 0 1 16 0zm-3.97-3.03a.75.75 0 0 0-1.08.022L7.477 9.417 5.384 7.323a.75.75 0 0 0-1.06 1.061L6.97 11.03a.75.75 0 0 0 1.079-.02l3.992-4.99a.75.75 0 0 0-.01-1.05z"/>
+        </svg>
+        ${message}
+    `;
+
+    // Add animation styles if not already added
+    if (!document.querySelector('style[data-toast-animations]')) {
+        const style = document.createElement('style');
+        style.setAttribute('data-toast-animations', 'true');
+        style.textContent = `
+            @keyframes slideIn {
+                from { transform: translateX(100%); opacity: 0; }
+                to { transform: translateX(0); opacity: 1; }
+            }
+            @keyframes slideOut {
+                from { transform: translateX(0); opacity: 1; }
+                to { transform: translateX(100%); opacity: 0; }
+            }
+            .animate-spin {
+                animation: spin 1s linear infinite;
+            }
+            @keyframes spin {
+                from { transform: rotate(0deg); }
+                to { transform: rotate(360deg); }
+            }
+        `;
+        document.head.appendChild(style);
+    }
+
+    document.body.appendChild(toast);
+
+    setTimeout(() => {
+        toast.style.animation = 'slideOut 0.3s ease';
+        setTimeout(() => {
+            if (toast.parentNode) {
+                toast.parentNode.removeChild(toast);
+            }
+        }, 300);
+    }, 3000);
+}
+
+// Event listeners
+document.addEventListener('DOMContentLoaded', function() {
+    calculateStats();
+
+    // 有新問卷時即時更新
+    subscribeStoreEvents(['survey.created'], reloadWhenIdle);
+
+    // Close modals when clicking outside
+    window.onclick = function(event) {
+        const surveyModal = document.getElementById('surveyModal');
+        const addSurveyModal = document.getElementById('addSurveyModal');
+
+        if (event.target == surveyModal) {
+            closeModal();
+        }
+        if (event.target == addSurveyModal) {
+            closeAddModal();
+        }
+    }
+
+    // Close modals with Escape key
+    document.addEventListener('keydown', function(event) {
+        if (event.key === 'Escape') {
+            closeModal();
+            closeAddModal();
+        }
+    });
+
+    // Form submission with Enter key
+    const form = document.getElementById('surveyForm');
+    if (form) {
+        form.addEventListener('keydown', function(event) {
+            if (event.key === 'Enter' && !event.shiftKey) {
+                event.preventDefault();
+                saveSurvey();
+            }
+        });
+    }
+});
@@ -0,0 +1,360 @@
+// CSRF Token helper function
+const csrftoken = getCookie('csrftoken');
+
+// Modal management
+let isEditMode = false;
+let currentTherapistId = null;
+
+function openModal(mode) {
+    const modal = document.getElementById('therapistModal');
+    const modalTitle = document.getElementById('modalTitle');
+    const form = document.getElementById('therapistForm');
+
+    if (mode === 'add') {
+        modalTitle.textContent = '新增按摩師';
+        form.reset();
+        isEditMode = false;
+        currentTherapistId = null;
+        document.getElementById('therapistId').value = '';
+    }
+
+    modal.style.display = 'block';
+    setTimeout(() => {
+        modal.classList.add('show');
+    }, 10);
+
+    // Focus on first input
+    document.getElementById('name').focus();
+}
+
+function closeModal() {
+    const modal = document.getElementById('therapistModal');
+    modal.classList.remove('show');
+    setTimeout(() => {
+        modal.style.display = 'none';
+    }, 300);
+}
+
+function editTherapist(id, name, phone, lineId, nickName) {
+    const modal = document.getElementById('therapistModal');
+    const modalTitle = document.getElementById('modalTitle');
+
+    modalTitle.textContent = '編輯按摩師';
+
+    // Fill form with existing data
+    document.getElementById('therapistId').value = id;
+    document.getElementById('name').value = name || '';
+    document.getElementById('phone').value = phone || '';
+    document.getElementById('line_id').value = lineId || '';
+    document.getElementById('nick_name').value = nickName || '';
+
+    isEditMode = true;
+    currentTherapistId = id;
+
+    modal.style.display = 'block';
+    setTimeout(() => {
+        modal.classList.add('show');
+    }, 10);
+
+    // Focus on name input
+    document.getElementById('name').focus();
+}
+
+// Review Link Modal Functions
+function showReviewLink(therapistId, therapistName) {
+    const modal = document.getElementById('reviewLinkModal');
+    const title = document.getElementById('reviewLinkTitle');
+    const linkInput = document.getElementById('reviewLink');
+    const canvas = document.getElementById('qrcode');
+
+    // Set title
+    title.textContent = `${therapistName} - 評論連結`;
+
+    // Generate review URL
+    const baseUrl = window.location.origin;
+    const reviewUrl = `${baseUrl}/review/${therapistId}/`;
+    linkInput.value = reviewUrl;
+
+    // Generate QR Code
+    try {
+        const qr = new QRious({
+            element: canvas,
+            value: reviewUrl,
+            size: 200,
+            foreground: '#333',
+            background: '#fff'
+        });
+    } catch (error) {
+        console.error('QR Code generation failed:', error);
+        // Fallback: show text instead of QR code
+        const ctx = canvas.getContext('2d');
+        ctx.fillStyle = '#f8f9fa';
+        ctx.fillRect(0, 0, 200, 200);
+        ctx.fillStyle = '#333';
+        ctx.font = '12px Arial';
+        ctx.textAlign = 'center';
+        ctx.fillText('QR Code', 100, 95);
+        ctx.fillText('載入失敗', 100, 115);
+    }
+
+    // Show modal
+    modal.style.display = 'block';
+    setTimeout(() => {
+        modal.classList.add('show');
+    }, 10);
+}
+
+function closeReviewLinkModal() {
+    const modal = document.getElementById('reviewLinkModal');
+    modal.classList.remove('show');
+    setTimeout(() => {
+        modal.style.display = 'none';
+    }, 300);
+}
+
+function copyLink() {
+    const linkInput = document.getElementById('reviewLink');
+    const copyBtn = document.getElementById('copyBtn');
+
+    // Select and copy the link
+    linkInput.select();
+    linkInput.setSelectionRange(0, 99999); // For mobile devices
+
+    try {
+        document.execCommand('copy');
+
+        // Update button appearance
+        const originalContent = copyBtn.innerHTML;
+        copyBtn.classList.add('copied');
+        copyBtn.innerHTML = `
+            <svg width="12" height="12" fill="currentColor" viewBox="0 0 16 16">
+                <path d="M10.97 4.97a.235.235 0 0 0-.02.022L7.477 9.417 5.384 7.323a.75.75 0 0 0-1.06 1.061L6.97 11.03a.75.75 0 0 0 1.079-.02l3.992-4.99a.75.75 0 0 0-.01-1.05z"/>
+            </svg>
+            已複製
+        `;
+
+        // Reset button after 2 seconds
+        setTimeout(() => {
+            copyBtn.classList.remove('copied');
+            copyBtn.innerHTML = originalContent;
+        }, 2000);
+
+    } catch (err) {
+        console.error('Failed to copy: ', err);
+        alert('複製失敗，請手動複製連結');
+    }
+}
+
+function showLoading(button) {
+    button.disabled = true;
+    const originalText = button.innerHTML;
+    button.setAttribute('data-original-text', originalText);
+    button.innerHTML = '<svg class="animate-spin" width="16" height="16" viewBox="0 0 24 24"><circle class="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" stroke-width="4" fill="none"></circle><path class="opacity-75" fill="currentColor" d="m4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"></path></svg> 處理中...';
+}
+
+function hideLoading(button) {
+    button.disabled = false;
+    const originalText = button.getAttribute('data-original-text');
+    button.innerHTML = originalText || '儲存';
+}
+
+function saveTherapist() {
+    const form = document.getElementById('therapistForm');
+    const saveButton = document.querySelector('.modal-footer .btn-primary');
+
+    // Validate form
+    const nameInput = document.getElementById('name');
+    if (!nameInput.value.trim()) {
+        alert('請輸入姓名');
+        nameInput.focus();
+        return;
+    }
+
+    showLoading(saveButton);
+
+    const formData = new FormData(form);
+
+    const data = {
+        name: formData.get('name').trim(),
+        phone: formData.get('phone').trim(),
+        line_id: formData.get('line_id').trim(),
+        nick_name: formData.get('nick_name').trim()
+    };
+
+    const url = isEditMode 
+        ? `/api/therapists/${currentTherapistId}/`
+        : '/api/therapists/';
+
+    const method = isEditMode ? 'PUT' : 'POST';
+
+    fetch(url, {
+        method: method,
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrftoken
+        },
+        body: JSON.stringify(data)
+    })
+    .then(response => {
+        if (response.ok) {
+            return response.json();
+        }
+        return response.text().then(text => {
+            throw new Error(`HTTP ${response.status}: ${text}`);
+        });
+    })
+    .then(data => {
+        hideLoading(saveButton);
+        closeModal();
+        showSuccessMessage(isEditMode ? '更新成功！' : '新增成功！');
+        setTimeout(() => {
+            window.location.reload();
+        }, 1000);
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        hideLoading(saveButton);
+        alert('儲存失敗：' + error.message);
+    });
+}
+
+function deleteTherapist(id, name) {
+    const confirmMessage = `確定要刪除按摩師 "${name}" 嗎？\n\n此操作無法復原！`;
+
+    if (confirm(confirmMessage)) {
+        fetch(`/api/therapists/${id}/`, {
+            method: 'DELETE',
+            headers: {
+                'X-CSRFToken': csrftoken,
+                'Content-Type': 'application/json'
+            }
+        })
+        .then(response => {
+            if (response.ok) {
+                return response.json();
+            }
+            return response.text().then(text => {
+                throw new Error(`HTTP ${response.status}: ${text}`);
+            });
+        })
+        .then(data => {
+            showSuccessMessage('刪除成功！');
+            setTimeout(() => {
+                window.location.reload();
+            }, 1000);
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('刪除失敗：' + error.message);
+        });
+    }
+}
+
+function showSuccessMessage(message) {
+    // Create success toast
+    const toast = document.createElement('div');
+    toast.style.cssText = `
+        position: fixed;
+        top: 20px;
+        right: 20px;
+        background: #28a745;
+        color: white;
+        padding: 12px 20px;
+        border-radius: 6px;
+        box-shadow: 0 4px 12px rgba(40, 167, 69, 0.3);
+        display: flex;
+        align-items: center;
+        gap: 8px;
+        font-weight: 500;
+        z-index: 1001;
+        animation: slideIn 0.3s ease;
+    `;
+
+    toast.innerHTML = `
+        <svg width="20" height="20" fill="currentColor" viewBox="0 0 16 16">
+            <path d="M16 8A8 8 0 1 1 0 8a8 8 0 0 1 16 0zm-3.97-3.03a.75.75 0 0 0-1.08.022L7.477 9.417 5.384 7.323a.75.75 0 0 0-1.06 1.061L6.97 11.03a.75.75 0 0 0 1.079-.02l3.992-4.99a.75.75 0 0 0-.01-1.05z"/>
+        </svg>
+        ${message}
+    `;
+
+    // Add animation styles if not already added
+    if (!document.querySelector('style[data-toast-animations]')) {
+        const style = document.createElement('style');
+        style.setAttribute('data-toast-animations', 'true');
+        style.textContent = `
+            @keyframes slideIn {
+                from { transform: translateX(100%); opacity: 0; }
+                to { transform: translateX(0); opacity: 1; }
+            }
+            @keyframes slideOut {
+                from { transform: translateX(0); opacity: 1; }
+                to { transform: translateX(100%); opacity: 0; }
+            }
+            .animate-spin {
+                animation: spin 1s linear infinite;
+            }
+            @keyframes spin {
+                from { transform: rotate(0deg); }
+                to { transform: rotate(360deg); }
+            }
+        `;
+        document.head.appendChild(style);
+    }
+
+    document.body.appendChild(toast);
+
+    // Remove toast after 3 seconds
+    setTimeout(() => {
+        toast.style.animation = 'slideOut 0.3s ease';
+        setTimeout(() => {
+            if (toast.parentNode) {
+                toast.parentNode.removeChild(toast);
+            }
+        }, 300);
+    }, 3000);
+}
+
+// Event listeners
+document.addEventListener('DOMContentLoaded', function() {
+    // Close modals when clicking outside
+    window.onclick = function(event) {
+        const therapistModal = document.getElementById('therapistModal');
+        const reviewLinkModal = document.getElementById('reviewLinkModal');
+
+        if (event.target == therapistModal) {
+            closeModal();
+        }
+        if (event.target == reviewLinkModal) {
+            closeReviewLinkModal();
+        }
+    }
+
+    // Close modals with Escape key
+    document.addEventListener('keydown', function(event) {
+        if (event.key === 'Escape') {
+            closeModal();
+            closeReviewLinkModal();
+        }
+    });
+
+    // Form submission with Enter key
+    const form = document.getElementById('therapistForm');
+    if (form) {
+        form.addEventListener('keydown', function(event) {
+            if (event.key === 'Enter' && !event.shiftKey) {
+                event.preventDefault();
+                saveTherapist();
+            }
+        });
+    }
+
+    // Input validation
+    const nameInput = document.getElementById('name');
+    if (nameInput) {
+        nameInput.addEventListener('input', function() {
+            if (this.value.trim()) {
+                this.style.borderColor = '#e0e0e0';
+            }
+        });
+    }
+});
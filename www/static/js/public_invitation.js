@@ -0,0 +1,380 @@
+// ====== 邀請資料：以可接單時段為唯一依據 ======
+const invitationConfig = JSON.parse(document.getElementById('invitation-config').textContent);
+const invitationData = {
+    slug: invitationConfig.slug,
+    // 師傅可接單時段
+    availabilityStart: new Date(invitationConfig.available_start),
+    availabilityEnd:   new Date(invitationConfig.available_end),
+    // 療程時長（分鐘）
+    duration: invitationConfig.duration,
+    isBooked: false,
+    sseEnabled: invitationConfig.sse_enabled
+};
+
+let selectedTime = null;
+let countdownInterval = null;
+
+document.addEventListener('DOMContentLoaded', function() {
+    // 初始化
+    recordClick();
+    checkInvitationStatus();
+    startCountdown();
+    generateTimeSlots();
+    setupFormValidation();
+
+    // 優先使用伺服器推播，否則每 30 秒檢查一次最新狀態
+    if (invitationData.sseEnabled && window.EventSource) {
+        subscribeInvitationEvents();
+    } else {
+        setInterval(checkInvitationStatus, 30000);
+    }
+
+    // 啟動即時查看人數模擬（非必要）
+    simulateLiveViewers();
+});
+
+// ====== 點擊次數：頁面由快取提供，載入後另外回報 ======
+function recordClick() {
+    const url = `/api/public-invitations/${invitationData.slug}/click/`;
+    if (navigator.sendBeacon && navigator.sendBeacon(url)) return;
+    fetch(url, { method: 'POST', keepalive: true }).catch(() => {});
+}
+
+// ====== 狀態檢查 ======
+async function checkInvitationStatus() {
+    try {
+        const response = await fetch(`/api/public-invitations/${invitationData.slug}/status/`);
+        const data = await response.json();
+        applyInvitationStatus(data);
+    } catch (error) {
+        console.error('檢查狀態失敗:', error);
+    }
+}
+
+function subscribeInvitationEvents() {
+    const source = new EventSource(`/api/public-invitations/${invitationData.slug}/events/`);
+    source.addEventListener('status', e => applyInvitationStatus(JSON.parse(e.data)));
+    source.addEventListener('booked', e => {
+        applyInvitationStatus(JSON.parse(e.data));
+        source.close();
+    });
+    source.addEventListener('expired', e => {
+        applyInvitationStatus(JSON.parse(e.data));
+        source.close();
+    });
+    // 串流無法使用（例如沒有 events 服務）時瀏覽器不再重連，改為定期查詢
+    source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) {
+            setInterval(checkInvitationStatus, 30000);
+        }
+    };
+}
+
+function applyInvitationStatus(data) {
+    // 更新點擊數
+    document.getElementById('clickCount').textContent = data.click_count || invitationConfig.click_count;
+
+    // 已被預約
+    if (data.is_booked) {
+        showBookedMessage();
+        return;
+    }
+
+    // 依「最後可預約時間」判斷是否過期
+    const now = new Date();
+    const lastBookableTime = new Date(invitationData.availabilityEnd.getTime() - invitationData.duration * 60000);
+    if (now > lastBookableTime) {
+        showExpiredMessage();
+    }
+}
+
+// ====== 倒數計時 ======
+function startCountdown() {
+    updateCountdown();
+    countdownInterval = setInterval(updateCountdown, 1000);
+}
+
+function updateCountdown() {
+    const now = new Date();
+    const countdown = document.getElementById('countdown');
+    const statusBar = document.getElementById('statusBar');
+    const statusText = document.getElementById('statusText');
+
+    const lastBookableTime = new Date(invitationData.availabilityEnd.getTime() - invitationData.duration * 60000);
+
+    if (now > lastBookableTime) {
+        countdown.textContent = '優惠已結束';
+        countdown.classList.add('expired');
+        statusBar.classList.add('expired');
+        statusText.textContent = '已結束';
+        disableBookingForm();
+        clearInterval(countdownInterval);
+        return;
+    }
+
+    if (now < invitationData.availabilityStart) {
+        // 尚未開放：倒數至開始可接單
+        const diff = invitationData.availabilityStart - now;
+        countdown.textContent = formatDiff(diff);
+        statusText.textContent = '即將開放預約';
+        return;
+    }
+
+    // 進行中：倒數至最後可預約時間
+    const diff = lastBookableTime - now;
+    countdown.textContent = formatDiff(diff);
+    if (diff <= 3600_000) countdown.style.color = '#ff3838';
+    statusText.textContent = '優惠進行中';
+}
+
+function formatDiff(ms) {
+    const hours = Math.floor(ms / 3600000);
+    const minutes = Math.floor((ms % 3600000) / 60000);
+    const seconds = Math.floor((ms % 60000) / 1000);
+    return `${String(hours).padStart(2,'0')}:${String(minutes).padStart(2,'0')}:${String(seconds).padStart(2,'0')}`;
+}
+
+// ====== 生成時間選項（完全以可接單時段 ∩ 當下為準） ======
+function generateTimeSlots() {
+    const timeSlotsContainer = document.getElementById('timeSlots');
+    timeSlotsContainer.innerHTML = '';
+
+    const now = new Date();
+    let slotStartTime = new Date(invitationData.availabilityStart);
+
+    // 若已過可接單起點，從「現在對齊下一個 00/30 分」開始
+    if (now > slotStartTime) {
+        slotStartTime = new Date(now);
+        const mins = slotStartTime.getMinutes();
+        if (mins !== 0 && mins !== 30) {
+            slotStartTime.setMinutes(mins < 30 ? 30 : 60);
+        }
+    }
+    slotStartTime.setSeconds(0, 0);
+
+    // 截止為「可接單結束 - 療程時間」
+    const lastBookableTime = new Date(invitationData.availabilityEnd.getTime() - invitationData.duration * 60000);
+
+    if (slotStartTime > lastBookableTime) {
+        timeSlotsContainer.innerHTML = '<div style="text-align: center; color: #6c757d; padding: 20px;">暫無可預約時段</div>';
+        return;
+    }
+
+    // 每 30 分鐘一格
+    for (let current = new Date(slotStartTime); current <= lastBookableTime; current.setMinutes(current.getMinutes() + 30)) {
+        const timeSlot = createTimeSlot(new Date(current));
+        if (timeSlot) timeSlotsContainer.appendChild(timeSlot);
+    }
+
+    if (timeSlotsContainer.children.length === 0) {
+        timeSlotsContainer.innerHTML = '<div style="text-align: center; color: #6c757d; padding: 20px;">暫無可預約時段</div>';
+    }
+}
+
+function createTimeSlot(time) {
+    const now = new Date();
+    if (time < now) return null; // 過去時段不建立
+
+    // 檢查服務是否能在可接單結束前完成
+    const serviceEndTime = new Date(time.getTime() + invitationData.duration * 60000);
+    if (serviceEndTime > invitationData.availabilityEnd) return null;
+
+    const slot = document.createElement('div');
+    slot.className = 'time-slot';
+    slot.dataset.time = time.toISOString();
+
+    const hours = String(time.getHours()).padStart(2, '0');
+    const minutes = String(time.getMinutes()).padStart(2, '0');
+    slot.textContent = `${hours}:${minutes}`;
+
+    slot.addEventListener('click', selectTimeSlot);
+    return slot;
+}
+
+function selectTimeSlot(e) {
+    document.querySelectorAll('.time-slot').forEach(slot => slot.classList.remove('selected'));
+    e.currentTarget.classList.add('selected');
+    selectedTime = e.currentTarget.dataset.time;
+}
+
+// ====== 表單驗證與提交 ======
+function setupFormValidation() {
+    const form = document.getElementById('reservationForm');
+    const phoneInput = document.getElementById('customerPhone');
+
+    phoneInput.addEventListener('input', function(e) {
+        let value = e.target.value.replace(/[^0-9]/g, '');
+        if (value.length > 10) value = value.slice(0, 10);
+        e.target.value = value;
+    });
+
+    form.addEventListener('submit', async function(e) {
+        e.preventDefault();
+        if (!validateForm()) return;
+        await submitBooking();
+    });
+}
+
+function validateForm() {
+    const name = document.getElementById('customerName').value.trim();
+    const phone = document.getElementById('customerPhone').value.trim();
+
+    if (!name) { showError('請輸入您的姓名'); return false; }
+    if (!phone || !/^09\d{8}$/.test(phone)) { showError('請輸入有效的手機號碼（09開頭的10位數字）'); return false; }
+    if (!selectedTime) { showError('請選擇預約時間'); return false; }
+    return true;
+}
+
+async function submitBooking() {
+    const submitBtn = document.getElementById('submitBtn');
+    const originalText = submitBtn.innerHTML;
+
+    submitBtn.disabled = true;
+    submitBtn.innerHTML = '<div class="spinner"></div> 預約中...';
+    hideMessages();
+
+    const bookingData = {
+        customer_name: document.getElementById('customerName').value.trim(),
+        customer_phone: document.getElementById('customerPhone').value.trim(),
+        appointment_time: selectedTime
+    };
+
+    try {
+        const response = await fetch(`/api/public-invitations/${invitationData.slug}/book/`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(bookingData)
+        });
+        const data = await response.json();
+
+        if (response.ok) {
+            showSuccess(data);
+        } else {
+            if (data.error && data.error.includes('已被預約')) {
+                showBookedMessage();
+            } else if (data.error && data.error.includes('已過期')) {
+                showExpiredMessage();
+            } else {
+                showError(data.error || '預約失敗，請稍後再試');
+            }
+        }
+    } catch (error) {
+        console.error('預約錯誤:', error);
+        showError('網路錯誤，請檢查網路連線後再試');
+    } finally {
+        submitBtn.disabled = false;
+        submitBtn.innerHTML = originalText;
+    }
+}
+
+// ====== UI 輔助 ======
+function showSuccess(data) {
+    const successMessage = document.getElementById('successMessage');
+    const bookingForm = document.getElementById('bookingForm');
+    successMessage.innerHTML = `
+        <svg width="48" height="48" fill="#28a745" viewBox="0 0 16 16" style="display:block;margin:0 auto 20px;">
+            <path d="M16 8A8 8 0 1 1 0 8a8 8 0 0 1 16 0zm-3.97-3.03a.75.75 0 0 0-1.08.022L7.477 9.417 5.384 7.323a.75.75 0 0 0-1.06 1.061L6.97 11.03a.75.75 0 0 0 1.079-.02l3.992-4.99a.75.75 0 0 0-.01-1.05z"/>
+        </svg>
+        <h3 style="color:#28a745;margin-bottom:15px;">🎉 預約成功！</h3>
+        <p style="margin-bottom:10px;"><strong>${data.customer_name}</strong> 您好：</p>
+        <p>您已成功預約 <strong>${data.massage_plan}</strong></p>
+        <p>預約時間：<strong>${formatDateTime(data.appointment_time)}</strong></p>
+        <p>服務師傅：<strong>${data.therapist}</strong></p>
+        <p style="margin-top:15px;color:#28a745;font-size:18px;font-weight:bold;">
+            優惠價：NT$ ${data.discount_price} （省下 NT$ ${data.savings}）
+        </p>
+        <p style="margin-top:15px;font-size:14px;color:#6c757d;">我們將儘快與您聯繫確認詳細資訊</p>
+    `;
+    successMessage.style.display = 'block';
+    bookingForm.style.display = 'none';
+
+    const statusBar = document.getElementById('statusBar');
+    const statusText = document.getElementById('statusText');
+    statusBar.classList.add('booked');
+    statusText.textContent = '已預約';
+    clearInterval(countdownInterval);
+}
+
+function showBookedMessage() {
+    const bookedMessage = document.getElementById('bookedMessage');
+    const bookingForm = document.getElementById('bookingForm');
+    const statusBar = document.getElementById('statusBar');
+    const statusText = document.getElementById('statusText');
+
+    bookedMessage.style.display = 'block';
+    bookingForm.style.display = 'none';
+    statusBar.classList.add('booked');
+    statusText.textContent = '已被預約';
+    clearInterval(countdownInterval);
+}
+
+function showExpiredMessage() {
+    const bookingForm = document.getElementById('bookingForm');
+    const statusBar = document.getElementById('statusBar');
+    const statusText = document.getElementById('statusText');
+    const countdown = document.getElementById('countdown');
+
+    bookingForm.innerHTML = `
+        <div style="text-align:center;padding:40px 20px;">
+            <svg width="48" height="48" fill="#6c757d" viewBox="0 0 16 16" style="margin-bottom:20px;">
+                <path d="M8 15A7 7 0 1 1 8 1a7 7 0 0 1 0 14zm0 1A8 8 0 1 0 8 0a8 8 0 0 0 0 16z"/>
+                <path d="M7.002 11a1 1 0 1 1 2 0 1 1 0 0 1-2 0zM7.1 4.995a.905.905 0 1 1 1.8 0l-.35 3.507a.552.552 0 0 1-1.1 0L7.1 4.995z"/>
+            </svg>
+            <h3 style="color:#6c757d;margin-bottom:10px;">優惠已結束</h3>
+            <p style="color:#6c757d;">此優惠活動已經結束，請關注我們的其他優惠。</p>
+        </div>
+    `;
+    statusBar.classList.add('expired');
+    statusText.textContent = '已結束';
+    countdown.textContent = '優惠已結束';
+    countdown.classList.add('expired');
+    disableBookingForm();
+    clearInterval(countdownInterval);
+}
+
+function showError(message) {
+    const errorMessage = document.getElementById('errorMessage');
+    errorMessage.textContent = message;
+    errorMessage.style.display = 'block';
+    errorMessage.scrollIntoView({ behavior: 'smooth', block: 'center' });
+    setTimeout(() => { errorMessage.style.display = 'none'; }, 5000);
+}
+
+function hideMessages() {
+    document.getElementById('successMessage').style.display = 'none';
+    document.getElementById('errorMessage').style.display = 'none';
+    document.getElementById('bookedMessage').style.display = 'none';
+}
+
+function disableBookingForm() {
+    const submitBtn = document.getElementById('submitBtn');
+    submitBtn.disabled = true;
+    submitBtn.textContent = '優惠已結束';
+    submitBtn.className = 'btn btn-secondary';
+    document.querySelectorAll('.form-control').forEach(input => { input.disabled = true; });
+    document.querySelectorAll('.time-slot').forEach(slot => {
+        slot.classList.add('disabled');
+        slot.removeEventListener('click', selectTimeSlot);
+    });
+}
+
+function formatDateTime(dateTimeStr) {
+    const date = new Date(dateTimeStr);
+    const y = date.getFullYear();
+    const m = String(date.getMonth()+1).padStart(2,'0');
+    const d = String(date.getDate()).padStart(2,'0');
+    const hh = String(date.getHours()).padStart(2,'0');
+    const mm = String(date.getMinutes()).padStart(2,'0');
+    return `${y}/${m}/${d} ${hh}:${mm}`;
+}
+
+// 即時查看人數（模擬）
+function simulateLiveViewers() {
+    const updateViewers = () => {
+        const current = parseInt(document.getElementById('clickCount').textContent);
+        const change = Math.random() > 0.5 ? 1 : -1;
+        const next = Math.max(current + change, 1);
+        if (Math.random() > 0.7) document.getElementById('clickCount').textContent = next;
+    };
+    setInterval(updateViewers, (10 + Math.random() * 20) * 1000);
+}
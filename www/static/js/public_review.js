@@ -0,0 +1,164 @@
+// CSRF Token helper
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+const csrftoken = getCookie('csrftoken');
+let selectedRating = 0;
+
+// Rating descriptions
+const ratingDescriptions = {
+    1: "非常不滿意 😞",
+    2: "不滿意 😕", 
+    3: "普通 😐",
+    4: "滿意 😊",
+    5: "非常滿意 😍"
+};
+
+// Star rating functionality
+document.addEventListener('DOMContentLoaded', function() {
+    const stars = document.querySelectorAll('.star');
+    const ratingText = document.getElementById('ratingText');
+    const ratingDescription = document.getElementById('ratingDescription');
+
+    stars.forEach(star => {
+        star.addEventListener('click', function() {
+            const rating = parseInt(this.getAttribute('data-rating'));
+            selectRating(rating);
+        });
+
+        star.addEventListener('mouseenter', function() {
+            const rating = parseInt(this.getAttribute('data-rating'));
+            highlightStars(rating);
+            updateRatingText(rating);
+        });
+    });
+
+    document.getElementById('starRating').addEventListener('mouseleave', function() {
+        highlightStars(selectedRating);
+        updateRatingText(selectedRating);
+    });
+
+    function selectRating(rating) {
+        selectedRating = rating;
+        highlightStars(rating);
+        updateRatingText(rating);
+    }
+
+    function highlightStars(rating) {
+        stars.forEach((star, index) => {
+            if (index < rating) {
+                star.classList.add('active');
+            } else {
+                star.classList.remove('active');
+            }
+        });
+    }
+
+    function updateRatingText(rating) {
+        if (rating === 0) {
+            ratingText.textContent = '請選擇評分';
+            ratingDescription.textContent = '';
+        } else {
+            ratingText.textContent = `${rating}/5 星`;
+            ratingDescription.textContent = ratingDescriptions[rating] || '';
+        }
+    }
+
+    // Form submission
+    document.getElementById('reviewForm').addEventListener('submit', function(e) {
+        e.preventDefault();
+        submitReview();
+    });
+});
+
+function submitReview() {
+    const submitBtn = document.getElementById('submitBtn');
+    const errorMessage = document.getElementById('errorMessage');
+    const successMessage = document.getElementById('successMessage');
+
+    // Hide previous messages
+    errorMessage.style.display = 'none';
+    successMessage.style.display = 'none';
+
+    // Validate rating
+    if (selectedRating === 0) {
+        alert('請選擇評分');
+        return;
+    }
+
+    // Show loading state
+    submitBtn.disabled = true;
+    submitBtn.innerHTML = '<div class="spinner"></div> 提交中...';
+
+    const data = {
+        therapist: parseInt(document.getElementById('therapistId').value),
+        rating: selectedRating,
+        comment: document.getElementById('comment').value.trim()
+    };
+
+    // 使用獨立的公開 API 端點
+    fetch('/api/public-reviews/', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify(data)
+    })
+    .then(response => {
+        if (response.ok) {
+            return response.json();
+        }
+        return response.json().then(data => {
+            throw new Error(data.error || `HTTP ${response.status}`);
+        });
+    })
+    .then(data => {
+        // Show success
+        showSuccess();
+    })
+    .catch(error => {
+        console.error('Error:', error);
+
+        // Reset button
+        submitBtn.disabled = false;
+        submitBtn.innerHTML = '提交評論';
+
+        // Show error message
+        let errorText = '評論提交失敗';
+        if (error.message) {
+            errorText += '：' + error.message;
+        }
+        errorMessage.textContent = errorText;
+        errorMessage.style.display = 'block';
+
+        // Scroll to error message
+        errorMessage.scrollIntoView({ behavior: 'smooth', block: 'center' });
+    });
+}
+
+function showSuccess() {
+    const reviewForm = document.querySelector('.review-form');
+    const successContainer = document.getElementById('successContainer');
+
+    // Hide form and show success message
+    reviewForm.style.display = 'none';
+    successContainer.classList.add('show');
+
+    // Optional: Redirect after delay
+    setTimeout(() => {
+        // You can redirect to another page here if needed
+        // window.location.href = '/';
+    }, 3000);
+}